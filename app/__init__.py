@@ -14,9 +14,10 @@ from datetime import timedelta
 import logging
 from logging.handlers import RotatingFileHandler
 import os
+from app.utils.sqlite_local import SesionKatita
 
 # Inicializar extensiones (sin vincular a la app aún)
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': SesionKatita})
 jwt = JWTManager()
 
 
@@ -44,6 +45,10 @@ def create_app(config_name=None):
     else:
         app.config.from_object(get_config())
 
+    # JSON de la API: orjson + Decimal/date/datetime nativos (to_dict sin conversiones)
+    from app.utils.json_provider import ProveedorJSON
+    app.json = ProveedorJSON(app)
+
     # Asegurar que existe el directorio instance para SQLite
     try:
         os.makedirs(app.instance_path, exist_ok=True)
@@ -51,7 +56,14 @@ def create_app(config_name=None):
         pass
 
     # Inicializar extensiones con la app
+    # PostgreSQL: pool con pre_ping/recycle y statement_timeout por tipo de carga
+    from app.utils.pool_postgres import preparar_engine_postgres, configurar_postgres
+    preparar_engine_postgres(app)
     db.init_app(app)
+    configurar_postgres(app, db)
+    # SQLite local: WAL, busy_timeout, mmap... y pool de solo lectura para reportes
+    from app.utils.sqlite_local import configurar_sqlite_local
+    configurar_sqlite_local(app, db)
     jwt.init_app(app)
 
     # Configurar callbacks de JWT
@@ -79,81 +91,65 @@ def create_app(config_name=None):
     # Registrar handlers de errores
     register_error_handlers(app)
 
+    # Bitácora de cambios del catálogo POS (listener after_flush)
+    from app.services.catalogo_service import registrar_eventos_catalogo
+    registrar_eventos_catalogo()
+
+    # Captura de cambios hacia SyncQueue (listener after_flush)
+    from app.services.sync_service import registrar_eventos_sync
+    registrar_eventos_sync()
+
+    # Contadores de stock por nodo (listener after_flush)
+    from app.services.replicacion_stock_service import registrar_eventos_contadores
+    registrar_eventos_contadores()
+
+    # Caché de identidades: se invalida al modificar un usuario
+    from app.utils.identidad import registrar_eventos_identidad
+    registrar_eventos_identidad()
+
+    # Comandos CLI de mantenimiento (flask stock ..., flask sync ...)
+    from app.cli import register_commands
+    register_commands(app)
+
     # Crear tablas de base de datos (solo en desarrollo, NO en testing)
     with app.app_context():
         if app.config['DEBUG'] and not app.config['TESTING']:
             db.create_all()
             app.logger.info(f"Database initialized: {app.config['SQLALCHEMY_DATABASE_URI']}")
 
-        # AUTO-MIGRACIÓN: Actualizar constraint de estado si es necesario
-        # Ejecutar en producción (cloud) y también en modo production
-        if app.config['DATABASE_MODE'] in ['production', 'cloud']:
+        # Esquema versionado: en la nube se migra con `flask db upgrade` en el release, no al arrancar.
+        # Aquí solo se compara la versión aplicada (una consulta) y se avisa si está atrasada.
+        esquema_al_dia = True
+        if app.config['DATABASE_MODE'] in ['production', 'cloud'] and app.config['DB_VERIFICAR_MIGRACIONES']:
             try:
-                from sqlalchemy import text
-                app.logger.info("Verificando constraint de estado...")
-
-                # Intentar actualizar constraint (idempotente - no falla si ya existe)
-                try:
-                    db.session.execute(text("""
-                        ALTER TABLE cuadros_caja
-                        DROP CONSTRAINT IF EXISTS check_estado_valido
-                    """))
-                    db.session.commit()
-                    app.logger.info("Constraint antiguo eliminado")
-                except Exception as e:
-                    app.logger.warning(f"No se pudo eliminar constraint: {e}")
-                    db.session.rollback()
-
-                try:
-                    db.session.execute(text("""
-                        ALTER TABLE cuadros_caja
-                        ADD CONSTRAINT check_estado_valido
-                        CHECK (estado IN ('abierto', 'cerrado', 'pendiente_cierre'))
-                    """))
-                    db.session.commit()
-                    app.logger.info("✓ Constraint actualizado: estados = ['abierto', 'cerrado', 'pendiente_cierre']")
-                except Exception as e:
-                    if 'already exists' in str(e).lower() or 'duplicate' in str(e).lower():
-                        app.logger.info("✓ Constraint ya existe con configuración correcta")
-                    else:
-                        app.logger.warning(f"Advertencia al crear constraint: {e}")
-                    db.session.rollback()
-
-                # MIGRACIÓN 2: Agregar columna cuadro_caja_id a ventas (FASE 4)
-                try:
-                    # Verificar si la columna ya existe (PostgreSQL)
-                    result = db.session.execute(text("""
-                        SELECT column_name
-                        FROM information_schema.columns
-                        WHERE table_name='ventas' AND column_name='cuadro_caja_id'
-                    """))
-                    exists = result.fetchone() is not None
-
-                    if not exists:
-                        app.logger.info("Agregando columna cuadro_caja_id a ventas...")
-                        db.session.execute(text("""
-                            ALTER TABLE ventas
-                            ADD COLUMN cuadro_caja_id INTEGER
-                            REFERENCES cuadros_caja(id)
-                        """))
-
-                        # Crear índice
-                        db.session.execute(text("""
-                            CREATE INDEX IF NOT EXISTS idx_ventas_cuadro_caja_id
-                            ON ventas(cuadro_caja_id)
-                        """))
-
-                        db.session.commit()
-                        app.logger.info("✓ Columna cuadro_caja_id agregada a ventas")
-                    else:
-                        app.logger.info("✓ Columna cuadro_caja_id ya existe en ventas")
-                except Exception as e:
-                    app.logger.warning(f"Error al agregar columna cuadro_caja_id: {e}")
-                    db.session.rollback()
+                from app.utils.migraciones import verificar_version
+                verificar_version(app, db)
+            except Exception as e:
+                app.logger.warning(f"No se pudo verificar la versión del esquema: {e}")
 
+        # La base local de la tienda no tiene paso de release: se migra aquí (un solo proceso)
+        if app.config['DATABASE_MODE'] == 'local' and app.config['DB_MIGRAR_LOCAL_AL_ARRANCAR']:
+            try:
+                from app.utils.migraciones import actualizar_esquema_local
+                esquema_al_dia = actualizar_esquema_local(app, db)['al_dia']
             except Exception as e:
-                app.logger.error(f"Error en auto-migración: {e}")
-                db.session.rollback()
+                esquema_al_dia = False
+                app.logger.error(f"No se pudo migrar la base local: {e}")
+
+    # Worker de sincronización dentro de la app (alternativa a `flask sync run`)
+    # Con el esquema atrasado fallaría en cada lote (columnas de lease de sync_queue)
+    if app.config['SYNC_ENABLED'] and app.config['SYNC_WORKER_MODE'] == 'thread' and not app.config['TESTING']:
+        if esquema_al_dia:
+            from app.services.sync_service import iniciar_worker
+            iniciar_worker(app)
+        else:
+            app.logger.error("[SYNC] Worker no iniciado: el esquema de la base local está atrasado")
+
+    # Checkpoint periódico del WAL de SQLite (modo local)
+    if app.config['SQLITE_CHECKPOINT_SEGUNDOS'] > 0 and not app.config['TESTING']:
+        from app.utils.sqlite_local import es_sqlite_archivo, iniciar_checkpoint_periodico
+        if es_sqlite_archivo(app.config['SQLALCHEMY_DATABASE_URI']):
+            iniciar_checkpoint_periodico(app, db)
 
     # Ruta de health check
     @app.route('/health')
@@ -165,7 +161,8 @@ def create_app(config_name=None):
             'database_mode': app.config['DATABASE_MODE'],
             'version': '1.0.7',
             'optimized_dashboard': True,
-            'auto_migration': 'enabled'
+            'auto_migration': 'disabled',  # flask db upgrade en el release
+            'migrations': 'alembic'
         }), 200
 
     app.logger.info(f"KATITA-POS started in {app.config['DATABASE_MODE']} mode")
@@ -207,6 +204,12 @@ def configure_jwt_callbacks(app):
             'error': 'authorization_required'
         }), 401
 
+    @jwt.token_in_blocklist_loader
+    def token_revocado_callback(jwt_header, jwt_payload):
+        """Lista de revocados (logout): filtro en memoria, sin consulta en el caso normal"""
+        from app.utils.revocacion import esta_revocado
+        return esta_revocado(jwt_payload['jti'])
+
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_payload):
         """Callback cuando el token ha sido revocado"""
@@ -288,6 +291,22 @@ def register_blueprints(app):
     from app.blueprints.ajustes_inventario import ajustes_bp
     app.register_blueprint(ajustes_bp)
 
+    # Registrar blueprint de catálogo POS (snapshot + deltas)
+    from app.blueprints.pos import pos_bp
+    app.register_blueprint(pos_bp)
+
+    # Registrar blueprint de inventario (reconciliación de stock)
+    from app.blueprints.inventario import inventario_bp
+    app.register_blueprint(inventario_bp)
+
+    # Registrar blueprint de kardex (saldos corridos por producto/lote)
+    from app.blueprints.kardex import kardex_bp
+    app.register_blueprint(kardex_bp)
+
+    # Registrar blueprint de sistema (métricas operativas)
+    from app.blueprints.sistema import sistema_bp
+    app.register_blueprint(sistema_bp)
+
 
 def register_error_handlers(app):
     """
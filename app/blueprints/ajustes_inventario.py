@@ -258,7 +258,7 @@ def get_historial_producto(producto_id):
             'producto': {
                 'id': producto.id,
                 'nombre': producto.nombre,
-                'stock_actual': producto.stock_actual
+                'stock_actual': producto.stock_total
             },
             'ajustes': [a.to_dict() for a in ajustes],
             'total_ajustes': len(ajustes)
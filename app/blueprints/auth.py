@@ -6,26 +6,28 @@ Endpoints para autenticacion de usuarios con JWT.
 
 Este modulo maneja:
 - Login: Autenticar usuario y generar tokens
-- Logout: Cerrar sesion (invalidar en cliente)
+- Logout: Cerrar sesion (revoca los tokens por jti)
 - Refresh: Renovar access token con refresh token
 - Me: Obtener info del usuario autenticado
 
 Sistema JWT:
-- Stateless: No hay sesiones en el servidor
+- Stateless: No hay sesiones en el servidor (solo la lista de tokens revocados)
 - Access token: 8 horas de validez
 - Refresh token: 7 dias de validez
 - Bloqueo automatico tras 5 intentos fallidos
 """
 
-from flask import Blueprint, request, g
+from flask import Blueprint, request, g, current_app
 from sqlalchemy.exc import IntegrityError
 import jwt
 from flask_jwt_extended import (
     create_access_token, create_refresh_token,
-    jwt_required, get_jwt_identity, get_jwt
+    jwt_required, get_jwt_identity, get_jwt, decode_token
 )
 from app import db
 from app.models.user import User
+from app.services import auth_service
+from app.utils.revocacion import revocar_token
 from app.utils.responses import (
     success_response, error_response, created_response,
     not_found_response, validation_error_response,
@@ -133,12 +135,18 @@ def login():
             return unauthorized_response('Usuario inactivo. Contacte al administrador.')
 
         # ========== VERIFICAR PASSWORD ==========
-        if not user.check_password(password):
-            # Password incorrecto: registrar intento fallido
-            user.incrementar_intentos_fallidos()
-            db.session.commit()
+        # bcrypt corre en el pool acotado del servicio; el hash se rehace si cambió BCRYPT_ROUNDS
+        try:
+            password_correcto = auth_service.verificar_password(user, password)
+        except auth_service.ServicioSaturado:
+            return error_response(
+                'Demasiados inicios de sesion simultaneos. Intente nuevamente en unos segundos.',
+                status_code=503
+            )
 
-            intentos_restantes = 5 - user.intentos_login_fallidos
+        if not password_correcto:
+            # Password incorrecto: el intento se cuenta en memoria; solo el bloqueo escribe en la base
+            intentos_restantes = auth_service.registrar_fallo(user)
 
             if intentos_restantes > 0:
                 return unauthorized_response(
@@ -148,11 +156,12 @@ def login():
             else:
                 return unauthorized_response(
                     'Usuario bloqueado por multiples intentos fallidos. '
-                    'Intente nuevamente en 30 minutos.'
+                    f"Intente nuevamente en {current_app.config['LOGIN_BLOQUEO_MINUTOS']} minutos."
                 )
 
         # ========== PASSWORD CORRECTO - GENERAR TOKENS ==========
         # Registrar login exitoso (resetea intentos fallidos, actualiza ultimo_acceso)
+        auth_service.limpiar_intentos(user.id)
         user.registrar_acceso()
         db.session.commit()
 
@@ -241,21 +250,23 @@ def logout():
     """
     Cerrar sesion del usuario
 
-    Como JWT es stateless (no hay sesiones en el servidor), el logout
-    es responsabilidad del cliente: debe eliminar los tokens del
-    localStorage o sessionStorage.
-
-    Este endpoint sirve principalmente para:
-    - Confirmar al cliente que puede eliminar los tokens
-    - Registrar el evento de logout para auditoria (opcional)
-    - Realizar limpieza adicional si es necesaria
+    Revoca el access token de la peticion (por su jti) y, si se envia en el
+    body, tambien el refresh token del mismo usuario. Desde ese momento
+    @jwt_required / @login_required rechazan esos tokens con 401
+    'token_revoked' en este worker, y en los demas en a lo sumo
+    BLOCKLIST_REFRESCO_SEGUNDOS. El cliente igual debe eliminar los tokens.
 
     Headers requeridos:
         Authorization: Bearer <access_token>
 
+    Request body (opcional):
+        {
+            "refresh_token": "eyJ0eXAiOiJKV1QiLCJhbGc..."
+        }
+
     Returns:
         200: Logout exitoso
-        401: Token invalido o expirado
+        401: Token invalido, expirado o ya revocado
 
     Ejemplo de respuesta:
         {
@@ -263,7 +274,7 @@ def logout():
             "message": "Logout exitoso",
             "data": {
                 "username": "admin1",
-                "mensaje": "Los tokens deben ser eliminados del cliente"
+                "tokens_revocados": 2
             }
         }
     """
@@ -272,18 +283,29 @@ def logout():
         # Los datos del usuario estan en g.current_user
         username = g.current_user['username']
 
-        # Aqui podriamos registrar el logout en una tabla de auditoria
-        # Por ahora solo confirmamos el logout
+        revocar_token(get_jwt())
+        tokens_revocados = 1
+
+        refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh_token:
+            try:
+                payload = decode_token(refresh_token)
+            except Exception:
+                payload = None  # Refresh invalido o expirado: no hay nada que revocar
+            if payload and payload.get('type') == 'refresh' and payload.get('sub') == get_jwt()['sub']:
+                revocar_token(payload)
+                tokens_revocados += 1
 
         return success_response(
             data={
                 'username': username,
-                'mensaje': 'Los tokens deben ser eliminados del cliente'
+                'tokens_revocados': tokens_revocados
             },
             message='Logout exitoso'
         )
 
     except Exception as e:
+        db.session.rollback()
         return error_response(
             message='Error al procesar logout',
             status_code=500,
@@ -565,23 +587,31 @@ def update_profile():
             campos_actualizados.append('telefono')
 
         # ========== CAMBIAR CONTRASEÑA (SI SE PROPORCIONA) ==========
+        # bcrypt corre en el pool acotado del servicio, igual que en el login
         if 'new_password' in data and data['new_password']:
             # Verificar que se proporcionó la contraseña actual
             if not data.get('current_password'):
                 errores['current_password'] = 'Debe proporcionar la contraseña actual para cambiarla'
             else:
-                # Verificar que la contraseña actual sea correcta
-                if not user.check_password(data['current_password']):
-                    errores['current_password'] = 'La contraseña actual es incorrecta'
-                else:
-                    # Validar nueva contraseña
-                    nueva_password = data['new_password']
-                    if len(nueva_password) < 6:
-                        errores['new_password'] = 'La nueva contraseña debe tener al menos 6 caracteres'
+                try:
+                    # Verificar que la contraseña actual sea correcta
+                    if not auth_service.verificar_password(user, data['current_password']):
+                        errores['current_password'] = 'La contraseña actual es incorrecta'
                     else:
-                        user.set_password(nueva_password)
-                        campos_actualizados.append('password')
-                        print(f'   🔐 Contraseña actualizada para: {user.username}')
+                        # Validar nueva contraseña
+                        nueva_password = data['new_password']
+                        if len(nueva_password) < 6:
+                            errores['new_password'] = 'La nueva contraseña debe tener al menos 6 caracteres'
+                        else:
+                            auth_service.establecer_password(user, nueva_password)
+                            campos_actualizados.append('password')
+                            print(f'   🔐 Contraseña actualizada para: {user.username}')
+                except auth_service.ServicioSaturado:
+                    db.session.rollback()
+                    return error_response(
+                        'Demasiadas verificaciones de contraseña simultaneas. Intente nuevamente en unos segundos.',
+                        status_code=503
+                    )
 
         # Si hay errores de validación, retornarlos
         if errores:
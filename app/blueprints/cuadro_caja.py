@@ -9,13 +9,14 @@ Endpoints para:
 - Consultar historial de turnos
 """
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, request, jsonify, g
 from datetime import datetime, date
 from decimal import Decimal
 
 from app import db
-from app.models import CuadroCaja, Venta, User
+from app.models import CuadroCaja, Venta
+from app.decorators.auth_decorators import login_required
+from app.utils.identidad import es_admin_vigente
 
 cuadro_caja_bp = Blueprint('cuadro_caja', __name__, url_prefix='/api/cuadro-caja')
 
@@ -23,7 +24,7 @@ cuadro_caja_bp = Blueprint('cuadro_caja', __name__, url_prefix='/api/cuadro-caja
 # ==================== ENDPOINTS ====================
 
 @cuadro_caja_bp.route('/abrir', methods=['POST'])
-@jwt_required()
+@login_required
 def abrir_turno():
     """
     Abre un nuevo turno de caja
@@ -38,7 +39,7 @@ def abrir_turno():
         400: Datos inválidos o ya existe turno abierto
     """
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = g.current_user['user_id']
         data = request.get_json() or {}
 
         # Verificar si ya tiene un turno abierto
@@ -94,7 +95,7 @@ def abrir_turno():
 
 
 @cuadro_caja_bp.route('/turno-actual', methods=['GET'])
-@jwt_required()
+@login_required
 def obtener_turno_actual():
     """
     Obtiene el turno actualmente abierto del vendedor
@@ -103,7 +104,7 @@ def obtener_turno_actual():
         200: Turno actual (o null si no hay turno abierto)
     """
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = g.current_user['user_id']
 
         turno = CuadroCaja.turno_abierto_vendedor(current_user_id)
 
@@ -119,7 +120,7 @@ def obtener_turno_actual():
 
 
 @cuadro_caja_bp.route('/agregar-egreso', methods=['POST'])
-@jwt_required()
+@login_required
 def agregar_egreso():
     """
     Agrega un egreso (gasto) al turno actual
@@ -135,7 +136,7 @@ def agregar_egreso():
         400: Datos inválidos o no hay turno abierto
     """
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = g.current_user['user_id']
         data = request.get_json()
 
         if not data or 'monto' not in data or 'concepto' not in data:
@@ -170,7 +171,7 @@ def agregar_egreso():
 
 
 @cuadro_caja_bp.route('/solicitar-cierre', methods=['POST'])
-@jwt_required()
+@login_required
 def solicitar_cierre():
     """
     Vendedor solicita cierre de turno (requiere aprobación de admin)
@@ -186,7 +187,7 @@ def solicitar_cierre():
         400: Datos inválidos o no hay turno abierto
     """
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = g.current_user['user_id']
         data = request.get_json()
 
         if not data or 'efectivo_contado' not in data:
@@ -221,7 +222,7 @@ def solicitar_cierre():
 
 
 @cuadro_caja_bp.route('/aprobar-cierre/<int:turno_id>', methods=['POST'])
-@jwt_required()
+@login_required
 def aprobar_cierre(turno_id):
     """
     Admin aprueba el cierre solicitado por el vendedor
@@ -233,11 +234,10 @@ def aprobar_cierre(turno_id):
         400: El turno no está pendiente de cierre
     """
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = g.current_user['user_id']
 
         # Verificar que el usuario es admin
-        usuario = User.query.get(current_user_id)
-        if not usuario or usuario.rol != 'admin':
+        if not es_admin_vigente():
             return jsonify({'error': 'No autorizado. Solo administradores pueden aprobar cierres.'}), 403
 
         # Buscar el turno
@@ -263,7 +263,7 @@ def aprobar_cierre(turno_id):
 
 
 @cuadro_caja_bp.route('/rechazar-cierre/<int:turno_id>', methods=['POST'])
-@jwt_required()
+@login_required
 def rechazar_cierre(turno_id):
     """
     Admin rechaza el cierre solicitado por el vendedor
@@ -280,12 +280,11 @@ def rechazar_cierre(turno_id):
         400: Datos inválidos o el turno no está pendiente de cierre
     """
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = g.current_user['user_id']
         data = request.get_json()
 
         # Verificar que el usuario es admin
-        usuario = User.query.get(current_user_id)
-        if not usuario or usuario.rol != 'admin':
+        if not es_admin_vigente():
             return jsonify({'error': 'No autorizado. Solo administradores pueden rechazar cierres.'}), 403
 
         if not data or 'observaciones_rechazo' not in data:
@@ -318,7 +317,7 @@ def rechazar_cierre(turno_id):
 
 
 @cuadro_caja_bp.route('/cerrar', methods=['POST'])
-@jwt_required()
+@login_required
 def cerrar_turno():
     """
     Admin cierra turno directamente (sin aprobación)
@@ -335,12 +334,11 @@ def cerrar_turno():
         400: Datos inválidos o no hay turno abierto
     """
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = g.current_user['user_id']
         data = request.get_json()
 
         # Verificar que el usuario es admin
-        usuario = User.query.get(current_user_id)
-        if not usuario or usuario.rol != 'admin':
+        if not es_admin_vigente():
             return jsonify({'error': 'No autorizado. Los vendedores deben usar /solicitar-cierre'}), 403
 
         if not data or 'efectivo_contado' not in data:
@@ -375,7 +373,7 @@ def cerrar_turno():
 
 
 @cuadro_caja_bp.route('/historial', methods=['GET'])
-@jwt_required()
+@login_required
 def obtener_historial():
     """
     Obtiene el historial de turnos
@@ -389,8 +387,7 @@ def obtener_historial():
         200: Lista de turnos
     """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        current_user_id = g.current_user['user_id']
 
         # Query params
         fecha_inicio_str = request.args.get('fecha_inicio')
@@ -414,7 +411,7 @@ def obtener_historial():
                 return jsonify({'error': 'Formato de fecha_fin inválido (use YYYY-MM-DD)'}), 400
 
         # Si es vendedor, solo puede ver sus turnos (a menos que sea admin)
-        if user.rol != 'admin':
+        if not es_admin_vigente():
             solo_mis_turnos = True
 
         if solo_mis_turnos:
@@ -441,7 +438,7 @@ def obtener_historial():
 
 
 @cuadro_caja_bp.route('/turno/<int:turno_id>', methods=['GET'])
-@jwt_required()
+@login_required
 def obtener_turno(turno_id):
     """
     Obtiene los detalles de un turno específico
@@ -452,8 +449,7 @@ def obtener_turno(turno_id):
         404: Turno no encontrado
     """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        current_user_id = g.current_user['user_id']
 
         turno = CuadroCaja.query.get(turno_id)
 
@@ -461,7 +457,7 @@ def obtener_turno(turno_id):
             return jsonify({'error': 'Turno no encontrado'}), 404
 
         # Verificar permisos: solo el vendedor dueño o admin pueden ver el turno
-        if turno.vendedor_id != current_user_id and user.rol != 'admin':
+        if turno.vendedor_id != current_user_id and not es_admin_vigente():
             return jsonify({'error': 'No tienes permiso para ver este turno'}), 403
 
         return jsonify({
@@ -473,7 +469,7 @@ def obtener_turno(turno_id):
 
 
 @cuadro_caja_bp.route('/turnos-abiertos', methods=['GET'])
-@jwt_required()
+@login_required
 def obtener_turnos_abiertos():
     """
     Obtiene todos los turnos actualmente abiertos (solo admin)
@@ -483,11 +479,10 @@ def obtener_turnos_abiertos():
         403: No autorizado
     """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        current_user_id = g.current_user['user_id']
 
         # Solo admin puede ver todos los turnos abiertos
-        if user.rol != 'admin':
+        if not es_admin_vigente():
             return jsonify({'error': 'No tienes permiso para esta operación'}), 403
 
         turnos = CuadroCaja.turnos_abiertos()
@@ -501,7 +496,7 @@ def obtener_turnos_abiertos():
 
 
 @cuadro_caja_bp.route('/turnos-pendientes', methods=['GET'])
-@jwt_required()
+@login_required
 def obtener_turnos_pendientes():
     """
     Obtiene todos los turnos pendientes de cierre (solo admin)
@@ -511,11 +506,10 @@ def obtener_turnos_pendientes():
         403: No autorizado
     """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        current_user_id = g.current_user['user_id']
 
         # Solo admin puede ver todos los turnos pendientes
-        if user.rol != 'admin':
+        if not es_admin_vigente():
             return jsonify({'error': 'No tienes permiso para esta operación'}), 403
 
         turnos = CuadroCaja.query.filter_by(estado='pendiente_cierre').order_by(CuadroCaja.fecha_apertura.desc()).all()
@@ -530,7 +524,7 @@ def obtener_turnos_pendientes():
 
 
 @cuadro_caja_bp.route('/todos-los-turnos', methods=['GET'])
-@jwt_required()
+@login_required
 def obtener_todos_los_turnos():
     """
     Obtiene todos los turnos de todos los vendedores (solo admin)
@@ -546,11 +540,10 @@ def obtener_todos_los_turnos():
         403: No autorizado
     """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        current_user_id = g.current_user['user_id']
 
         # Solo admin puede ver todos los turnos
-        if user.rol != 'admin':
+        if not es_admin_vigente():
             return jsonify({'error': 'No tienes permiso para esta operación'}), 403
 
         # Construir query base
@@ -602,7 +595,7 @@ def obtener_todos_los_turnos():
 
 
 @cuadro_caja_bp.route('/estadisticas', methods=['GET'])
-@jwt_required()
+@login_required
 def obtener_estadisticas():
     """
     Obtiene estadísticas de cuadros de caja
@@ -614,8 +607,7 @@ def obtener_estadisticas():
         200: Estadísticas del día
     """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        current_user_id = g.current_user['user_id']
 
         # Parsear fecha
         fecha_str = request.args.get('fecha')
@@ -631,7 +623,7 @@ def obtener_estadisticas():
         turnos_dia = CuadroCaja.turnos_del_dia(fecha)
 
         # Filtrar por vendedor si no es admin
-        if user.rol != 'admin':
+        if not es_admin_vigente():
             turnos_dia = [t for t in turnos_dia if t.vendedor_id == current_user_id]
 
         # Calcular estadísticas
@@ -680,7 +672,7 @@ def obtener_estadisticas():
 # ==================================================================================
 
 @cuadro_caja_bp.route('/ventas-turno', methods=['GET'])
-@jwt_required()
+@login_required
 def obtener_ventas_turno():
     """
     Obtiene todas las ventas del turno actual del vendedor autenticado.
@@ -700,15 +692,14 @@ def obtener_ventas_turno():
         from flask import current_app
 
         # Obtener usuario autenticado
-        user_id = get_jwt_identity()
-        claims = get_jwt()
-        user_rol = claims.get('rol')
+        user_id = g.current_user['user_id']
+        es_admin = es_admin_vigente()
 
         # Obtener parámetros
         turno_id = request.args.get('turno_id', type=int)
 
         # Si es admin y especifica turno_id, obtener ese turno
-        if user_rol == 'admin' and turno_id:
+        if es_admin and turno_id:
             turno = CuadroCaja.query.get(turno_id)
             if not turno:
                 return jsonify({'error': 'Turno no encontrado'}), 404
@@ -14,6 +14,7 @@ from app.models.venta import Venta
 from app.models.detalle_venta import DetalleVenta
 from app.models.product import Product
 from app.models.lote import Lote
+from app.decorators.db_decorators import solo_lectura
 
 # Zona horaria de Perú (UTC-5)
 PERU_TZ = timezone(timedelta(hours=-5))
@@ -23,6 +24,7 @@ dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
 
 @dashboard_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@solo_lectura
 def get_dashboard_stats():
     """
     Endpoint optimizado que retorna todas las estadísticas del dashboard en 1 sola petición.
@@ -13,6 +13,7 @@ from app.models.venta import Venta
 from app.models.detalle_venta import DetalleVenta
 from app.models.product import Product
 from app.models.lote import Lote
+from app.models.movimiento_stock import MovimientoStock
 from app.models.cuadro_caja import CuadroCaja
 from app.decorators.auth_decorators import login_required, role_required
 
@@ -30,6 +31,43 @@ def handle_options(devolucion_id=None):
     return '', 204
 
 
+# ===========================
+# REPOSICIÓN EN LOTES
+# ===========================
+
+def _reponer_en_lotes(detalle, cantidad):
+    """
+    Devuelve unidades a los lotes del producto
+
+    Primero al lote de la venta; lo que no entre (o si la línea no tiene
+    lote) va a los demás lotes con espacio en orden FIFO. stock_total solo
+    sube junto con sus lotes para mantener stock_total == SUM(lotes).
+
+    Args:
+        detalle (DetalleVenta): Línea devuelta
+        cantidad (int): Unidades a reponer
+
+    Returns:
+        list: [(lote, cantidad)] efectivamente repuesto
+    """
+    lotes = Lote.query.filter_by(producto_id=detalle.producto_id).order_by(
+        Lote.fecha_vencimiento.asc(), Lote.id.asc()
+    ).all()
+    lotes.sort(key=lambda lote: lote.id != detalle.lote_id)  # El lote de la venta primero
+
+    aplicado = []
+    pendiente = cantidad
+    for lote in lotes:
+        espacio = min(pendiente, lote.cantidad_inicial - lote.cantidad_actual)
+        if espacio > 0:
+            lote.aumentar_stock(espacio)
+            aplicado.append((lote, espacio))
+            pendiente -= espacio
+        if pendiente == 0:
+            break
+    return aplicado
+
+
 # ===========================
 # CREAR DEVOLUCIÓN
 # ===========================
@@ -56,7 +94,7 @@ def crear_devolucion():
             "success": true,
             "message": "Devolución procesada exitosamente",
             "devolucion": {...},
-            "stock_revertido": [...]
+            "stock_revertido": [...]   # cantidad_no_repuesta > 0: unidades sin lote donde volver
         }
     """
     try:
@@ -112,22 +150,34 @@ def crear_devolucion():
             if not producto:
                 continue
 
-            # Aumentar stock del producto
-            cantidad_devuelta = detalle.cantidad
-            producto.stock_actual += cantidad_devuelta
-
-            # Si había un lote asociado, también revertir su stock
-            if detalle.lote_id:
-                lote = Lote.query.get(detalle.lote_id)
-                if lote:
-                    lote.cantidad_disponible += cantidad_devuelta
-
+            stock_anterior = producto.stock_total
+            aplicado = _reponer_en_lotes(detalle, detalle.cantidad)
+
+            for lote, cantidad in aplicado:
+                db.session.add(MovimientoStock(
+                    tipo='devolucion',
+                    producto_id=producto.id,
+                    lote_id=lote.id,
+                    usuario_id=admin_id,
+                    venta_id=venta.id,
+                    cantidad=cantidad,
+                    stock_anterior=producto.stock_total,
+                    stock_nuevo=producto.stock_total + cantidad,
+                    motivo=f'Devolución de venta {venta.numero_venta}',
+                    referencia=f'DEV-{venta.numero_venta}'
+                ))
+                producto.stock_total += cantidad
+
+            cantidad_devuelta = sum(cantidad for _, cantidad in aplicado)
             stock_revertido.append({
                 'producto_id': producto.id,
                 'producto_nombre': producto.nombre,
+                'cantidad_vendida': detalle.cantidad,
                 'cantidad_devuelta': cantidad_devuelta,
-                'stock_anterior': producto.stock_actual - cantidad_devuelta,
-                'stock_nuevo': producto.stock_actual
+                'cantidad_no_repuesta': detalle.cantidad - cantidad_devuelta,
+                'lotes': [{'lote_id': lote.id, 'cantidad': cantidad} for lote, cantidad in aplicado],
+                'stock_anterior': stock_anterior,
+                'stock_nuevo': producto.stock_total
             })
 
         # === REVERSIÓN DEL CUADRO DE CAJA ===
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+KATITA-POS - Blueprint de Inventario
+====================================
+Endpoints de mantenimiento del inventario (solo administradores)
+
+Endpoints:
+- GET  /api/inventario/reconciliacion          - Productos con stock_total descuadrado
+- POST /api/inventario/reconciliacion/reparar  - Corregir descuadres en un solo UPDATE
+- GET  /api/inventario/snapshots               - Últimos cortes de stock
+- POST /api/inventario/snapshots               - Tomar un corte ahora
+- GET  /api/inventario/stock-al?fecha=...      - Stock y valor al cierre de una fecha
+- GET  /api/inventario/conflictos              - Conflictos de stock entre nodos
+- POST /api/inventario/conflictos/<id>/resolver - Marcar un conflicto como revisado
+"""
+
+from datetime import datetime
+from flask import Blueprint, request
+from flask_jwt_extended import get_jwt_identity
+from app import db
+from app.models.snapshot_stock import SnapshotStock
+from app.models.tarea_reconciliacion import TareaReconciliacion
+from app.services import stock_service
+from app.decorators.db_decorators import solo_lectura
+from app.utils.responses import (
+    success_response, error_response, created_response,
+    not_found_response, conflict_response
+)
+from app.decorators.auth_decorators import login_required, admin_required
+
+inventario_bp = Blueprint('inventario', __name__, url_prefix='/api/inventario')
+
+
+@inventario_bp.route('/reconciliacion', methods=['GET'])
+@login_required
+@admin_required
+def reporte_reconciliacion():
+    """
+    Reporta los productos cuyo stock_total no coincide con sus lotes
+
+    Returns:
+        200: Lista de descuadres (vacía si todo cuadra)
+        403: Usuario no es administrador
+
+    Ejemplo de respuesta:
+        {
+            "success": true,
+            "message": "2 productos descuadrados",
+            "data": {
+                "total": 2,
+                "descuadres": [
+                    {
+                        "producto_id": 5,
+                        "codigo_barras": "7750182001878",
+                        "nombre": "Coca Cola 500ml",
+                        "stock_registrado": 48,
+                        "stock_real": 45,
+                        "diferencia": -3
+                    }
+                ]
+            }
+        }
+    """
+    try:
+        descuadres = stock_service.detectar_descuadres()
+        return success_response(
+            {'total': len(descuadres), 'descuadres': descuadres},
+            f"{len(descuadres)} productos descuadrados"
+        )
+
+    except Exception as e:
+        return error_response(f"Error al reconciliar stock: {str(e)}", 500)
+
+
+@inventario_bp.route('/reconciliacion/reparar', methods=['POST'])
+@login_required
+@admin_required
+def reparar_reconciliacion():
+    """
+    Corrige stock_total de todos los productos descuadrados
+
+    Se ejecuta un único UPDATE, se invalida el catálogo POS de los
+    productos corregidos y se registra una auditoría 'reparacion_stock'.
+
+    Returns:
+        200: productos_corregidos, descuadres, operacion_id
+        403: Usuario no es administrador
+    """
+    try:
+        resultado = stock_service.reparar_descuadres(usuario_id=int(get_jwt_identity()))
+        return success_response(
+            resultado,
+            f"{resultado['productos_corregidos']} productos corregidos"
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Error al reparar stock: {str(e)}", 500)
+
+
+@inventario_bp.route('/snapshots', methods=['GET'])
+@login_required
+@admin_required
+def listar_snapshots():
+    """
+    Lista los últimos cortes de stock con su resumen
+
+    Query Parameters:
+        limite (int): Cantidad de cortes (default: 30)
+
+    Returns:
+        200: Lista de cortes (corte, productos, unidades, valor)
+        403: Usuario no es administrador
+    """
+    try:
+        limite = min(max(request.args.get('limite', default=30, type=int), 1), 365)
+        return success_response(SnapshotStock.cortes(limite), "Cortes de stock")
+
+    except Exception as e:
+        return error_response(f"Error al listar cortes: {str(e)}", 500)
+
+
+@inventario_bp.route('/snapshots', methods=['POST'])
+@login_required
+@admin_required
+def crear_snapshot():
+    """
+    Toma un corte de stock en este momento (además del corte nocturno)
+
+    Returns:
+        201: corte, productos, lotes
+        403: Usuario no es administrador
+    """
+    try:
+        resultado = stock_service.tomar_snapshot()
+        resultado['corte'] = resultado['corte'].isoformat()
+        return created_response(resultado, "Corte de stock registrado")
+
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Error al tomar corte de stock: {str(e)}", 500)
+
+
+@inventario_bp.route('/stock-al', methods=['GET'])
+@login_required
+@admin_required
+@solo_lectura
+def consultar_stock_al():
+    """
+    Stock y valor al costo al cierre de una fecha
+
+    Parte del corte más cercano anterior a la fecha y aplica solo los
+    movimientos posteriores.
+
+    Query Parameters:
+        fecha (date): YYYY-MM-DD (requerido)
+        por_lote (bool): Detallar por lote (default: false)
+
+    Returns:
+        200: fecha, corte_base, movimientos_aplicados, total_unidades,
+             valor_total, items
+        400: Fecha inválida
+        403: Usuario no es administrador
+    """
+    try:
+        try:
+            fecha = datetime.strptime(request.args.get('fecha', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return error_response('Parametro "fecha" requerido con formato YYYY-MM-DD', 400)
+
+        por_lote = request.args.get('por_lote', 'false').lower() == 'true'
+        resultado = stock_service.stock_al(fecha, por_lote=por_lote)
+        return success_response(resultado, f"Stock al {fecha.isoformat()}")
+
+    except Exception as e:
+        return error_response(f"Error al calcular stock a la fecha: {str(e)}", 500)
+
+
+@inventario_bp.route('/conflictos', methods=['GET'])
+@login_required
+@admin_required
+def listar_conflictos():
+    """
+    Tareas de reconciliación pendientes (stock fusionado fuera de rango)
+
+    Returns:
+        200: Lista de tareas (diferencia < 0 = unidades vendidas de más)
+        403: Usuario no es administrador
+    """
+    try:
+        tareas = [t.to_dict() for t in TareaReconciliacion.pendientes()]
+        return success_response({'total': len(tareas), 'tareas': tareas},
+                                f"{len(tareas)} conflictos pendientes")
+
+    except Exception as e:
+        return error_response(f"Error al listar conflictos: {str(e)}", 500)
+
+
+@inventario_bp.route('/conflictos/<int:tarea_id>/resolver', methods=['POST'])
+@login_required
+@admin_required
+def resolver_conflicto(tarea_id):
+    """
+    Marca un conflicto de stock como revisado
+
+    Body:
+        {"nota": "Ajuste #45 por merma"}
+
+    Returns:
+        200: Tarea resuelta
+        403: Usuario no es administrador
+        404: Tarea no encontrada
+        409: La tarea ya estaba resuelta
+    """
+    try:
+        tarea = db.session.get(TareaReconciliacion, tarea_id)
+        if not tarea:
+            return not_found_response(f'Tarea con ID {tarea_id} no encontrada')
+        if tarea.estado != 'pendiente':
+            return conflict_response('La tarea ya está resuelta')
+
+        data = request.get_json(silent=True) or {}
+        tarea.resolver(int(get_jwt_identity()), data.get('nota'))
+        db.session.commit()
+        return success_response(tarea.to_dict(), "Conflicto resuelto")
+
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Error al resolver conflicto: {str(e)}", 500)
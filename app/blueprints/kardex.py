@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+KATITA-POS - Blueprint de Kardex
+================================
+Historial valorizado de movimientos de stock con saldos corridos
+
+Endpoints:
+- GET /api/productos/<id>/kardex  - Kardex de un producto
+- GET /api/lotes/<id>/kardex      - Kardex de un lote
+
+Paginación keyset: cada página retorna 'siguiente_cursor', que se envía
+como ?despues=<cursor>. Con ?formato=csv se exporta el kardex completo
+como CSV en streaming (sin paginar).
+"""
+
+import csv
+import io
+from datetime import datetime
+from flask import Blueprint, request, Response, stream_with_context
+from flask_jwt_extended import jwt_required
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.services import kardex_service
+from app.decorators.db_decorators import solo_lectura
+from app.utils.responses import success_response, error_response, not_found_response
+
+kardex_bp = Blueprint('kardex', __name__, url_prefix='/api')
+
+
+def _leer_parametros():
+    """
+    Lee despues, limit, desde y hasta del query string
+
+    Returns:
+        dict: Parámetros normalizados
+
+    Raises:
+        ValueError: Si algún parámetro tiene formato inválido
+    """
+    parametros = {
+        'limit': min(max(request.args.get('limit', default=100, type=int), 1), 500),
+        'despues': None,
+        'desde': None,
+        'hasta': None,
+    }
+
+    cursor = request.args.get('despues')
+    if cursor:
+        try:
+            fecha, movimiento_id = cursor.rsplit('_', 1)
+            parametros['despues'] = (datetime.fromisoformat(fecha), int(movimiento_id))
+        except ValueError:
+            raise ValueError('Cursor invalido para "despues"')
+
+    for nombre in ('desde', 'hasta'):
+        valor = request.args.get(nombre)
+        if valor:
+            try:
+                parametros[nombre] = datetime.strptime(valor, '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(f'Formato de fecha invalido para "{nombre}". Use YYYY-MM-DD')
+
+    return parametros
+
+
+def _cursor(siguiente):
+    """Convierte (created_at, id) en el cursor '<fecha ISO>_<id>'"""
+    return f'{siguiente[0].isoformat()}_{siguiente[1]}' if siguiente else None
+
+
+def _exportar_csv(nombre_archivo, **filtro):
+    """Respuesta CSV en streaming (una fila por movimiento)"""
+
+    def generar():
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(kardex_service.COLUMNAS_CSV)
+
+        for movimiento in kardex_service.iterar_kardex(**filtro):
+            escritor.writerow([movimiento[c] for c in kardex_service.COLUMNAS_CSV])
+            if buffer.tell() > 8192:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generar()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={nombre_archivo}'}
+    )
+
+
+def _responder_kardex(cabecera, nombre_archivo, **filtro):
+    """Arma la respuesta JSON paginada o el CSV completo"""
+    try:
+        parametros = _leer_parametros()
+    except ValueError as e:
+        return error_response(str(e), status_code=400)
+
+    if request.args.get('formato', 'json').lower() == 'csv':
+        return _exportar_csv(
+            nombre_archivo, desde=parametros['desde'], hasta=parametros['hasta'], **filtro
+        )
+
+    pagina = kardex_service.pagina_kardex(**filtro, **parametros)
+    return success_response(
+        data={
+            **cabecera,
+            'movimientos': pagina['movimientos'],
+            'limit': parametros['limit'],
+            'siguiente_cursor': _cursor(pagina['siguiente'])
+        },
+        message=f"{len(pagina['movimientos'])} movimientos"
+    )
+
+
+@kardex_bp.route('/productos/<int:producto_id>/kardex', methods=['GET'])
+@jwt_required()
+@solo_lectura
+def kardex_producto(producto_id):
+    """
+    Kardex de un producto con saldo corrido de cantidad y valorizado
+
+    Query Parameters:
+        despues (str): Cursor de la página anterior
+        limit (int): Movimientos por página (default: 100, max: 500)
+        desde, hasta (date): Rango de fechas YYYY-MM-DD (el saldo
+            incluye los movimientos anteriores a 'desde')
+        formato (str): 'csv' para exportar todo el kardex
+
+    Returns:
+        200: producto, movimientos, siguiente_cursor (o archivo CSV)
+        400: Parámetros inválidos
+        404: Producto no encontrado
+
+    Ejemplo de movimiento:
+        {
+            "id": 812, "fecha": "2025-01-04T09:12:33", "tipo": "venta",
+            "codigo_lote": "LOTE-20250102-003", "entrada": 0, "salida": 2,
+            "costo_unitario": "2.50", "saldo_cantidad": 46,
+            "saldo_valorizado": "115.00"
+        }
+    """
+    try:
+        producto = db.session.get(Product, producto_id)
+        if not producto:
+            return not_found_response(f'Producto con ID {producto_id} no encontrado')
+
+        cabecera = {'producto': {
+            'id': producto.id,
+            'nombre': producto.nombre,
+            'codigo_barras': producto.codigo_barras,
+            'stock_total': producto.stock_total
+        }}
+        return _responder_kardex(cabecera, f'kardex_{producto.codigo_barras}.csv',
+                                 producto_id=producto_id)
+
+    except Exception as e:
+        return error_response(
+            message='Error al obtener el kardex del producto',
+            status_code=500,
+            errors={'exception': str(e)}
+        )
+
+
+@kardex_bp.route('/lotes/<int:lote_id>/kardex', methods=['GET'])
+@jwt_required()
+@solo_lectura
+def kardex_lote(lote_id):
+    """
+    Kardex de un lote con saldo corrido de cantidad y valorizado
+
+    Mismos parámetros y formato que el kardex de producto.
+
+    Returns:
+        200: lote, movimientos, siguiente_cursor (o archivo CSV)
+        400: Parámetros inválidos
+        404: Lote no encontrado
+    """
+    try:
+        lote = db.session.get(Lote, lote_id)
+        if not lote:
+            return not_found_response(f'Lote con ID {lote_id} no encontrado')
+
+        cabecera = {'lote': {
+            'id': lote.id,
+            'codigo_lote': lote.codigo_lote,
+            'producto_id': lote.producto_id,
+            'cantidad_actual': lote.cantidad_actual
+        }}
+        return _responder_kardex(cabecera, f'kardex_{lote.codigo_lote}.csv', lote_id=lote_id)
+
+    except Exception as e:
+        return error_response(
+            message='Error al obtener el kardex del lote',
+            status_code=500,
+            errors={'exception': str(e)}
+        )
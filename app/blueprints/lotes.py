@@ -18,16 +18,18 @@ El sistema de lotes es CRITICO para:
 - Gestion de fechas de vencimiento
 """
 
-from flask import Blueprint, request, g
+from flask import Blueprint, request, g, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import or_
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta, timezone
 from app import db
 from app.models.lote import Lote
 from app.models.product import Product
 from app.models.movimiento_stock import MovimientoStock
+from app.services import recepcion_service
+from app.services import vencimiento_service
 from app.utils.responses import (
     success_response, error_response, created_response,
     not_found_response, validation_error_response, conflict_response
@@ -37,6 +39,9 @@ from app.decorators.auth_decorators import login_required, role_required
 # Crear Blueprint con prefijo /api/lotes
 lotes_bp = Blueprint('lotes', __name__, url_prefix='/api/lotes')
 
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
 
 # ==================================================================================
 # ENDPOINT 1: POST /api/lotes - Crear lote (ingreso de mercaderia)
@@ -328,7 +333,7 @@ def listar_lotes():
 
             db.session.commit()
         # ========== CONSTRUIR QUERY BASE ==========
-        query = Lote.query
+        query = Lote.con_producto()
 
         # ========== FILTRO POR PRODUCTO ==========
         producto_id = request.args.get('producto_id', type=int)
@@ -381,11 +386,8 @@ def listar_lotes():
         lotes = query.limit(limit).offset(offset).all()
 
         # ========== ENRIQUECER DATOS DE RESPUESTA ==========
-        lotes_dict = []
-        for lote in lotes:
-            # BUG 3 CORREGIDO: Incluir información del producto
-            lote_data = lote.to_dict(include_producto=True)
-            lotes_dict.append(lote_data)
+        # BUG 3 CORREGIDO: Incluir información del producto (cargado en el JOIN)
+        lotes_dict = Lote.serializar_lista(lotes, include_producto=True)
 
         # ========== RESPUESTA EXITOSA ==========
         return success_response(
@@ -465,13 +467,10 @@ def lotes_producto(producto_id):
         lotes = Lote.lotes_fifo(producto_id).all()
 
         # ========== ENRIQUECER DATOS ==========
-        lotes_dict = []
+        lotes_dict = Lote.serializar_lista(lotes)
         stock_total_disponible = 0
 
         for lote in lotes:
-            lote_data = lote.to_dict()
-            lotes_dict.append(lote_data)
-
             if lote.cantidad_actual > 0:
                 stock_total_disponible += lote.cantidad_actual
 
@@ -530,6 +529,14 @@ def alertas_vencimiento():
         dias (int): Dias de anticipacion (default: 7)
                    Ejemplos: 7, 15, 30
         solo_activos (bool): Solo productos con stock > 0 (default: true)
+        limit (int): Productos por pagina (default: 100, max: 500)
+        offset (int): Productos a saltar (default: 0)
+
+    NOTA:
+        La agrupacion por producto, la cantidad afectada y la urgencia se
+        calculan en una sola consulta SQL (umbrales configurables con
+        VENCIMIENTO_URGENCIA_ALTA_DIAS / VENCIMIENTO_URGENCIA_MEDIA_DIAS).
+        Solo se cargan los lotes de los productos de la pagina.
 
     Returns:
         200: Lista de productos con lotes proximos a vencer
@@ -562,90 +569,39 @@ def alertas_vencimiento():
         if dias < 1:
             dias = 7
 
-        # ========== CALCULAR FECHA LIMITE ==========
-        fecha_limite = datetime.now() + timedelta(days=dias)
+        limit = request.args.get('limit', default=100, type=int)
+        offset = request.args.get('offset', default=0, type=int)
 
-        # ========== CONSULTAR LOTES PROXIMOS A VENCER ==========
-        query = Lote.query.filter(
-            Lote.fecha_vencimiento >= datetime.now(),
-            Lote.fecha_vencimiento <= fecha_limite
+        if limit > 500:
+            limit = 500
+        if limit < 1:
+            limit = 100
+        if offset < 0:
+            offset = 0
+
+        # ========== AGREGAR EN SQL ==========
+        resultado = vencimiento_service.alertas_vencimiento(
+            dias,
+            solo_activos=solo_activos,
+            umbral_alta=current_app.config['VENCIMIENTO_URGENCIA_ALTA_DIAS'],
+            umbral_media=current_app.config['VENCIMIENTO_URGENCIA_MEDIA_DIAS'],
+            limit=limit,
+            offset=offset
         )
-
-        if solo_activos:
-            query = query.filter(Lote.cantidad_actual > 0)
-
-        query = query.order_by(Lote.fecha_vencimiento.asc())
-        lotes_proximos = query.all()
-
-        # ========== AGRUPAR POR PRODUCTO ==========
-        productos_afectados = {}
-
-        for lote in lotes_proximos:
-            producto_id = lote.producto_id
-
-            if producto_id not in productos_afectados:
-                productos_afectados[producto_id] = {
-                    'producto': lote.producto,
-                    'lotes': [],
-                    'cantidad_total': 0
-                }
-
-            productos_afectados[producto_id]['lotes'].append(lote)
-            productos_afectados[producto_id]['cantidad_total'] += lote.cantidad_actual
-
-        # ========== CONSTRUIR RESPUESTA CON NIVELES DE URGENCIA ==========
-        alertas = []
-
-        for producto_id, data in productos_afectados.items():
-            producto = data['producto']
-            lotes = data['lotes']
-            cantidad_total = data['cantidad_total']
-
-            # Calcular urgencia basada en el lote mas proximo
-            dias_min = min(lote.dias_hasta_vencimiento for lote in lotes)
-
-            if dias_min <= 3:
-                urgencia = 'alta'
-            elif dias_min <= 7:
-                urgencia = 'media'
-            else:
-                urgencia = 'baja'
-
-            # Serializar lotes (BUG 3 CORREGIDO)
-            lotes_dict = []
-            for lote in lotes:
-                lote_data = lote.to_dict(include_producto=True)
-                lote_data['dias_hasta_vencimiento'] = lote.dias_hasta_vencimiento
-                lote_data['esta_vencido'] = lote.esta_vencido
-                lotes_dict.append(lote_data)
-
-            alertas.append({
-                'producto': {
-                    'id': producto.id,
-                    'nombre': producto.nombre,
-                    'codigo_barras': producto.codigo_barras,
-                    'categoria': producto.categoria,
-                    'precio_venta': str(producto.precio_venta)
-                },
-                'lotes_proximos': lotes_dict,
-                'cantidad_total_afectada': cantidad_total,
-                'urgencia': urgencia,
-                'dias_minimo_vencimiento': dias_min
-            })
-
-        # Ordenar por urgencia (alta primero)
-        urgencia_orden = {'alta': 0, 'media': 1, 'baja': 2}
-        alertas.sort(key=lambda x: (urgencia_orden[x['urgencia']], x['dias_minimo_vencimiento']))
+        alertas = resultado['alertas']
+        total = resultado['total_productos_afectados']
 
         # ========== RESPUESTA EXITOSA ==========
         return success_response(
             data={
                 'alertas': alertas,
-                'total_productos_afectados': len(alertas),
+                'total_productos_afectados': total,
                 'dias_anticipacion': dias,
-                'fecha_limite': fecha_limite.strftime('%Y-%m-%d')
+                'fecha_limite': resultado['fecha_limite'].strftime('%Y-%m-%d'),
+                'limit': limit,
+                'offset': offset
             },
-            message=f'{len(alertas)} productos con lotes proximos a vencer en {dias} dias'
+            message=f'{total} productos con lotes proximos a vencer en {dias} dias'
         )
 
     except Exception as e:
@@ -760,6 +716,32 @@ def actualizar_lote(id):
 # ENDPOINT 6: GET /api/lotes/vencidos - Reporte de lotes vencidos
 # ==================================================================================
 
+def _parametros_vencidos():
+    """
+    Lee los filtros comunes de los reportes de vencidos
+
+    Returns:
+        tuple: (con_stock, desde, hasta)
+
+    Raises:
+        ValueError: Si alguna fecha no tiene formato YYYY-MM-DD
+    """
+    con_stock = request.args.get('con_stock', 'true').lower() == 'true'
+    fechas = {}
+    for nombre in ('desde', 'hasta'):
+        valor = request.args.get(nombre)
+        try:
+            fechas[nombre] = datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+        except ValueError:
+            raise ValueError(f'Formato de fecha invalido para "{nombre}". Use YYYY-MM-DD')
+    return con_stock, fechas['desde'], fechas['hasta']
+
+
+def _cursor_vencidos(siguiente):
+    """Convierte (fecha_vencimiento, id) en el cursor 'YYYY-MM-DD:id'"""
+    return f'{siguiente[0].isoformat()}:{siguiente[1]}' if siguiente else None
+
+
 @lotes_bp.route('/vencidos', methods=['GET'])
 @jwt_required()
 def reporte_vencidos():
@@ -773,11 +755,15 @@ def reporte_vencidos():
     - Dar de baja productos
     - Analisis de gestion de inventario
 
+    Los totales y el desglose se calculan con SQL agregado sobre TODO el
+    filtro (no solo la pagina). El detalle de lotes incluido es la primera
+    pagina; para recorrer el resto usar GET /api/lotes/vencidos/lotes.
+
     Query Parameters:
         con_stock (bool): true = solo vencidos con stock > 0 (default: true)
         desde (date): Fecha inicio del periodo (formato: YYYY-MM-DD)
         hasta (date): Fecha fin del periodo (formato: YYYY-MM-DD)
-        limit (int): Maximo de resultados (default: 100)
+        limit (int): Maximo de lotes en el detalle (default: 100, max: 500)
         offset (int): Paginacion (default: 0)
 
     Returns:
@@ -793,95 +779,180 @@ def reporte_vencidos():
                 "lotes_vencidos": [...],
                 "total_lotes": 12,
                 "cantidad_total_afectada": 340,
-                "valor_perdido_estimado": 850.50,
-                "productos_unicos_afectados": 8
+                "valor_perdido_estimado": "850.50",
+                "productos_unicos_afectados": 8,
+                "desglose": {
+                    "por_proveedor": [{"proveedor": "Backus", "total_lotes": 4, ...}],
+                    "por_categoria": [{"categoria": "Lacteos", ...}],
+                    "por_mes": [{"mes": "2025-01", ...}]
+                },
+                "siguiente_cursor": "2025-01-31:418"
             }
         }
     """
     try:
         # ========== PARAMETROS ==========
-        con_stock = request.args.get('con_stock', 'true').lower() == 'true'
-        desde = request.args.get('desde')
-        hasta = request.args.get('hasta')
-        limit = request.args.get('limit', default=100, type=int)
-        offset = request.args.get('offset', default=0, type=int)
+        try:
+            con_stock, desde, hasta = _parametros_vencidos()
+        except ValueError as e:
+            return error_response(str(e), status_code=400)
 
-        # ========== CONSTRUIR QUERY ==========
-        query = Lote.query.filter(Lote.fecha_vencimiento < datetime.now())
+        limit = min(max(request.args.get('limit', default=100, type=int), 1), 500)
+        offset = max(request.args.get('offset', default=0, type=int), 0)
+        hoy = date.today()
 
-        # Filtrar solo con stock
-        if con_stock:
-            query = query.filter(Lote.cantidad_actual > 0)
+        # ========== TOTALES Y DESGLOSE (SQL agregado) ==========
+        resumen = vencimiento_service.resumen_vencidos(con_stock, desde, hasta, hoy=hoy)
 
-        # Filtrar por rango de fechas de vencimiento
-        if desde:
-            try:
-                fecha_desde = datetime.strptime(desde, '%Y-%m-%d')
-                query = query.filter(Lote.fecha_vencimiento >= fecha_desde)
-            except ValueError:
-                return error_response(
-                    'Formato de fecha invalido para "desde". Use YYYY-MM-DD',
-                    status_code=400
-                )
+        # ========== DETALLE (una pagina) ==========
+        pagina = vencimiento_service.lotes_vencidos_pagina(
+            con_stock, desde, hasta, limit=limit, offset=offset, hoy=hoy
+        )
 
-        if hasta:
-            try:
-                fecha_hasta = datetime.strptime(hasta, '%Y-%m-%d')
-                query = query.filter(Lote.fecha_vencimiento <= fecha_hasta)
-            except ValueError:
-                return error_response(
-                    'Formato de fecha invalido para "hasta". Use YYYY-MM-DD',
-                    status_code=400
-                )
+        # ========== RESPUESTA EXITOSA ==========
+        return success_response(
+            data={
+                'lotes_vencidos': pagina['lotes'],
+                **resumen,
+                'limit': limit,
+                'offset': offset,
+                'siguiente_cursor': _cursor_vencidos(pagina['siguiente'])
+            },
+            message=f"{resumen['total_lotes']} lotes vencidos encontrados"
+        )
 
-        # Ordenar por fecha de vencimiento (mas antiguo primero)
-        query = query.order_by(Lote.fecha_vencimiento.asc())
+    except Exception as e:
+        return error_response(
+            message='Error al generar reporte de vencidos',
+            status_code=500,
+            errors={'exception': str(e)}
+        )
 
-        # Contar total
-        total = query.count()
 
-        # Aplicar paginacion
-        lotes_vencidos = query.limit(limit).offset(offset).all()
+# ==================================================================================
+# ENDPOINT 7: GET /api/lotes/vencidos/lotes - Detalle de vencidos (keyset)
+# ==================================================================================
 
-        # ========== CALCULAR METRICAS ==========
-        cantidad_total_afectada = 0
-        valor_perdido_estimado = Decimal('0')
-        productos_unicos = set()
+@lotes_bp.route('/vencidos/lotes', methods=['GET'])
+@jwt_required()
+def lotes_vencidos():
+    """
+    Recorre los lotes vencidos con paginacion keyset
 
-        lotes_dict = []
-        for lote in lotes_vencidos:
-            # BUG 3 CORREGIDO: Incluir información del producto
-            lote_data = lote.to_dict(include_producto=True)
-            lote_data['dias_vencido'] = abs(lote.dias_hasta_vencimiento)
+    Orden: fecha_vencimiento, id. Cada pagina retorna 'siguiente_cursor';
+    se envia como ?despues=<cursor> para pedir la pagina siguiente
+    (null = ultima pagina). A diferencia de offset, el costo de cada
+    pagina no crece con la posicion.
 
-            # Calcular valor perdido (cantidad * precio_compra)
-            valor_lote_perdido = lote.cantidad_actual * lote.precio_compra_lote
-            lote_data['valor_perdido'] = str(valor_lote_perdido)
+    Query Parameters:
+        con_stock, desde, hasta: Igual que /vencidos
+        despues (str): Cursor 'YYYY-MM-DD:id' de la pagina anterior
+        limit (int): Lotes por pagina (default: 100, max: 500)
 
-            lotes_dict.append(lote_data)
+    Returns:
+        200: lotes, siguiente_cursor
+        400: Parametros invalidos
+    """
+    try:
+        try:
+            con_stock, desde, hasta = _parametros_vencidos()
+        except ValueError as e:
+            return error_response(str(e), status_code=400)
 
-            # Sumar metricas
-            cantidad_total_afectada += lote.cantidad_actual
-            valor_perdido_estimado += valor_lote_perdido
-            productos_unicos.add(lote.producto_id)
+        limit = min(max(request.args.get('limit', default=100, type=int), 1), 500)
+
+        despues = None
+        cursor = request.args.get('despues')
+        if cursor:
+            try:
+                fecha, lote_id = cursor.split(':')
+                despues = (datetime.strptime(fecha, '%Y-%m-%d').date(), int(lote_id))
+            except ValueError:
+                return error_response('Cursor invalido para "despues"', status_code=400)
+
+        pagina = vencimiento_service.lotes_vencidos_pagina(
+            con_stock, desde, hasta, despues=despues, limit=limit
+        )
 
-        # ========== RESPUESTA EXITOSA ==========
         return success_response(
             data={
-                'lotes_vencidos': lotes_dict,
-                'total_lotes': total,
-                'cantidad_total_afectada': cantidad_total_afectada,
-                'valor_perdido_estimado': str(valor_perdido_estimado),
-                'productos_unicos_afectados': len(productos_unicos),
+                'lotes': pagina['lotes'],
                 'limit': limit,
-                'offset': offset
+                'siguiente_cursor': _cursor_vencidos(pagina['siguiente'])
             },
-            message=f'{total} lotes vencidos encontrados'
+            message=f"{len(pagina['lotes'])} lotes vencidos"
         )
 
     except Exception as e:
         return error_response(
-            message='Error al generar reporte de vencidos',
+            message='Error al listar lotes vencidos',
+            status_code=500,
+            errors={'exception': str(e)}
+        )
+
+
+# ==================================================================================
+# ENDPOINT 8: POST /api/lotes/recepcion - Recepcion de mercaderia (muchos lotes)
+# ==================================================================================
+
+@lotes_bp.route('/recepcion', methods=['POST'])
+@jwt_required()
+def registrar_recepcion():
+    """
+    Registrar una guia/factura de proveedor completa en una sola transaccion
+
+    Equivale a llamar POST /api/lotes por cada linea, pero valida todo con
+    consultas en bloque, inserta lotes y movimientos en bloque, actualiza el
+    stock con un unico UPDATE y hace un solo commit: o se registra toda la
+    recepcion o ninguna linea.
+
+    Body JSON:
+        {
+            "proveedor": "Distribuidora Lima SAC",
+            "numero_documento": "F001-000123",
+            "lineas": [
+                {
+                    "producto_id": 1,
+                    "cantidad": 48,
+                    "fecha_vencimiento": "2025-12-31",
+                    "precio_compra_lote": 2.50,
+                    "codigo_lote": "LOTE-X",          // Opcional (se genera)
+                    "ubicacion_almacen": "Estante A-3", // Opcional
+                    "notas": "..."                     // Opcional
+                },
+                ...
+            ]
+        }
+
+    Returns:
+        201: Recepcion registrada (resumen, lotes creados, stock resultante)
+        422: Errores de validacion por linea (no se registra nada)
+        500: Error interno
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        resultado = recepcion_service.registrar_recepcion(data, int(get_jwt_identity()))
+
+        return created_response(
+            data=resultado,
+            message=f"Recepcion registrada: {resultado['recepcion']['total_lineas']} lotes"
+        )
+
+    except recepcion_service.ErrorRecepcion as e:
+        db.session.rollback()
+        return validation_error_response(e.errores, 'La recepcion tiene lineas invalidas')
+
+    except IntegrityError as e:
+        db.session.rollback()
+        return conflict_response(
+            message='Error de integridad en la base de datos',
+            errors={'database': str(e.orig)}
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        return error_response(
+            message='Error al registrar la recepcion',
             status_code=500,
             errors={'exception': str(e)}
         )
@@ -3,15 +3,15 @@ Blueprint para ejecutar migraciones de base de datos
 Solo accesible para administradores
 """
 from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models.user import User
+from app.decorators.auth_decorators import login_required
+from app.utils.identidad import es_admin_vigente
 from sqlalchemy import text
 
 migrations_bp = Blueprint('migrations', __name__, url_prefix='/api/migrations')
 
 @migrations_bp.route('/update-estado-constraint', methods=['POST'])
-@jwt_required()
+@login_required
 def update_estado_constraint():
     """
     Actualiza el constraint de estado en cuadros_caja para incluir 'pendiente_cierre'
@@ -19,10 +19,7 @@ def update_estado_constraint():
     """
     try:
         # Verificar que el usuario es admin
-        current_user_id = get_jwt_identity()
-        usuario = User.query.get(current_user_id)
-
-        if not usuario or usuario.rol != 'admin':
+        if not es_admin_vigente():
             return jsonify({'error': 'No autorizado. Solo administradores pueden ejecutar migraciones.'}), 403
 
         # 1. Eliminar el constraint antiguo
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+KATITA-POS - Blueprint de Catálogo POS
+======================================
+Endpoints para que los terminales POS mantengan una copia local del catálogo
+
+Endpoints:
+- GET /api/pos/catalog                    - Snapshot completo versionado
+- GET /api/pos/catalog/changes?since=<v>  - Solo productos cambiados desde v
+
+Formato compacto:
+    Cada producto es una lista en el orden de 'columnas' (no un dict), lo que
+    reduce el tamaño del payload. Se puede pedir msgpack (?formato=msgpack) y
+    la respuesta se comprime con gzip si el cliente envía Accept-Encoding: gzip.
+"""
+
+import gzip
+from flask import Blueprint, request, current_app
+from flask_jwt_extended import jwt_required
+from app.services import catalogo_service
+from app.utils.responses import error_response, validation_error_response
+
+# msgpack es opcional: si no está instalado se sirve solo JSON
+try:
+    import msgpack
+    MSGPACK_SUPPORT = True
+except ImportError:
+    MSGPACK_SUPPORT = False
+
+pos_bp = Blueprint('pos', __name__, url_prefix='/api/pos')
+
+# No vale la pena comprimir respuestas muy pequeñas
+GZIP_MIN_BYTES = 1024
+
+
+def _respuesta_compacta(data, message):
+    """
+    Serializa la respuesta en JSON o msgpack y la comprime con gzip si aplica
+
+    Args:
+        data (dict): Datos del catálogo (incluye 'version')
+        message (str): Mensaje descriptivo
+
+    Returns:
+        Response: Respuesta Flask lista para retornar
+    """
+    payload = {
+        'success': True,
+        'message': message,
+        'data': data
+    }
+
+    formato = request.args.get('formato', 'json').lower()
+    if formato == 'msgpack':
+        cuerpo = msgpack.packb(payload, use_bin_type=True)
+        mimetype = 'application/x-msgpack'
+    else:
+        cuerpo = current_app.json.dumps_bytes(payload)
+        mimetype = 'application/json'
+
+    response = current_app.response_class(cuerpo, status=200, mimetype=mimetype)
+
+    if 'gzip' in request.headers.get('Accept-Encoding', '').lower() and len(cuerpo) >= GZIP_MIN_BYTES:
+        response.set_data(gzip.compress(cuerpo, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['X-Catalog-Version'] = str(data['version'])
+    return response
+
+
+def _validar_formato():
+    """Retorna un error si se pidió msgpack y no está instalado"""
+    formato = request.args.get('formato', 'json').lower()
+    if formato not in ('json', 'msgpack'):
+        return validation_error_response(
+            {"formato": "Debe ser 'json' o 'msgpack'"},
+            "Formato inválido"
+        )
+    if formato == 'msgpack' and not MSGPACK_SUPPORT:
+        return error_response("Formato msgpack no disponible en este servidor", 406)
+    return None
+
+
+# ==================================================================================
+# ENDPOINT 1: GET /api/pos/catalog - Snapshot completo del catálogo
+# ==================================================================================
+
+@pos_bp.route('/catalog', methods=['GET'])
+@jwt_required()
+def obtener_catalogo():
+    """
+    Retorna el catálogo completo de productos activos para el POS
+
+    Cada fila incluye precio, stock y el lote cabeza FIFO (el que se usará en
+    la próxima venta). El terminal guarda 'version' y luego sincroniza con
+    /catalog/changes.
+
+    Query Parameters:
+        - formato: 'json' (default) o 'msgpack'
+
+    Headers:
+        - If-None-Match: versión que ya tiene el terminal (responde 304)
+
+    Returns:
+        200: Snapshot del catálogo
+        304: El terminal ya tiene la versión actual
+        406: msgpack no disponible
+        500: Error interno del servidor
+
+    Ejemplo de respuesta:
+        {
+            "success": true,
+            "message": "Catálogo obtenido",
+            "data": {
+                "version": 1532,
+                "columnas": ["id", "codigo_barras", "nombre", ...],
+                "productos": [
+                    [1, "7750182001878", "Coca Cola 500ml", "Bebidas", 3.5, 48,
+                     5, "LOTE-001", 24, "2025-12-31"]
+                ]
+            }
+        }
+    """
+    try:
+        error = _validar_formato()
+        if error:
+            return error
+
+        data = catalogo_service.obtener_snapshot()
+
+        etag = f'"catalogo-{data["version"]}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = current_app.response_class(status=304)
+            response.headers['ETag'] = etag
+            return response
+
+        response = _respuesta_compacta(
+            data, f"Catálogo obtenido ({len(data['productos'])} productos)"
+        )
+        response.headers['ETag'] = etag
+        return response
+
+    except Exception as e:
+        return error_response(f"Error al obtener catálogo: {str(e)}", 500)
+
+
+# ==================================================================================
+# ENDPOINT 2: GET /api/pos/catalog/changes - Delta desde una versión
+# ==================================================================================
+
+@pos_bp.route('/catalog/changes', methods=['GET'])
+@jwt_required()
+def obtener_cambios_catalogo():
+    """
+    Retorna solo los productos que cambiaron desde una versión del catálogo
+
+    Query Parameters:
+        - since: int (requerido, versión que tiene el terminal)
+        - formato: 'json' (default) o 'msgpack'
+
+    Returns:
+        200: Productos cambiados y eliminados
+        422: Parámetro since inválido
+        406: msgpack no disponible
+        500: Error interno del servidor
+
+    Ejemplo de respuesta:
+        {
+            "success": true,
+            "message": "2 cambios desde la versión 1530",
+            "data": {
+                "version": 1532,
+                "desde": 1530,
+                "columnas": [...],
+                "productos": [[...], [...]],
+                "eliminados": [17]
+            }
+        }
+    """
+    try:
+        error = _validar_formato()
+        if error:
+            return error
+
+        try:
+            desde = int(request.args.get('since', ''))
+            if desde < 0:
+                raise ValueError
+        except ValueError:
+            return validation_error_response(
+                {"since": "Debe ser un entero >= 0"},
+                "Versión inválida"
+            )
+
+        data = catalogo_service.obtener_cambios(desde)
+        total = len(data['productos']) + len(data['eliminados'])
+
+        return _respuesta_compacta(data, f"{total} cambios desde la versión {desde}")
+
+    except Exception as e:
+        return error_response(f"Error al obtener cambios del catálogo: {str(e)}", 500)
@@ -5,6 +5,10 @@ Blueprint para gestionar endpoints de productos (API REST)
 
 Endpoints:
 - GET    /api/products/health  - Health check del blueprint
+- POST   /api/products/barcode/batch - Búsqueda POS de varios códigos
+- POST   /api/products/import  - Importación masiva CSV/XLSX
+- GET    /api/products/import/<id> - Estado de una importación en segundo plano
+- POST   /api/products/bulk-update - Actualización masiva de precios/atributos
 - GET    /api/products         - Listar todos los productos
 - GET    /api/products/<id>    - Obtener un producto por ID
 - POST   /api/products         - Crear un nuevo producto
@@ -16,15 +20,17 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from sqlalchemy.exc import IntegrityError
 from decimal import Decimal
-import requests  # FASE 5: Para Open Food Facts API
 from app import db
 from app.models.product import Product
 from app.models.lote import Lote
+from app.services import barcode_lookup_service  # FASE 5: Open Food Facts con caché
+from app.services import product_import_service
+from app.services import product_service
 from app.utils.responses import (
     success_response, error_response, created_response,
     not_found_response, validation_error_response, conflict_response
 )
-from app.decorators.auth_decorators import login_required, role_required
+from app.decorators.auth_decorators import login_required, role_required, admin_required
 
 # Crear el blueprint
 products_bp = Blueprint('products', __name__, url_prefix='/api/products')
@@ -398,6 +404,41 @@ def listar_productos():
 # ENDPOINT ESPECIAL PARA POS: GET /api/products/barcode/<codigo>
 # ============================================================================
 
+def _datos_producto_pos(producto, lotes):
+    """
+    Construye el payload POS de un producto con sus lotes FIFO
+
+    Compartido por la búsqueda individual y la búsqueda en lote para que
+    ambas devuelvan exactamente la misma estructura por producto.
+
+    Args:
+        producto (Product): Producto encontrado
+        lotes (list): Lotes disponibles en orden FIFO
+
+    Returns:
+        dict: producto.to_dict() + lotes_disponibles + lote_siguiente_fifo
+    """
+    # Preparar informacion detallada de lotes con datos de vencimiento
+    lotes_data = []
+    for lote in lotes:
+        lotes_data.append({
+            'id': lote.id,
+            'codigo_lote': lote.codigo_lote,
+            'cantidad_actual': lote.cantidad_actual,
+            'fecha_vencimiento': lote.fecha_vencimiento.isoformat(),
+            'dias_hasta_vencimiento': lote.dias_hasta_vencimiento,
+            'esta_vencido': lote.esta_vencido,
+            'esta_por_vencer': lote.esta_por_vencer
+        })
+
+    data = producto.to_dict()
+    data['lotes_disponibles'] = lotes_data
+
+    # lote_siguiente_fifo: el primero del array (el que se usara en la venta)
+    data['lote_siguiente_fifo'] = lotes_data[0] if lotes_data else None
+    return data
+
+
 @products_bp.route('/barcode/<codigo_barras>', methods=['GET'])
 @jwt_required()
 def buscar_por_codigo_barras(codigo_barras):
@@ -496,28 +537,11 @@ def buscar_por_codigo_barras(codigo_barras):
         # Obtener lotes disponibles ordenados FIFO (primero que vence, primero que sale)
         lotes = Lote.lotes_fifo(producto.id)
 
-        # Preparar informacion detallada de lotes con datos de vencimiento
-        lotes_data = []
-        for lote in lotes:
-            lotes_data.append({
-                'id': lote.id,
-                'codigo_lote': lote.codigo_lote,
-                'cantidad_actual': lote.cantidad_actual,
-                'fecha_vencimiento': lote.fecha_vencimiento.isoformat(),
-                'dias_hasta_vencimiento': lote.dias_hasta_vencimiento,
-                'esta_vencido': lote.esta_vencido,
-                'esta_por_vencer': lote.esta_por_vencer
-            })
-
         # Construir respuesta completa con producto y lotes
-        data = producto.to_dict()
-        data['lotes_disponibles'] = lotes_data
-
-        # lote_siguiente_fifo: el primero del array (el que se usara en la venta)
-        data['lote_siguiente_fifo'] = lotes_data[0] if lotes_data else None
+        data = _datos_producto_pos(producto, lotes)
 
         # Si no hay lotes disponibles, agregar warning (no es error, solo informativo)
-        if not lotes_data:
+        if not data['lotes_disponibles']:
             response_data = success_response(data, "Producto encontrado")
             # Agregar warning al response JSON
             json_response = response_data[0].get_json()
@@ -530,6 +554,334 @@ def buscar_por_codigo_barras(codigo_barras):
         return error_response(f"Error al buscar producto: {str(e)}", 500)
 
 
+# ============================================================================
+# ENDPOINT ESPECIAL PARA POS: POST /api/products/barcode/batch
+# ============================================================================
+
+# Máximo de códigos por petición (un escaneo de inventario típico)
+MAX_CODIGOS_BATCH = 200
+
+
+@products_bp.route('/barcode/batch', methods=['POST'])
+@jwt_required()
+def buscar_por_codigos_barras():
+    """
+    Buscar varios productos por codigo de barras en una sola peticion
+
+    Pensado para la toma de inventario y el escaner de checkout masivo:
+    en lugar de N llamadas a /barcode/<codigo> (N round trips y 2N queries)
+    resuelve todos los productos con un solo IN y todos sus lotes FIFO con
+    una sola consulta con ROW_NUMBER().
+
+    Request Body:
+        {
+            "codigos": ["7750182001878", "7755139002015", ...]  (max 200)
+        }
+
+    Returns:
+        200 OK: Mapa codigo -> resultado
+        422: Lista de codigos invalida
+        500 Internal Server Error: Error del servidor
+
+    Cada resultado tiene:
+        - estado: 'encontrado' | 'no_encontrado' | 'inactivo'
+        - data: mismo payload que GET /barcode/<codigo> (null si no encontrado)
+        - warning: "Producto sin stock disponible" (solo si no hay lotes)
+
+    Ejemplo de respuesta:
+        {
+            "success": true,
+            "message": "2 de 3 productos encontrados",
+            "data": {
+                "resultados": {
+                    "7750182001878": {"estado": "encontrado", "data": {...}},
+                    "7755139002015": {"estado": "inactivo", "data": null},
+                    "0000000000000": {"estado": "no_encontrado", "data": null}
+                },
+                "total": 3,
+                "encontrados": 1,
+                "inactivos": 1,
+                "no_encontrados": 1
+            }
+        }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        codigos = data.get('codigos')
+
+        if not isinstance(codigos, list) or not codigos:
+            return validation_error_response(
+                {"codigos": "Debe ser una lista no vacía de códigos de barras"},
+                "Datos inválidos"
+            )
+        if len(codigos) > MAX_CODIGOS_BATCH:
+            return validation_error_response(
+                {"codigos": f"Máximo {MAX_CODIGOS_BATCH} códigos por petición"},
+                "Demasiados códigos"
+            )
+
+        # Normalizar y quitar duplicados conservando el orden
+        codigos = list(dict.fromkeys(str(c).strip() for c in codigos if c))
+
+        # 1 query: todos los productos
+        productos = Product.query.filter(Product.codigo_barras.in_(codigos)).all()
+        por_codigo = {p.codigo_barras: p for p in productos}
+
+        # 1 query: lotes FIFO de los productos activos
+        activos = [p.id for p in productos if p.activo]
+        lotes_por_producto = Lote.lotes_fifo_por_productos(activos)
+
+        resultados = {}
+        contadores = {'encontrado': 0, 'inactivo': 0, 'no_encontrado': 0}
+
+        for codigo in codigos:
+            producto = por_codigo.get(codigo)
+
+            if producto is None:
+                resultado = {'estado': 'no_encontrado', 'data': None}
+            elif not producto.activo:
+                resultado = {'estado': 'inactivo', 'data': None}
+            else:
+                resultado = {
+                    'estado': 'encontrado',
+                    'data': _datos_producto_pos(producto, lotes_por_producto[producto.id])
+                }
+                if not resultado['data']['lotes_disponibles']:
+                    resultado['warning'] = "Producto sin stock disponible"
+
+            contadores[resultado['estado']] += 1
+            resultados[codigo] = resultado
+
+        return success_response(
+            {
+                'resultados': resultados,
+                'total': len(codigos),
+                'encontrados': contadores['encontrado'],
+                'inactivos': contadores['inactivo'],
+                'no_encontrados': contadores['no_encontrado']
+            },
+            f"{contadores['encontrado']} de {len(codigos)} productos encontrados"
+        )
+
+    except Exception as e:
+        return error_response(f"Error al buscar productos: {str(e)}", 500)
+
+
+# ============================================================================
+# ENDPOINT: POST /api/products/import - Importación masiva CSV/XLSX
+# ============================================================================
+
+@products_bp.route('/import', methods=['POST'])
+@login_required
+@admin_required
+def importar_productos():
+    """
+    Importa (crea o actualiza) productos desde un archivo CSV o XLSX
+
+    Solo administradores. El archivo se procesa en streaming y por bloques;
+    cada bloque se valida, verifica unicidad con una sola consulta y se
+    guarda con un INSERT ... ON CONFLICT (upsert por codigo_barras).
+
+    Form Data (multipart):
+        - archivo: .csv o .xlsx con encabezados
+            requeridos: codigo_barras, nombre, categoria, precio_compra, precio_venta
+            opcionales: stock_minimo, descripcion, imagen_url
+        - actualizar_existentes: 'true' (default) o 'false'
+        - async: 'true' para forzar segundo plano
+
+    NOTA:
+        - El stock NO se importa (se registra con lotes)
+        - Archivos mayores a IMPORT_BACKGROUND_BYTES se procesan en segundo
+          plano y se consulta el estado en GET /api/products/import/<id>
+
+    Returns:
+        200: Importación completada con reporte por fila
+        202: Importación en segundo plano (retorna trabajo_id)
+        403: Usuario no es administrador
+        422: Archivo faltante, formato no soportado o columnas faltantes
+        500: Error interno del servidor
+
+    Ejemplo de respuesta:
+        {
+            "success": true,
+            "message": "Importación completada: 120 creados, 30 actualizados, 2 con error",
+            "data": {
+                "total_filas": 152,
+                "creados": 120,
+                "actualizados": 30,
+                "filas_con_error": 2,
+                "errores": [
+                    {"fila": 7, "codigo_barras": "123", "errores": ["..."]}
+                ],
+                "errores_truncados": false,
+                "duracion_segundos": 0.41
+            }
+        }
+    """
+    import os
+    import tempfile
+    from flask import current_app
+
+    ruta = None
+    try:
+        archivo = request.files.get('archivo')
+        if archivo is None or not archivo.filename:
+            return validation_error_response({"archivo": "Campo requerido"}, "Archivo faltante")
+
+        extension = archivo.filename.rsplit('.', 1)[-1].lower() if '.' in archivo.filename else ''
+        if extension not in ('csv', 'xlsx'):
+            return validation_error_response(
+                {"archivo": "Formato no soportado. Use CSV o XLSX"},
+                "Formato inválido"
+            )
+
+        actualizar_existentes = request.form.get('actualizar_existentes', 'true').lower() == 'true'
+        forzar_async = request.form.get('async', 'false').lower() == 'true'
+
+        # Guardar a disco en streaming (no se carga el archivo completo en memoria)
+        descriptor, ruta = tempfile.mkstemp(suffix=f'.{extension}', prefix='katita-import-')
+        with os.fdopen(descriptor, 'wb') as destino:
+            archivo.save(destino)
+
+        tamano = os.path.getsize(ruta)
+        if forzar_async or tamano > current_app.config['IMPORT_BACKGROUND_BYTES']:
+            trabajo_id = product_import_service.iniciar_trabajo(
+                current_app._get_current_object(), ruta, extension, actualizar_existentes
+            )
+            ruta = None  # El hilo de fondo se encarga de borrar el archivo
+            return success_response(
+                {"trabajo_id": trabajo_id, "estado": "en_proceso"},
+                "Importación iniciada en segundo plano",
+                202
+            )
+
+        reporte = product_import_service.importar_productos(ruta, extension, actualizar_existentes)
+
+        return success_response(
+            reporte,
+            f"Importación completada: {reporte['creados']} creados, "
+            f"{reporte['actualizados']} actualizados, {reporte['filas_con_error']} con error"
+        )
+
+    except ValueError as e:
+        db.session.rollback()
+        return validation_error_response({"archivo": str(e)}, "Archivo inválido")
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Error al importar productos: {str(e)}", 500)
+    finally:
+        if ruta:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+
+@products_bp.route('/import/<trabajo_id>', methods=['GET'])
+@jwt_required()
+def estado_importacion(trabajo_id):
+    """
+    Consulta el estado de una importación en segundo plano
+
+    Returns:
+        200: Estado del trabajo ('en_proceso', 'completado' con reporte, 'fallido')
+        404: Trabajo no encontrado
+    """
+    trabajo = product_import_service.obtener_trabajo(trabajo_id)
+    if trabajo is None:
+        return not_found_response(f"Trabajo de importación '{trabajo_id}' no encontrado")
+    return success_response(trabajo, "Estado de la importación")
+
+
+# ============================================================================
+# ENDPOINT: POST /api/products/bulk-update - Actualización masiva
+# ============================================================================
+
+@products_bp.route('/bulk-update', methods=['POST'])
+@login_required
+@admin_required
+def actualizar_productos_masivo():
+    """
+    Actualiza precios/atributos de muchos productos con un solo UPDATE
+
+    Solo administradores. Pensado para reajustar una categoría completa
+    tras un aumento del proveedor sin editar producto por producto.
+
+    Request Body:
+        {
+            "filtro": {                          (al menos un criterio)
+                "categoria": "Bebidas",
+                "ids": [1, 2, 3],
+                "codigos_barras": ["7750182001878"],
+                "solo_activos": true
+            },
+            "operacion": {
+                "precio_campo": "precio_venta",  (o "precio_compra")
+                "precio_valor": 3.50,            (fijar precio) o
+                "precio_porcentaje": 8,          (ajustar en %)
+                "redondeo": 0.10,                (múltiplo del nuevo precio)
+                "activo": true,
+                "stock_minimo": 10
+            },
+            "simular": false                     (true: solo valida y cuenta)
+        }
+
+    NOTA:
+        - Si algún producto quedaría con precio_venta <= precio_compra
+          no se modifica NINGUNO (se listan ejemplos)
+        - Se registra una sola auditoría por operación
+        - Se invalida el catálogo POS de todos los productos afectados
+
+    Returns:
+        200: Actualización aplicada (o simulada)
+        403: Usuario no es administrador
+        422: Filtro/operación inválidos o precios incoherentes
+        500: Error interno del servidor
+
+    Ejemplo de respuesta:
+        {
+            "success": true,
+            "message": "42 productos actualizados",
+            "data": {
+                "filas_afectadas": 42,
+                "simulado": false,
+                "operacion_id": 7,
+                "version_catalogo": 1580
+            }
+        }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        filtro = data.get('filtro') or {}
+        operacion = data.get('operacion') or {}
+
+        if not isinstance(filtro, dict) or not isinstance(operacion, dict):
+            return validation_error_response(
+                {"request": "filtro y operacion deben ser objetos"},
+                "Datos inválidos"
+            )
+
+        resultado = product_service.actualizar_productos_masivo(
+            filtro,
+            operacion,
+            usuario_id=int(get_jwt_identity()),
+            simular=bool(data.get('simular', False))
+        )
+
+        verbo = 'se actualizarían' if resultado['simulado'] else 'actualizados'
+        return success_response(resultado, f"{resultado['filas_afectadas']} productos {verbo}")
+
+    except product_service.ErrorActualizacionMasiva as e:
+        db.session.rollback()
+        errores = dict(e.errores)
+        if e.productos_invalidos:
+            errores['productos_invalidos'] = e.productos_invalidos
+        return validation_error_response(errores, "Actualización masiva inválida")
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Error en actualización masiva: {str(e)}", 500)
+
+
 # ============================================================================
 # ENDPOINT 3: GET /api/products/<id> - Obtener un producto por ID
 # ============================================================================
@@ -744,6 +1096,10 @@ def buscar_producto_por_barcode(barcode):
     Permite auto-completar datos del producto (nombre, foto, marca, categoría)
     cuando el usuario escanea o ingresa un código de barras.
 
+    Los resultados (incluidos los "no encontrado") se guardan en la tabla
+    cache_codigos_barras con TTL, y las búsquedas simultáneas del mismo código
+    comparten una sola consulta al proveedor.
+
     Args:
         barcode (str): Código de barras del producto (8-13 dígitos)
 
@@ -765,9 +1121,9 @@ def buscar_producto_por_barcode(barcode):
             "mensaje": "Producto no encontrado en Open Food Facts"
         }
     """
-    try:
-        from flask import current_app
+    from flask import current_app
 
+    try:
         # Validar que el código de barras tenga longitud válida
         if not barcode or len(barcode) < 8 or len(barcode) > 13:
             return jsonify({
@@ -775,58 +1131,43 @@ def buscar_producto_por_barcode(barcode):
                 'mensaje': 'Código de barras inválido. Debe tener entre 8 y 13 dígitos.'
             }), 400
 
-        # Buscar en Open Food Facts API
-        url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
-        current_app.logger.info(f"Buscando producto en Open Food Facts: {barcode}")
-
-        response = requests.get(url, timeout=5)
-
-        if response.status_code == 200:
-            data = response.json()
-
-            # Verificar si el producto fue encontrado
-            if data.get('status') == 1:
-                producto = data.get('product', {})
-
-                # Extraer información relevante
-                nombre = producto.get('product_name', '') or producto.get('product_name_es', '')
-                foto_url = producto.get('image_url', '') or producto.get('image_front_url', '')
-                marca = producto.get('brands', '')
-
-                # Categorías en Open Food Facts vienen como tags
-                categorias = producto.get('categories_tags', [])
-                categoria = categorias[0].replace('en:', '') if categorias else None
+        # Buscar en caché local y, si no está, en el proveedor (Open Food Facts)
+        resultado = barcode_lookup_service.buscar_codigo(barcode)
+        origen = 'caché' if resultado['cache'] else 'proveedor'
 
-                current_app.logger.info(f"✓ Producto encontrado: {nombre}")
+        if resultado['encontrado']:
+            datos = resultado['datos']
+            current_app.logger.info(f"✓ Producto encontrado ({origen}): {datos['nombre']}")
 
-                return jsonify({
-                    'encontrado': True,
-                    'nombre': nombre,
-                    'foto_url': foto_url,
-                    'marca': marca,
-                    'categoria': categoria,
-                    'barcode': barcode
-                })
-            else:
-                current_app.logger.info(f"Producto no encontrado en Open Food Facts: {barcode}")
-                return jsonify({
-                    'encontrado': False,
-                    'mensaje': 'Producto no encontrado en Open Food Facts. Puedes registrarlo manualmente.'
-                })
-        else:
-            current_app.logger.warning(f"Error en API Open Food Facts: {response.status_code}")
             return jsonify({
-                'encontrado': False,
-                'mensaje': 'Error al consultar Open Food Facts. Intenta nuevamente.'
-            }), 503
+                'encontrado': True,
+                'nombre': datos['nombre'],
+                'foto_url': datos['foto_url'],
+                'marca': datos['marca'],
+                'categoria': datos['categoria'],
+                'barcode': barcode
+            })
+
+        current_app.logger.info(f"Producto no encontrado en Open Food Facts ({origen}): {barcode}")
+        return jsonify({
+            'encontrado': False,
+            'mensaje': 'Producto no encontrado en Open Food Facts. Puedes registrarlo manualmente.'
+        })
 
-    except requests.Timeout:
+    except barcode_lookup_service.ProveedorTimeout:
         current_app.logger.error("Timeout al consultar Open Food Facts API")
         return jsonify({
             'encontrado': False,
             'mensaje': 'Timeout al buscar producto. Verifica tu conexión.'
         }), 504
 
+    except barcode_lookup_service.ProveedorNoDisponible as e:
+        current_app.logger.warning(f"Error en API Open Food Facts: {e}")
+        return jsonify({
+            'encontrado': False,
+            'mensaje': 'Error al consultar Open Food Facts. Intenta nuevamente.'
+        }), 503
+
     except Exception as e:
         current_app.logger.error(f"Error buscando producto: {str(e)}")
         return jsonify({
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+KATITA-POS - Blueprint de Sistema
+=================================
+Métricas operativas del backend (solo administradores)
+
+Endpoints:
+- GET  /api/sistema/sync           - Métricas del worker y estado de la cola
+- POST /api/sistema/sync/ejecutar  - Vaciar la cola de sincronización ahora
+- GET  /api/sistema/sync/contadores - Contadores de stock de este nodo
+- POST /api/sistema/sync/contadores - Fusionar contadores recibidos de otro nodo
+- GET  /api/sistema/db-pool        - Ocupación y esperas del pool de conexiones
+"""
+
+from datetime import datetime
+from flask import Blueprint, request
+from app import db
+from app.services import sync_service, replicacion_stock_service
+from app.utils.pool_postgres import obtener_metricas_pool
+from app.utils.responses import (
+    success_response, error_response, validation_error_response
+)
+from app.decorators.auth_decorators import login_required, admin_required
+
+sistema_bp = Blueprint('sistema', __name__, url_prefix='/api/sistema')
+
+
+@sistema_bp.route('/sync', methods=['GET'])
+@login_required
+@admin_required
+def metricas_sync():
+    """
+    Métricas del worker de sincronización en este proceso
+
+    Returns:
+        200: lotes, enviados, rechazados, remoto_no_disponible, caidas_consecutivas,
+             registros_por_segundo, ultimo_lote_at, cola
+        403: Usuario no es administrador
+    """
+    try:
+        return success_response(sync_service.obtener_metricas(), "Métricas de sincronización")
+
+    except Exception as e:
+        return error_response(f"Error al obtener métricas: {str(e)}", 500)
+
+
+@sistema_bp.route('/sync/ejecutar', methods=['POST'])
+@login_required
+@admin_required
+def ejecutar_sync():
+    """
+    Vacía la cola de sincronización en esta petición
+
+    Returns:
+        200: lotes, enviados, rechazados, agotados
+        403: Usuario no es administrador
+    """
+    try:
+        totales = sync_service.vaciar_cola()
+        return success_response(totales, f"{totales['enviados']} registros sincronizados")
+
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Error al sincronizar: {str(e)}", 500)
+
+
+@sistema_bp.route('/sync/contadores', methods=['GET'])
+@login_required
+@admin_required
+def exportar_contadores():
+    """
+    Contadores de stock por nodo para que otro nodo los fusione
+
+    Query Parameters:
+        desde (datetime): Solo los modificados desde este instante (ISO 8601)
+
+    Returns:
+        200: nodo, contadores
+        400: Fecha inválida
+        403: Usuario no es administrador
+    """
+    try:
+        desde = request.args.get('desde')
+        try:
+            desde = datetime.fromisoformat(desde) if desde else None
+        except ValueError:
+            return error_response('Parametro "desde" debe tener formato ISO 8601', 400)
+
+        contadores = replicacion_stock_service.exportar_contadores(desde=desde)
+        return success_response(
+            {'nodo': replicacion_stock_service.nodo_actual(), 'contadores': contadores},
+            f"{len(contadores)} contadores"
+        )
+
+    except Exception as e:
+        return error_response(f"Error al exportar contadores: {str(e)}", 500)
+
+
+@sistema_bp.route('/sync/contadores', methods=['POST'])
+@login_required
+@admin_required
+def fusionar_contadores():
+    """
+    Fusiona contadores de stock de otro nodo (idempotente)
+
+    Body:
+        {"contadores": [{"lote_id": 1, "nodo": "tienda-1",
+                         "incrementos": 20, "decrementos": 7}]}
+
+    Returns:
+        200: contadores, lotes_actualizados, conflictos, lotes_desconocidos
+        403: Usuario no es administrador
+        422: Contadores inválidos
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        contadores = data.get('contadores')
+        if not isinstance(contadores, list):
+            return validation_error_response({'contadores': 'Debe ser una lista'})
+
+        try:
+            resultado = replicacion_stock_service.fusionar_contadores(contadores)
+        except ValueError as e:
+            return validation_error_response({'contadores': str(e)})
+
+        return success_response(resultado, f"{resultado['contadores']} contadores fusionados")
+
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Error al fusionar contadores: {str(e)}", 500)
+
+
+@sistema_bp.route('/db-pool', methods=['GET'])
+@login_required
+@admin_required
+def metricas_pool():
+    """
+    Ocupación del pool de conexiones y esperas acumuladas en este proceso
+
+    Returns:
+        200: dialecto, pool (clase, tamano, en_uso, libres, overflow, max_overflow),
+             checkouts, espera_promedio_ms, espera_max_ms, esperas_lentas,
+             timeouts, pico_en_uso, conexiones_nuevas, conexiones_invalidadas
+        403: Usuario no es administrador
+    """
+    try:
+        return success_response(obtener_metricas_pool(db.engine), "Métricas del pool de conexiones")
+
+    except Exception as e:
+        return error_response(f"Error al obtener métricas del pool: {str(e)}", 500)
@@ -10,6 +10,7 @@ from datetime import datetime
 from app import db
 from app.models.user import User
 from app.decorators.auth_decorators import login_required, role_required
+from app.services import auth_service
 import re
 
 usuarios_bp = Blueprint('usuarios', __name__, url_prefix='/api/usuarios')
@@ -395,6 +396,7 @@ def cambiar_password(user_id):
         usuario.desbloquear()
 
         db.session.commit()
+        auth_service.limpiar_intentos(usuario.id)
 
         return jsonify({
             'success': True,
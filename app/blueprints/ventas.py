@@ -24,39 +24,24 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func, and_
 from decimal import Decimal
 from datetime import datetime, timezone, date, timedelta
-from io import BytesIO
-import matplotlib
-matplotlib.use('Agg')  # Backend sin GUI
-import matplotlib.pyplot as plt
-from matplotlib.patches import Wedge
 import os
 
 # Zona horaria de Perú (UTC-5)
 PERU_TZ = timezone(timedelta(hours=-5))
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image as RLImage, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-from reportlab.pdfgen import canvas
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.chart import BarChart, PieChart, Reference
-from openpyxl.chart.label import DataLabelList
 from app import db
 from app.models.venta import Venta
 from app.models.detalle_venta import DetalleVenta
 from app.models.product import Product
 from app.models.lote import Lote
 from app.models.movimiento_stock import MovimientoStock
-from app.models.user import User
 from app.models.cuadro_caja import CuadroCaja
 from app.utils.responses import (
     success_response, error_response, created_response,
     not_found_response, validation_error_response
 )
 from app.decorators.auth_decorators import login_required, role_required
+from app.decorators.db_decorators import solo_lectura
+from app.utils.identidad import current_user
 
 # Crear Blueprint con prefijo /api/ventas
 ventas_bp = Blueprint('ventas', __name__, url_prefix='/api/ventas')
@@ -194,12 +179,12 @@ def procesar_venta():
             print('='*70 + '\n')
             return validation_error_response(errores)
 
-        # Validar vendedor existe y esta activo
-        vendedor = User.query.get(vendedor_id)
+        # Validar vendedor existe y esta activo (identidad cacheada, sin consulta por venta)
+        vendedor = current_user
         if not vendedor:
             return not_found_response(f"Vendedor con ID {vendedor_id} no encontrado")
 
-        if not vendedor.activo:
+        if not vendedor['activo']:
             return error_response('El vendedor no esta activo', status_code=400)
 
         # Validar metodo de pago
@@ -1060,6 +1045,7 @@ def cancelar_venta(id):
 
 @ventas_bp.route('/reportes/resumen', methods=['GET'])
 @jwt_required()
+@solo_lectura
 def resumen_ventas():
     """
     Obtener resumen estadistico de ventas
@@ -1327,113 +1313,13 @@ def resumen_ventas():
         )
 
 
-# ==================================================================================
-# FUNCIONES AUXILIARES PARA GRÁFICOS
-# ==================================================================================
-
-def crear_grafico_metodos_pago(metodos_data, output_path):
-    """Crea un gráfico de pie para métodos de pago"""
-    fig, ax = plt.subplots(figsize=(6, 4), facecolor='white')
-
-    metodos = [m['metodo'] for m in metodos_data]
-    totales = [float(m['total']) for m in metodos_data]
-
-    colors_chart = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444']
-    explode = [0.05] * len(metodos)  # Separar un poco cada slice
-
-    wedges, texts, autotexts = ax.pie(
-        totales,
-        labels=metodos,
-        autopct='%1.1f%%',
-        colors=colors_chart[:len(metodos)],
-        explode=explode,
-        shadow=True,
-        startangle=90,
-        textprops={'fontsize': 10, 'weight': 'bold'}
-    )
-
-    # Mejorar el texto de porcentajes
-    for autotext in autotexts:
-        autotext.set_color('white')
-        autotext.set_fontsize(11)
-        autotext.set_weight('bold')
-
-    ax.set_title('Distribución por Método de Pago', fontsize=13, weight='bold', pad=15)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-
-def crear_grafico_top_productos(top_productos, output_path):
-    """Crea un gráfico de barras horizontales para top productos"""
-    fig, ax = plt.subplots(figsize=(7, 5), facecolor='white')
-
-    # Tomar solo top 5 para que se vea mejor
-    top_5 = top_productos[:5]
-    nombres = [p['nombre'][:25] + '...' if len(p['nombre']) > 25 else p['nombre'] for p in top_5]
-    totales = [float(p['total']) for p in top_5]
-
-    # Invertir para que el #1 esté arriba
-    nombres.reverse()
-    totales.reverse()
-
-    bars = ax.barh(nombres, totales, color='#10b981', edgecolor='#059669', linewidth=1.5)
-
-    # Agregar valores al final de cada barra
-    for i, (bar, val) in enumerate(zip(bars, totales)):
-        ax.text(val + max(totales) * 0.02, i, f'S/ {val:.2f}',
-                va='center', fontsize=10, weight='bold', color='#047857')
-
-    ax.set_xlabel('Total Vendido (S/)', fontsize=11, weight='bold')
-    ax.set_title('Top 5 Productos Más Vendidos', fontsize=13, weight='bold', pad=15)
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.grid(axis='x', alpha=0.3, linestyle='--')
-
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-
-def crear_grafico_vendedores(ventas_por_vendedor, output_path):
-    """Crea un gráfico de barras para ventas por vendedor"""
-    if not ventas_por_vendedor or len(ventas_por_vendedor) == 0:
-        return None
-
-    fig, ax = plt.subplots(figsize=(7, 4), facecolor='white')
-
-    vendedores = [v['vendedor_nombre'][:20] for v in ventas_por_vendedor]
-    totales = [float(v['total']) for v in ventas_por_vendedor]
-
-    bars = ax.bar(vendedores, totales, color='#3b82f6', edgecolor='#1e40af', linewidth=1.5)
-
-    # Agregar valores encima de cada barra
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height + max(totales) * 0.02,
-                f'S/ {height:.2f}',
-                ha='center', va='bottom', fontsize=10, weight='bold')
-
-    ax.set_ylabel('Total Vendido (S/)', fontsize=11, weight='bold')
-    ax.set_title('Ventas por Vendedor', fontsize=13, weight='bold', pad=15)
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.grid(axis='y', alpha=0.3, linestyle='--')
-
-    # Rotar etiquetas si son muchas
-    if len(vendedores) > 3:
-        plt.xticks(rotation=45, ha='right')
-
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-
-    return output_path
-
 # ==================================================================================
 # ENDPOINT: GET /api/ventas/reportes/pdf - Exportar reporte a PDF PROFESIONAL
 # ==================================================================================
 
 @ventas_bp.route('/reportes/pdf', methods=['GET'])
 @jwt_required()
+@solo_lectura
 def exportar_reporte_pdf():
     """
     Genera un reporte de ventas PROFESIONAL en formato PDF con:
@@ -1620,6 +1506,7 @@ def exportar_reporte_pdf():
 
 @ventas_bp.route('/reportes/excel', methods=['GET'])
 @jwt_required()
+@solo_lectura
 def exportar_reporte_excel():
     """
     Genera un reporte de ventas profesional en formato Excel con Top 10 productos.
@@ -1721,146 +1608,22 @@ def exportar_reporte_excel():
         elif len(ventas_anterior) == 0 and len(ventas) > 0:
             comparacion = '↑ Nuevo período (sin ventas previas)'
 
-        # Crear Excel
-        wb = Workbook()
-        ws = wb.active
-        ws.title = 'Reporte de Ventas'
-
-        # Estilos
-        header_fill = PatternFill(start_color='1e40af', end_color='1e40af', fill_type='solid')
-        header_font = Font(color='FFFFFF', bold=True, size=11)
-        title_font = Font(bold=True, size=16, color='1e40af')
-        green_fill = PatternFill(start_color='16a34a', end_color='16a34a', fill_type='solid')
-        green_header_font = Font(color='FFFFFF', bold=True, size=11)
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
+        # Generar Excel (openpyxl se importa solo al exportar)
+        from app.utils.excel_generator import generar_excel_ventas
 
-        # Título
-        ws.merge_cells('A1:F1')
-        ws['A1'] = 'KATITA POS - Reporte de Ventas'
-        ws['A1'].font = title_font
-        ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
-        ws.row_dimensions[1].height = 25
-
-        # Período
-        ws.merge_cells('A2:F2')
-        ws['A2'] = f'Período: {fecha_inicio.strftime("%d/%m/%Y")} - {fecha_fin.strftime("%d/%m/%Y")}'
-        ws['A2'].alignment = Alignment(horizontal='center')
-        ws['A2'].font = Font(size=11)
-
-        # Resumen de métricas
-        ws['A4'] = 'RESUMEN DE VENTAS'
-        ws['A4'].font = Font(bold=True, size=13, color='1e40af')
-
-        ws['A5'] = 'Total de Ventas:'
-        ws['B5'] = f'{len(ventas)} ventas'
-        ws['A6'] = 'Total Vendido:'
-        ws['B6'] = f'S/ {total_vendido:.2f}'
-        ws['A7'] = 'Ganancia Total:'
-        ws['B7'] = f'S/ {ganancia_total:.2f}'
-        ws['A8'] = 'Margen de Ganancia:'
-        ws['B8'] = f'{margen_porcentaje:.1f}%'
-        ws['A9'] = 'Ticket Promedio:'
-        ws['B9'] = f'S/ {(total_vendido / len(ventas)):.2f}' if len(ventas) > 0 else 'S/ 0.00'
-        ws['A10'] = 'Unidades Vendidas:'
-        ws['B10'] = f'{total_unidades} unidades'
-        ws['A11'] = 'Método Más Usado:'
-        ws['B11'] = metodo_mas_usado
-        ws['A12'] = 'Hora Pico:'
-        ws['B12'] = hora_pico
-        ws['A13'] = 'Comparación:'
-        ws['B13'] = comparacion
-
-        # Formatear resumen
-        for row in range(5, 14):
-            ws[f'A{row}'].font = Font(bold=True, size=10)
-            ws[f'A{row}'].border = border
-            ws[f'B{row}'].border = border
-            ws[f'B{row}'].alignment = Alignment(horizontal='left')
-
-        # Top 10 Productos
-        current_row = 15
-        if top_productos:
-            ws[f'A{current_row}'] = 'TOP 10 PRODUCTOS MÁS VENDIDOS'
-            ws[f'A{current_row}'].font = Font(bold=True, size=13, color='16a34a')
-            current_row += 2
-
-            # Headers Top 10
-            top_headers = ['#', 'Producto', 'Cantidad', 'Total Vendido', 'Ganancia']
-            for col, header in enumerate(top_headers, start=1):
-                cell = ws.cell(row=current_row, column=col)
-                cell.value = header
-                cell.fill = green_fill
-                cell.font = green_header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.border = border
-
-            # Datos Top 10
-            current_row += 1
-            for idx, prod in enumerate(top_productos, 1):
-                ws.cell(row=current_row, column=1, value=idx)
-                ws.cell(row=current_row, column=2, value=prod['nombre'])
-                ws.cell(row=current_row, column=3, value=prod['cantidad'])
-                ws.cell(row=current_row, column=4, value=f"S/ {float(prod['total']):.2f}")
-                ws.cell(row=current_row, column=5, value=f"S/ {float(prod['ganancia']):.2f}")
-
-                for col in range(1, 6):
-                    ws.cell(row=current_row, column=col).border = border
-                    ws.cell(row=current_row, column=col).alignment = Alignment(horizontal='center' if col in [1, 3] else 'left')
-
-                current_row += 1
-
-            current_row += 1
-
-        # Detalle de ventas
-        ws[f'A{current_row}'] = 'DETALLE DE VENTAS'
-        ws[f'A{current_row}'].font = Font(bold=True, size=13, color='1e40af')
-        current_row += 2
-
-        # Headers
-        headers = ['Fecha', 'ID Venta', 'Método de Pago', 'Vendedor', 'Total', 'Ganancia']
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=current_row, column=col)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = border
-
-        # Datos de ventas
-        current_row += 1
-        for venta in ventas:
-            vendedor_nombre = venta.vendedor.nombre_completo if venta.vendedor else 'Sin asignar'
-            ws.cell(row=current_row, column=1, value=venta.created_at.strftime('%d/%m/%Y %H:%M'))
-            ws.cell(row=current_row, column=2, value=f'#{venta.id}')
-            ws.cell(row=current_row, column=3, value=venta.metodo_pago.upper())
-            ws.cell(row=current_row, column=4, value=vendedor_nombre)
-            ws.cell(row=current_row, column=5, value=f'S/ {venta.total:.2f}')
-            ws.cell(row=current_row, column=6, value=f'S/ {venta.ganancia_total:.2f}')
-
-            # Aplicar bordes
-            for col in range(1, 7):
-                ws.cell(row=current_row, column=col).border = border
-                ws.cell(row=current_row, column=col).alignment = Alignment(horizontal='center')
-
-            current_row += 1
-
-        # Ajustar anchos de columna
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 12
-        ws.column_dimensions['C'].width = 20
-        ws.column_dimensions['D'].width = 25
-        ws.column_dimensions['E'].width = 15
-        ws.column_dimensions['F'].width = 15
-
-        # Guardar en memoria
-        buffer = BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
+        buffer = generar_excel_ventas(
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            ventas=ventas,
+            total_vendido=total_vendido,
+            ganancia_total=ganancia_total,
+            total_unidades=total_unidades,
+            margen_porcentaje=margen_porcentaje,
+            top_productos=top_productos,
+            metodo_mas_usado=metodo_mas_usado,
+            hora_pico=hora_pico,
+            comparacion=comparacion
+        )
 
         # Nombre del archivo
         filename = f'reporte_ventas_{fecha_inicio}_{fecha_fin}.xlsx'
@@ -0,0 +1,212 @@
+"""
+KATITA-POS - Comandos CLI
+=========================
+Comandos de mantenimiento ejecutables con `flask <grupo> <comando>`
+
+Ejemplos:
+    flask stock reconciliar            # Solo reporta descuadres
+    flask stock reconciliar --reparar  # Reporta y corrige en un solo UPDATE
+    flask stock snapshot               # Fotografía del stock (programar cada noche)
+    flask sync run                     # Worker de sincronización (bucle)
+    flask sync run --una-vez           # Vacía la cola una vez y termina
+    flask sync purgar                  # Aplica la retención de la cola (programar cada noche)
+    flask sync contadores-init         # Atribuye el stock existente al nodo 'base'
+    flask sqlite checkpoint            # Vacía el WAL de la base local (modo local)
+    flask tokens purgar                # Elimina los tokens revocados ya expirados (programar cada noche)
+    flask db upgrade                   # Aplica las migraciones pendientes (paso de release)
+    flask db migrate -m "mensaje"      # Genera una revisión comparando modelos y base
+"""
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+stock_cli = AppGroup('stock', help='Mantenimiento del stock de productos')
+sync_cli = AppGroup('sync', help='Sincronización de la cola SyncQueue con el servidor')
+sqlite_cli = AppGroup('sqlite', help='Mantenimiento de la base SQLite local')
+db_cli = AppGroup('db', help='Migraciones versionadas de la base de datos (Alembic)')
+tokens_cli = AppGroup('tokens', help='Mantenimiento de la lista de tokens JWT revocados')
+
+
+@stock_cli.command('reconciliar')
+@click.option('--reparar', is_flag=True, help='Corregir los descuadres encontrados')
+def reconciliar_stock(reparar):
+    """Compara stock_total con la suma de los lotes de cada producto"""
+    from app.services import stock_service
+
+    if reparar:
+        resultado = stock_service.reparar_descuadres()
+        descuadres = resultado['descuadres']
+    else:
+        descuadres = stock_service.detectar_descuadres()
+
+    for d in descuadres:
+        click.echo(
+            f"[{d['producto_id']}] {d['codigo_barras']} {d['nombre']}: "
+            f"registrado={d['stock_registrado']} real={d['stock_real']} "
+            f"diferencia={d['diferencia']:+d}"
+        )
+
+    if not descuadres:
+        click.echo('Sin descuadres: stock_total coincide con los lotes')
+    elif reparar:
+        click.echo(f"{resultado['productos_corregidos']} productos corregidos "
+                   f"(operación #{resultado['operacion_id']})")
+    else:
+        click.echo(f'{len(descuadres)} productos descuadrados. Use --reparar para corregirlos')
+
+
+@stock_cli.command('snapshot')
+def snapshot_stock():
+    """Escribe una fotografía del stock por lote y por producto"""
+    from app.services import stock_service
+
+    resultado = stock_service.tomar_snapshot()
+    click.echo(
+        f"Corte {resultado['corte'].isoformat()}: "
+        f"{resultado['productos']} productos, {resultado['lotes']} lotes"
+    )
+
+
+@sync_cli.command('run')
+@click.option('--una-vez', is_flag=True, help='Vaciar la cola una vez y terminar')
+@click.option('--tamano', type=int, default=None, help='Registros por lote (default: SYNC_BATCH_SIZE)')
+def ejecutar_sync(una_vez, tamano):
+    """Envía la cola de sincronización al remoto en lotes"""
+    import threading
+    from app import db
+    from app.services import sync_service
+
+    detener = threading.Event()
+    intervalo = current_app.config['SYNC_INTERVAL']
+
+    try:
+        while True:
+            totales = sync_service.vaciar_cola(tamano=tamano, detener=detener)
+            click.echo(f"{totales['enviados']} enviados, {totales['rechazados']} rechazados, "
+                       f"{totales['agotados']} sin más intentos ({totales['lotes']} lotes)")
+            db.session.remove()
+            if una_vez:
+                break
+            detener.wait(intervalo)
+    except KeyboardInterrupt:
+        detener.set()
+        click.echo('Worker de sincronización detenido')
+
+
+@sync_cli.command('purgar')
+@click.option('--dias', type=int, default=None, help='Retención de procesados (default: SYNC_RETENCION_DIAS)')
+def purgar_sync(dias):
+    """Elimina en bloques los registros antiguos de la cola"""
+    from app.models.sync_queue import SyncQueue
+
+    config = current_app.config
+    eliminados = SyncQueue.limpiar_procesados(
+        dias=dias if dias is not None else config['SYNC_RETENCION_DIAS'],
+        tamano_bloque=config['SYNC_PURGA_BLOQUE'],
+        dias_fallidos=config['SYNC_RETENCION_FALLIDOS_DIAS'] or None
+    )
+    click.echo(f'{eliminados} registros eliminados de la cola de sincronización')
+
+
+@sync_cli.command('contadores-init')
+def inicializar_contadores():
+    """Crea los contadores de stock de los lotes que aún no tienen"""
+    from app.services import replicacion_stock_service
+
+    lotes = replicacion_stock_service.inicializar_contadores()
+    click.echo(f'{lotes} lotes inicializados en el nodo base')
+
+
+@sqlite_cli.command('checkpoint')
+@click.option('--modo', type=click.Choice(['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'], case_sensitive=False),
+              default=None, help='Modo de checkpoint (default: SQLITE_CHECKPOINT_MODO)')
+def checkpoint_sqlite(modo):
+    """Traslada el WAL a la base de datos local"""
+    from app import db
+    from app.utils.sqlite_local import es_sqlite_archivo, checkpoint_wal
+
+    if not es_sqlite_archivo(current_app.config['SQLALCHEMY_DATABASE_URI']):
+        raise click.ClickException('La base de datos no es un archivo SQLite')
+
+    resultado = checkpoint_wal(db.engine, modo or current_app.config['SQLITE_CHECKPOINT_MODO'])
+    click.echo(
+        f"WAL: {resultado['paginas_wal']} páginas, {resultado['paginas_copiadas']} copiadas"
+        + (' (lectores activos, checkpoint incompleto)' if resultado['ocupado'] else '')
+    )
+
+
+@db_cli.command('upgrade')
+@click.argument('revision', default='head')
+@click.option('--sql', is_flag=True, help='Mostrar el SQL sin ejecutarlo')
+def db_upgrade(revision, sql):
+    """Aplica las migraciones hasta REVISION (default: head)"""
+    from alembic import command
+    from app.utils.migraciones import config_alembic
+
+    command.upgrade(config_alembic(), revision, sql=sql)
+
+
+@db_cli.command('downgrade')
+@click.argument('revision', default='-1')
+@click.option('--sql', is_flag=True, help='Mostrar el SQL sin ejecutarlo')
+def db_downgrade(revision, sql):
+    """Revierte las migraciones hasta REVISION (default: la anterior)"""
+    from alembic import command
+    from app.utils.migraciones import config_alembic
+
+    command.downgrade(config_alembic(), revision, sql=sql)
+
+
+@db_cli.command('migrate')
+@click.option('-m', '--message', required=True, help='Descripción de la revisión')
+@click.option('--rev-id', default=None, help='Identificador de la revisión (default: aleatorio)')
+def db_migrate(message, rev_id):
+    """Genera una revisión comparando los modelos con la base de datos"""
+    from alembic import command
+    from app.utils.migraciones import config_alembic
+
+    command.revision(config_alembic(), message=message, autogenerate=True, rev_id=rev_id)
+
+
+@db_cli.command('current')
+def db_current():
+    """Muestra la revisión aplicada y la última disponible"""
+    from app import db
+    from app.utils.migraciones import revision_actual, revision_head
+
+    actual, head = revision_actual(db.engine), revision_head()
+    click.echo(f"Aplicada: {actual or 'ninguna'} | Última: {head}" + ('' if actual == head else ' (pendiente)'))
+
+
+@db_cli.command('stamp')
+@click.argument('revision')
+def db_stamp(revision):
+    """Marca la base en REVISION sin ejecutar migraciones"""
+    from alembic import command
+    from app.utils.migraciones import config_alembic
+
+    command.stamp(config_alembic(), revision)
+
+
+@tokens_cli.command('purgar')
+def purgar_tokens():
+    """Elimina los tokens revocados cuya expiración ya pasó"""
+    from app.models.token_revocado import TokenRevocado
+
+    eliminados = TokenRevocado.limpiar_expirados()
+    click.echo(f'{eliminados} tokens revocados expirados eliminados')
+
+
+def register_commands(app):
+    """
+    Registra los grupos de comandos CLI en la aplicación
+
+    Args:
+        app (Flask): Instancia de la aplicación
+    """
+    app.cli.add_command(stock_cli)
+    app.cli.add_command(sync_cli)
+    app.cli.add_command(sqlite_cli)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(tokens_cli)
@@ -1,3 +1,3 @@
 """
-Decoradores de autenticacion y autorizacion
+Decoradores de autenticacion, autorizacion y base de datos
 """
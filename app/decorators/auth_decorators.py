@@ -7,6 +7,14 @@ Decoradores para proteger endpoints con autenticacion JWT y control de roles.
 Decoradores disponibles:
 - @login_required: Requiere token JWT valido
 - @role_required('admin', 'vendedor'): Requiere rol especifico
+- @admin_required: Atajo de @role_required('admin')
+
+El token lo verifica Flask-JWT-Extended (misma configuracion, callbacks de
+error y lista de revocados que @jwt_required). La identidad y el rol se
+leen de los claims ya verificados: rechazar por rol no consulta la base.
+Si el claim autoriza, @role_required confirma rol y activo con la
+identidad cacheada (app.utils.identidad.tiene_rol_vigente): un usuario
+degradado o desactivado no conserva el acceso hasta que su token expire.
 
 Uso tipico:
     @app.route('/admin/usuarios')
@@ -18,24 +26,24 @@ Uso tipico:
 """
 
 from functools import wraps
-from flask import request, g
-import jwt
+from flask import g
+from flask_jwt_extended import verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 from app.utils.responses import unauthorized_response, forbidden_response
-from app.utils.jwt_utils import verificar_token, extraer_token_del_header
+from app.utils.identidad import identidad_desde_claims, tiene_rol_vigente
 
 
 def login_required(f):
     """
     Decorador que requiere token JWT valido para acceder al endpoint
 
-    Verifica que:
-    1. El header Authorization este presente
-    2. El token tenga formato correcto (Bearer <token>)
-    3. El token sea valido y no haya expirado
-    4. El token sea de tipo 'access'
+    Verifica con Flask-JWT-Extended que el header Authorization traiga un
+    access token valido, no expirado ni revocado. Los errores los responden
+    los callbacks de JWT configurados en create_app (401).
 
-    Si todas las validaciones pasan, guarda los datos del usuario
-    en g.current_user para que esten disponibles en el endpoint.
+    Si el token es valido, guarda la identidad de sus claims en
+    g.current_user para que este disponible en el endpoint.
 
     Args:
         f: Funcion del endpoint a proteger
@@ -58,47 +66,9 @@ def login_required(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # ========== EXTRAER TOKEN DEL HEADER ==========
-        authorization_header = request.headers.get('Authorization')
-
-        if not authorization_header:
-            return unauthorized_response('Token de autenticacion requerido')
-
-        try:
-            # Extraer token del formato "Bearer <token>"
-            token = extraer_token_del_header(authorization_header)
-
-        except ValueError as e:
-            return unauthorized_response(str(e))
-
-        # ========== VERIFICAR TOKEN ==========
-        try:
-            # Verificar que sea un access token valido
-            print(f"[DEBUG @login_required] Verificando token...")
-            payload = verificar_token(token, token_type='access')
-            print(f"[DEBUG @login_required] Token válido. Payload: {payload}")
-
-            # Guardar datos del usuario en g para acceso en el endpoint
-            # Flask-JWT-Extended usa 'sub' en lugar de 'user_id'
-            user_id = payload.get('user_id') or payload.get('sub')
-            g.current_user = {
-                'user_id': int(user_id) if user_id else None,
-                'username': payload['username'],
-                'rol': payload['rol']
-            }
-            print(f"[DEBUG @login_required] g.current_user establecido: {g.current_user}")
-
-        except jwt.ExpiredSignatureError:
-            return unauthorized_response('Token expirado. Por favor, refresque su token.')
-
-        except jwt.InvalidTokenError as e:
-            return unauthorized_response(f'Token invalido: {str(e)}')
-
-        except ValueError as e:
-            return unauthorized_response(str(e))
-
-        except Exception as e:
-            return unauthorized_response(f'Error al verificar token: {str(e)}')
+        verify_jwt_in_request()
+        g.current_user = identidad_desde_claims()
+        g.pop('_usuario_actual', None)  # current_user se vuelve a leer de la caché en cada petición
 
         # Token valido, ejecutar endpoint
         return f(*args, **kwargs)
@@ -120,7 +90,8 @@ def role_required(*allowed_roles):
         Decorador que verifica el rol del usuario
 
     Raises:
-        403 Forbidden: Si el usuario no tiene el rol requerido
+        403 Forbidden: Si el usuario no tiene el rol requerido, o ya no lo
+            tiene o esta inactivo aunque su token diga otra cosa
         401 Unauthorized: Si no hay usuario autenticado
 
     Example:
@@ -169,6 +140,13 @@ def role_required(*allowed_roles):
                     }
                 )
 
+            # El claim dura lo que el token: confirmar con la identidad cacheada
+            if not tiene_rol_vigente(*allowed_roles):
+                return forbidden_response(
+                    message='Acceso denegado. El usuario esta inactivo o su rol cambio; inicie sesion nuevamente',
+                    errors={'rol_requerido': list(allowed_roles)}
+                )
+
             # Rol valido, ejecutar endpoint
             return f(*args, **kwargs)
 
@@ -177,6 +155,29 @@ def role_required(*allowed_roles):
     return decorator
 
 
+def admin_required(f):
+    """
+    Decorador que requiere un administrador activo
+
+    Atajo de @role_required('admin'); igual que este, DEBE usarse DESPUES
+    de @login_required.
+
+    Args:
+        f: Funcion del endpoint
+
+    Returns:
+        Funcion decorada
+
+    Example:
+        @app.route('/api/sistema/sync')
+        @login_required
+        @admin_required
+        def metricas_sync():
+            return {'metricas': {...}}
+    """
+    return role_required('admin')(f)
+
+
 def optional_auth(f):
     """
     Decorador que intenta autenticar al usuario pero NO falla si no hay token
@@ -206,25 +207,14 @@ def optional_auth(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Intentar extraer y verificar token
-        authorization_header = request.headers.get('Authorization')
-
         g.current_user = None  # Default: no autenticado
 
-        if authorization_header:
-            try:
-                token = extraer_token_del_header(authorization_header)
-                payload = verificar_token(token, token_type='access')
-
-                g.current_user = {
-                    'user_id': payload['user_id'],
-                    'username': payload['username'],
-                    'rol': payload['rol']
-                }
-
-            except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, ValueError):
-                # Token invalido, pero no fallar - continuar sin autenticacion
-                pass
+        try:
+            if verify_jwt_in_request(optional=True):
+                g.current_user = identidad_desde_claims()
+        except (JWTExtendedException, PyJWTError):
+            # Token invalido, pero no fallar - continuar sin autenticacion
+            pass
 
         # Ejecutar endpoint (con o sin autenticacion)
         return f(*args, **kwargs)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+KATITA-POS - Decoradores de Base de Datos
+==========================================
+Decoradores que marcan el tipo de acceso a datos de un endpoint.
+
+Decoradores disponibles:
+- @solo_lectura: Pool de solo lectura (SQLite) y timeout de reportes (PostgreSQL)
+
+Uso tipico:
+    @ventas_bp.route('/reportes/resumen')
+    @jwt_required()
+    @solo_lectura
+    def resumen_ventas():
+        # Las consultas no compiten con el registro de ventas
+        pass
+"""
+
+from functools import wraps
+from flask import g
+
+
+def solo_lectura(f):
+    """
+    Decorador para endpoints de reportes que no escriben en la base de datos
+
+    En modo local (SQLite) las consultas van al engine de solo lectura, cuyas
+    conexiones tienen query_only=ON: un reporte largo no retiene la única
+    escritura que SQLite permite a la vez.
+
+    En PostgreSQL la conexión es la misma, pero pool_postgres.timeout_actual
+    lee g.solo_lectura y aplica DB_STATEMENT_TIMEOUT_REPORTES_MS en lugar de
+    DB_STATEMENT_TIMEOUT_MS a las transacciones de la petición.
+
+    Args:
+        f: Funcion del endpoint
+
+    Returns:
+        Funcion decorada
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Vale para toda la petición (incluidas respuestas en streaming)
+        g.solo_lectura = True
+        return f(*args, **kwargs)
+
+    return decorated_function
@@ -14,6 +14,14 @@ from app.models.sync_queue import SyncQueue
 from app.models.cuadro_caja import CuadroCaja
 from app.models.devolucion import Devolucion  # FASE 8: Sistema de devoluciones
 from app.models.ajuste_inventario import AjusteInventario  # FASE 8: Ajustes de inventario
+from app.models.catalogo_cambio import CatalogoCambio
+from app.models.cache_codigo_barras import CacheCodigoBarras
+from app.models.operacion_masiva import OperacionMasiva
+from app.models.snapshot_stock import SnapshotStock
+from app.models.contador_stock import ContadorStock
+from app.models.tarea_reconciliacion import TareaReconciliacion
+from app.models.token_revocado import TokenRevocado
+from app.models.trabajo_importacion import TrabajoImportacion
 
 # Cuando se creen más modelos, importarlos aquí:
 # from app.models.category import Category
@@ -28,5 +36,13 @@ __all__ = [
     'SyncQueue',
     'CuadroCaja',
     'Devolucion',
-    'AjusteInventario'
+    'AjusteInventario',
+    'CatalogoCambio',
+    'CacheCodigoBarras',
+    'OperacionMasiva',
+    'SnapshotStock',
+    'ContadorStock',
+    'TareaReconciliacion',
+    'TokenRevocado',
+    'TrabajoImportacion'
 ]
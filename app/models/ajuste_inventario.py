@@ -109,9 +109,17 @@ class AjusteInventario(db.Model):
             raise ValueError(f'Tipo de ajuste inválido. Debe ser: {", ".join(tipos_validos)}')
 
         # Calcular diferencia
-        cantidad_anterior = producto.stock_actual
+        cantidad_anterior = producto.stock_total
         diferencia = cantidad_nueva - cantidad_anterior
 
+        # Aplicar la diferencia a los lotes (stock_total == SUM(lotes)) y registrarla en el kardex
+        if diferencia != 0:
+            AjusteInventario._aplicar_diferencia_lotes(
+                producto_id, lote_id, diferencia,
+                usuario_id=admin_id, stock_anterior=cantidad_anterior,
+                motivo=f'Ajuste ({tipo_ajuste}): {motivo}'
+            )
+
         # Crear el ajuste
         ajuste = AjusteInventario(
             producto_id=producto_id,
@@ -128,6 +136,82 @@ class AjusteInventario(db.Model):
         db.session.add(ajuste)
 
         # Actualizar el stock del producto
-        producto.stock_actual = cantidad_nueva
+        producto.stock_total = cantidad_nueva
 
         return ajuste
+
+    @staticmethod
+    def _aplicar_diferencia_lotes(producto_id, lote_id, diferencia, usuario_id, stock_anterior, motivo):
+        """
+        Reparte la diferencia de un ajuste entre los lotes del producto
+
+        - Con lote_id: se aplica solo a ese lote
+        - Faltante sin lote: se descuenta en orden FIFO
+        - Sobrante sin lote: se devuelve a los lotes con espacio,
+          empezando por el que vence más tarde
+
+        Cada lote tocado deja un MovimientoStock tipo 'ajuste' (el kardex y
+        stock_al reconstruyen el stock solo a partir de los movimientos).
+        stock_anterior/stock_nuevo son el stock del producto, como en ventas.
+
+        Raises:
+            ValueError: Si el lote no es del producto o los lotes no
+                pueden absorber la diferencia
+        """
+        from app.models.lote import Lote
+        from app.models.movimiento_stock import MovimientoStock
+
+        if lote_id:
+            lote = db.session.get(Lote, lote_id)
+            if not lote or lote.producto_id != producto_id:
+                raise ValueError('El lote no pertenece al producto')
+            lotes = [lote]
+        else:
+            lotes = Lote.query.filter_by(producto_id=producto_id).order_by(
+                Lote.fecha_vencimiento.asc(), Lote.id.asc()
+            ).all()
+
+        pendiente = abs(diferencia)
+        aplicado = []  # (lote, cantidad con signo)
+
+        if diferencia < 0:
+            for lote in lotes:
+                cantidad = min(pendiente, lote.cantidad_actual)
+                if cantidad > 0:
+                    lote.descontar_stock(cantidad)
+                    aplicado.append((lote, -cantidad))
+                    pendiente -= cantidad
+                if pendiente == 0:
+                    break
+        else:
+            for lote in reversed(lotes):
+                cantidad = min(pendiente, lote.cantidad_inicial - lote.cantidad_actual)
+                if cantidad > 0:
+                    lote.aumentar_stock(cantidad)
+                    aplicado.append((lote, cantidad))
+                    pendiente -= cantidad
+                if pendiente == 0:
+                    break
+
+        if pendiente > 0:
+            if diferencia < 0:
+                raise ValueError('Los lotes del producto no tienen stock suficiente para el ajuste')
+            raise ValueError(
+                'Los lotes del producto no pueden recibir más unidades. '
+                'Registre un lote nuevo para el stock adicional'
+            )
+
+        stock = stock_anterior
+        for lote, cantidad in aplicado:
+            db.session.add(MovimientoStock(
+                tipo='ajuste',
+                producto_id=producto_id,
+                lote_id=lote.id,
+                usuario_id=usuario_id,
+                cantidad=cantidad,
+                stock_anterior=stock,
+                stock_nuevo=stock + cantidad,
+                motivo=motivo[:100],
+                referencia=lote.codigo_lote
+            ))
+            stock += cantidad
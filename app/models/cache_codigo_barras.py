@@ -0,0 +1,179 @@
+"""
+KATITA-POS - CacheCodigoBarras Model
+====================================
+Caché persistente de búsquedas de códigos de barras en proveedores externos
+(Open Food Facts o dataset local)
+"""
+
+import json
+from app import db
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import Index
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+
+class CacheCodigoBarras(db.Model):
+    """
+    Modelo de CacheCodigoBarras
+
+    Guarda el resultado de cada búsqueda externa por código de barras.
+    Las entradas positivas (producto encontrado) y negativas (no existe en
+    el proveedor) tienen TTL distintos: un negativo caduca antes porque el
+    producto puede ser agregado al proveedor más adelante.
+
+    Attributes:
+        id (int): Identificador único
+        codigo_barras (str): Código consultado (único)
+        encontrado (bool): True si el proveedor conoce el producto
+        datos (str): JSON con nombre, foto_url, marca, categoria
+        proveedor (str): Proveedor que respondió
+        expira_en (datetime): Fecha en que la entrada deja de ser válida
+    """
+
+    __tablename__ = 'cache_codigos_barras'
+
+    # === CAMPOS ===
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    codigo_barras = db.Column(
+        db.String(20),
+        unique=True,
+        nullable=False,
+        comment='Código de barras consultado'
+    )
+
+    encontrado = db.Column(
+        db.Boolean,
+        nullable=False,
+        comment='Entrada positiva (True) o negativa (False)'
+    )
+
+    datos = db.Column(
+        db.Text,
+        nullable=True,
+        comment='Datos del producto en formato JSON'
+    )
+
+    proveedor = db.Column(
+        db.String(50),
+        nullable=False,
+        comment='Proveedor que respondió la búsqueda'
+    )
+
+    expira_en = db.Column(
+        db.DateTime,
+        nullable=False,
+        comment='Fecha de expiración de la entrada'
+    )
+
+    created_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(PERU_TZ),
+        nullable=False,
+        comment='Fecha de creación'
+    )
+
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(PERU_TZ),
+        onupdate=lambda: datetime.now(PERU_TZ),
+        nullable=False,
+        comment='Fecha de última actualización'
+    )
+
+    # === ÍNDICES ===
+    __table_args__ = (
+        Index('ix_cache_codigo_expira', 'expira_en'),
+    )
+
+    # === PROPIEDADES ===
+
+    @property
+    def datos_dict(self):
+        """
+        Retorna los datos del producto como diccionario
+
+        Returns:
+            dict: Datos del producto (vacío en entradas negativas)
+        """
+        return json.loads(self.datos) if self.datos else {}
+
+    def esta_vigente(self, ahora=None):
+        """
+        Indica si la entrada aún no expiró
+
+        Args:
+            ahora (datetime): Fecha de referencia (default: ahora)
+
+        Returns:
+            bool: True si la entrada es válida
+        """
+        ahora = ahora or datetime.now(PERU_TZ)
+        expira = self.expira_en
+        if expira.tzinfo is None:
+            ahora = ahora.replace(tzinfo=None)
+        return expira > ahora
+
+    # === MÉTODOS DE CLASE ===
+
+    @classmethod
+    def obtener_vigente(cls, codigo_barras):
+        """
+        Busca una entrada no expirada para el código
+
+        Args:
+            codigo_barras (str): Código a buscar
+
+        Returns:
+            CacheCodigoBarras: Entrada vigente o None
+        """
+        entrada = cls.query.filter_by(codigo_barras=codigo_barras).first()
+        if entrada and entrada.esta_vigente():
+            return entrada
+        return None
+
+    @classmethod
+    def guardar(cls, codigo_barras, encontrado, datos, proveedor, ttl_segundos):
+        """
+        Crea o reemplaza la entrada de un código
+
+        Args:
+            codigo_barras (str): Código consultado
+            encontrado (bool): Resultado positivo o negativo
+            datos (dict): Datos del producto (None si negativo)
+            proveedor (str): Nombre del proveedor
+            ttl_segundos (int): Vigencia de la entrada
+
+        Returns:
+            CacheCodigoBarras: Entrada guardada (sin commit)
+        """
+        entrada = cls.query.filter_by(codigo_barras=codigo_barras).first()
+        if entrada is None:
+            entrada = cls(codigo_barras=codigo_barras)
+            db.session.add(entrada)
+
+        entrada.encontrado = encontrado
+        entrada.datos = json.dumps(datos, ensure_ascii=False) if datos else None
+        entrada.proveedor = proveedor
+        entrada.expira_en = datetime.now(PERU_TZ) + timedelta(seconds=ttl_segundos)
+        return entrada
+
+    @classmethod
+    def limpiar_expirados(cls):
+        """
+        Elimina las entradas expiradas
+
+        Returns:
+            int: Cantidad de entradas eliminadas
+        """
+        eliminados = cls.query.filter(
+            cls.expira_en <= datetime.now(PERU_TZ)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return eliminados
+
+    def __repr__(self):
+        estado = 'positivo' if self.encontrado else 'negativo'
+        return f'<CacheCodigoBarras {self.codigo_barras} ({estado})>'
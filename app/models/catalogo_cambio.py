@@ -0,0 +1,186 @@
+"""
+KATITA-POS - CatalogoCambio Model
+=================================
+Bitácora de cambios del catálogo POS
+Cada fila lleva la versión del catálogo en que se registró: los terminales
+POS guardan la última versión que conocen y piden solo los productos que
+cambiaron desde entonces.
+
+La versión no puede ser el id de la bitácora: los ids se asignan al
+insertar, no al hacer commit, y una transacción lenta haría visible una
+versión menor a la que un terminal ya sincronizó. Tampoco un contador
+compartido: su fila bloqueada hasta el commit pondría en fila a todas las
+ventas. Cada transacción usa una sola versión:
+- PostgreSQL: su id de transacción (pg_current_xact_id). La versión que se
+  publica es la marca segura: el xmin del snapshot menos uno; toda
+  transacción con id menor ya terminó, así que ninguna versión <= marca
+  puede aparecer después.
+- SQLite: max(version) + 1. La base admite un solo escritor y la
+  transacción ya escribió al registrar, así que el orden es el de commit.
+"""
+
+from app import db
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import BigInteger, Index, Text, cast, func, select
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+
+class CatalogoCambio(db.Model):
+    """
+    Modelo de CatalogoCambio
+
+    Registro append-only de productos cuyo estado visible en el POS cambió
+    (precio, stock, lote FIFO, activo). La columna version (una por
+    transacción, ver el docstring del módulo) es la versión del catálogo.
+
+    Attributes:
+        id (int): Identificador único
+        version (int): Versión del catálogo en que se registró el cambio
+        producto_id (int): Producto afectado
+        origen (str): Tabla que originó el cambio (products, lotes, ventas...)
+        created_at (datetime): Fecha del cambio
+    """
+
+    __tablename__ = 'catalogo_cambios'
+
+    # === CAMPOS ===
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    version = db.Column(
+        db.BigInteger().with_variant(db.Integer(), 'sqlite'),
+        nullable=False,
+        server_default='0',
+        comment='Versión del catálogo (id de la transacción que registró el cambio)'
+    )
+
+    producto_id = db.Column(
+        db.Integer,
+        nullable=False,
+        comment='Producto cuyo estado en el catálogo cambió'
+    )
+
+    origen = db.Column(
+        db.String(50),
+        nullable=False,
+        comment='Tabla que originó el cambio'
+    )
+
+    created_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(PERU_TZ),
+        nullable=False,
+        comment='Fecha del cambio'
+    )
+
+    # === ÍNDICES ===
+    __table_args__ = (
+        Index('ix_catalogo_cambio_producto', 'producto_id', 'id'),
+        Index('ix_catalogo_cambio_version', 'version', 'producto_id'),
+    )
+
+    # === MÉTODOS DE CLASE ===
+
+    @classmethod
+    def version_actual(cls):
+        """
+        Retorna la versión actual del catálogo
+
+        En PostgreSQL es la marca segura (xmin del snapshot - 1): no lee la
+        bitácora ni toma locks. Una transacción larga la retiene hasta que
+        termina; sus cambios y los posteriores llegan después.
+
+        Returns:
+            int: Versión hasta la que la bitácora ya no cambia (0 si no hay cambios)
+        """
+        if db.session.get_bind().dialect.name == 'postgresql':
+            xmin = cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger)
+            return db.session.execute(select(xmin - 1)).scalar()
+        return db.session.execute(select(func.coalesce(func.max(cls.version), 0))).scalar()
+
+    @classmethod
+    def version_transaccion(cls, connection=None):
+        """
+        Versión de la transacción en curso (la misma para todos sus registros)
+
+        Args:
+            connection: Conexión a usar (default: la de db.session)
+
+        Returns:
+            int: Versión asignada
+        """
+        conexion = connection if connection is not None else db.session.connection()
+        transaccion = conexion.get_transaction()
+        guardada = conexion.info.get('catalogo_version')
+        if guardada is not None and guardada[0] is transaccion:
+            return guardada[1]
+
+        if conexion.dialect.name == 'postgresql':
+            consulta = select(cast(cast(func.pg_current_xact_id(), Text), BigInteger))
+        else:
+            consulta = select(func.coalesce(func.max(cls.version), 0) + 1)
+        version = conexion.execute(consulta).scalar()
+        conexion.info['catalogo_version'] = (transaccion, version)
+        return version
+
+    @classmethod
+    def productos_cambiados_desde(cls, version, hasta=None):
+        """
+        Retorna los productos que cambiaron después de una versión
+
+        Args:
+            version (int): Última versión conocida por el terminal
+            hasta (int): Versión publicada (version_actual); en PostgreSQL
+                excluye transacciones que confirmaron por encima de la marca
+
+        Returns:
+            list: IDs de productos distintos con cambios posteriores
+        """
+        consulta = db.session.query(cls.producto_id).filter(cls.version > version)
+        if hasta is not None:
+            consulta = consulta.filter(cls.version <= hasta)
+        filas = consulta.distinct().all()
+        return [fila.producto_id for fila in filas]
+
+    @classmethod
+    def registrar(cls, producto_ids, origen, connection=None):
+        """
+        Agrega una fila a la bitácora por cada producto
+
+        Pensado para escrituras masivas (UPDATE/INSERT set-based) que no pasan
+        por el flush del ORM y por tanto no son capturadas automáticamente.
+
+        Args:
+            producto_ids (iterable): IDs de productos afectados
+            origen (str): Tabla que originó el cambio
+            connection: Conexión a usar (default: la de db.session)
+        """
+        ids = sorted({int(pid) for pid in producto_ids if pid})
+        if not ids:
+            return
+        conexion = connection if connection is not None else db.session.connection()
+        version = cls.version_transaccion(conexion)
+        ahora = datetime.now(PERU_TZ)
+        filas = [
+            {'version': version, 'producto_id': pid, 'origen': origen, 'created_at': ahora}
+            for pid in ids
+        ]
+        conexion.execute(cls.__table__.insert(), filas)
+
+    def to_dict(self):
+        """
+        Convierte el cambio a diccionario
+
+        Returns:
+            dict: Representación del cambio
+        """
+        return {
+            'version': self.version,
+            'producto_id': self.producto_id,
+            'origen': self.origen,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __repr__(self):
+        return f'<CatalogoCambio v{self.version}: producto {self.producto_id} ({self.origen})>'
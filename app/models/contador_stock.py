@@ -0,0 +1,97 @@
+"""
+KATITA-POS - ContadorStock Model
+================================
+Contadores de stock por nodo (PN-counter) para replicación sin conflictos
+
+Cada nodo (tienda offline o nube) solo escribe su propia fila por lote:
+'incrementos' acumula las entradas y 'decrementos' las salidas registradas
+en ese nodo. Ambos solo crecen, así que fusionar dos réplicas es tomar el
+máximo de cada contador: la operación es conmutativa, asociativa e
+idempotente. El stock del lote es SUM(incrementos) - SUM(decrementos).
+"""
+
+from app import db
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import Index, ForeignKey, UniqueConstraint, CheckConstraint
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+
+class ContadorStock(db.Model):
+    """
+    Modelo de ContadorStock
+
+    Attributes:
+        id (int): Identificador único
+        lote_id (int): Lote
+        nodo (str): Nodo que registró los movimientos (SYNC_NODE_ID)
+        incrementos (int): Unidades que entraron al lote en este nodo
+        decrementos (int): Unidades que salieron del lote en este nodo
+        updated_at (datetime): Última modificación
+    """
+
+    __tablename__ = 'contadores_stock'
+
+    # === CAMPOS ===
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    lote_id = db.Column(
+        db.Integer,
+        ForeignKey('lotes.id', ondelete='CASCADE'),
+        nullable=False,
+        comment='Lote'
+    )
+
+    nodo = db.Column(
+        db.String(64),
+        nullable=False,
+        comment='Nodo dueño del contador'
+    )
+
+    incrementos = db.Column(
+        db.BigInteger,
+        nullable=False,
+        default=0,
+        comment='Entradas acumuladas (solo crece)'
+    )
+
+    decrementos = db.Column(
+        db.BigInteger,
+        nullable=False,
+        default=0,
+        comment='Salidas acumuladas (solo crece)'
+    )
+
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(PERU_TZ),
+        onupdate=lambda: datetime.now(PERU_TZ),
+        nullable=False,
+        comment='Última modificación'
+    )
+
+    # === CONSTRAINTS ===
+    __table_args__ = (
+        UniqueConstraint('lote_id', 'nodo', name='uq_contador_lote_nodo'),
+        CheckConstraint('incrementos >= 0', name='check_incrementos_no_negativo'),
+        CheckConstraint('decrementos >= 0', name='check_decrementos_no_negativo'),
+        Index('ix_contador_stock_lote', 'lote_id'),
+    )
+
+    def to_dict(self):
+        """
+        Convierte el contador al formato de intercambio entre nodos
+
+        Returns:
+            dict: lote_id, nodo, incrementos, decrementos
+        """
+        return {
+            'lote_id': self.lote_id,
+            'nodo': self.nodo,
+            'incrementos': self.incrementos,
+            'decrementos': self.decrementos,
+        }
+
+    def __repr__(self):
+        return f'<ContadorStock lote={self.lote_id} nodo={self.nodo} +{self.incrementos}/-{self.decrementos}>'
@@ -253,23 +253,24 @@ class DetalleVenta(db.Model):
         Returns:
             dict: Diccionario con los datos del detalle
         """
+        # Decimal y datetime van sin convertir: los serializa app.json (app.utils.json_provider)
         data = {
             'id': self.id,
             'venta_id': self.venta_id,
             'producto_id': self.producto_id,
             'lote_id': self.lote_id,
             'cantidad': self.cantidad,
-            'precio_unitario': float(self.precio_unitario) if self.precio_unitario else 0.0,
-            'precio_compra': float(self.precio_compra) if self.precio_compra else 0.0,
-            'precio_compra_unitario': float(self.precio_compra) if self.precio_compra else 0.0,  # Mantener compatibilidad
-            'subtotal': float(self.subtotal) if self.subtotal else 0.0,
-            'descuento_item': float(self.descuento_item) if self.descuento_item else 0.0,
-            'subtotal_final': float(self.subtotal_final) if self.subtotal_final else 0.0,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'precio_unitario': self.precio_unitario or Decimal('0.00'),
+            'precio_compra': self.precio_compra or Decimal('0.00'),
+            'precio_compra_unitario': self.precio_compra or Decimal('0.00'),  # Mantener compatibilidad
+            'subtotal': self.subtotal or Decimal('0.00'),
+            'descuento_item': self.descuento_item or Decimal('0.00'),
+            'subtotal_final': self.subtotal_final or Decimal('0.00'),
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
             # Propiedades calculadas
-            'ganancia_unitaria': float(self.ganancia_unitaria),
-            'ganancia_total': float(self.ganancia_total),
+            'ganancia_unitaria': self.ganancia_unitaria,
+            'ganancia_total': self.ganancia_total,
             'porcentaje_ganancia': self.porcentaje_ganancia,
             'margen_bruto': self.margen_bruto,
         }
@@ -281,7 +282,7 @@ class DetalleVenta(db.Model):
                     'nombre': self.producto.nombre,
                     'codigo_barras': self.producto.codigo_barras,
                     # CORRECCIÓN: Incluir precio_compra y categoria para cálculo de ganancias
-                    'precio_compra': float(self.producto.precio_compra) if self.producto.precio_compra else 0.0,
+                    'precio_compra': self.producto.precio_compra or Decimal('0.00'),
                     'categoria': self.producto.categoria if hasattr(self.producto, 'categoria') else None,
                 }
                 # Alias para compatibilidad
@@ -7,9 +7,9 @@ Controla fechas de vencimiento y trazabilidad FIFO
 
 from app import db
 from datetime import datetime, timezone, date, timedelta
-from sqlalchemy import CheckConstraint, Index, ForeignKey
+from sqlalchemy import CheckConstraint, Index, ForeignKey, func, select
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import validates, joinedload
 from decimal import Decimal
 
 # Zona horaria de Perú (UTC-5)
@@ -375,38 +375,60 @@ class Lote(db.Model):
             if self.fecha_vencimiento <= fecha_ingreso_date:
                 raise ValueError('La fecha de vencimiento debe ser posterior a la fecha de ingreso')
 
-    def to_dict(self, include_producto=False):
+    def to_dict(self, include_producto=False, hoy=None, ahora=None):
         """
         Convierte el lote a diccionario para JSON
 
+        Los campos derivados (días, vencido, por vencer, % vendido) se
+        calculan una sola vez con la fecha de referencia recibida, en lugar
+        de llamar a date.today() en cada propiedad.
+
         Args:
             include_producto (bool): Incluir información del producto
+            hoy (date): Fecha de referencia (default: date.today())
+            ahora (datetime): Instante de referencia con zona horaria
+                (default: datetime.now(PERU_TZ))
 
         Returns:
             dict: Representación del lote en formato diccionario
         """
+        if hoy is None:
+            hoy = date.today()
+
+        dias_hasta_vencimiento = None
+        esta_vencido = False
+        if self.fecha_vencimiento:
+            dias_hasta_vencimiento = (self.fecha_vencimiento - hoy).days
+            esta_vencido = dias_hasta_vencimiento < 0
+
+        cantidad_vendida = self.cantidad_inicial - self.cantidad_actual
+        porcentaje_vendido = (
+            (cantidad_vendida / self.cantidad_inicial) * 100 if self.cantidad_inicial > 0 else 0.0
+        )
+
+        # (Decimal y date/datetime van sin convertir: los serializa app.json, ver app.utils.json_provider)
         data = {
             'id': self.id,
             'producto_id': self.producto_id,
             'codigo_lote': self.codigo_lote,
             'cantidad_inicial': self.cantidad_inicial,
             'cantidad_actual': self.cantidad_actual,
-            'cantidad_vendida': self.cantidad_vendida,
-            'porcentaje_vendido': round(self.porcentaje_vendido, 2),
-            'fecha_ingreso': self.fecha_ingreso.isoformat() if self.fecha_ingreso else None,
-            'fecha_vencimiento': self.fecha_vencimiento.isoformat() if self.fecha_vencimiento else None,
-            'dias_hasta_vencimiento': self.dias_hasta_vencimiento,
-            'esta_vencido': self.esta_vencido,
-            'esta_por_vencer': self.esta_por_vencer,
-            'tiene_stock': self.tiene_stock,
-            'precio_compra_lote': float(self.precio_compra_lote),
+            'cantidad_vendida': cantidad_vendida,
+            'porcentaje_vendido': round(porcentaje_vendido, 2),
+            'fecha_ingreso': self.fecha_ingreso,
+            'fecha_vencimiento': self.fecha_vencimiento,
+            'dias_hasta_vencimiento': dias_hasta_vencimiento,
+            'esta_vencido': esta_vencido,
+            'esta_por_vencer': dias_hasta_vencimiento is not None and 0 <= dias_hasta_vencimiento <= 30,
+            'tiene_stock': self.cantidad_actual > 0,
+            'precio_compra_lote': self.precio_compra_lote,
             'proveedor': self.proveedor,
             'ubicacion': self.ubicacion,
             'notas': self.notas,
             'activo': self.activo,
-            'dias_en_inventario': self.dias_en_inventario(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'dias_en_inventario': self.dias_en_inventario(ahora),
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
 
         if include_producto and self.producto:
@@ -419,6 +441,41 @@ class Lote(db.Model):
 
         return data
 
+    @classmethod
+    def serializar_lista(cls, lotes, include_producto=False, hoy=None, ahora=None):
+        """
+        Serializa muchos lotes con una sola fecha de referencia
+
+        Para include_producto=True la consulta debe cargar el producto por
+        adelantado (ver con_producto()) para no hacer una consulta por lote.
+
+        Args:
+            lotes (list): Lotes a serializar
+            include_producto (bool): Incluir información del producto
+            hoy (date): Fecha de referencia (default: date.today())
+            ahora (datetime): Instante de referencia (default: datetime.now(PERU_TZ))
+
+        Returns:
+            list: Lista de diccionarios (mismo formato que to_dict)
+        """
+        hoy = hoy or date.today()
+        ahora = ahora or datetime.now(PERU_TZ)
+        return [lote.to_dict(include_producto, hoy=hoy, ahora=ahora) for lote in lotes]
+
+    @classmethod
+    def con_producto(cls, query=None):
+        """
+        Agrega la carga del producto en la misma consulta (JOIN)
+
+        Args:
+            query (Query): Consulta de lotes (default: Lote.query)
+
+        Returns:
+            Query: Consulta con joinedload(Lote.producto)
+        """
+        query = query if query is not None else cls.query
+        return query.options(joinedload(cls.producto))
+
     def descontar_stock(self, cantidad):
         """
         Descuenta stock del lote
@@ -479,23 +536,27 @@ class Lote(db.Model):
         """
         return self.tiene_stock and self.activo and not self.esta_vencido
 
-    def dias_en_inventario(self):
+    def dias_en_inventario(self, ahora=None):
         """
         Calcula los días que el lote lleva en el inventario
 
+        Args:
+            ahora (datetime): Instante de referencia con zona horaria
+                (default: datetime.now(PERU_TZ))
+
         Returns:
             int: Días desde el ingreso
         """
         if self.fecha_ingreso:
+            if ahora is None:
+                ahora = datetime.now(PERU_TZ)
+
             # Manejar timezone-aware y timezone-naive datetimes
-            if self.fecha_ingreso.tzinfo is not None:
-                # fecha_ingreso tiene timezone (aware)
-                hoy = datetime.now(PERU_TZ)
-            else:
-                # fecha_ingreso no tiene timezone (naive)
-                hoy = datetime.now()
-
-            delta = hoy - self.fecha_ingreso
+            if self.fecha_ingreso.tzinfo is None:
+                # fecha_ingreso no tiene timezone (naive): hora local
+                ahora = ahora.astimezone().replace(tzinfo=None)
+
+            delta = ahora - self.fecha_ingreso
             return delta.days
         return 0
 
@@ -613,6 +674,68 @@ class Lote(db.Model):
             cls.fecha_vencimiento.asc()  # Primero los que vencen antes
         )
 
+    @classmethod
+    def subconsulta_fifo(cls, producto_ids=None):
+        """
+        Subconsulta con la posición FIFO de cada lote disponible por producto
+
+        Usa ROW_NUMBER() particionado por producto para numerar los lotes
+        disponibles (activos, con stock y no vencidos) en orden FIFO, de modo
+        que el lote cabeza de cada producto sea posicion_fifo = 1.
+
+        Args:
+            producto_ids (list): Limitar a estos productos (opcional)
+
+        Returns:
+            Subquery: Columnas del lote + posicion_fifo
+        """
+        posicion = func.row_number().over(
+            partition_by=cls.producto_id,
+            order_by=(cls.fecha_vencimiento.asc(), cls.id.asc())
+        ).label('posicion_fifo')
+
+        query = select(
+            cls.id,
+            cls.producto_id,
+            cls.codigo_lote,
+            cls.cantidad_actual,
+            cls.fecha_vencimiento,
+            posicion
+        ).where(
+            cls.activo == True,
+            cls.cantidad_actual > 0,
+            cls.fecha_vencimiento >= date.today()
+        )
+
+        if producto_ids is not None:
+            query = query.where(cls.producto_id.in_(producto_ids))
+
+        return query.subquery('lotes_fifo')
+
+    @classmethod
+    def lotes_fifo_por_productos(cls, producto_ids):
+        """
+        Retorna los lotes FIFO de varios productos en una sola consulta
+
+        Args:
+            producto_ids (list): IDs de productos
+
+        Returns:
+            dict: {producto_id: [Lote, ...]} en orden FIFO
+        """
+        resultado = {pid: [] for pid in producto_ids}
+        if not producto_ids:
+            return resultado
+
+        fifo = cls.subconsulta_fifo(producto_ids)
+        lotes = cls.query.join(fifo, cls.id == fifo.c.id).order_by(
+            fifo.c.producto_id, fifo.c.posicion_fifo
+        ).all()
+
+        for lote in lotes:
+            resultado[lote.producto_id].append(lote)
+        return resultado
+
     @classmethod
     def buscar_por_codigo(cls, codigo_lote):
         """
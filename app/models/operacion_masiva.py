@@ -0,0 +1,128 @@
+"""
+KATITA-POS - OperacionMasiva Model
+==================================
+Auditoría de operaciones set-based sobre el catálogo
+(actualizaciones masivas de precios/atributos, reparaciones de stock)
+"""
+
+import json
+from app import db
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import Index, ForeignKey
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+
+class OperacionMasiva(db.Model):
+    """
+    Modelo de OperacionMasiva
+
+    Un registro por lote de cambios aplicado con un único UPDATE, en lugar de
+    un registro por fila afectada.
+
+    Attributes:
+        id (int): Identificador único
+        tipo (str): Tipo de operación (actualizacion_productos, ...)
+        usuario_id (int): Usuario que ejecutó la operación
+        filtro (str): JSON con el filtro aplicado
+        cambios (str): JSON con la operación aplicada
+        filas_afectadas (int): Filas modificadas por el UPDATE
+        created_at (datetime): Fecha de la operación
+    """
+
+    __tablename__ = 'operaciones_masivas'
+
+    # === CAMPOS ===
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    tipo = db.Column(
+        db.String(50),
+        nullable=False,
+        comment='Tipo de operación masiva'
+    )
+
+    usuario_id = db.Column(
+        db.Integer,
+        ForeignKey('users.id', ondelete='SET NULL'),
+        nullable=True,
+        comment='Usuario que ejecutó la operación'
+    )
+
+    filtro = db.Column(
+        db.Text,
+        nullable=True,
+        comment='Filtro aplicado (JSON)'
+    )
+
+    cambios = db.Column(
+        db.Text,
+        nullable=False,
+        comment='Operación aplicada (JSON)'
+    )
+
+    filas_afectadas = db.Column(
+        db.Integer,
+        nullable=False,
+        default=0,
+        comment='Cantidad de filas modificadas'
+    )
+
+    created_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(PERU_TZ),
+        nullable=False,
+        comment='Fecha de la operación'
+    )
+
+    # === ÍNDICES ===
+    __table_args__ = (
+        Index('ix_operacion_masiva_tipo_fecha', 'tipo', 'created_at'),
+    )
+
+    # === MÉTODOS DE CLASE ===
+
+    @classmethod
+    def registrar(cls, tipo, usuario_id, filtro, cambios, filas_afectadas):
+        """
+        Crea el registro de auditoría de una operación (sin commit)
+
+        Args:
+            tipo (str): Tipo de operación
+            usuario_id (int): Usuario que la ejecutó
+            filtro (dict): Filtro aplicado
+            cambios (dict): Operación aplicada
+            filas_afectadas (int): Filas modificadas
+
+        Returns:
+            OperacionMasiva: Registro agregado a la sesión
+        """
+        operacion = cls(
+            tipo=tipo,
+            usuario_id=usuario_id,
+            filtro=json.dumps(filtro, ensure_ascii=False, default=str) if filtro is not None else None,
+            cambios=json.dumps(cambios, ensure_ascii=False, default=str),
+            filas_afectadas=filas_afectadas
+        )
+        db.session.add(operacion)
+        return operacion
+
+    def to_dict(self):
+        """
+        Convierte la operación a diccionario
+
+        Returns:
+            dict: Representación de la operación
+        """
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'usuario_id': self.usuario_id,
+            'filtro': json.loads(self.filtro) if self.filtro else None,
+            'cambios': json.loads(self.cambios) if self.cambios else None,
+            'filas_afectadas': self.filas_afectadas,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __repr__(self):
+        return f'<OperacionMasiva {self.tipo}: {self.filas_afectadas} filas>'
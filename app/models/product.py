@@ -7,7 +7,7 @@ Gestiona el inventario de productos del minimarket
 
 from app import db
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import CheckConstraint, Index
+from sqlalchemy import CheckConstraint, Index, select, func
 from sqlalchemy.ext.hybrid import hybrid_property
 from decimal import Decimal
 
@@ -253,18 +253,22 @@ class Product(db.Model):
 
     def calcular_stock_total(self):
         """
-        Calcula el stock total sumando todos los lotes activos
+        Recalcula el stock total sumando las cantidades de todos los lotes
 
-        Este método será implementado cuando se cree el modelo Lote.
-        Por ahora retorna el stock_total actual.
+        Se suman todos los lotes (activos o no), igual que lo mantienen la
+        creación de lotes, las ventas y las cancelaciones. Para reconciliar
+        todo el catálogo de una vez usar app.services.stock_service.
 
         Returns:
-            int: Stock total calculado
+            int: Stock total calculado (también se asigna a stock_total)
         """
-        # TODO: Implementar cuando se cree el modelo Lote
-        # total = sum(lote.cantidad for lote in self.lotes if lote.activo)
-        # self.stock_total = total
-        # return total
+        from app.models.lote import Lote
+
+        total = db.session.execute(
+            select(func.coalesce(func.sum(Lote.cantidad_actual), 0))
+            .where(Lote.producto_id == self.id)
+        ).scalar()
+        self.stock_total = int(total)
         return self.stock_total
 
     def to_dict(self, include_relationships=False):
@@ -277,24 +281,25 @@ class Product(db.Model):
         Returns:
             dict: Representación del producto en formato diccionario
         """
+        # (Decimal y date/datetime van sin convertir: los serializa app.json, ver app.utils.json_provider)
         data = {
             'id': self.id,
             'codigo_barras': self.codigo_barras,
             'nombre': self.nombre,
             'descripcion': self.descripcion,
             'categoria': self.categoria,
-            'precio_compra': float(self.precio_compra),
-            'precio_venta': float(self.precio_venta),
+            'precio_compra': self.precio_compra,
+            'precio_venta': self.precio_venta,
             'stock_total': self.stock_total,
             'stock_minimo': self.stock_minimo,
             'stock_disponible': self.stock_disponible,
             'necesita_reabastecimiento': self.necesita_reabastecimiento,
-            'margen_ganancia': float(self.margen_ganancia),
+            'margen_ganancia': self.margen_ganancia,
             'porcentaje_ganancia': round(self.porcentaje_ganancia, 2),
             'imagen_url': self.imagen_url,
             'activo': self.activo,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
         }
 
         # TODO: Incluir relaciones cuando se implementen
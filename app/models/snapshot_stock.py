@@ -0,0 +1,125 @@
+"""
+KATITA-POS - SnapshotStock Model
+================================
+Fotografías periódicas del stock (por lote y por producto)
+
+Permiten responder "¿cuánto stock y a qué valor teníamos el día X?"
+partiendo del corte más cercano y aplicando solo los movimientos
+posteriores, en lugar de recorrer todo el historial de MovimientoStock.
+"""
+
+from app import db
+from datetime import timezone, timedelta
+from sqlalchemy import Index, ForeignKey, func
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+
+class SnapshotStock(db.Model):
+    """
+    Modelo de SnapshotStock
+
+    Cada corte escribe una fila por lote con stock y una fila resumen por
+    producto (lote_id NULL). Todas las filas de un corte comparten el mismo
+    valor de 'corte'.
+
+    Attributes:
+        id (int): Identificador único
+        corte (datetime): Instante de la fotografía
+        producto_id (int): Producto
+        lote_id (int): Lote (NULL en la fila resumen del producto)
+        cantidad (int): Unidades en el corte
+        valor (Decimal): Valor al costo (cantidad * precio_compra_lote)
+    """
+
+    __tablename__ = 'snapshots_stock'
+
+    # === CAMPOS ===
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    corte = db.Column(
+        db.DateTime,
+        nullable=False,
+        comment='Instante de la fotografía'
+    )
+
+    producto_id = db.Column(
+        db.Integer,
+        ForeignKey('products.id', ondelete='CASCADE'),
+        nullable=False,
+        comment='Producto'
+    )
+
+    lote_id = db.Column(
+        db.Integer,
+        ForeignKey('lotes.id', ondelete='CASCADE'),
+        nullable=True,
+        comment='Lote (NULL = resumen del producto)'
+    )
+
+    cantidad = db.Column(
+        db.Integer,
+        nullable=False,
+        comment='Unidades en el corte'
+    )
+
+    valor = db.Column(
+        db.Numeric(12, 2),
+        nullable=False,
+        comment='Valor al costo en el corte'
+    )
+
+    # === ÍNDICES ===
+    __table_args__ = (
+        Index('ix_snapshot_stock_corte_producto', 'corte', 'producto_id'),
+    )
+
+    # === MÉTODOS DE CLASE ===
+
+    @classmethod
+    def ultimo_corte(cls, antes_de=None):
+        """
+        Retorna el corte más reciente (opcionalmente anterior a un instante)
+
+        Args:
+            antes_de (datetime): Límite superior exclusivo (opcional)
+
+        Returns:
+            datetime: Instante del corte o None si no hay ninguno
+        """
+        query = db.session.query(func.max(cls.corte))
+        if antes_de is not None:
+            query = query.filter(cls.corte < antes_de)
+        return query.scalar()
+
+    @classmethod
+    def cortes(cls, limite=30):
+        """
+        Lista los últimos cortes con su resumen
+
+        Args:
+            limite (int): Cantidad máxima de cortes
+
+        Returns:
+            list: [{corte, productos, unidades, valor}]
+        """
+        filas = db.session.query(
+            cls.corte,
+            func.count(cls.id),
+            func.coalesce(func.sum(cls.cantidad), 0),
+            func.coalesce(func.sum(cls.valor), 0)
+        ).filter(cls.lote_id.is_(None)).group_by(cls.corte).order_by(cls.corte.desc()).limit(limite).all()
+
+        return [
+            {
+                'corte': corte.isoformat(),
+                'productos': productos,
+                'unidades': int(unidades),
+                'valor': str(valor),
+            }
+            for corte, productos, unidades, valor in filas
+        ]
+
+    def __repr__(self):
+        return f'<SnapshotStock {self.corte} producto={self.producto_id} lote={self.lote_id}: {self.cantidad}>'
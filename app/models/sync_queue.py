@@ -10,7 +10,7 @@ import json
 from datetime import datetime, timezone, timedelta
 from sqlalchemy import (
     Index, CheckConstraint, String, Integer,
-    Text, Boolean, DateTime
+    Text, Boolean, DateTime, or_, and_, case, func, select, delete
 )
 from sqlalchemy.orm import validates
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -32,7 +32,7 @@ class SyncQueue(db.Model):
     - update: Actualización de registro existente
     - delete: Eliminación de registro
 
-    IMPORTANTE: Este modelo NO sincroniza datos (eso lo hace un servicio).
+    IMPORTANTE: Este modelo NO sincroniza datos (eso lo hace sync_service).
     Solo GESTIONA LA COLA de sincronización.
     """
 
@@ -55,6 +55,11 @@ class SyncQueue(db.Model):
     max_intentos = db.Column(Integer, default=5, nullable=False)
     procesado = db.Column(Boolean, default=False, nullable=False)
     error_mensaje = db.Column(Text, nullable=True)
+    siguiente_intento = db.Column(DateTime, nullable=True)  # Backoff: no reintentar antes de esta hora
+
+    # Lease: worker que reclamó el registro y hasta cuándo lo tiene reservado
+    lease_owner = db.Column(String(64), nullable=True)
+    lease_hasta = db.Column(DateTime, nullable=True)
 
     # Timestamps
     created_at = db.Column(
@@ -91,6 +96,13 @@ class SyncQueue(db.Model):
         Index('ix_sync_tabla_registro', 'tabla', 'registro_id'),
         Index('ix_sync_procesado_created', 'procesado', 'created_at'),
         Index('ix_sync_tabla_operacion', 'tabla', 'operacion'),
+        # Índice parcial: solo filas pendientes (la cola de trabajo del worker
+        # se recorre en O(pendientes) aunque la tabla tenga millones de procesados)
+        Index(
+            'ix_sync_pendientes', 'created_at', 'id',
+            postgresql_where=(procesado == False),  # noqa: E712
+            sqlite_where=(procesado == False)  # noqa: E712
+        ),
     )
 
     # === CONSTRUCTOR ===
@@ -283,6 +295,7 @@ class SyncQueue(db.Model):
             'max_intentos': self.max_intentos,
             'procesado': self.procesado,
             'error_mensaje': self.error_mensaje,
+            'siguiente_intento': self.siguiente_intento.isoformat() if self.siguiente_intento else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'procesado_at': self.procesado_at.isoformat() if self.procesado_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
@@ -297,14 +310,17 @@ class SyncQueue(db.Model):
     # === MÉTODOS DE CLASE (QUERIES) ===
 
     @classmethod
-    def pendientes(cls):
+    def pendientes(cls, limite=None):
         """
         Retorna registros pendientes de sincronización
 
+        Args:
+            limite (int): Máximo de registros (default: todos)
+
         Returns:
             list[SyncQueue]: Lista de registros pendientes ordenados por antigüedad
         """
-        return cls.query.filter_by(procesado=False).order_by(cls.created_at.asc()).all()
+        return cls.query.filter_by(procesado=False).order_by(cls.created_at.asc()).limit(limite).all()
 
     @classmethod
     def por_tabla(cls, tabla):
@@ -333,17 +349,20 @@ class SyncQueue(db.Model):
         return cls.query.filter_by(operacion=operacion).order_by(cls.created_at.desc()).all()
 
     @classmethod
-    def fallidos(cls):
+    def fallidos(cls, limite=None):
         """
         Retorna registros que han fallado definitivamente
 
+        Args:
+            limite (int): Máximo de registros (default: todos)
+
         Returns:
             list[SyncQueue]: Lista de registros fallidos sin reintentos disponibles
         """
         return cls.query.filter(
             cls.intentos >= cls.max_intentos,
             cls.procesado == False
-        ).order_by(cls.created_at.desc()).all()
+        ).order_by(cls.created_at.desc()).limit(limite).all()
 
     @classmethod
     def prioritarios(cls):
@@ -368,23 +387,50 @@ class SyncQueue(db.Model):
 
         Prioriza por:
         1. Registros más antiguos primero
-        2. Que aún puedan reintentar
+        2. Que aún puedan reintentar (y cuyo backoff ya venció)
 
         Returns:
             SyncQueue|None: Siguiente registro a procesar o None si no hay pendientes
         """
+        ahora = datetime.now(PERU_TZ).replace(tzinfo=None)
+
         return cls.query.filter(
             cls.procesado == False,
-            cls.intentos < cls.max_intentos
+            cls.intentos < cls.max_intentos,
+            or_(cls.siguiente_intento.is_(None), cls.siguiente_intento <= ahora)
         ).order_by(cls.created_at.asc()).first()
 
     @classmethod
-    def limpiar_procesados(cls, dias=30):
+    def _purgar(cls, condicion, tamano_bloque):
+        """
+        Elimina en bloques las filas que cumplen la condición
+
+        DELETE ... WHERE id IN (SELECT id ... LIMIT n) con commit por bloque:
+        cada transacción es corta y no retiene locks sobre toda la tabla.
+
+        Returns:
+            int: Cantidad de registros eliminados
+        """
+        tabla = cls.__table__
+        eliminados = 0
+        while True:
+            bloque = select(tabla.c.id).where(condicion).limit(tamano_bloque).scalar_subquery()
+            resultado = db.session.execute(delete(tabla).where(tabla.c.id.in_(bloque)))
+            db.session.commit()
+            eliminados += resultado.rowcount
+            if resultado.rowcount < tamano_bloque:
+                return eliminados
+
+    @classmethod
+    def limpiar_procesados(cls, dias=30, tamano_bloque=1000, dias_fallidos=None):
         """
         Elimina registros procesados antiguos
 
         Args:
             dias (int): Eliminar procesados con más de N días
+            tamano_bloque (int): Registros eliminados por transacción
+            dias_fallidos (int): Eliminar también los fallidos definitivos sin
+                cambios hace más de N días (None = conservarlos)
 
         Returns:
             int: Cantidad de registros eliminados
@@ -392,63 +438,68 @@ class SyncQueue(db.Model):
         # Calcular fecha límite en UTC
         fecha_limite = datetime.now(PERU_TZ) - timedelta(days=dias)
 
-        # Buscar registros a eliminar
-        registros = cls.query.filter(
-            cls.procesado == True,
-            cls.procesado_at <= fecha_limite
-        ).all()
-
-        cantidad = len(registros)
+        eliminados = cls._purgar(
+            and_(cls.procesado == True, cls.procesado_at <= fecha_limite),  # noqa: E712
+            tamano_bloque
+        )
 
-        # Eliminar registros
-        for registro in registros:
-            db.session.delete(registro)
+        if dias_fallidos:
+            limite_fallidos = datetime.now(PERU_TZ) - timedelta(days=dias_fallidos)
+            eliminados += cls._purgar(
+                and_(
+                    cls.procesado == False,  # noqa: E712
+                    cls.intentos >= cls.max_intentos,
+                    cls.updated_at <= limite_fallidos
+                ),
+                tamano_bloque
+            )
 
-        db.session.commit()
-
-        return cantidad
+        return eliminados
 
     @classmethod
     def estadisticas(cls):
         """
         Retorna estadísticas de la cola de sincronización
 
+        Una sola consulta GROUP BY (operacion, procesado) con conteos
+        condicionales; los totales se suman en Python.
+
         Returns:
             dict: Diccionario con estadísticas
         """
-        total = cls.query.count()
-        pendientes = cls.query.filter_by(procesado=False).count()
-        procesados = cls.query.filter_by(procesado=True).count()
-        fallidos = cls.query.filter(
-            cls.intentos >= cls.max_intentos,
-            cls.procesado == False
-        ).count()
-
-        # Estadísticas por operación
-        inserts = cls.query.filter_by(operacion='insert', procesado=False).count()
-        updates = cls.query.filter_by(operacion='update', procesado=False).count()
-        deletes = cls.query.filter_by(operacion='delete', procesado=False).count()
-
-        # Registros prioritarios
         hace_60_min = datetime.now(PERU_TZ) - timedelta(minutes=60)
-        prioritarios = cls.query.filter(
-            cls.procesado == False,
-            cls.created_at <= hace_60_min
-        ).count()
 
-        return {
-            'total': total,
-            'pendientes': pendientes,
-            'procesados': procesados,
-            'fallidos': fallidos,
-            'prioritarios': prioritarios,
-            'por_operacion': {
-                'insert': inserts,
-                'update': updates,
-                'delete': deletes,
-            }
+        filas = db.session.query(
+            cls.operacion,
+            cls.procesado,
+            func.count(cls.id),
+            func.sum(case((cls.intentos >= cls.max_intentos, 1), else_=0)),
+            func.sum(case((cls.created_at <= hace_60_min, 1), else_=0))
+        ).group_by(cls.operacion, cls.procesado).all()
+
+        estadisticas = {
+            'total': 0,
+            'pendientes': 0,
+            'procesados': 0,
+            'fallidos': 0,
+            'prioritarios': 0,
+            'por_operacion': {'insert': 0, 'update': 0, 'delete': 0},
         }
 
+        for operacion, procesado, cantidad, agotados, antiguos in filas:
+            estadisticas['total'] += cantidad
+            if procesado:
+                estadisticas['procesados'] += cantidad
+                continue
+
+            # Conteos de fallidos, prioritarios y por operación: solo pendientes
+            estadisticas['pendientes'] += cantidad
+            estadisticas['fallidos'] += int(agotados or 0)
+            estadisticas['prioritarios'] += int(antiguos or 0)
+            estadisticas['por_operacion'][operacion] = estadisticas['por_operacion'].get(operacion, 0) + cantidad
+
+        return estadisticas
+
     # === REPRESENTACIONES ===
 
     def __repr__(self):
@@ -0,0 +1,147 @@
+"""
+KATITA-POS - TareaReconciliacion Model
+======================================
+Conflictos de stock detectados al fusionar réplicas
+
+Si al fusionar los contadores de varios nodos un lote queda con stock
+negativo (se vendió offline lo mismo en dos tiendas) o por encima de su
+cantidad inicial, el stock se recorta al rango válido y se abre una tarea
+para que un administrador la revise. Las ventas nunca se bloquean.
+"""
+
+from app import db
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import Index, ForeignKey, CheckConstraint
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+
+class TareaReconciliacion(db.Model):
+    """
+    Modelo de TareaReconciliacion
+
+    Una tarea pendiente por lote: si el conflicto cambia antes de resolverse
+    se actualiza la misma tarea.
+
+    Attributes:
+        id (int): Identificador único
+        lote_id (int): Lote en conflicto
+        producto_id (int): Producto del lote
+        diferencia (int): Stock según contadores menos stock aplicado
+            (negativo = unidades vendidas de más; positivo = excedente)
+        estado (str): 'pendiente' o 'resuelta'
+        nota (str): Comentario de la resolución
+        resuelta_por (int): Usuario que la resolvió
+        created_at, updated_at, resuelta_at (datetime)
+    """
+
+    __tablename__ = 'tareas_reconciliacion'
+
+    # === CAMPOS ===
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    lote_id = db.Column(
+        db.Integer,
+        ForeignKey('lotes.id', ondelete='CASCADE'),
+        nullable=False,
+        comment='Lote en conflicto'
+    )
+
+    producto_id = db.Column(
+        db.Integer,
+        ForeignKey('products.id', ondelete='CASCADE'),
+        nullable=False,
+        comment='Producto del lote'
+    )
+
+    diferencia = db.Column(
+        db.Integer,
+        nullable=False,
+        comment='Contadores - stock aplicado'
+    )
+
+    estado = db.Column(
+        db.String(20),
+        nullable=False,
+        default='pendiente',
+        comment='pendiente | resuelta'
+    )
+
+    nota = db.Column(db.String(255), nullable=True)
+
+    resuelta_por = db.Column(
+        db.Integer,
+        ForeignKey('users.id', ondelete='SET NULL'),
+        nullable=True
+    )
+
+    created_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(PERU_TZ),
+        nullable=False
+    )
+
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(PERU_TZ),
+        onupdate=lambda: datetime.now(PERU_TZ),
+        nullable=False
+    )
+
+    resuelta_at = db.Column(db.DateTime, nullable=True)
+
+    # === CONSTRAINTS ===
+    __table_args__ = (
+        CheckConstraint("estado IN ('pendiente', 'resuelta')", name='check_estado_tarea_valido'),
+        Index('ix_tarea_reconciliacion_estado_lote', 'estado', 'lote_id'),
+    )
+
+    # === MÉTODOS ===
+
+    def resolver(self, usuario_id, nota=None):
+        """
+        Marca la tarea como resuelta (sin commit)
+
+        Args:
+            usuario_id (int): Usuario que la resuelve
+            nota (str): Comentario (ej. ajuste realizado)
+        """
+        self.estado = 'resuelta'
+        self.resuelta_por = usuario_id
+        self.nota = nota[:255] if nota else None
+        self.resuelta_at = datetime.now(PERU_TZ)
+
+    @classmethod
+    def pendientes(cls):
+        """
+        Retorna las tareas pendientes, las más recientes primero
+
+        Returns:
+            list[TareaReconciliacion]
+        """
+        return cls.query.filter_by(estado='pendiente').order_by(cls.updated_at.desc()).all()
+
+    def to_dict(self):
+        """
+        Convierte la tarea a diccionario
+
+        Returns:
+            dict: Representación de la tarea
+        """
+        return {
+            'id': self.id,
+            'lote_id': self.lote_id,
+            'producto_id': self.producto_id,
+            'diferencia': self.diferencia,
+            'tipo': 'faltante' if self.diferencia < 0 else 'excedente',
+            'estado': self.estado,
+            'nota': self.nota,
+            'resuelta_por': self.resuelta_por,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'resuelta_at': self.resuelta_at.isoformat() if self.resuelta_at else None,
+        }
+
+    def __repr__(self):
+        return f'<TareaReconciliacion lote={self.lote_id} diferencia={self.diferencia} {self.estado}>'
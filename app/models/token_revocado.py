@@ -0,0 +1,134 @@
+"""
+KATITA-POS - TokenRevocado Model
+================================
+Lista de tokens JWT revocados (logout), identificados por su jti
+"""
+
+from app import db
+from datetime import datetime, timezone
+from sqlalchemy import Index
+
+
+def ahora_utc():
+    """Fecha actual en UTC sin zona horaria (expira_en se guarda así, como el exp del JWT)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class TokenRevocado(db.Model):
+    """
+    Modelo de TokenRevocado
+
+    Cada fila invalida un token hasta su expiración natural; después ya no
+    hace falta (Flask-JWT-Extended rechaza el token por expirado) y
+    `limpiar_expirados` la elimina. Las consultas por petición no llegan a
+    esta tabla: las resuelve el filtro en memoria de app.utils.revocacion.
+
+    Attributes:
+        id (int): Identificador único (creciente: el refresco incremental lee id > último)
+        jti (str): Identificador único del token (claim jti)
+        tipo (str): access o refresh
+        user_id (int): Usuario dueño del token
+        expira_en (datetime): Expiración del token en UTC (claim exp)
+    """
+
+    __tablename__ = 'tokens_revocados'
+
+    # === CAMPOS ===
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    jti = db.Column(
+        db.String(64),
+        unique=True,
+        nullable=False,
+        comment='Identificador único del token (claim jti)'
+    )
+
+    tipo = db.Column(
+        db.String(10),
+        nullable=False,
+        default='access',
+        comment='Tipo de token: access o refresh'
+    )
+
+    user_id = db.Column(
+        db.Integer,
+        nullable=True,
+        comment='Usuario dueño del token'
+    )
+
+    expira_en = db.Column(
+        db.DateTime,
+        nullable=False,
+        comment='Expiración del token en UTC'
+    )
+
+    created_at = db.Column(
+        db.DateTime,
+        default=ahora_utc,
+        nullable=False,
+        comment='Fecha de revocación en UTC'
+    )
+
+    # === ÍNDICES ===
+    __table_args__ = (
+        Index('ix_token_revocado_expira', 'expira_en'),
+    )
+
+    # === MÉTODOS DE CLASE ===
+
+    @classmethod
+    def revocar(cls, jti, tipo, user_id, exp):
+        """
+        Registra un token como revocado (idempotente)
+
+        Args:
+            jti (str): Claim jti
+            tipo (str): access o refresh
+            user_id (int): Usuario dueño del token
+            exp (int): Claim exp (timestamp UTC)
+
+        Returns:
+            TokenRevocado: Registro (sin commit)
+        """
+        registro = cls.query.filter_by(jti=jti).first()
+        if registro is None:
+            registro = cls(
+                jti=jti,
+                tipo=tipo,
+                user_id=user_id,
+                expira_en=datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None)
+            )
+            db.session.add(registro)
+        return registro
+
+    @classmethod
+    def esta_revocado(cls, jti):
+        """
+        Consulta exacta en la base (solo para confirmar positivos del filtro)
+
+        Args:
+            jti (str): Claim jti
+
+        Returns:
+            bool: True si el token está revocado y aún no expiró
+        """
+        return db.session.query(
+            cls.query.filter(cls.jti == jti, cls.expira_en > ahora_utc()).exists()
+        ).scalar()
+
+    @classmethod
+    def limpiar_expirados(cls):
+        """
+        Elimina los registros de tokens ya expirados
+
+        Returns:
+            int: Cantidad de registros eliminados
+        """
+        eliminados = cls.query.filter(
+            cls.expira_en <= ahora_utc()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return eliminados
+
+    def __repr__(self):
+        return f'<TokenRevocado {self.jti} ({self.tipo})>'
@@ -0,0 +1,162 @@
+"""
+KATITA-POS - TrabajoImportacion Model
+=====================================
+Estado de las importaciones de productos en segundo plano
+
+El archivo se procesa en un hilo del worker que lo recibió, pero el estado
+vive en la base: con varios workers (gunicorn) la consulta puede llegar a
+cualquiera de ellos. Si el worker se recicla (max_requests) o cae, el hilo
+muere con él y la fila quedaría en_proceso para siempre: pasado
+IMPORT_TRABAJO_MAX_MINUTOS se marca como fallida.
+"""
+
+import json
+from app import db
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import Index
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+
+class TrabajoImportacion(db.Model):
+    """
+    Modelo de TrabajoImportacion
+
+    Attributes:
+        id (str): ID del trabajo (uuid4 hex)
+        estado (str): en_proceso, completado o fallido
+        resultado (str): Reporte de la importación (JSON)
+        error (str): Mensaje de error si falló
+        creado_at (datetime): Inicio del trabajo
+        finalizado_at (datetime): Fin del trabajo (NULL mientras está en proceso)
+    """
+
+    __tablename__ = 'trabajos_importacion'
+
+    # === CAMPOS ===
+    id = db.Column(db.String(32), primary_key=True)
+
+    estado = db.Column(
+        db.String(20),
+        nullable=False,
+        default='en_proceso',
+        comment='en_proceso, completado o fallido'
+    )
+
+    resultado = db.Column(
+        db.Text,
+        nullable=True,
+        comment='Reporte de la importación (JSON)'
+    )
+
+    error = db.Column(
+        db.Text,
+        nullable=True,
+        comment='Mensaje de error si el trabajo falló'
+    )
+
+    creado_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(PERU_TZ),
+        nullable=False,
+        comment='Inicio del trabajo'
+    )
+
+    finalizado_at = db.Column(
+        db.DateTime,
+        nullable=True,
+        comment='Fin del trabajo'
+    )
+
+    # === ÍNDICES ===
+    __table_args__ = (
+        Index('ix_trabajo_importacion_finalizado', 'finalizado_at'),
+    )
+
+    # === MÉTODOS DE CLASE ===
+
+    @classmethod
+    def finalizar(cls, trabajo_id, estado, resultado=None, error=None):
+        """
+        Guarda el resultado de un trabajo (commit)
+
+        Args:
+            trabajo_id (str): ID del trabajo
+            estado (str): completado o fallido
+            resultado (dict): Reporte de la importación
+            error (str): Mensaje de error
+        """
+        trabajo = db.session.get(cls, trabajo_id)
+        if trabajo is None:
+            return
+        trabajo.estado = estado
+        trabajo.resultado = json.dumps(resultado, ensure_ascii=False) if resultado is not None else None
+        trabajo.error = error
+        trabajo.finalizado_at = datetime.now(PERU_TZ)
+        db.session.commit()
+
+    @classmethod
+    def marcar_abandonados(cls, minutos, trabajo_id=None):
+        """
+        Marca como fallidos los trabajos en proceso desde hace más de 'minutos' (sin commit)
+
+        Args:
+            minutos (int): Duración máxima de un trabajo
+            trabajo_id (str): Revisar solo este trabajo (default: todos)
+
+        Returns:
+            int: Cantidad de trabajos marcados
+        """
+        ahora = datetime.now(PERU_TZ)
+        consulta = cls.query.filter(
+            cls.finalizado_at.is_(None),
+            cls.creado_at < ahora - timedelta(minutes=minutos)
+        )
+        if trabajo_id is not None:
+            consulta = consulta.filter(cls.id == trabajo_id)
+        return consulta.update({
+            'estado': 'fallido',
+            'error': f'El trabajo no terminó en {minutos} minutos (el worker se reinició o cayó)',
+            'finalizado_at': ahora,
+        }, synchronize_session=False)
+
+    @classmethod
+    def limpiar_finalizados(cls, dias):
+        """
+        Elimina los trabajos finalizados hace más de 'dias' días (sin commit)
+
+        Args:
+            dias (int): Días de retención
+
+        Returns:
+            int: Cantidad de trabajos eliminados
+        """
+        limite = datetime.now(PERU_TZ) - timedelta(days=dias)
+        return cls.query.filter(
+            cls.finalizado_at.isnot(None),
+            cls.finalizado_at < limite
+        ).delete(synchronize_session=False)
+
+    def to_dict(self):
+        """
+        Convierte el trabajo a diccionario
+
+        Returns:
+            dict: id, estado, creado_at y, si terminó, resultado o error
+        """
+        data = {
+            'id': self.id,
+            'estado': self.estado,
+            'creado_at': self.creado_at.isoformat() if self.creado_at else None,
+        }
+        if self.finalizado_at:
+            data['finalizado_at'] = self.finalizado_at.isoformat()
+        if self.resultado:
+            data['resultado'] = json.loads(self.resultado)
+        if self.error:
+            data['error'] = self.error
+        return data
+
+    def __repr__(self):
+        return f'<TrabajoImportacion {self.id}: {self.estado}>'
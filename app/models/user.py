@@ -9,6 +9,7 @@ from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 import re
 import bcrypt
+from flask import current_app, has_app_context
 from sqlalchemy import (
     Index, CheckConstraint, String, Integer,
     Boolean, DateTime, Text
@@ -197,8 +198,9 @@ class User(db.Model):
         if not password or len(password) < 6:
             raise ValueError('La contraseña debe tener al menos 6 caracteres')
 
-        # Generar salt y hashear password con bcrypt
-        salt = bcrypt.gensalt()
+        # Generar salt y hashear password con bcrypt (costo BCRYPT_ROUNDS)
+        rounds = current_app.config.get('BCRYPT_ROUNDS', 12) if has_app_context() else 12
+        salt = bcrypt.gensalt(rounds=rounds)
         self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
     def check_password(self, password):
@@ -420,19 +420,20 @@ class Venta(db.Model):
             dict: Diccionario con los datos de la venta
         """
         # Convertir fecha a timezone de Perú para serialización
+        # (Decimal y datetime van sin convertir: los serializa app.json, ver app.utils.json_provider)
         fecha_peru = self.fecha.astimezone(PERU_TZ) if self.fecha else None
 
         data = {
             'id': self.id,
             'numero_venta': self.numero_venta,
-            'fecha': fecha_peru.isoformat() if fecha_peru else None,
-            'fecha_venta': fecha_peru.isoformat() if fecha_peru else None,  # Alias para compatibilidad
-            'subtotal': float(self.subtotal) if self.subtotal else 0.0,
-            'descuento': float(self.descuento) if self.descuento else 0.0,
-            'total': float(self.total) if self.total else 0.0,
+            'fecha': fecha_peru,
+            'fecha_venta': fecha_peru,  # Alias para compatibilidad
+            'subtotal': self.subtotal or Decimal('0.00'),
+            'descuento': self.descuento or Decimal('0.00'),
+            'total': self.total or Decimal('0.00'),
             'metodo_pago': self.metodo_pago,
-            'monto_recibido': float(self.monto_recibido) if self.monto_recibido else None,
-            'cambio': float(self.cambio) if self.cambio else 0.0,
+            'monto_recibido': self.monto_recibido or None,
+            'cambio': self.cambio or Decimal('0.00'),
             'cliente_nombre': self.cliente_nombre,
             'cliente_dni': self.cliente_dni,
             'vendedor_id': self.vendedor_id,
@@ -442,8 +443,8 @@ class Venta(db.Model):
             'notas': self.notas,
             'created_offline': self.created_offline,
             'synced': self.synced,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
             # Propiedades calculadas
             'cantidad_items': self.cantidad_items,
             'es_pago_digital': self.es_pago_digital,
@@ -0,0 +1,190 @@
+"""
+KATITA-POS - Servicio de Autenticación
+=======================================
+Verificación de contraseñas y control de intentos fallidos
+
+- bcrypt corre en un pool acotado de hilos (BCRYPT_WORKERS) y con un tope
+  de verificaciones en curso (BCRYPT_MAX_PENDIENTES): una ráfaga de logins
+  no satura la CPU de todos los hilos del worker. Si no hay cupo en
+  BCRYPT_ESPERA_SEGUNDOS se lanza ServicioSaturado (503).
+- Costo configurable (BCRYPT_ROUNDS): un hash con otro costo se rehace en
+  el siguiente login correcto.
+- Intentos fallidos en memoria del proceso con ventana de tiempo
+  (LOGIN_VENTANA_SEGUNDOS): solo al llegar a LOGIN_MAX_INTENTOS se escribe
+  en users (bloqueo). El bloqueo en la base es lo que ven los demás
+  workers; sin almacén compartido (Redis) cada worker cuenta por su lado.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from flask import current_app
+
+
+class ServicioSaturado(Exception):
+    """No hay cupo para verificar contraseñas dentro del tiempo de espera."""
+
+
+# ==================== Pool de bcrypt ====================
+
+_pool_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_cupos = None
+
+
+def _obtener_pool():
+    """Pool y semáforo del proceso (se recrean tras un fork de gunicorn)"""
+    global _pool, _pool_pid, _cupos
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            config = current_app.config
+            _pool = ThreadPoolExecutor(max_workers=config['BCRYPT_WORKERS'], thread_name_prefix='bcrypt')
+            _cupos = threading.BoundedSemaphore(config['BCRYPT_MAX_PENDIENTES'])
+            _pool_pid = os.getpid()
+        return _pool, _cupos
+
+
+def cerrar_pool():
+    """Cierra el pool del proceso; se recrea con la configuración vigente en el próximo uso"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+
+
+def _ejecutar(funcion, *args):
+    """Ejecuta funcion en el pool de bcrypt respetando el tope de pendientes"""
+    pool, cupos = _obtener_pool()
+    if not cupos.acquire(timeout=current_app.config['BCRYPT_ESPERA_SEGUNDOS']):
+        raise ServicioSaturado('Demasiados inicios de sesión simultáneos')
+    try:
+        return pool.submit(funcion, *args).result()
+    finally:
+        cupos.release()
+
+
+def _checkpw(password, password_hash):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        return False  # Hash con formato inválido
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def costo_hash(password_hash):
+    """
+    Costo (rounds) de un hash bcrypt ($2b$12$...)
+
+    Returns:
+        int | None: None si el hash no tiene el formato esperado
+    """
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def verificar_password(user, password):
+    """
+    Verifica la contraseña en el pool de bcrypt y rehace el hash si su costo
+    no es BCRYPT_ROUNDS (sin commit; el login exitoso ya hace uno)
+
+    Args:
+        user (User): Usuario
+        password (str): Contraseña en texto plano
+
+    Returns:
+        bool: True si la contraseña es correcta
+
+    Raises:
+        ServicioSaturado: Sin cupo en el pool
+    """
+    if not password or not user.password_hash:
+        return False
+
+    if not _ejecutar(_checkpw, password, user.password_hash):
+        return False
+
+    rounds = current_app.config['BCRYPT_ROUNDS']
+    if costo_hash(user.password_hash) != rounds:
+        user.password_hash = _ejecutar(_hashpw, password, rounds)
+    return True
+
+
+
+def establecer_password(user, password):
+    """
+    Hashea la contraseña en el pool de bcrypt con costo BCRYPT_ROUNDS y la
+    asigna al usuario (sin commit). Mismas reglas que User.set_password
+
+    Args:
+        user (User): Usuario
+        password (str): Contraseña en texto plano
+
+    Raises:
+        ValueError: Si la contraseña no cumple requisitos mínimos
+        ServicioSaturado: Sin cupo en el pool
+    """
+    if not password or len(password) < 6:
+        raise ValueError('La contraseña debe tener al menos 6 caracteres')
+
+    user.password_hash = _ejecutar(_hashpw, password, current_app.config['BCRYPT_ROUNDS'])
+
+# ==================== Intentos fallidos ====================
+
+_intentos_lock = threading.Lock()
+_intentos = {}  # user_id -> (conteo, expira_monotonic)
+
+
+def registrar_fallo(user):
+    """
+    Cuenta un intento fallido; al llegar a LOGIN_MAX_INTENTOS bloquea al
+    usuario en la base (commit) y reinicia el contador
+
+    Args:
+        user (User): Usuario
+
+    Returns:
+        int: Intentos restantes (0 = quedó bloqueado)
+    """
+    config = current_app.config
+    maximo = config['LOGIN_MAX_INTENTOS']
+    ahora = time.monotonic()
+
+    with _intentos_lock:
+        conteo, expira = _intentos.get(user.id, (0, 0))
+        if expira <= ahora:
+            # Ventana vencida: se parte de lo que quedó en la base (bases anteriores)
+            conteo = user.intentos_login_fallidos or 0
+        conteo += 1
+        if conteo >= maximo:
+            _intentos.pop(user.id, None)
+        else:
+            _intentos[user.id] = (conteo, ahora + config['LOGIN_VENTANA_SEGUNDOS'])
+
+    if conteo >= maximo:
+        from app import db
+        user.intentos_login_fallidos = conteo
+        user.bloquear(minutos=config['LOGIN_BLOQUEO_MINUTOS'])
+        db.session.commit()
+        return 0
+    return maximo - conteo
+
+
+def limpiar_intentos(user_id):
+    """Descarta los intentos fallidos en memoria de un usuario (login correcto)"""
+    with _intentos_lock:
+        _intentos.pop(user_id, None)
+
+
+def reiniciar_intentos():
+    """Vacía los contadores del proceso"""
+    with _intentos_lock:
+        _intentos.clear()
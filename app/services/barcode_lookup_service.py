@@ -0,0 +1,247 @@
+"""
+KATITA-POS - Servicio de Búsqueda de Códigos de Barras
+======================================================
+Autocompletado de productos a partir de un proveedor externo
+
+Capas:
+    1. Caché persistente (tabla cache_codigos_barras) con entradas positivas
+       y negativas, cada una con su TTL.
+    2. Single-flight: si varias peticiones buscan el mismo código al mismo
+       tiempo, solo una consulta al proveedor y las demás esperan su resultado.
+    3. Proveedor intercambiable: Open Food Facts (requests.Session con
+       keep-alive y pool de conexiones) o un dataset JSON local para tests y
+       tiendas sin internet.
+"""
+
+import json
+import threading
+from abc import ABC, abstractmethod
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from app import db
+from app.models.cache_codigo_barras import CacheCodigoBarras
+
+
+class ProveedorNoDisponible(Exception):
+    """El proveedor no pudo responder (error HTTP, red caída). No se cachea."""
+
+
+class ProveedorTimeout(ProveedorNoDisponible):
+    """El proveedor no respondió dentro del timeout. No se cachea."""
+
+
+# ==================== Proveedores ====================
+
+class ProveedorCodigos(ABC):
+    """
+    Interfaz de proveedor de datos de productos por código de barras
+
+    Las subclases implementan buscar(codigo) y retornan un dict con
+    nombre, foto_url, marca y categoria, o None si el producto no existe.
+    Los errores transitorios deben lanzar ProveedorNoDisponible.
+    """
+
+    nombre = 'base'
+
+    @abstractmethod
+    def buscar(self, codigo_barras):
+        """dict con nombre, foto_url, marca y categoria, o None si no existe"""
+
+
+class ProveedorOpenFoodFacts(ProveedorCodigos):
+    """Proveedor Open Food Facts con sesión HTTP reutilizable (keep-alive)"""
+
+    nombre = 'openfoodfacts'
+    URL = 'https://world.openfoodfacts.org/api/v0/product/{codigo}.json'
+
+    def __init__(self, timeout=5, pool_maxsize=10):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = 'KATITA-POS/1.0 (autocompletado de productos)'
+
+    def buscar(self, codigo_barras):
+        try:
+            response = self.session.get(self.URL.format(codigo=codigo_barras), timeout=self.timeout)
+        except requests.Timeout as e:
+            raise ProveedorTimeout(str(e))
+        except requests.RequestException as e:
+            raise ProveedorNoDisponible(str(e))
+
+        if response.status_code != 200:
+            raise ProveedorNoDisponible(f'HTTP {response.status_code}')
+
+        data = response.json()
+        if data.get('status') != 1:
+            return None
+
+        producto = data.get('product', {})
+
+        # Categorías en Open Food Facts vienen como tags
+        categorias = producto.get('categories_tags', [])
+
+        return {
+            'nombre': producto.get('product_name', '') or producto.get('product_name_es', ''),
+            'foto_url': producto.get('image_url', '') or producto.get('image_front_url', ''),
+            'marca': producto.get('brands', ''),
+            'categoria': categorias[0].replace('en:', '') if categorias else None,
+        }
+
+
+class ProveedorJSONLocal(ProveedorCodigos):
+    """
+    Proveedor basado en un archivo JSON local
+
+    Formato del archivo: {"7750182001878": {"nombre": ..., "marca": ...}, ...}
+    Útil para tests y para tiendas offline con un dataset precargado.
+    """
+
+    nombre = 'json_local'
+
+    def __init__(self, ruta=None, datos=None):
+        if datos is not None:
+            self.datos = datos
+        elif ruta:
+            with open(ruta, encoding='utf-8') as archivo:
+                self.datos = json.load(archivo)
+        else:
+            self.datos = {}
+
+    def buscar(self, codigo_barras):
+        producto = self.datos.get(codigo_barras)
+        if producto is None:
+            return None
+        return {
+            'nombre': producto.get('nombre', ''),
+            'foto_url': producto.get('foto_url', ''),
+            'marca': producto.get('marca', ''),
+            'categoria': producto.get('categoria'),
+        }
+
+
+def obtener_proveedor(app=None):
+    """
+    Retorna el proveedor configurado (uno por app, reutilizado entre requests)
+
+    Config:
+        BARCODE_PROVIDER: 'openfoodfacts' (default) o 'json_local'
+        BARCODE_LOCAL_DATASET: ruta del JSON para 'json_local'
+        BARCODE_LOOKUP_TIMEOUT: timeout en segundos de Open Food Facts
+
+    Returns:
+        ProveedorCodigos: Instancia del proveedor
+    """
+    app = app or current_app._get_current_object()
+    proveedor = app.extensions.get('barcode_provider')
+    if proveedor is None:
+        if app.config['BARCODE_PROVIDER'] == 'json_local':
+            proveedor = ProveedorJSONLocal(app.config.get('BARCODE_LOCAL_DATASET'))
+        else:
+            proveedor = ProveedorOpenFoodFacts(timeout=app.config['BARCODE_LOOKUP_TIMEOUT'])
+        app.extensions['barcode_provider'] = proveedor
+    return proveedor
+
+
+def configurar_proveedor(app, proveedor):
+    """
+    Reemplaza el proveedor de una app (tests o integraciones propias)
+
+    Args:
+        app (Flask): Aplicación
+        proveedor (ProveedorCodigos): Proveedor a usar
+    """
+    app.extensions['barcode_provider'] = proveedor
+
+
+# ==================== Single-flight ====================
+
+class _Vuelo:
+    """Búsqueda en curso compartida por todas las peticiones del mismo código"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+_vuelos = {}
+_vuelos_lock = threading.Lock()
+
+
+def _buscar_una_vez(codigo_barras, funcion):
+    """
+    Ejecuta funcion() una sola vez por código aunque lleguen varias peticiones
+
+    El primer hilo ejecuta la búsqueda; los demás esperan y reciben el mismo
+    resultado (o la misma excepción).
+    """
+    with _vuelos_lock:
+        vuelo = _vuelos.get(codigo_barras)
+        lider = vuelo is None
+        if lider:
+            vuelo = _Vuelo()
+            _vuelos[codigo_barras] = vuelo
+
+    if not lider:
+        vuelo.evento.wait()
+        if vuelo.error is not None:
+            raise vuelo.error
+        return vuelo.resultado
+
+    try:
+        vuelo.resultado = funcion()
+        return vuelo.resultado
+    except Exception as e:
+        vuelo.error = e
+        raise
+    finally:
+        with _vuelos_lock:
+            _vuelos.pop(codigo_barras, None)
+        vuelo.evento.set()
+
+
+# ==================== API del servicio ====================
+
+def buscar_codigo(codigo_barras):
+    """
+    Busca datos de producto por código usando caché + proveedor
+
+    Args:
+        codigo_barras (str): Código de barras (8-13 dígitos)
+
+    Returns:
+        dict: {'encontrado': bool, 'datos': dict|None, 'cache': bool}
+
+    Raises:
+        ProveedorTimeout: El proveedor no respondió a tiempo
+        ProveedorNoDisponible: El proveedor falló (no se cachea)
+    """
+    entrada = CacheCodigoBarras.obtener_vigente(codigo_barras)
+    if entrada is not None:
+        return {
+            'encontrado': entrada.encontrado,
+            'datos': entrada.datos_dict if entrada.encontrado else None,
+            'cache': True
+        }
+
+    proveedor = obtener_proveedor()
+    config = current_app.config
+
+    def consultar():
+        datos = proveedor.buscar(codigo_barras)
+        encontrado = datos is not None
+        ttl = config['BARCODE_CACHE_TTL_POSITIVO'] if encontrado else config['BARCODE_CACHE_TTL_NEGATIVO']
+
+        try:
+            CacheCodigoBarras.guardar(codigo_barras, encontrado, datos, proveedor.nombre, ttl)
+            db.session.commit()
+        except Exception as e:
+            # Un fallo al guardar la caché no debe romper el autocompletado
+            db.session.rollback()
+            current_app.logger.warning(f"No se pudo guardar caché de {codigo_barras}: {e}")
+
+        return {'encontrado': encontrado, 'datos': datos, 'cache': False}
+
+    return _buscar_una_vez(codigo_barras, consultar)
@@ -0,0 +1,196 @@
+"""
+KATITA-POS - Servicio de Catálogo POS
+=====================================
+Snapshot compacto y versionado del catálogo para terminales POS
+
+Los terminales descargan el catálogo completo una vez (GET /api/pos/catalog)
+y luego solo piden los productos que cambiaron desde su última versión
+(GET /api/pos/catalog/changes?since=<version>). La versión es una por
+transacción y se publica solo hasta una marca segura (ver CatalogoCambio);
+la bitácora catalogo_cambios se alimenta automáticamente en cada flush que
+toca productos, lotes o detalles de venta, sin locks compartidos.
+"""
+
+from sqlalchemy import select, and_
+from sqlalchemy.orm import Session
+from app import db
+from app.utils.eventos import escuchar
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.detalle_venta import DetalleVenta
+from app.models.catalogo_cambio import CatalogoCambio
+
+# Orden de columnas de cada fila del snapshot (formato compacto: listas, no dicts)
+COLUMNAS_CATALOGO = [
+    'id',
+    'codigo_barras',
+    'nombre',
+    'categoria',
+    'precio_venta',
+    'stock_total',
+    'lote_id',
+    'codigo_lote',
+    'lote_cantidad',
+    'lote_vencimiento',
+]
+
+
+# ==================== Captura de cambios ====================
+
+def _productos_afectados(session):
+    """
+    Obtiene los productos cuyo estado en el catálogo cambió en el flush
+
+    Args:
+        session: Sesión que está haciendo flush
+
+    Returns:
+        dict: {producto_id: origen}
+    """
+    afectados = {}
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+
+        if isinstance(obj, Product):
+            afectados.setdefault(obj.id, 'products')
+        elif isinstance(obj, Lote):
+            afectados.setdefault(obj.producto_id, 'lotes')
+        elif isinstance(obj, DetalleVenta):
+            afectados.setdefault(obj.producto_id, 'ventas')
+
+    afectados.pop(None, None)
+    return afectados
+
+
+def _registrar_cambios_en_flush(session, flush_context):
+    """Listener after_flush: agrega los productos modificados a la bitácora"""
+    afectados = _productos_afectados(session)
+    if not afectados:
+        return
+
+    # Agrupar por origen para insertar en bloque
+    por_origen = {}
+    for producto_id, origen in afectados.items():
+        por_origen.setdefault(origen, []).append(producto_id)
+
+    connection = session.connection()
+    for origen, producto_ids in por_origen.items():
+        CatalogoCambio.registrar(producto_ids, origen, connection=connection)
+
+
+def registrar_eventos_catalogo():
+    """Registra el listener que alimenta la bitácora del catálogo"""
+    escuchar(Session, 'after_flush', _registrar_cambios_en_flush)
+
+
+# ==================== Lectura del catálogo ====================
+
+def _consulta_catalogo(producto_ids=None):
+    """
+    Construye la consulta de productos activos con su lote cabeza FIFO
+
+    Una sola consulta: products LEFT JOIN (lotes numerados con ROW_NUMBER)
+    filtrando posicion_fifo = 1.
+
+    Args:
+        producto_ids (list): Limitar a estos productos (opcional)
+
+    Returns:
+        Select: Consulta lista para ejecutar
+    """
+    fifo = Lote.subconsulta_fifo(producto_ids)
+
+    query = select(
+        Product.id,
+        Product.codigo_barras,
+        Product.nombre,
+        Product.categoria,
+        Product.precio_venta,
+        Product.stock_total,
+        fifo.c.id.label('lote_id'),
+        fifo.c.codigo_lote,
+        fifo.c.cantidad_actual.label('lote_cantidad'),
+        fifo.c.fecha_vencimiento.label('lote_vencimiento'),
+    ).outerjoin(
+        fifo,
+        and_(fifo.c.producto_id == Product.id, fifo.c.posicion_fifo == 1)
+    ).where(
+        Product.activo == True
+    ).order_by(Product.id)
+
+    if producto_ids is not None:
+        query = query.where(Product.id.in_(producto_ids))
+
+    return query
+
+
+def _fila_compacta(fila):
+    """Convierte una fila de la consulta al formato de lista del snapshot"""
+    return [
+        fila.id,
+        fila.codigo_barras,
+        fila.nombre,
+        fila.categoria,
+        float(fila.precio_venta),
+        fila.stock_total,
+        fila.lote_id,
+        fila.codigo_lote,
+        fila.lote_cantidad,
+        fila.lote_vencimiento.isoformat() if fila.lote_vencimiento else None,
+    ]
+
+
+def obtener_snapshot():
+    """
+    Retorna el catálogo completo de productos activos
+
+    La versión se lee ANTES que los datos. Es una marca segura: todo cambio
+    con versión <= a la leída ya está confirmado y en los datos; una
+    escritura que confirma entre ambas lecturas tiene versión mayor y el
+    terminal la recibe de nuevo en el siguiente delta (entrega al menos una vez).
+
+    Returns:
+        dict: {version, columnas, productos}
+    """
+    version = CatalogoCambio.version_actual()
+    filas = db.session.execute(_consulta_catalogo()).all()
+
+    return {
+        'version': version,
+        'columnas': COLUMNAS_CATALOGO,
+        'productos': [_fila_compacta(fila) for fila in filas],
+    }
+
+
+def obtener_cambios(desde_version):
+    """
+    Retorna solo los productos que cambiaron después de una versión
+
+    Los productos que cambiaron pero ya no están activos (o fueron eliminados)
+    se informan en 'eliminados' para que el terminal los quite de su copia.
+
+    Args:
+        desde_version (int): Última versión conocida por el terminal
+
+    Returns:
+        dict: {version, desde, columnas, productos, eliminados}
+    """
+    version = CatalogoCambio.version_actual()
+    producto_ids = CatalogoCambio.productos_cambiados_desde(desde_version, hasta=version)
+
+    productos = []
+    if producto_ids:
+        filas = db.session.execute(_consulta_catalogo(producto_ids)).all()
+        productos = [_fila_compacta(fila) for fila in filas]
+
+    vigentes = {fila[0] for fila in productos}
+
+    return {
+        'version': version,
+        'desde': desde_version,
+        'columnas': COLUMNAS_CATALOGO,
+        'productos': productos,
+        'eliminados': sorted(pid for pid in producto_ids if pid not in vigentes),
+    }
@@ -0,0 +1,209 @@
+"""
+KATITA-POS - Servicio de Kardex
+===============================
+Kardex (historial valorizado de movimientos) por producto o por lote
+
+Los saldos corridos se calculan en SQL con SUM() OVER (ORDER BY
+created_at, id). La paginación es keyset sobre (created_at, id), que
+recorre el índice ix_movimiento_producto_fecha sin OFFSET; el saldo previo
+a la página se obtiene con un único SUM sobre el mismo índice.
+
+Costo unitario de cada movimiento: precio_compra_lote del lote, o el
+precio_compra del producto si el movimiento no tiene lote.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import select, func, and_, or_
+from app import db
+from app.models.movimiento_stock import MovimientoStock
+from app.models.lote import Lote
+from app.models.product import Product
+
+COLUMNAS_CSV = (
+    'id', 'fecha', 'tipo', 'codigo_lote', 'referencia', 'motivo',
+    'entrada', 'salida', 'costo_unitario', 'saldo_cantidad', 'saldo_valorizado'
+)
+
+# Filas por lote de lectura al exportar CSV
+TAMANO_BLOQUE_CSV = 1000
+
+
+def _costo_unitario():
+    return func.coalesce(Lote.precio_compra_lote, Product.precio_compra)
+
+
+def _filtro_base(producto_id=None, lote_id=None):
+    if lote_id is not None:
+        return MovimientoStock.lote_id == lote_id
+    return MovimientoStock.producto_id == producto_id
+
+
+def _despues_de(cursor):
+    fecha, movimiento_id = cursor
+    return or_(
+        MovimientoStock.created_at > fecha,
+        and_(MovimientoStock.created_at == fecha, MovimientoStock.id > movimiento_id)
+    )
+
+
+def _antes_de(cursor):
+    fecha, movimiento_id = cursor
+    return or_(
+        MovimientoStock.created_at < fecha,
+        and_(MovimientoStock.created_at == fecha, MovimientoStock.id < movimiento_id)
+    )
+
+
+def _filtro_fechas(desde=None, hasta=None):
+    condiciones = []
+    if desde:
+        condiciones.append(MovimientoStock.created_at >= datetime.combine(desde, datetime.min.time()))
+    if hasta:
+        condiciones.append(
+            MovimientoStock.created_at < datetime.combine(hasta + timedelta(days=1), datetime.min.time())
+        )
+    return condiciones
+
+
+def _consulta(condiciones):
+    """SELECT del kardex con saldos corridos (ventana) sobre las filas filtradas"""
+    orden = (MovimientoStock.created_at, MovimientoStock.id)
+    valor = MovimientoStock.cantidad * _costo_unitario()
+
+    return (
+        select(
+            MovimientoStock.id,
+            MovimientoStock.created_at,
+            MovimientoStock.tipo,
+            MovimientoStock.cantidad,
+            MovimientoStock.referencia,
+            MovimientoStock.motivo,
+            MovimientoStock.lote_id,
+            MovimientoStock.venta_id,
+            MovimientoStock.usuario_id,
+            Lote.codigo_lote,
+            _costo_unitario().label('costo_unitario'),
+            func.sum(MovimientoStock.cantidad).over(order_by=orden).label('saldo_cantidad'),
+            func.sum(valor).over(order_by=orden).label('saldo_valorizado'),
+        )
+        .join(Product, Product.id == MovimientoStock.producto_id)
+        .outerjoin(Lote, Lote.id == MovimientoStock.lote_id)
+        .where(*condiciones)
+        .order_by(*orden)
+    )
+
+
+def _saldo_previo(filtro_base, cursor):
+    """Saldo (cantidad, valor) de todos los movimientos anteriores al cursor"""
+    fila = db.session.execute(
+        select(
+            func.coalesce(func.sum(MovimientoStock.cantidad), 0),
+            func.coalesce(func.sum(MovimientoStock.cantidad * _costo_unitario()), 0),
+        )
+        .select_from(MovimientoStock)
+        .join(Product, Product.id == MovimientoStock.producto_id)
+        .outerjoin(Lote, Lote.id == MovimientoStock.lote_id)
+        .where(filtro_base, _antes_de(cursor))
+    ).one()
+    return int(fila[0]), Decimal(str(fila[1]))
+
+
+def _monto(valor):
+    return str(Decimal(str(valor)).quantize(Decimal('0.01')))
+
+
+def _serializar(fila, saldo_cantidad, saldo_valor):
+    return {
+        'id': fila.id,
+        'fecha': fila.created_at.isoformat() if fila.created_at else None,
+        'tipo': fila.tipo,
+        'lote_id': fila.lote_id,
+        'codigo_lote': fila.codigo_lote,
+        'venta_id': fila.venta_id,
+        'usuario_id': fila.usuario_id,
+        'referencia': fila.referencia,
+        'motivo': fila.motivo,
+        'entrada': fila.cantidad if fila.cantidad > 0 else 0,
+        'salida': -fila.cantidad if fila.cantidad < 0 else 0,
+        'costo_unitario': _monto(fila.costo_unitario),
+        'saldo_cantidad': saldo_cantidad,
+        'saldo_valorizado': _monto(saldo_valor),
+    }
+
+
+def pagina_kardex(producto_id=None, lote_id=None, despues=None, limit=100,
+                  desde=None, hasta=None):
+    """
+    Página del kardex con saldos corridos
+
+    Args:
+        producto_id (int): Kardex del producto
+        lote_id (int): Kardex del lote (tiene prioridad sobre producto_id)
+        despues (tuple): (created_at, id) del último movimiento visto
+        limit (int): Movimientos por página
+        desde (date): Desde esta fecha (el saldo incluye lo anterior)
+        hasta (date): Hasta esta fecha inclusive
+
+    Returns:
+        dict: movimientos, siguiente (tuple o None)
+    """
+    filtro_base = _filtro_base(producto_id, lote_id)
+    condiciones = [filtro_base] + _filtro_fechas(desde, hasta)
+    if despues:
+        condiciones.append(_despues_de(despues))
+
+    # Un movimiento extra para saber si hay página siguiente
+    filas = db.session.execute(_consulta(condiciones).limit(limit + 1)).all()
+    hay_mas = len(filas) > limit
+    filas = filas[:limit]
+    if not filas:
+        return {'movimientos': [], 'siguiente': None}
+
+    # La ventana solo ve la página: sumar el saldo de todo lo anterior
+    cantidad_previa, valor_previo = _saldo_previo(filtro_base, (filas[0].created_at, filas[0].id))
+
+    movimientos = [
+        _serializar(
+            fila,
+            cantidad_previa + int(fila.saldo_cantidad),
+            valor_previo + Decimal(str(fila.saldo_valorizado))
+        )
+        for fila in filas
+    ]
+
+    ultima = filas[-1]
+    return {
+        'movimientos': movimientos,
+        'siguiente': (ultima.created_at, ultima.id) if hay_mas else None,
+    }
+
+
+def iterar_kardex(producto_id=None, lote_id=None, desde=None, hasta=None):
+    """
+    Recorre el kardex completo para exportación (memoria acotada)
+
+    Una sola consulta con la ventana sobre todo el historial, leída en
+    bloques con yield_per.
+
+    Yields:
+        dict: Movimiento serializado con saldos corridos
+    """
+    consulta = _consulta([_filtro_base(producto_id, lote_id)])
+
+    if desde or hasta:
+        # Los saldos deben incluir lo anterior a 'desde': filtrar sobre la ventana
+        ventana = consulta.subquery('kardex')
+        consulta = select(ventana).order_by(ventana.c.created_at, ventana.c.id)
+        if desde:
+            consulta = consulta.where(
+                ventana.c.created_at >= datetime.combine(desde, datetime.min.time())
+            )
+        if hasta:
+            consulta = consulta.where(
+                ventana.c.created_at < datetime.combine(hasta + timedelta(days=1), datetime.min.time())
+            )
+
+    consulta = consulta.execution_options(yield_per=TAMANO_BLOQUE_CSV)
+    for fila in db.session.execute(consulta):
+        yield _serializar(fila, int(fila.saldo_cantidad), Decimal(str(fila.saldo_valorizado)))
@@ -0,0 +1,417 @@
+"""
+KATITA-POS - Servicio de Importación de Productos
+=================================================
+Importación masiva del catálogo desde CSV o XLSX
+
+El archivo se lee en streaming (csv.reader / openpyxl en modo read_only)
+y se procesa en bloques:
+    1. Validación de cada fila del bloque (errores por número de fila)
+    2. Una sola consulta por bloque para saber qué códigos ya existen
+    3. Un INSERT ... ON CONFLICT (codigo_barras) DO UPDATE por bloque
+
+La codificación del CSV se decide antes de procesar el primer bloque
+(UTF-8 o, si no lo es, Windows-1252 como lo exporta Excel): un error de
+decodificación a mitad de archivo dejaría bloques ya confirmados.
+
+Los archivos grandes se procesan en un hilo de fondo y el progreso se
+consulta por id de trabajo (tabla trabajos_importacion, visible desde
+cualquier worker).
+"""
+
+import codecs
+import csv
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal, InvalidOperation
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.product import Product
+from app.models.catalogo_cambio import CatalogoCambio
+from app.models.trabajo_importacion import TrabajoImportacion
+from app.services import sync_service
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+COLUMNAS_REQUERIDAS = ('codigo_barras', 'nombre', 'categoria', 'precio_compra', 'precio_venta')
+COLUMNAS_OPCIONALES = ('stock_minimo', 'descripcion', 'imagen_url')
+
+# Tope de errores detallados en el reporte (el conteo total siempre es exacto)
+MAX_ERRORES_REPORTE = 1000
+
+
+# ==================== Lectura en streaming ====================
+
+def _normalizar_encabezado(valor):
+    return str(valor or '').strip().lower().replace(' ', '_')
+
+
+def _codificacion_csv(ruta):
+    """
+    Decide la codificación del CSV recorriendo el archivo completo
+
+    Returns:
+        str: 'utf-8-sig' o 'cp1252' (CSV de Excel en Windows)
+
+    Raises:
+        ValueError: Si el archivo no es válido en ninguna de las dos
+    """
+    for codificacion in ('utf-8-sig', 'cp1252'):
+        decodificador = codecs.getincrementaldecoder(codificacion)()
+        try:
+            with open(ruta, 'rb') as archivo:
+                for bloque in iter(lambda: archivo.read(64 * 1024), b''):
+                    decodificador.decode(bloque)
+            decodificador.decode(b'', final=True)
+            return codificacion
+        except UnicodeDecodeError:
+            continue
+    raise ValueError('No se pudo leer el CSV: guárdelo con codificación UTF-8')
+
+
+def _leer_csv(ruta):
+    """Genera (numero_fila, dict) desde un CSV (separador , o ;)"""
+    codificacion = _codificacion_csv(ruta)
+    with open(ruta, newline='', encoding=codificacion) as archivo:
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        delimitador = ';' if muestra.count(';') > muestra.count(',') else ','
+
+        reader = csv.reader(archivo, delimiter=delimitador)
+        encabezados = [_normalizar_encabezado(h) for h in next(reader, [])]
+
+        for numero, valores in enumerate(reader, start=2):
+            if not any(v.strip() for v in valores):
+                continue
+            yield numero, dict(zip(encabezados, valores))
+
+
+def _leer_xlsx(ruta):
+    """Genera (numero_fila, dict) desde la primera hoja de un XLSX"""
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [_normalizar_encabezado(h) for h in next(filas, [])]
+
+        for numero, valores in enumerate(filas, start=2):
+            if all(v is None or str(v).strip() == '' for v in valores):
+                continue
+            yield numero, dict(zip(encabezados, valores))
+    finally:
+        libro.close()
+
+
+def leer_filas(ruta, extension):
+    """
+    Lee el archivo fila por fila sin cargarlo completo en memoria
+
+    Args:
+        ruta (str): Ruta del archivo
+        extension (str): 'csv' o 'xlsx'
+
+    Returns:
+        generator: (numero_fila, dict con columnas normalizadas)
+    """
+    if extension == 'xlsx':
+        return _leer_xlsx(ruta)
+    if extension == 'csv':
+        return _leer_csv(ruta)
+    raise ValueError('Formato no soportado. Use CSV o XLSX')
+
+
+# ==================== Validación ====================
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    # Excel entrega los códigos numéricos como float (7750182001878.0)
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def validar_fila(fila, columnas):
+    """
+    Valida y convierte una fila del archivo
+
+    Args:
+        fila (dict): Valores crudos de la fila
+        columnas (set): Columnas opcionales presentes en el archivo
+
+    Returns:
+        tuple: (valores limpios o None, lista de errores)
+    """
+    errores = []
+    valores = {}
+
+    codigo = _texto(fila.get('codigo_barras'))
+    try:
+        Product.validar_codigo_barras(codigo)
+        valores['codigo_barras'] = codigo
+    except ValueError as e:
+        errores.append(str(e))
+
+    nombre = _texto(fila.get('nombre'))
+    if not nombre or len(nombre) > 200:
+        errores.append('El nombre es requerido (máx. 200 caracteres)')
+    valores['nombre'] = nombre
+
+    categoria = _texto(fila.get('categoria'))
+    if not categoria or len(categoria) > 50:
+        errores.append('La categoría es requerida (máx. 50 caracteres)')
+    valores['categoria'] = categoria
+
+    try:
+        precio_compra = Decimal(_texto(fila.get('precio_compra')).replace(',', '.'))
+        precio_venta = Decimal(_texto(fila.get('precio_venta')).replace(',', '.'))
+        Product.validar_precios(precio_compra, precio_venta)
+        valores['precio_compra'] = precio_compra.quantize(Decimal('0.01'))
+        valores['precio_venta'] = precio_venta.quantize(Decimal('0.01'))
+    except InvalidOperation:
+        errores.append('Los precios deben ser números')
+    except ValueError as e:
+        errores.append(str(e))
+
+    if 'stock_minimo' in columnas:
+        texto = _texto(fila.get('stock_minimo'))
+        try:
+            stock_minimo = int(Decimal(texto)) if texto else 5
+            Product.validar_stock_minimo(stock_minimo)
+            valores['stock_minimo'] = stock_minimo
+        except (InvalidOperation, ValueError):
+            errores.append('El stock mínimo debe ser un entero >= 0')
+
+    for campo in ('descripcion', 'imagen_url'):
+        if campo in columnas:
+            valores[campo] = _texto(fila.get(campo)) or None
+
+    return (None if errores else valores), errores
+
+
+# ==================== Upsert por bloques ====================
+
+def _sentencia_upsert(columnas_actualizables):
+    """
+    Construye INSERT ... ON CONFLICT (codigo_barras) DO UPDATE según el motor
+
+    Args:
+        columnas_actualizables (list): Columnas que se sobrescriben si existe
+
+    Returns:
+        Insert: Sentencia lista para ejecutar con una lista de filas
+    """
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    sentencia = insert(Product.__table__)
+    actualizar = {col: sentencia.excluded[col] for col in columnas_actualizables}
+    actualizar['updated_at'] = sentencia.excluded.updated_at
+    return sentencia.on_conflict_do_update(index_elements=['codigo_barras'], set_=actualizar)
+
+
+class ReporteImportacion:
+    """Acumula los resultados de una importación"""
+
+    def __init__(self):
+        self.total_filas = 0
+        self.creados = 0
+        self.actualizados = 0
+        self.filas_con_error = 0
+        self.errores = []
+
+    def agregar_error(self, numero_fila, codigo, errores):
+        self.filas_con_error += 1
+        if len(self.errores) < MAX_ERRORES_REPORTE:
+            self.errores.append({'fila': numero_fila, 'codigo_barras': codigo, 'errores': errores})
+
+    def to_dict(self):
+        return {
+            'total_filas': self.total_filas,
+            'creados': self.creados,
+            'actualizados': self.actualizados,
+            'filas_con_error': self.filas_con_error,
+            'errores': self.errores,
+            'errores_truncados': self.filas_con_error > len(self.errores),
+        }
+
+
+def _procesar_bloque(bloque, columnas, vistos, actualizar_existentes, reporte):
+    """Valida, verifica unicidad y hace upsert de un bloque de filas"""
+    validas = []
+    for numero, fila in bloque:
+        valores, errores = validar_fila(fila, columnas)
+        codigo = _texto(fila.get('codigo_barras'))
+
+        if valores and codigo in vistos:
+            errores = [f'Código de barras duplicado en el archivo (fila {vistos[codigo]})']
+            valores = None
+
+        if errores:
+            reporte.agregar_error(numero, codigo, errores)
+            continue
+
+        vistos[codigo] = numero
+        validas.append((numero, valores))
+
+    if not validas:
+        return
+
+    # Una sola consulta por bloque para saber cuáles ya existen
+    codigos = [v['codigo_barras'] for _, v in validas]
+    existentes = set(db.session.execute(
+        select(Product.codigo_barras).where(Product.codigo_barras.in_(codigos))
+    ).scalars())
+
+    if not actualizar_existentes:
+        for numero, valores in validas:
+            if valores['codigo_barras'] in existentes:
+                reporte.agregar_error(numero, valores['codigo_barras'], ['El código de barras ya existe'])
+        validas = [(n, v) for n, v in validas if v['codigo_barras'] not in existentes]
+        if not validas:
+            return
+
+    ahora = datetime.now(PERU_TZ)
+    filas = [dict(valores, updated_at=ahora) for _, valores in validas]
+    actualizables = [c for c in filas[0] if c not in ('codigo_barras', 'updated_at')]
+
+    db.session.execute(_sentencia_upsert(actualizables), filas)
+
+    # El INSERT no pasa por el flush del ORM: registrar versión del catálogo a mano
+    ids_por_codigo = dict(db.session.execute(
+        select(Product.codigo_barras, Product.id)
+        .where(Product.codigo_barras.in_([f['codigo_barras'] for f in filas]))
+    ).all())
+    CatalogoCambio.registrar(ids_por_codigo.values(), 'products')
+    sync_service.registrar_cambios(
+        'products', [pid for codigo, pid in ids_por_codigo.items() if codigo not in existentes], 'insert'
+    )
+    sync_service.registrar_cambios(
+        'products', [pid for codigo, pid in ids_por_codigo.items() if codigo in existentes]
+    )
+
+    db.session.commit()
+
+    actualizados = sum(1 for f in filas if f['codigo_barras'] in existentes)
+    reporte.actualizados += actualizados
+    reporte.creados += len(filas) - actualizados
+
+
+def importar_productos(ruta, extension, actualizar_existentes=True, tamano_bloque=500):
+    """
+    Importa productos desde un archivo CSV o XLSX
+
+    Cada bloque se confirma por separado: un error de validación en una fila
+    no descarta el resto del archivo, solo se reporta.
+
+    Args:
+        ruta (str): Ruta del archivo
+        extension (str): 'csv' o 'xlsx'
+        actualizar_existentes (bool): Actualizar productos con código existente
+        tamano_bloque (int): Filas por bloque
+
+    Returns:
+        dict: Reporte con creados, actualizados y errores por fila
+
+    Raises:
+        ValueError: Si faltan columnas requeridas o el formato no es válido
+    """
+    inicio = time.perf_counter()
+    reporte = ReporteImportacion()
+    vistos = {}
+    columnas = None
+    bloque = []
+
+    for numero, fila in leer_filas(ruta, extension):
+        if columnas is None:
+            faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in fila]
+            if faltantes:
+                raise ValueError(f'Faltan columnas requeridas: {", ".join(faltantes)}')
+            columnas = {c for c in COLUMNAS_OPCIONALES if c in fila}
+
+        reporte.total_filas += 1
+        bloque.append((numero, fila))
+
+        if len(bloque) >= tamano_bloque:
+            _procesar_bloque(bloque, columnas, vistos, actualizar_existentes, reporte)
+            bloque = []
+
+    if bloque:
+        _procesar_bloque(bloque, columnas, vistos, actualizar_existentes, reporte)
+
+    resultado = reporte.to_dict()
+    resultado['duracion_segundos'] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+# ==================== Trabajos en segundo plano ====================
+
+def _ejecutar_trabajo(app, trabajo_id, ruta, extension, actualizar_existentes, tamano_bloque):
+    """Cuerpo del hilo de fondo: importa y guarda el resultado del trabajo"""
+    with app.app_context():
+        try:
+            resultado = importar_productos(ruta, extension, actualizar_existentes, tamano_bloque)
+            TrabajoImportacion.finalizar(trabajo_id, 'completado', resultado=resultado)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"[IMPORT] Trabajo {trabajo_id} falló: {e}")
+            TrabajoImportacion.finalizar(trabajo_id, 'fallido', error=str(e))
+        finally:
+            db.session.remove()
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+
+def iniciar_trabajo(app, ruta, extension, actualizar_existentes=True, tamano_bloque=500):
+    """
+    Lanza la importación en un hilo de fondo
+
+    El estado se guarda en trabajos_importacion antes de lanzar el hilo, así
+    la consulta funciona desde cualquier worker. De paso se marcan como
+    fallidos los trabajos abandonados y se eliminan los finalizados hace
+    más de IMPORT_TRABAJOS_RETENCION_DIAS.
+
+    Returns:
+        str: ID del trabajo
+    """
+    trabajo_id = uuid.uuid4().hex
+    TrabajoImportacion.marcar_abandonados(app.config['IMPORT_TRABAJO_MAX_MINUTOS'])
+    TrabajoImportacion.limpiar_finalizados(app.config['IMPORT_TRABAJOS_RETENCION_DIAS'])
+    db.session.add(TrabajoImportacion(id=trabajo_id, estado='en_proceso'))
+    db.session.commit()
+
+    hilo = threading.Thread(
+        target=_ejecutar_trabajo,
+        args=(app, trabajo_id, ruta, extension, actualizar_existentes, tamano_bloque),
+        name=f'import-{trabajo_id[:8]}',
+        daemon=True
+    )
+    hilo.start()
+    return trabajo_id
+
+
+def obtener_trabajo(trabajo_id):
+    """
+    Retorna el estado de un trabajo de importación
+
+    Un trabajo en proceso desde hace más de IMPORT_TRABAJO_MAX_MINUTOS se
+    informa como fallido: su hilo murió con el worker que lo ejecutaba.
+
+    Returns:
+        dict: Estado del trabajo o None si no existe
+    """
+    if TrabajoImportacion.marcar_abandonados(current_app.config['IMPORT_TRABAJO_MAX_MINUTOS'], trabajo_id):
+        db.session.commit()
+
+    # populate_existing: el hilo de fondo lo actualiza desde otra sesión
+    trabajo = db.session.get(TrabajoImportacion, trabajo_id, populate_existing=True)
+    return trabajo.to_dict() if trabajo else None
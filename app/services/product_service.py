@@ -0,0 +1,236 @@
+"""
+KATITA-POS - Servicio de Productos
+==================================
+Operaciones set-based sobre el catálogo de productos
+
+La actualización masiva traduce un filtro + una operación a un único
+UPDATE validado, en lugar de editar producto por producto.
+"""
+
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select, update, func, and_, or_, case, literal
+from app import db
+from app.models.product import Product
+from app.models.catalogo_cambio import CatalogoCambio
+from app.models.operacion_masiva import OperacionMasiva
+from app.services import sync_service
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+CAMPOS_PRECIO = ('precio_venta', 'precio_compra')
+
+# Cantidad de productos de ejemplo que se devuelven cuando la validación falla
+MAX_EJEMPLOS_INVALIDOS = 20
+
+
+class ErrorActualizacionMasiva(ValueError):
+    """Error de validación de una actualización masiva (errores por campo)"""
+
+    def __init__(self, errores, productos_invalidos=None):
+        super().__init__('Actualización masiva inválida')
+        self.errores = errores
+        self.productos_invalidos = productos_invalidos or []
+
+
+def _condicion_filtro(filtro):
+    """
+    Traduce el filtro del request a una condición SQL
+
+    Args:
+        filtro (dict): categoria, ids, codigos_barras, solo_activos
+
+    Returns:
+        ClauseElement: Condición WHERE
+
+    Raises:
+        ErrorActualizacionMasiva: Si el filtro está vacío o es inválido
+    """
+    condiciones = []
+
+    if filtro.get('categoria'):
+        condiciones.append(Product.categoria == filtro['categoria'])
+
+    if filtro.get('ids'):
+        try:
+            ids = [int(i) for i in filtro['ids']]
+        except (TypeError, ValueError):
+            raise ErrorActualizacionMasiva({'filtro.ids': 'Debe ser una lista de enteros'})
+        condiciones.append(Product.id.in_(ids))
+
+    if filtro.get('codigos_barras'):
+        condiciones.append(Product.codigo_barras.in_([str(c) for c in filtro['codigos_barras']]))
+
+    # Sin criterio explícito no se permite tocar todo el catálogo por accidente
+    if not condiciones:
+        raise ErrorActualizacionMasiva(
+            {'filtro': 'Indique al menos categoria, ids o codigos_barras'}
+        )
+
+    if filtro.get('solo_activos'):
+        condiciones.append(Product.activo == True)
+
+    return and_(*condiciones)
+
+
+def _decimal(valor, campo):
+    try:
+        return Decimal(str(valor))
+    except (InvalidOperation, TypeError, ValueError):
+        raise ErrorActualizacionMasiva({campo: 'Debe ser un número válido'})
+
+
+def _valores_operacion(operacion):
+    """
+    Traduce la operación a expresiones SQL para el SET del UPDATE
+
+    Operaciones soportadas:
+        - precio_campo: 'precio_venta' (default) o 'precio_compra'
+        - precio_valor: fijar el precio
+        - precio_porcentaje: ajustar el precio en % (ej. 8 o -5)
+        - redondeo: múltiplo al que se redondea el nuevo precio (ej. 0.10)
+        - activo: true/false
+        - stock_minimo: entero >= 0
+
+    Returns:
+        dict: {columna: expresión SQL}
+    """
+    valores = {}
+    errores = {}
+
+    campo = operacion.get('precio_campo', 'precio_venta')
+    if campo not in CAMPOS_PRECIO:
+        errores['precio_campo'] = f'Debe ser uno de: {", ".join(CAMPOS_PRECIO)}'
+
+    tiene_valor = operacion.get('precio_valor') is not None
+    tiene_porcentaje = operacion.get('precio_porcentaje') is not None
+
+    if tiene_valor and tiene_porcentaje:
+        errores['precio'] = 'Use precio_valor o precio_porcentaje, no ambos'
+    elif not errores and (tiene_valor or tiene_porcentaje):
+        columna = getattr(Product, campo)
+
+        if tiene_valor:
+            precio = _decimal(operacion['precio_valor'], 'precio_valor')
+            if precio <= 0:
+                errores['precio_valor'] = 'Debe ser mayor a 0'
+            expresion = literal(precio, Product.precio_venta.type)
+        else:
+            porcentaje = _decimal(operacion['precio_porcentaje'], 'precio_porcentaje')
+            if porcentaje <= -100:
+                errores['precio_porcentaje'] = 'Debe ser mayor a -100'
+            factor = (Decimal('100') + porcentaje) / Decimal('100')
+            expresion = columna * literal(factor, Product.precio_venta.type)
+
+        if operacion.get('redondeo') is not None:
+            paso = _decimal(operacion['redondeo'], 'redondeo')
+            if paso <= 0:
+                errores['redondeo'] = 'Debe ser mayor a 0'
+            else:
+                expresion = func.round(func.round(expresion / paso) * paso, 2)
+        else:
+            expresion = func.round(expresion, 2)
+
+        valores[campo] = expresion
+    elif operacion.get('redondeo') is not None:
+        errores['redondeo'] = 'Requiere precio_valor o precio_porcentaje'
+
+    if 'activo' in operacion:
+        if not isinstance(operacion['activo'], bool):
+            errores['activo'] = 'Debe ser un valor booleano (true/false)'
+        else:
+            valores['activo'] = operacion['activo']
+
+    if 'stock_minimo' in operacion:
+        try:
+            stock_minimo = int(operacion['stock_minimo'])
+            Product.validar_stock_minimo(stock_minimo)
+            valores['stock_minimo'] = stock_minimo
+        except (TypeError, ValueError):
+            errores['stock_minimo'] = 'Debe ser un entero >= 0'
+
+    if errores:
+        raise ErrorActualizacionMasiva(errores)
+    if not valores:
+        raise ErrorActualizacionMasiva({'operacion': 'No se indicó ningún cambio'})
+
+    return valores
+
+
+def actualizar_productos_masivo(filtro, operacion, usuario_id, simular=False):
+    """
+    Aplica una operación a todos los productos que cumplen el filtro
+
+    Pasos (una transacción):
+        1. Una consulta que cuenta las filas afectadas y las que quedarían
+           con precio_venta <= precio_compra (se rechaza todo si hay alguna)
+        2. Un único UPDATE ... RETURNING id
+        3. Una versión del catálogo POS por producto (invalida cachés POS)
+        4. Un registro de auditoría para todo el lote
+
+    Args:
+        filtro (dict): Criterios de selección
+        operacion (dict): Cambios a aplicar
+        usuario_id (int): Usuario que ejecuta
+        simular (bool): Solo validar y contar, sin modificar
+
+    Returns:
+        dict: filas_afectadas, operacion_id, version_catalogo
+
+    Raises:
+        ErrorActualizacionMasiva: Filtro/operación inválidos o precios incoherentes
+    """
+    condicion = _condicion_filtro(filtro)
+    valores = _valores_operacion(operacion)
+
+    precio_venta = valores.get('precio_venta', Product.precio_venta)
+    precio_compra = valores.get('precio_compra', Product.precio_compra)
+    invalido = or_(precio_venta <= precio_compra, precio_venta <= 0, precio_compra <= 0)
+
+    # 1. Validación set-based: total afectado e inválidos en una sola consulta
+    conteo = db.session.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(case((invalido, 1), else_=0)), 0)
+        ).select_from(Product).where(condicion)
+    ).one()
+    total, invalidos = conteo[0], int(conteo[1])
+
+    if invalidos:
+        ejemplos = db.session.execute(
+            select(Product.id, Product.codigo_barras, Product.nombre)
+            .where(condicion, invalido)
+            .limit(MAX_EJEMPLOS_INVALIDOS)
+        ).all()
+        raise ErrorActualizacionMasiva(
+            {'precio_venta': f'{invalidos} productos quedarían con precio de venta <= precio de compra'},
+            [{'id': e.id, 'codigo_barras': e.codigo_barras, 'nombre': e.nombre} for e in ejemplos]
+        )
+
+    if simular or total == 0:
+        return {'filas_afectadas': total, 'simulado': simular, 'operacion_id': None,
+                'version_catalogo': CatalogoCambio.version_actual()}
+
+    # 2. Un único UPDATE
+    valores['updated_at'] = datetime.now(PERU_TZ)
+    producto_ids = db.session.execute(
+        update(Product.__table__).where(condicion).values(**valores).returning(Product.__table__.c.id)
+    ).scalars().all()
+
+    # 3. Invalidar cachés POS de todos los productos en un paso
+    CatalogoCambio.registrar(producto_ids, 'products')
+    sync_service.registrar_cambios('products', producto_ids)
+
+    # 4. Auditoría: un registro por lote
+    auditoria = OperacionMasiva.registrar(
+        'actualizacion_productos', usuario_id, filtro, operacion, len(producto_ids)
+    )
+    db.session.commit()
+
+    return {
+        'filas_afectadas': len(producto_ids),
+        'simulado': False,
+        'operacion_id': auditoria.id,
+        'version_catalogo': CatalogoCambio.version_actual(),
+    }
@@ -0,0 +1,320 @@
+"""
+KATITA-POS - Servicio de Recepción de Mercadería
+================================================
+Registro de una guía/factura de proveedor completa (muchos lotes) en una
+sola transacción
+
+En lugar de repetir POST /api/lotes por cada línea (consulta de producto,
+verificación de código, UPDATE de stock, movimiento y commit por lote):
+    - Se validan todos los productos y códigos con consultas IN
+    - Los códigos faltantes se generan en bloque
+    - Lotes y movimientos se insertan en bloque
+    - El stock se actualiza con un único UPDATE agrupado (CASE por producto)
+    - Todo se confirma con un solo commit
+"""
+
+from collections import defaultdict
+from datetime import datetime, date, timezone, timedelta
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import select, insert, update, case
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.movimiento_stock import MovimientoStock
+from app.models.catalogo_cambio import CatalogoCambio
+from app.models.operacion_masiva import OperacionMasiva
+from app.services import sync_service, replicacion_stock_service
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+MAX_LINEAS_RECEPCION = 500
+
+
+class ErrorRecepcion(ValueError):
+    """Error de validación de una recepción (errores por línea/campo)"""
+
+    def __init__(self, errores):
+        super().__init__('Recepción inválida')
+        self.errores = errores
+
+
+def _parsear_fecha(valor):
+    if 'T' in valor:
+        return datetime.fromisoformat(valor.replace('Z', '+00:00')).date()
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def _validar_lineas(lineas, hoy):
+    """
+    Valida el formato de cada línea (sin consultar la base de datos)
+
+    Returns:
+        tuple: (lineas normalizadas, errores)
+    """
+    normalizadas = []
+    errores = {}
+
+    for i, linea in enumerate(lineas):
+        prefijo = f'lineas[{i}]'
+        if not isinstance(linea, dict):
+            errores[prefijo] = 'Debe ser un objeto'
+            continue
+
+        faltantes = [c for c in ('producto_id', 'cantidad', 'fecha_vencimiento', 'precio_compra_lote')
+                     if linea.get(c) is None]
+        if faltantes:
+            errores[prefijo] = f'Campos requeridos: {", ".join(faltantes)}'
+            continue
+
+        try:
+            producto_id = int(linea['producto_id'])
+        except (TypeError, ValueError):
+            errores[f'{prefijo}.producto_id'] = 'Debe ser un entero'
+            continue
+
+        try:
+            cantidad = int(linea['cantidad'])
+            if cantidad <= 0:
+                errores[f'{prefijo}.cantidad'] = 'Debe ser mayor a 0'
+        except (TypeError, ValueError):
+            errores[f'{prefijo}.cantidad'] = 'Debe ser un numero entero'
+
+        try:
+            fecha_vencimiento = _parsear_fecha(str(linea['fecha_vencimiento']))
+            if fecha_vencimiento <= hoy:
+                errores[f'{prefijo}.fecha_vencimiento'] = 'Debe ser una fecha futura'
+        except ValueError:
+            errores[f'{prefijo}.fecha_vencimiento'] = 'Formato invalido. Use YYYY-MM-DD'
+
+        try:
+            precio = Decimal(str(linea['precio_compra_lote']))
+            if precio <= 0:
+                errores[f'{prefijo}.precio_compra_lote'] = 'Debe ser mayor a 0'
+        except (InvalidOperation, ValueError):
+            errores[f'{prefijo}.precio_compra_lote'] = 'Debe ser un numero decimal valido'
+
+        codigo_lote = (linea.get('codigo_lote') or '').strip() or None
+        if codigo_lote and len(codigo_lote) > 50:
+            errores[f'{prefijo}.codigo_lote'] = 'Maximo 50 caracteres'
+
+        if any(clave.startswith(prefijo) for clave in errores):
+            continue
+
+        normalizadas.append({
+            'indice': i,
+            'producto_id': producto_id,
+            'cantidad': cantidad,
+            'fecha_vencimiento': fecha_vencimiento,
+            'precio_compra_lote': precio,
+            'codigo_lote': codigo_lote,
+            'ubicacion': linea.get('ubicacion_almacen', ''),
+            'notas': linea.get('notas', ''),
+        })
+
+    return normalizadas, errores
+
+
+def _generar_codigos(lineas, ahora):
+    """
+    Asigna LOTE-YYYYMMDD-NNN a las líneas sin código con una sola consulta
+
+    Continúa desde el mayor correlativo existente del día (mismo formato que
+    POST /api/lotes).
+    """
+    sin_codigo = [l for l in lineas if not l['codigo_lote']]
+    if not sin_codigo:
+        return
+
+    prefijo = f"LOTE-{ahora.strftime('%Y%m%d')}-"
+    existentes = db.session.execute(
+        select(Lote.codigo_lote).where(Lote.codigo_lote.like(f'{prefijo}%'))
+    ).scalars().all()
+
+    correlativo = 0
+    for codigo in existentes:
+        sufijo = codigo[len(prefijo):]
+        if sufijo.isdigit():
+            correlativo = max(correlativo, int(sufijo))
+
+    tomados = {l['codigo_lote'] for l in lineas if l['codigo_lote']}
+    for linea in sin_codigo:
+        correlativo += 1
+        codigo = f'{prefijo}{str(correlativo).zfill(3)}'
+        while codigo in tomados:
+            correlativo += 1
+            codigo = f'{prefijo}{str(correlativo).zfill(3)}'
+        linea['codigo_lote'] = codigo
+
+
+def registrar_recepcion(datos, usuario_id):
+    """
+    Registra una recepción de mercadería completa de forma atómica
+
+    Args:
+        datos (dict): proveedor, numero_documento, lineas[]
+            Cada línea: producto_id, cantidad, fecha_vencimiento,
+            precio_compra_lote, codigo_lote (opcional),
+            ubicacion_almacen (opcional), notas (opcional)
+        usuario_id (int): Usuario que registra la recepción
+
+    Returns:
+        dict: recepcion (resumen), lotes, productos
+
+    Raises:
+        ErrorRecepcion: Si alguna línea es inválida (no se registra nada)
+    """
+    proveedor = (datos.get('proveedor') or '').strip()
+    documento = (datos.get('numero_documento') or '').strip()
+    lineas = datos.get('lineas')
+
+    errores = {}
+    if not isinstance(lineas, list) or not lineas:
+        errores['lineas'] = 'Debe enviar al menos una linea'
+    elif len(lineas) > MAX_LINEAS_RECEPCION:
+        errores['lineas'] = f'Maximo {MAX_LINEAS_RECEPCION} lineas por recepcion'
+    if len(documento) > 60:
+        errores['numero_documento'] = 'Maximo 60 caracteres'
+    if errores:
+        raise ErrorRecepcion(errores)
+
+    ahora = datetime.now(PERU_TZ)
+    lineas, errores = _validar_lineas(lineas, date.today())
+
+    # ========== VALIDACIONES SET-BASED ==========
+    producto_ids = {l['producto_id'] for l in lineas}
+    existentes = set(db.session.execute(
+        select(Product.id).where(Product.id.in_(producto_ids))
+    ).scalars().all()) if producto_ids else set()
+
+    codigos = [l['codigo_lote'] for l in lineas if l['codigo_lote']]
+    codigos_usados = set(db.session.execute(
+        select(Lote.codigo_lote).where(Lote.codigo_lote.in_(codigos))
+    ).scalars().all()) if codigos else set()
+
+    vistos = set()
+    for linea in lineas:
+        prefijo = f"lineas[{linea['indice']}]"
+        if linea['producto_id'] not in existentes:
+            errores[f'{prefijo}.producto_id'] = f"Producto con ID {linea['producto_id']} no encontrado"
+        codigo = linea['codigo_lote']
+        if codigo in codigos_usados:
+            errores[f'{prefijo}.codigo_lote'] = f'El codigo de lote {codigo} ya existe'
+        elif codigo and codigo in vistos:
+            errores[f'{prefijo}.codigo_lote'] = f'El codigo de lote {codigo} esta repetido en la recepcion'
+        vistos.add(codigo)
+
+    if errores:
+        raise ErrorRecepcion(errores)
+
+    _generar_codigos(lineas, ahora)
+
+    # ========== INSERTAR LOTES EN BLOQUE ==========
+    lote_ids = db.session.execute(
+        insert(Lote.__table__).returning(Lote.__table__.c.id, sort_by_parameter_order=True),
+        [
+            {
+                'producto_id': l['producto_id'],
+                'codigo_lote': l['codigo_lote'],
+                'cantidad_inicial': l['cantidad'],
+                'cantidad_actual': l['cantidad'],
+                'fecha_ingreso': ahora,
+                'fecha_vencimiento': l['fecha_vencimiento'],
+                'precio_compra_lote': l['precio_compra_lote'],
+                'proveedor': proveedor,
+                'ubicacion': l['ubicacion'],
+                'notas': l['notas'],
+                'activo': True,
+                'created_at': ahora,
+                'updated_at': ahora,
+            }
+            for l in lineas
+        ]
+    ).scalars().all()
+
+    # ========== UN SOLO UPDATE DE STOCK (CASE por producto) ==========
+    cantidad_por_producto = defaultdict(int)
+    for linea in lineas:
+        cantidad_por_producto[linea['producto_id']] += linea['cantidad']
+
+    productos = Product.__table__
+    stock_final = dict(db.session.execute(
+        update(productos)
+        .where(productos.c.id.in_(cantidad_por_producto))
+        .values(
+            stock_total=productos.c.stock_total + case(
+                cantidad_por_producto, value=productos.c.id, else_=0
+            ),
+            updated_at=ahora
+        )
+        .returning(productos.c.id, productos.c.stock_total)
+    ).all())
+
+    # ========== MOVIMIENTOS 'compra' EN BLOQUE ==========
+    # stock_anterior/nuevo encadenados por producto en el orden de la guía
+    stock_corriente = {
+        pid: stock_final[pid] - cantidad for pid, cantidad in cantidad_por_producto.items()
+    }
+    referencia = f'Recepcion {documento}' if documento else 'Ingreso de mercaderia'
+    movimientos = []
+    for linea, lote_id in zip(lineas, lote_ids):
+        anterior = stock_corriente[linea['producto_id']]
+        stock_corriente[linea['producto_id']] = anterior + linea['cantidad']
+        movimientos.append({
+            'tipo': 'compra',
+            'producto_id': linea['producto_id'],
+            'lote_id': lote_id,
+            'usuario_id': usuario_id,
+            'cantidad': linea['cantidad'],
+            'stock_anterior': anterior,
+            'stock_nuevo': anterior + linea['cantidad'],
+            'referencia': f"{referencia} - {linea['codigo_lote']}"[:100],
+            'motivo': f'Proveedor: {proveedor}'[:100] if proveedor else 'Compra',
+            'created_at': ahora,
+            'updated_at': ahora,
+        })
+    movimiento_ids = db.session.execute(
+        insert(MovimientoStock.__table__).returning(
+            MovimientoStock.__table__.c.id, sort_by_parameter_order=True
+        ),
+        movimientos
+    ).scalars().all()
+
+    # Inserts/UPDATE en bloque no pasan por el flush del ORM
+    CatalogoCambio.registrar(list(cantidad_por_producto), 'recepcion')
+    sync_service.registrar_cambios('lotes', lote_ids, 'insert')
+    sync_service.registrar_cambios('products', list(cantidad_por_producto))
+    sync_service.registrar_cambios('movimientos_stock', movimiento_ids, 'insert')
+    replicacion_stock_service.registrar_deltas(
+        {lote_id: linea['cantidad'] for linea, lote_id in zip(lineas, lote_ids)}
+    )
+
+    valor_total = sum(l['cantidad'] * l['precio_compra_lote'] for l in lineas)
+    auditoria = OperacionMasiva.registrar(
+        'recepcion_mercaderia',
+        usuario_id,
+        {'proveedor': proveedor, 'numero_documento': documento},
+        {'lineas': len(lineas), 'unidades': sum(cantidad_por_producto.values()),
+         'valor_total': str(valor_total)},
+        len(lote_ids)
+    )
+    db.session.commit()
+
+    return {
+        'recepcion': {
+            'operacion_id': auditoria.id,
+            'proveedor': proveedor,
+            'numero_documento': documento,
+            'total_lineas': len(lineas),
+            'total_unidades': sum(cantidad_por_producto.values()),
+            'valor_total': str(valor_total),
+        },
+        'lotes': [
+            {'id': lote_id, 'codigo_lote': l['codigo_lote'], 'producto_id': l['producto_id'],
+             'cantidad': l['cantidad']}
+            for l, lote_id in zip(lineas, lote_ids)
+        ],
+        'productos': [
+            {'id': pid, 'stock_total': stock} for pid, stock in sorted(stock_final.items())
+        ],
+    }
@@ -0,0 +1,378 @@
+"""
+KATITA-POS - Servicio de Replicación de Stock
+=============================================
+Fusión sin conflictos del stock entre nodos offline usando PN-counters
+
+Problema: si una tienda offline y la nube venden del mismo lote mientras
+están desconectadas, replicar el valor absoluto de cantidad_actual hace que
+la última escritura gane y se pierdan ventas.
+
+Solución: cada nodo acumula en ContadorStock sus propias entradas y salidas
+por lote (contadores que solo crecen). Un listener after_flush traduce cada
+cambio de Lote.cantidad_actual hecho por el ORM en un delta del contador del
+nodo local. Al recibir contadores de otro nodo se toma el máximo por
+(lote, nodo), lo que hace la fusión conmutativa, asociativa e idempotente,
+y luego se recalculan cantidad_actual y stock_total:
+
+    cantidad_actual = SUM(incrementos) - SUM(decrementos)   (por lote)
+
+Si el resultado queda fuera de [0, cantidad_inicial] se recorta y se abre
+una TareaReconciliacion; la venta ya ocurrió y no se bloquea.
+
+El receptor de la sincronización debe aplicar las filas de contadores_stock
+con fusionar_contadores() y no sobrescribir cantidad_actual/stock_total con
+las imágenes de lotes/products.
+"""
+
+import socket
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import select, update, func, case, inspect, and_, bindparam, literal, DateTime
+from sqlalchemy.orm import Session
+from app import db
+from app.utils.eventos import escuchar
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.contador_stock import ContadorStock
+from app.models.tarea_reconciliacion import TareaReconciliacion
+from app.models.catalogo_cambio import CatalogoCambio
+from app.services import sync_service
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+# Nodo al que se atribuye el stock existente antes de activar los contadores
+NODO_BASE = 'base'
+
+
+# ==================== Operaciones puras (PN-counter) ====================
+
+def fusionar_estados(a, b):
+    """
+    Fusiona dos estados {(lote_id, nodo): (incrementos, decrementos)}
+
+    Máximo por componente: conmutativa, asociativa e idempotente.
+
+    Returns:
+        dict: Estado fusionado (nuevo)
+    """
+    fusionado = dict(a)
+    for clave, (incrementos, decrementos) in b.items():
+        previo = fusionado.get(clave, (0, 0))
+        fusionado[clave] = (max(previo[0], incrementos), max(previo[1], decrementos))
+    return fusionado
+
+
+def valor_lote(estado, lote_id):
+    """
+    Stock de un lote según un estado de contadores
+
+    Returns:
+        int: SUM(incrementos) - SUM(decrementos) (puede ser negativo)
+    """
+    return sum(i - d for (lote, _), (i, d) in estado.items() if lote == lote_id)
+
+
+# ==================== Captura local ====================
+
+def nodo_actual():
+    """Identificador de este nodo (SYNC_NODE_ID o el hostname)"""
+    return current_app.config.get('SYNC_NODE_ID') or socket.gethostname()[:64]
+
+
+def _contadores_activos():
+    return has_app_context() and current_app.config.get('SYNC_STOCK_CONTADORES', False)
+
+
+def _sentencia_upsert(filas, acumular):
+    """
+    INSERT ... ON CONFLICT (lote_id, nodo) DO UPDATE según el motor
+
+    Args:
+        filas (list): [{lote_id, nodo, incrementos, decrementos}]
+        acumular (bool): True suma los deltas (captura local);
+            False toma el máximo (fusión con otro nodo)
+    """
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    tabla = ContadorStock.__table__
+    ahora = datetime.now(PERU_TZ)
+    sentencia = insert(tabla).values([dict(f, updated_at=ahora) for f in filas])
+    nuevo = sentencia.excluded
+
+    if acumular:
+        valores = {
+            'incrementos': tabla.c.incrementos + nuevo.incrementos,
+            'decrementos': tabla.c.decrementos + nuevo.decrementos,
+        }
+    else:
+        valores = {
+            'incrementos': case((nuevo.incrementos > tabla.c.incrementos, nuevo.incrementos),
+                                else_=tabla.c.incrementos),
+            'decrementos': case((nuevo.decrementos > tabla.c.decrementos, nuevo.decrementos),
+                                else_=tabla.c.decrementos),
+        }
+    valores['updated_at'] = nuevo.updated_at
+
+    return sentencia.on_conflict_do_update(
+        index_elements=['lote_id', 'nodo'], set_=valores
+    ).returning(tabla.c.id)
+
+
+def registrar_deltas(deltas, conexion=None):
+    """
+    Suma deltas de stock a los contadores del nodo local
+
+    Para escrituras set-based que no pasan por el flush del ORM.
+
+    Args:
+        deltas (dict): {lote_id: delta} (positivo = entrada, negativo = salida)
+        conexion: Conexión a usar (default: la de db.session)
+    """
+    if not _contadores_activos():
+        return
+
+    nodo = nodo_actual()
+    filas = [
+        {'lote_id': lote_id, 'nodo': nodo,
+         'incrementos': max(delta, 0), 'decrementos': max(-delta, 0)}
+        for lote_id, delta in sorted(deltas.items()) if lote_id and delta
+    ]
+    if not filas:
+        return
+
+    ejecutor = conexion if conexion is not None else db.session
+
+    # Lotes anteriores a los contadores: el stock previo al delta se atribuye
+    # al nodo 'base' (mismo valor en todos los nodos que partieron de él)
+    contadores = ContadorStock.__table__
+    sin_contador = ejecutor.execute(
+        select(Lote.id, Lote.cantidad_actual)
+        .where(Lote.id.in_([f['lote_id'] for f in filas]),
+               ~select(contadores.c.id).where(contadores.c.lote_id == Lote.id).exists())
+    ).all()
+    base = [
+        {'lote_id': lote_id, 'nodo': NODO_BASE, 'incrementos': cantidad - deltas[lote_id], 'decrementos': 0}
+        for lote_id, cantidad in sin_contador if cantidad - deltas[lote_id] > 0
+    ]
+
+    ids = []
+    if base:
+        ids += ejecutor.execute(_sentencia_upsert(base, acumular=False)).scalars().all()
+    ids += ejecutor.execute(_sentencia_upsert(filas, acumular=True)).scalars().all()
+    sync_service.registrar_cambios('contadores_stock', ids)
+
+
+def _capturar_deltas_en_flush(session, flush_context):
+    """Listener after_flush: convierte cambios de cantidad_actual en deltas"""
+    if not _contadores_activos():
+        return
+
+    deltas = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, Lote) and obj.cantidad_actual:
+            deltas[obj.id] += obj.cantidad_actual
+
+    for obj in session.dirty:
+        if not isinstance(obj, Lote):
+            continue
+        historial = inspect(obj).attrs.cantidad_actual.history
+        if historial.added and historial.deleted:
+            deltas[obj.id] += (historial.added[0] or 0) - (historial.deleted[0] or 0)
+
+    if deltas:
+        registrar_deltas(deltas, conexion=session.connection())
+
+
+def registrar_eventos_contadores():
+    """Registra el listener de contadores de stock"""
+    escuchar(Session, 'after_flush', _capturar_deltas_en_flush)
+
+
+def inicializar_contadores():
+    """
+    Atribuye al nodo 'base' el stock de los lotes que aún no tienen contadores
+
+    Ejecutar una vez en la nube antes de distribuir la base a las tiendas,
+    para que todas partan del mismo estado.
+
+    Returns:
+        int: Lotes inicializados
+    """
+    tabla = ContadorStock.__table__
+    sin_contador = ~select(tabla.c.id).where(tabla.c.lote_id == Lote.id).exists()
+    ahora = datetime.now(PERU_TZ)
+
+    insertados = db.session.execute(
+        tabla.insert().from_select(
+            ['lote_id', 'nodo', 'incrementos', 'decrementos', 'updated_at'],
+            select(Lote.id, literal(NODO_BASE), Lote.cantidad_actual,
+                   literal(0), literal(ahora, DateTime))
+            .where(sin_contador)
+        )
+    ).rowcount
+    db.session.commit()
+    return insertados
+
+
+# ==================== Fusión con otros nodos ====================
+
+def _abrir_o_actualizar_tareas(conflictos, ahora):
+    """
+    Una tarea pendiente por lote: crea, actualiza o cierra según la diferencia
+
+    Args:
+        conflictos (dict): {lote_id: (producto_id, diferencia)} de los lotes
+            recalculados (diferencia 0 = sin conflicto)
+    """
+    abiertas = {
+        t.lote_id: t for t in TareaReconciliacion.query.filter(
+            TareaReconciliacion.estado == 'pendiente',
+            TareaReconciliacion.lote_id.in_(conflictos)
+        )
+    }
+
+    for lote_id, (producto_id, diferencia) in conflictos.items():
+        tarea = abiertas.get(lote_id)
+        if diferencia == 0:
+            if tarea is not None:
+                tarea.resolver(None, 'Resuelta al fusionar contadores')
+        elif tarea is None:
+            db.session.add(TareaReconciliacion(
+                lote_id=lote_id, producto_id=producto_id, diferencia=diferencia
+            ))
+        elif tarea.diferencia != diferencia:
+            tarea.diferencia = diferencia
+            tarea.updated_at = ahora
+
+
+def _aplicar_contadores(lote_ids):
+    """
+    Recalcula cantidad_actual de los lotes y stock_total de sus productos
+
+    Returns:
+        tuple: (lotes actualizados, lotes en conflicto)
+    """
+    contadores = ContadorStock.__table__
+    saldos = dict(db.session.execute(
+        select(contadores.c.lote_id,
+               func.sum(contadores.c.incrementos) - func.sum(contadores.c.decrementos))
+        .where(contadores.c.lote_id.in_(lote_ids))
+        .group_by(contadores.c.lote_id)
+    ).all())
+
+    lotes = db.session.execute(
+        select(Lote.id, Lote.producto_id, Lote.cantidad_inicial, Lote.cantidad_actual)
+        .where(Lote.id.in_(saldos))
+    ).all()
+
+    ahora = datetime.now(PERU_TZ)
+    cambios, conflictos = [], {}
+    for lote in lotes:
+        saldo = int(saldos[lote.id])
+        aplicado = min(max(saldo, 0), lote.cantidad_inicial)
+        conflictos[lote.id] = (lote.producto_id, saldo - aplicado)
+        if aplicado != lote.cantidad_actual:
+            cambios.append({'b_id': lote.id, 'b_cantidad': aplicado, 'b_activo': aplicado > 0})
+
+    tabla_lotes = Lote.__table__
+    if cambios:
+        db.session.execute(
+            update(tabla_lotes).where(tabla_lotes.c.id == bindparam('b_id'))
+            .values(cantidad_actual=bindparam('b_cantidad'), activo=bindparam('b_activo'),
+                    updated_at=ahora),
+            cambios
+        )
+
+    producto_ids = sorted({lote.producto_id for lote in lotes})
+    if producto_ids:
+        productos = Product.__table__
+        stock_lotes = (
+            select(func.coalesce(func.sum(tabla_lotes.c.cantidad_actual), 0))
+            .where(tabla_lotes.c.producto_id == productos.c.id)
+            .scalar_subquery()
+        )
+        db.session.execute(
+            update(productos)
+            .where(and_(productos.c.id.in_(producto_ids), productos.c.stock_total != stock_lotes))
+            .values(stock_total=stock_lotes, updated_at=ahora)
+        )
+        CatalogoCambio.registrar(producto_ids, 'replicacion')
+
+    _abrir_o_actualizar_tareas(conflictos, ahora)
+    return len(cambios), sum(1 for _, diferencia in conflictos.values() if diferencia)
+
+
+def fusionar_contadores(contadores):
+    """
+    Fusiona contadores recibidos de otro nodo (máximo por lote y nodo)
+
+    Aplicar el mismo lote de contadores dos veces, o en cualquier orden
+    respecto de otros nodos, deja el mismo resultado.
+
+    Args:
+        contadores (list): [{lote_id, nodo, incrementos, decrementos}]
+
+    Returns:
+        dict: contadores, lotes_actualizados, conflictos, lotes_desconocidos
+
+    Raises:
+        ValueError: Si algún contador tiene formato inválido
+    """
+    filas = []
+    for c in contadores:
+        try:
+            fila = {
+                'lote_id': int(c['lote_id']),
+                'nodo': str(c['nodo'])[:64],
+                'incrementos': int(c['incrementos']),
+                'decrementos': int(c['decrementos']),
+            }
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'Contador inválido: {c}')
+        if fila['incrementos'] < 0 or fila['decrementos'] < 0 or not fila['nodo']:
+            raise ValueError(f'Contador inválido: {c}')
+        filas.append(fila)
+
+    lote_ids = {f['lote_id'] for f in filas}
+    existentes = set(db.session.execute(select(Lote.id).where(Lote.id.in_(lote_ids))).scalars())
+
+    # Los lotes que aún no llegaron a este nodo se reintentan en la próxima sincronización
+    filas = [f for f in filas if f['lote_id'] in existentes]
+    if not filas:
+        return {'contadores': 0, 'lotes_actualizados': 0, 'conflictos': 0,
+                'lotes_desconocidos': sorted(lote_ids - existentes)}
+
+    db.session.execute(_sentencia_upsert(filas, acumular=False))
+    actualizados, conflictos = _aplicar_contadores(sorted(existentes))
+    db.session.commit()
+
+    return {
+        'contadores': len(filas),
+        'lotes_actualizados': actualizados,
+        'conflictos': conflictos,
+        'lotes_desconocidos': sorted(lote_ids - existentes),
+    }
+
+
+def exportar_contadores(lote_ids=None, desde=None):
+    """
+    Contadores de este nodo para enviarlos a otro
+
+    Args:
+        lote_ids (list): Limitar a estos lotes (opcional)
+        desde (datetime): Solo los modificados desde este instante (opcional)
+
+    Returns:
+        list: [{lote_id, nodo, incrementos, decrementos}]
+    """
+    query = ContadorStock.query
+    if lote_ids is not None:
+        query = query.filter(ContadorStock.lote_id.in_(lote_ids))
+    if desde is not None:
+        query = query.filter(ContadorStock.updated_at >= desde)
+    return [c.to_dict() for c in query.order_by(ContadorStock.lote_id, ContadorStock.nodo)]
@@ -0,0 +1,302 @@
+"""
+KATITA-POS - Servicio de Stock
+==============================
+Reconciliación de Product.stock_total contra la suma de sus lotes
+
+Product.stock_total es una copia desnormalizada de las cantidades de los
+lotes. Invariante:
+
+    stock_total == SUM(lotes.cantidad_actual) del producto
+                   (todos los lotes, activos o no; 0 si no tiene lotes)
+
+La detección usa un único GROUP BY sobre lotes y la reparación un único
+UPDATE set-based, en lugar de recorrer producto por producto.
+
+También escribe fotografías periódicas del stock (SnapshotStock) y
+responde consultas de stock a una fecha partiendo del corte más cercano.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from sqlalchemy import select, update, insert, func, literal, null
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.movimiento_stock import MovimientoStock
+from app.models.snapshot_stock import SnapshotStock
+from app.models.catalogo_cambio import CatalogoCambio
+from app.models.operacion_masiva import OperacionMasiva
+from app.services import sync_service
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+# Cantidad de descuadres que se guardan en la auditoría de una reparación
+MAX_DETALLE_AUDITORIA = 100
+
+
+def _stock_real_por_producto():
+    """
+    Subconsulta con el stock real de cada producto que tiene lotes
+
+    Returns:
+        Subquery: columnas producto_id, stock_real
+    """
+    return (
+        select(
+            Lote.producto_id.label('producto_id'),
+            func.sum(Lote.cantidad_actual).label('stock_real')
+        )
+        .group_by(Lote.producto_id)
+        .subquery('stock_lotes')
+    )
+
+
+def detectar_descuadres(producto_ids=None, conexion=None):
+    """
+    Lista los productos cuyo stock_total no coincide con la suma de sus lotes
+
+    Una sola consulta: products LEFT JOIN (GROUP BY lotes).
+
+    Args:
+        producto_ids (list): Limitar a estos productos (opcional)
+        conexion (Connection): Conexión a usar en lugar de la sesión
+            (útil fuera de una transacción de la sesión, ej. after_commit)
+
+    Returns:
+        list: [{producto_id, codigo_barras, nombre, stock_registrado,
+                stock_real, diferencia}] ordenado por producto_id
+    """
+    stock_lotes = _stock_real_por_producto()
+    stock_real = func.coalesce(stock_lotes.c.stock_real, 0)
+
+    consulta = (
+        select(
+            Product.id, Product.codigo_barras, Product.nombre,
+            Product.stock_total, stock_real.label('stock_real')
+        )
+        .outerjoin(stock_lotes, stock_lotes.c.producto_id == Product.id)
+        .where(Product.stock_total != stock_real)
+        .order_by(Product.id)
+    )
+    if producto_ids is not None:
+        consulta = consulta.where(Product.id.in_(producto_ids))
+
+    ejecutor = conexion if conexion is not None else db.session
+    filas = ejecutor.execute(consulta).all()
+
+    return [
+        {
+            'producto_id': fila.id,
+            'codigo_barras': fila.codigo_barras,
+            'nombre': fila.nombre,
+            'stock_registrado': fila.stock_total,
+            'stock_real': int(fila.stock_real),
+            'diferencia': int(fila.stock_real) - fila.stock_total,
+        }
+        for fila in filas
+    ]
+
+
+def reparar_descuadres(usuario_id=None, producto_ids=None):
+    """
+    Corrige stock_total de todos los productos descuadrados en un solo UPDATE
+
+    Pasos (una transacción):
+        1. Detectar descuadres (para la auditoría)
+        2. UPDATE products SET stock_total = (SUM lotes) WHERE distinto
+        3. Una versión del catálogo POS por producto corregido
+        4. Un registro de auditoría 'reparacion_stock'
+
+    Args:
+        usuario_id (int): Usuario que ejecuta (None desde la CLI)
+        producto_ids (list): Limitar a estos productos (opcional)
+
+    Returns:
+        dict: productos_corregidos, descuadres, operacion_id
+    """
+    descuadres = detectar_descuadres(producto_ids)
+    if not descuadres:
+        return {'productos_corregidos': 0, 'descuadres': [], 'operacion_id': None}
+
+    productos = Product.__table__
+    stock_real = (
+        select(func.coalesce(func.sum(Lote.cantidad_actual), 0))
+        .where(Lote.producto_id == productos.c.id)
+        .scalar_subquery()
+    )
+
+    sentencia = (
+        update(productos)
+        .where(productos.c.stock_total != stock_real)
+        .values(stock_total=stock_real, updated_at=datetime.now(PERU_TZ))
+        .returning(productos.c.id)
+    )
+    if producto_ids is not None:
+        sentencia = sentencia.where(productos.c.id.in_(producto_ids))
+
+    corregidos = db.session.execute(sentencia).scalars().all()
+
+    CatalogoCambio.registrar(corregidos, 'reparacion_stock')
+    sync_service.registrar_cambios('products', corregidos)
+
+    auditoria = OperacionMasiva.registrar(
+        'reparacion_stock',
+        usuario_id,
+        {'producto_ids': producto_ids} if producto_ids is not None else None,
+        {'descuadres': descuadres[:MAX_DETALLE_AUDITORIA], 'total_descuadres': len(descuadres)},
+        len(corregidos)
+    )
+    db.session.commit()
+
+    return {
+        'productos_corregidos': len(corregidos),
+        'descuadres': descuadres,
+        'operacion_id': auditoria.id,
+    }
+
+
+# ==================== Fotografías de stock ====================
+
+def tomar_snapshot(corte=None):
+    """
+    Escribe una fotografía del stock actual (por lote y por producto)
+
+    Dos INSERT ... SELECT: uno por lote con stock y otro con el resumen por
+    producto (GROUP BY). No se cargan objetos en memoria.
+
+    Args:
+        corte (datetime): Instante a registrar (default: ahora, hora de Perú).
+            Se escribe igual que MovimientoStock.created_at (con zona horaria)
+            para que ambos queden en la misma referencia en la base de datos
+
+    Returns:
+        dict: corte, lotes, productos
+    """
+    if corte is None:
+        corte = datetime.now(PERU_TZ)
+    elif corte.tzinfo is None:
+        corte = corte.replace(tzinfo=PERU_TZ)
+
+    columnas = ['corte', 'producto_id', 'lote_id', 'cantidad', 'valor']
+    valor = Lote.cantidad_actual * Lote.precio_compra_lote
+    con_stock = Lote.cantidad_actual > 0
+
+    lotes = db.session.execute(
+        insert(SnapshotStock).from_select(columnas, select(
+            literal(corte, SnapshotStock.corte.type), Lote.producto_id, Lote.id,
+            Lote.cantidad_actual, valor
+        ).where(con_stock))
+    ).rowcount
+
+    productos = db.session.execute(
+        insert(SnapshotStock).from_select(columnas, select(
+            literal(corte, SnapshotStock.corte.type), Lote.producto_id,
+            null(), func.sum(Lote.cantidad_actual), func.sum(valor)
+        ).where(con_stock).group_by(Lote.producto_id))
+    ).rowcount
+
+    db.session.commit()
+    return {'corte': corte, 'lotes': lotes, 'productos': productos}
+
+
+def stock_al(fecha, por_lote=False):
+    """
+    Stock y valor al cierre de una fecha
+
+    Parte del corte más cercano anterior y suma solo los movimientos entre
+    ese corte y el cierre del día: O(productos + movimientos recientes) en
+    lugar de O(todo el historial). Sin cortes previos se usa todo el
+    historial de movimientos.
+
+    Args:
+        fecha (date|datetime): Día (se toma su cierre) o instante exclusivo,
+            en hora de Perú si no trae zona horaria
+        por_lote (bool): Detallar por lote en lugar de por producto
+
+    Returns:
+        dict: fecha, corte_base, movimientos_aplicados, total_unidades,
+              valor_total, items
+    """
+    if isinstance(fecha, datetime):
+        limite = fecha if fecha.tzinfo else fecha.replace(tzinfo=PERU_TZ)
+    else:
+        limite = datetime.combine(fecha + timedelta(days=1), datetime.min.time(), tzinfo=PERU_TZ)
+
+    corte = SnapshotStock.ultimo_corte(antes_de=limite)
+    saldos = defaultdict(lambda: [0, Decimal('0')])
+
+    # 1. Punto de partida: el corte
+    if corte is not None:
+        filas = db.session.execute(
+            select(SnapshotStock.producto_id, SnapshotStock.lote_id,
+                   SnapshotStock.cantidad, SnapshotStock.valor)
+            .where(SnapshotStock.corte == corte,
+                   SnapshotStock.lote_id.isnot(None) if por_lote else SnapshotStock.lote_id.is_(None))
+        ).all()
+        for fila in filas:
+            clave = (fila.producto_id, fila.lote_id) if por_lote else fila.producto_id
+            saldos[clave][0] += fila.cantidad
+            saldos[clave][1] += Decimal(str(fila.valor))
+
+    # 2. Solo los movimientos posteriores al corte (agregados en SQL)
+    costo = func.coalesce(Lote.precio_compra_lote, Product.precio_compra)
+    agrupar = [MovimientoStock.producto_id] + ([MovimientoStock.lote_id] if por_lote else [])
+    condiciones = [MovimientoStock.created_at < limite]
+    if corte is not None:
+        condiciones.append(MovimientoStock.created_at > corte)
+
+    deltas = db.session.execute(
+        select(*agrupar,
+               func.sum(MovimientoStock.cantidad).label('cantidad'),
+               func.sum(MovimientoStock.cantidad * costo).label('valor'),
+               func.count().label('movimientos'))
+        .join(Product, Product.id == MovimientoStock.producto_id)
+        .outerjoin(Lote, Lote.id == MovimientoStock.lote_id)
+        .where(*condiciones)
+        .group_by(*agrupar)
+    ).all()
+
+    movimientos = 0
+    for fila in deltas:
+        clave = (fila.producto_id, fila.lote_id) if por_lote else fila.producto_id
+        saldos[clave][0] += int(fila.cantidad)
+        saldos[clave][1] += Decimal(str(fila.valor))
+        movimientos += fila.movimientos
+
+    # 3. Datos descriptivos de los productos involucrados
+    producto_ids = {clave[0] if por_lote else clave for clave in saldos}
+    nombres = {
+        fila.id: fila for fila in db.session.execute(
+            select(Product.id, Product.codigo_barras, Product.nombre)
+            .where(Product.id.in_(producto_ids))
+        ).all()
+    } if producto_ids else {}
+
+    # Por lote, los movimientos sin lote (lote_id NULL) van al final de su producto
+    orden = (lambda par: (par[0][0], par[0][1] is None, par[0][1] or 0)) if por_lote else (lambda par: par[0])
+    items = []
+    for clave, (cantidad, valor) in sorted(saldos.items(), key=orden):
+        if cantidad == 0 and valor == 0:
+            continue
+        producto_id = clave[0] if por_lote else clave
+        item = {
+            'producto_id': producto_id,
+            'codigo_barras': nombres[producto_id].codigo_barras if producto_id in nombres else None,
+            'nombre': nombres[producto_id].nombre if producto_id in nombres else None,
+            'cantidad': cantidad,
+            'valor': str(valor.quantize(Decimal('0.01'))),
+        }
+        if por_lote:
+            item['lote_id'] = clave[1]
+        items.append(item)
+
+    return {
+        'fecha': fecha.isoformat(),
+        'corte_base': corte.isoformat() if corte else None,
+        'movimientos_aplicados': movimientos,
+        'total_unidades': sum(i['cantidad'] for i in items),
+        'valor_total': str(sum((Decimal(i['valor']) for i in items), Decimal('0.00'))),
+        'items': items,
+    }
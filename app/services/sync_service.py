@@ -0,0 +1,690 @@
+"""
+KATITA-POS - Servicio de Sincronización
+=======================================
+Vacía la cola SyncQueue enviando lotes de cambios a un servidor remoto
+
+Flujo de un lote:
+    1. Reclamar hasta N registros con un único UPDATE ... RETURNING que
+       escribe un lease (lease_owner, lease_hasta). En PostgreSQL la
+       subconsulta usa FOR UPDATE SKIP LOCKED para que varios workers no se
+       esperen entre sí; en SQLite el lock de escritura serializa el UPDATE
+       y el lease evita que otro worker tome los mismos registros.
+    2. Enviar el lote al remoto (una sola petición).
+    3. Marcar aceptados con un UPDATE y reprogramar los rechazados con
+       backoff exponencial (intentos / max_intentos) en un executemany.
+       Si el remoto está caído el lote solo se pospone: sin gastar intentos.
+
+Un worker que muere deja sus registros con lease; cuando lease_hasta vence
+otro worker los vuelve a reclamar.
+
+Remotos intercambiables: HTTP (requests.Session con keep-alive) o local en
+memoria para tests y tiendas sin servidor central.
+
+Captura de cambios: un listener after_flush encola la imagen de cada fila
+insertada/modificada/eliminada de las tablas replicadas. Los cambios sobre
+un registro que ya tiene una fila pendiente (sin lease) se fusionan con
+ella, así un lote descontado 300 veces en el día deja una sola fila.
+"""
+
+import json
+import os
+import random
+import socket
+import threading
+import time
+import requests
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timezone, timedelta
+from decimal import Decimal
+from flask import current_app, has_app_context
+from sqlalchemy import select, update, delete, insert, bindparam, or_, tuple_, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.utils.eventos import escuchar
+from app.models.sync_queue import SyncQueue
+
+# Zona horaria de Perú (UTC-5)
+PERU_TZ = timezone(timedelta(hours=-5))
+
+# Tablas cuyos cambios se replican al servidor
+TABLAS_REPLICADAS = frozenset({
+    'ventas', 'detalles_venta', 'lotes', 'products', 'movimientos_stock', 'cuadros_caja',
+    'contadores_stock'
+})
+
+# Máximo de claves por consulta de filas pendientes (límite de parámetros)
+TAMANO_BLOQUE_CAPTURA = 400
+
+
+class RemotoNoDisponible(Exception):
+    """El remoto no pudo recibir el lote (red caída, HTTP 5xx). Se reintenta todo el lote."""
+
+
+# ==================== Remotos ====================
+
+class RemotoSync(ABC):
+    """
+    Interfaz del servidor que recibe los cambios
+
+    Las subclases implementan enviar(cambios) con una lista de dicts
+    {id, tabla, operacion, registro_id, data} y retornan
+    (ids_aceptados, {id: mensaje_error}). Los errores transitorios deben
+    lanzar RemotoNoDisponible.
+    """
+
+    nombre = 'base'
+
+    @abstractmethod
+    def enviar(self, cambios):
+        """(ids_aceptados, {id: mensaje_error}); RemotoNoDisponible si el servidor no responde"""
+
+
+class RemotoHTTP(RemotoSync):
+    """
+    Remoto HTTP con sesión reutilizable (keep-alive)
+
+    POST <url> con {"cambios": [...]}; la respuesta esperada es
+    {"aceptados": [ids], "rechazados": {"<id>": "mensaje"}}.
+    """
+
+    nombre = 'http'
+
+    def __init__(self, url, token=None, timeout=10):
+        if not url:
+            raise ValueError('SYNC_REMOTE_URL es requerido para el remoto HTTP')
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'KATITA-POS/1.0 (sincronización)'
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+
+    def enviar(self, cambios):
+        try:
+            response = self.session.post(self.url, json={'cambios': cambios}, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise RemotoNoDisponible(str(e))
+
+        if response.status_code >= 500 or response.status_code == 429:
+            raise RemotoNoDisponible(f'HTTP {response.status_code}')
+        if response.status_code != 200:
+            mensaje = f'HTTP {response.status_code}: {response.text[:200]}'
+            return [], {cambio['id']: mensaje for cambio in cambios}
+
+        data = response.json()
+        rechazados = {int(k): v for k, v in (data.get('rechazados') or {}).items()}
+        return [int(i) for i in data.get('aceptados', [])], rechazados
+
+
+class RemotoLocal(RemotoSync):
+    """
+    Remoto en memoria
+
+    Acepta todo salvo los registros cuyo id esté en 'rechazar'. Con
+    disponible=False simula una caída de red. Útil para tests.
+    """
+
+    nombre = 'local'
+
+    def __init__(self):
+        self.recibidos = []
+        self.rechazar = set()
+        self.disponible = True
+
+    def enviar(self, cambios):
+        if not self.disponible:
+            raise RemotoNoDisponible('Remoto local no disponible')
+
+        aceptados, rechazados = [], {}
+        for cambio in cambios:
+            if cambio['id'] in self.rechazar:
+                rechazados[cambio['id']] = 'Rechazado por el remoto'
+            else:
+                self.recibidos.append(cambio)
+                aceptados.append(cambio['id'])
+        return aceptados, rechazados
+
+
+def obtener_remoto(app=None):
+    """
+    Retorna el remoto configurado (uno por app, reutilizado entre lotes)
+
+    Config:
+        SYNC_REMOTE: 'http' (default) o 'local'
+        SYNC_REMOTE_URL, SYNC_REMOTE_TOKEN, SYNC_REMOTE_TIMEOUT: remoto HTTP
+
+    Returns:
+        RemotoSync: Instancia del remoto
+    """
+    app = app or current_app._get_current_object()
+    remoto = app.extensions.get('sync_remoto')
+    if remoto is None:
+        if app.config['SYNC_REMOTE'] == 'local':
+            remoto = RemotoLocal()
+        else:
+            remoto = RemotoHTTP(
+                app.config.get('SYNC_REMOTE_URL'),
+                token=app.config.get('SYNC_REMOTE_TOKEN'),
+                timeout=app.config['SYNC_REMOTE_TIMEOUT']
+            )
+        app.extensions['sync_remoto'] = remoto
+    return remoto
+
+
+def configurar_remoto(app, remoto):
+    """
+    Reemplaza el remoto de una app (tests o integraciones propias)
+
+    Args:
+        app (Flask): Aplicación
+        remoto (RemotoSync): Remoto a usar
+    """
+    app.extensions['sync_remoto'] = remoto
+
+
+# ==================== Captura de cambios ====================
+
+def _valor_json(valor):
+    """Convierte fechas y decimales a texto para guardarlos en SyncQueue.data"""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def _imagen_objeto(obj):
+    """Imagen de la fila de un objeto ORM: {columna: valor}"""
+    mapper = inspect(obj).mapper
+    return {
+        atributo.columns[0].name: _valor_json(getattr(obj, atributo.key))
+        for atributo in mapper.column_attrs
+    }
+
+
+def _combinar(previa, nueva):
+    """
+    Operación resultante de fusionar un cambio con la fila pendiente
+
+    insert + update = insert, insert + delete = nada (None),
+    update/delete + update = update, cualquier + delete = delete.
+    """
+    if nueva == 'delete':
+        return None if previa == 'insert' else 'delete'
+    if previa == 'insert':
+        return 'insert'
+    return 'update'
+
+
+def _encolar(conexion, cambios):
+    """
+    Encola cambios fusionándolos con las filas pendientes del mismo registro
+
+    Solo se fusiona con filas no procesadas, sin lease (no están en vuelo)
+    y con intentos disponibles. Una consulta por bloque de claves, un INSERT
+    en bloque y un executemany de UPDATE. El UPDATE/DELETE vuelve a exigir
+    esas condiciones: en PostgreSQL un worker puede reclamar la fila entre
+    la consulta y la escritura, y entonces el cambio va en una fila nueva.
+
+    Args:
+        conexion: Conexión de la transacción en curso
+        cambios (list): [(tabla, operacion, registro_id, imagen)] en orden
+    """
+    cola = SyncQueue.__table__
+    libre = (
+        cola.c.procesado == False,  # noqa: E712
+        cola.c.lease_owner.is_(None),
+        cola.c.intentos < cola.c.max_intentos,
+    )
+
+    # Si un registro aparece varias veces, cuenta la secuencia completa
+    fusionados = {}
+    for tabla, operacion, registro_id, imagen in cambios:
+        clave = (tabla, registro_id)
+        if clave in fusionados:
+            previa = fusionados[clave][0]
+            operacion = _combinar(previa, operacion) if previa else operacion
+        fusionados[clave] = (operacion, imagen)
+
+    pendientes = {}
+    claves = list(fusionados)
+    for i in range(0, len(claves), TAMANO_BLOQUE_CAPTURA):
+        filas = conexion.execute(
+            select(cola.c.id, cola.c.tabla, cola.c.registro_id, cola.c.operacion)
+            .where(
+                *libre,
+                tuple_(cola.c.tabla, cola.c.registro_id).in_(claves[i:i + TAMANO_BLOQUE_CAPTURA])
+            )
+            .order_by(cola.c.id)
+        ).all()
+        for fila in filas:
+            pendientes[(fila.tabla, fila.registro_id)] = fila
+
+    nuevos, actualizar, descartar = [], [], []
+    sin_fusionar = {}  # id de la fila pendiente -> fila nueva si ya no se puede fusionar
+    for (tabla, registro_id), (operacion, imagen) in fusionados.items():
+        data = json.dumps(imagen)
+        previa = pendientes.get((tabla, registro_id))
+        if previa is not None:
+            if operacion is not None:
+                sin_fusionar[previa.id] = {'tabla': tabla, 'operacion': operacion,
+                                           'registro_id': registro_id, 'data': data}
+            operacion = _combinar(previa.operacion, operacion)
+            if operacion is None:
+                descartar.append(previa.id)
+            else:
+                actualizar.append({'b_id': previa.id, 'b_operacion': operacion, 'b_data': data})
+        elif operacion is not None:
+            nuevos.append({'tabla': tabla, 'operacion': operacion,
+                           'registro_id': registro_id, 'data': data})
+
+    perdidas = set()
+    if actualizar:
+        resultado = conexion.execute(
+            update(cola).where(cola.c.id == bindparam('b_id'), *libre)
+            .values(operacion=bindparam('b_operacion'), data=bindparam('b_data')),
+            actualizar
+        )
+        ids = [p['b_id'] for p in actualizar]
+        if not (resultado.supports_sane_multi_rowcount() and resultado.rowcount == len(ids)):
+            # Las filas actualizadas siguen libres (el lock de la fila es nuestro hasta el commit)
+            siguen = set(conexion.execute(select(cola.c.id).where(cola.c.id.in_(ids), *libre)).scalars())
+            perdidas.update(set(ids) - siguen)
+    if descartar:
+        borradas = conexion.execute(
+            delete(cola).where(cola.c.id.in_(descartar), *libre).returning(cola.c.id)
+        ).scalars()
+        perdidas.update(set(descartar) - set(borradas))
+
+    # Reclamadas por un worker entre la consulta y la escritura: el cambio va aparte
+    nuevos.extend(sin_fusionar[i] for i in sorted(perdidas) if i in sin_fusionar)
+    if nuevos:
+        conexion.execute(insert(cola), nuevos)
+
+
+def _captura_activa():
+    return has_app_context() and current_app.config.get('SYNC_CAPTURE', False)
+
+
+def _capturar_cambios_en_flush(session, flush_context):
+    """Listener after_flush: encola las filas replicadas que cambiaron"""
+    if not _captura_activa():
+        return
+
+    cambios = []
+    for operacion, objetos in (('insert', session.new), ('update', session.dirty),
+                               ('delete', session.deleted)):
+        for obj in objetos:
+            tabla = getattr(obj, '__tablename__', None)
+            if tabla not in TABLAS_REPLICADAS:
+                continue
+            if operacion == 'update' and not session.is_modified(obj, include_collections=False):
+                continue
+            imagen = {'id': obj.id} if operacion == 'delete' else _imagen_objeto(obj)
+            cambios.append((tabla, operacion, obj.id, imagen))
+
+    if cambios:
+        _encolar(session.connection(), cambios)
+
+
+def registrar_eventos_sync():
+    """Registra el listener de captura de cambios"""
+    escuchar(Session, 'after_flush', _capturar_cambios_en_flush)
+
+
+def registrar_cambios(tabla, registro_ids, operacion='update'):
+    """
+    Encola a mano filas escritas con INSERT/UPDATE set-based
+
+    Las escrituras masivas no pasan por el flush del ORM. Las imágenes se
+    leen con una consulta por bloque.
+
+    Args:
+        tabla (str): Nombre de la tabla replicada
+        registro_ids (iterable): IDs escritos
+        operacion (str): 'insert' o 'update'
+    """
+    ids = sorted({int(i) for i in registro_ids if i})
+    if not ids or tabla not in TABLAS_REPLICADAS or not _captura_activa():
+        return
+
+    tabla_sql = db.metadata.tables[tabla]
+    conexion = db.session.connection()
+    cambios = []
+    for i in range(0, len(ids), TAMANO_BLOQUE_CAPTURA):
+        filas = conexion.execute(
+            select(tabla_sql).where(tabla_sql.c.id.in_(ids[i:i + TAMANO_BLOQUE_CAPTURA]))
+        ).mappings()
+        cambios.extend(
+            (tabla, operacion, fila['id'], {k: _valor_json(v) for k, v in fila.items()})
+            for fila in filas
+        )
+    _encolar(conexion, cambios)
+
+
+# ==================== Métricas ====================
+
+_metricas_lock = threading.Lock()
+
+
+def _metricas_vacias():
+    return {
+        'lotes': 0,
+        'enviados': 0,
+        'rechazados': 0,
+        'remoto_no_disponible': 0,
+        'caidas_consecutivas': 0,
+        'segundos_envio': 0.0,
+        'ultimo_lote_at': None,
+    }
+
+
+_metricas = _metricas_vacias()
+
+
+def _sumar_metricas(enviados, rechazados, caida, segundos):
+    with _metricas_lock:
+        _metricas['lotes'] += 1
+        _metricas['enviados'] += enviados
+        _metricas['rechazados'] += rechazados
+        _metricas['remoto_no_disponible'] += 1 if caida else 0
+        _metricas['caidas_consecutivas'] = _metricas['caidas_consecutivas'] + 1 if caida else 0
+        _metricas['segundos_envio'] += segundos
+        _metricas['ultimo_lote_at'] = datetime.now(PERU_TZ).isoformat()
+
+
+def obtener_metricas():
+    """
+    Métricas del worker en este proceso más el estado de la cola
+
+    Returns:
+        dict: lotes, enviados, rechazados, remoto_no_disponible, caidas_consecutivas,
+              registros_por_segundo, ultimo_lote_at, cola
+    """
+    with _metricas_lock:
+        metricas = dict(_metricas)
+
+    segundos = metricas.pop('segundos_envio')
+    metricas['registros_por_segundo'] = round(metricas['enviados'] / segundos, 2) if segundos else 0.0
+    metricas['cola'] = SyncQueue.estadisticas()
+    return metricas
+
+
+def reiniciar_metricas():
+    """Pone en cero las métricas del proceso"""
+    with _metricas_lock:
+        _metricas.clear()
+        _metricas.update(_metricas_vacias())
+
+
+# ==================== Procesamiento ====================
+
+def _ahora():
+    """Hora de Perú sin tzinfo (como se guardan los DateTime de la cola)"""
+    return datetime.now(PERU_TZ).replace(tzinfo=None)
+
+
+def identificador_worker():
+    """Identificador del worker para el lease: host:pid:hilo"""
+    return f'{socket.gethostname()[:40]}:{os.getpid()}:{threading.get_ident() % 100000}'
+
+
+def calcular_espera(intentos, base, maximo):
+    """
+    Segundos de espera antes del siguiente intento (backoff exponencial)
+
+    base * 2^(intentos-1), con tope 'maximo' y jitter de hasta 20% para que
+    muchos registros fallidos a la vez no se reintenten en la misma ráfaga.
+
+    Args:
+        intentos (int): Intentos fallidos acumulados (>= 1)
+        base (int): Espera del primer reintento en segundos
+        maximo (int): Espera máxima en segundos
+
+    Returns:
+        float: Segundos de espera
+    """
+    espera = min(base * 2 ** max(intentos - 1, 0), maximo)
+    return espera * random.uniform(0.8, 1.0)
+
+
+def reclamar_lote(propietario, tamano=100, lease_segundos=120):
+    """
+    Reserva hasta 'tamano' registros pendientes para este worker
+
+    Un solo UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED)
+    RETURNING. Son elegibles los registros no procesados, con intentos
+    disponibles, cuyo backoff venció y sin lease vigente.
+
+    Args:
+        propietario (str): Identificador del worker
+        tamano (int): Máximo de registros a reclamar
+        lease_segundos (int): Duración de la reserva
+
+    Returns:
+        list: Filas (id, tabla, operacion, registro_id, data, intentos,
+              max_intentos) ordenadas por antigüedad
+    """
+    ahora = _ahora()
+    tabla = SyncQueue.__table__
+    elegibles = (
+        tabla.c.procesado == False,  # noqa: E712
+        tabla.c.intentos < tabla.c.max_intentos,
+        or_(tabla.c.siguiente_intento.is_(None), tabla.c.siguiente_intento <= ahora),
+        or_(tabla.c.lease_hasta.is_(None), tabla.c.lease_hasta < ahora),
+    )
+
+    candidatos = (
+        select(tabla.c.id)
+        .where(*elegibles)
+        .order_by(tabla.c.created_at, tabla.c.id)
+        .limit(tamano)
+    )
+    if db.engine.dialect.name == 'postgresql':
+        candidatos = candidatos.with_for_update(skip_locked=True)
+
+    reclamados = db.session.execute(
+        update(tabla)
+        .where(tabla.c.id.in_(candidatos.scalar_subquery()), *elegibles)
+        .values(lease_owner=propietario, lease_hasta=ahora + timedelta(seconds=lease_segundos))
+        .returning(tabla.c.id, tabla.c.tabla, tabla.c.operacion, tabla.c.registro_id,
+                   tabla.c.data, tabla.c.intentos, tabla.c.max_intentos, tabla.c.created_at)
+    ).all()
+    db.session.commit()
+
+    return sorted(reclamados, key=lambda fila: (fila.created_at, fila.id))
+
+
+def _cerrar_lote(propietario, aceptados, rechazados, filas, config):
+    """
+    Marca aceptados y reprograma rechazados, solo si el lease sigue siendo nuestro
+
+    Returns:
+        int: Registros que agotaron sus intentos en este lote
+    """
+    ahora = _ahora()
+    tabla = SyncQueue.__table__
+    propio = tabla.c.lease_owner == propietario
+
+    if aceptados:
+        db.session.execute(
+            update(tabla)
+            .where(tabla.c.id.in_(aceptados), propio)
+            .values(procesado=True, procesado_at=ahora, error_mensaje=None,
+                    lease_owner=None, lease_hasta=None)
+        )
+
+    agotados = 0
+    parametros = []
+    for fila in filas:
+        if fila.id not in rechazados:
+            continue
+        intentos = fila.intentos + 1
+        agotados += 1 if intentos >= fila.max_intentos else 0
+        espera = calcular_espera(intentos, config['SYNC_BACKOFF_BASE'], config['SYNC_BACKOFF_MAX'])
+        parametros.append({
+            'b_id': fila.id,
+            'b_intentos': intentos,
+            'b_error': str(rechazados[fila.id])[:1000],
+            'b_siguiente': ahora + timedelta(seconds=espera),
+        })
+
+    if parametros:
+        db.session.execute(
+            update(tabla)
+            .where(tabla.c.id == bindparam('b_id'), propio)
+            .values(intentos=bindparam('b_intentos'), error_mensaje=bindparam('b_error'),
+                    siguiente_intento=bindparam('b_siguiente'), lease_owner=None, lease_hasta=None),
+            parametros
+        )
+
+    db.session.commit()
+    return agotados
+
+
+def _posponer_lote(propietario, filas, config):
+    """
+    Libera el lease de un lote que no llegó al remoto y lo reprograma
+
+    Una caída del remoto no es culpa de los registros: no consume intentos
+    ni pisa error_mensaje, así la tienda puede trabajar offline horas sin
+    agotar la cola. El backoff crece con las caídas consecutivas del proceso.
+    """
+    with _metricas_lock:
+        caidas = _metricas['caidas_consecutivas'] + 1
+    espera = calcular_espera(caidas, config['SYNC_BACKOFF_BASE'], config['SYNC_BACKOFF_MAX'])
+
+    tabla = SyncQueue.__table__
+    db.session.execute(
+        update(tabla)
+        .where(tabla.c.id.in_([f.id for f in filas]), tabla.c.lease_owner == propietario)
+        .values(lease_owner=None, lease_hasta=None,
+                siguiente_intento=_ahora() + timedelta(seconds=espera))
+    )
+    db.session.commit()
+
+
+def procesar_lote(remoto=None, propietario=None, tamano=None):
+    """
+    Reclama, envía y cierra un lote de la cola
+
+    Args:
+        remoto (RemotoSync): Remoto a usar (default: el configurado)
+        propietario (str): Identificador del worker (default: host:pid:hilo)
+        tamano (int): Registros por lote (default: SYNC_BATCH_SIZE)
+
+    Returns:
+        dict: reclamados, enviados, rechazados, agotados, remoto_disponible
+    """
+    config = current_app.config
+    remoto = remoto or obtener_remoto()
+    propietario = propietario or identificador_worker()
+
+    filas = reclamar_lote(propietario, tamano or config['SYNC_BATCH_SIZE'], config['SYNC_LEASE_SECONDS'])
+    if not filas:
+        return {'reclamados': 0, 'enviados': 0, 'rechazados': 0, 'agotados': 0,
+                'remoto_disponible': True}
+
+    cambios = [
+        {'id': f.id, 'tabla': f.tabla, 'operacion': f.operacion,
+         'registro_id': f.registro_id, 'data': f.data}
+        for f in filas
+    ]
+
+    inicio = time.perf_counter()
+    try:
+        aceptados, rechazados = remoto.enviar(cambios)
+    except RemotoNoDisponible as e:
+        current_app.logger.warning(f'[SYNC] Remoto no disponible, {len(filas)} registros pospuestos: {e}')
+        _posponer_lote(propietario, filas, config)
+        _sumar_metricas(0, 0, True, time.perf_counter() - inicio)
+        return {'reclamados': len(filas), 'enviados': 0, 'rechazados': 0, 'agotados': 0,
+                'remoto_disponible': False}
+    segundos = time.perf_counter() - inicio
+
+    # Lo que el remoto no mencionó se reintenta más tarde
+    reclamados = {f.id for f in filas}
+    aceptados = [i for i in aceptados if i in reclamados]
+    for faltante in reclamados - set(aceptados) - set(rechazados):
+        rechazados[faltante] = 'Sin respuesta del remoto para este registro'
+
+    agotados = _cerrar_lote(propietario, aceptados, rechazados, filas, config)
+    _sumar_metricas(len(aceptados), len(rechazados), False, segundos)
+
+    return {
+        'reclamados': len(filas),
+        'enviados': len(aceptados),
+        'rechazados': len(rechazados),
+        'agotados': agotados,
+        'remoto_disponible': True,
+    }
+
+
+def vaciar_cola(remoto=None, propietario=None, tamano=None, max_lotes=None, detener=None):
+    """
+    Procesa lotes hasta que no queden registros elegibles
+
+    Se corta antes si el remoto está caído (el resto espera su backoff),
+    si se alcanza max_lotes o si se activa el evento 'detener'.
+
+    Returns:
+        dict: lotes, enviados, rechazados, agotados
+    """
+    totales = {'lotes': 0, 'enviados': 0, 'rechazados': 0, 'agotados': 0}
+    while max_lotes is None or totales['lotes'] < max_lotes:
+        if detener is not None and detener.is_set():
+            break
+
+        resultado = procesar_lote(remoto, propietario, tamano)
+        if not resultado['reclamados']:
+            break
+
+        totales['lotes'] += 1
+        for clave in ('enviados', 'rechazados', 'agotados'):
+            totales[clave] += resultado[clave]
+
+        if not resultado['remoto_disponible']:
+            break
+
+    return totales
+
+
+# ==================== Worker en segundo plano ====================
+
+def _bucle_worker(app, detener):
+    """Cuerpo del hilo: vacía la cola y espera SYNC_INTERVAL entre rondas"""
+    propietario = identificador_worker()
+    while not detener.is_set():
+        with app.app_context():
+            try:
+                totales = vaciar_cola(propietario=propietario, detener=detener)
+                if totales['lotes']:
+                    app.logger.info(f"[SYNC] {totales['enviados']} enviados, "
+                                    f"{totales['rechazados']} rechazados en {totales['lotes']} lotes")
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f'[SYNC] Error en el worker: {e}')
+            finally:
+                db.session.remove()
+        detener.wait(app.config['SYNC_INTERVAL'])
+
+
+def iniciar_worker(app):
+    """
+    Lanza el worker de sincronización en un hilo de la app
+
+    Se usa con SYNC_WORKER_MODE='thread'. Con varios procesos (gunicorn)
+    cada uno tiene su hilo; el lease evita que dos hilos envíen el mismo
+    registro.
+
+    Returns:
+        threading.Event: Evento para detener el worker
+    """
+    if 'sync_worker' in app.extensions:
+        return app.extensions['sync_worker']
+
+    detener = threading.Event()
+    hilo = threading.Thread(target=_bucle_worker, args=(app, detener), name='sync-worker', daemon=True)
+    hilo.start()
+    app.extensions['sync_worker'] = detener
+    return detener
@@ -0,0 +1,292 @@
+"""
+KATITA-POS - Servicio de Vencimientos
+=====================================
+Consultas agregadas sobre el vencimiento de lotes
+
+Las alertas se agrupan, ordenan y paginan por producto en la base de
+datos; solo se cargan los lotes de los productos de la página devuelta.
+
+El reporte de vencidos (mermas) calcula totales y desgloses sobre todo el
+filtro con una sola consulta agregada; el detalle por lote se pagina
+aparte con keyset (fecha_vencimiento, id).
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import select, func, case, and_, or_, extract
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+
+URGENCIAS = ('alta', 'media', 'baja')
+
+
+def _filtro_por_vencer(hoy, dias, solo_activos):
+    """Condición de lotes que vencen entre hoy y hoy + dias (inclusive)"""
+    condiciones = [
+        Lote.fecha_vencimiento >= hoy,
+        Lote.fecha_vencimiento <= hoy + timedelta(days=dias),
+    ]
+    if solo_activos:
+        condiciones.append(Lote.cantidad_actual > 0)
+    return and_(*condiciones)
+
+
+def alertas_vencimiento(dias, solo_activos=True, umbral_alta=3, umbral_media=7,
+                        limit=100, offset=0, hoy=None):
+    """
+    Alertas de vencimiento agrupadas por producto
+
+    Una consulta GROUP BY producto_id calcula el vencimiento más próximo,
+    la cantidad afectada, el nivel de urgencia (CASE sobre fechas límite) y,
+    con una ventana sobre los grupos, el total de productos. La paginación
+    es por producto; luego una segunda consulta trae los lotes de la página.
+
+    Args:
+        dias (int): Días de anticipación
+        solo_activos (bool): Solo lotes con stock
+        umbral_alta (int): Días hasta vencer para urgencia alta
+        umbral_media (int): Días hasta vencer para urgencia media
+        limit (int): Productos por página
+        offset (int): Productos a saltar
+        hoy (date): Fecha de referencia (default: date.today())
+
+    Returns:
+        dict: alertas, total_productos_afectados, fecha_limite
+    """
+    hoy = hoy or date.today()
+    filtro = _filtro_por_vencer(hoy, dias, solo_activos)
+
+    vencimiento_minimo = func.min(Lote.fecha_vencimiento)
+    urgencia = case(
+        (vencimiento_minimo <= hoy + timedelta(days=umbral_alta), 0),
+        (vencimiento_minimo <= hoy + timedelta(days=umbral_media), 1),
+        else_=2
+    )
+
+    grupos = db.session.execute(
+        select(
+            Product.id, Product.nombre, Product.codigo_barras,
+            Product.categoria, Product.precio_venta,
+            vencimiento_minimo.label('vencimiento_minimo'),
+            func.sum(Lote.cantidad_actual).label('cantidad_total'),
+            urgencia.label('urgencia'),
+            func.count().over().label('total_productos')
+        )
+        .join(Lote, Lote.producto_id == Product.id)
+        .where(filtro)
+        .group_by(Product.id)
+        .order_by(urgencia, vencimiento_minimo, Product.id)
+        .limit(limit)
+        .offset(offset)
+    ).all()
+
+    total = grupos[0].total_productos if grupos else 0
+    if not grupos and offset:
+        # Página fuera de rango: contar los productos sin traer filas
+        total = db.session.execute(
+            select(func.count(func.distinct(Lote.producto_id))).where(filtro)
+        ).scalar()
+
+    # Detalle de lotes solo para los productos de esta página
+    lotes_por_producto = {g.id: [] for g in grupos}
+    if grupos:
+        lotes = Lote.con_producto().filter(
+            filtro, Lote.producto_id.in_(lotes_por_producto)
+        ).order_by(Lote.fecha_vencimiento.asc(), Lote.id.asc()).all()
+        for lote in lotes:
+            lotes_por_producto[lote.producto_id].append(lote)
+
+    alertas = []
+    for grupo in grupos:
+        alertas.append({
+            'producto': {
+                'id': grupo.id,
+                'nombre': grupo.nombre,
+                'codigo_barras': grupo.codigo_barras,
+                'categoria': grupo.categoria,
+                'precio_venta': str(grupo.precio_venta)
+            },
+            'lotes_proximos': Lote.serializar_lista(
+                lotes_por_producto[grupo.id], include_producto=True, hoy=hoy
+            ),
+            'cantidad_total_afectada': int(grupo.cantidad_total),
+            'urgencia': URGENCIAS[grupo.urgencia],
+            'dias_minimo_vencimiento': (grupo.vencimiento_minimo - hoy).days
+        })
+
+    return {
+        'alertas': alertas,
+        'total_productos_afectados': total,
+        'fecha_limite': hoy + timedelta(days=dias),
+    }
+
+
+def _filtro_vencidos(hoy, con_stock=True, desde=None, hasta=None):
+    """Condición de lotes vencidos (fecha_vencimiento anterior a hoy)"""
+    condiciones = [Lote.fecha_vencimiento < hoy]
+    if con_stock:
+        condiciones.append(Lote.cantidad_actual > 0)
+    if desde:
+        condiciones.append(Lote.fecha_vencimiento >= desde)
+    if hasta:
+        condiciones.append(Lote.fecha_vencimiento <= hasta)
+    return and_(*condiciones)
+
+
+def _monto(valor):
+    return Decimal(str(valor or 0)).quantize(Decimal('0.01'))
+
+
+def resumen_vencidos(con_stock=True, desde=None, hasta=None, hoy=None):
+    """
+    Totales y desgloses del stock vencido sobre todo el filtro
+
+    Un solo recorrido agregado: GROUP BY producto, proveedor y mes de
+    vencimiento. Las filas resultantes (muchas menos que lotes) se
+    acumulan en Python en los totales y en los desgloses por proveedor,
+    categoría y mes, contando productos únicos sin doble conteo.
+
+    Args:
+        con_stock (bool): Solo lotes con stock
+        desde (date): Vencimiento desde (opcional)
+        hasta (date): Vencimiento hasta (opcional)
+        hoy (date): Fecha de referencia (default: date.today())
+
+    Returns:
+        dict: total_lotes, cantidad_total_afectada, valor_perdido_estimado,
+              productos_unicos_afectados, desglose
+    """
+    hoy = hoy or date.today()
+    anio = extract('year', Lote.fecha_vencimiento)
+    mes = extract('month', Lote.fecha_vencimiento)
+
+    filas = db.session.execute(
+        select(
+            Lote.producto_id,
+            Product.categoria,
+            Lote.proveedor,
+            anio.label('anio'),
+            mes.label('mes'),
+            func.count(Lote.id).label('lotes'),
+            func.sum(Lote.cantidad_actual).label('cantidad'),
+            func.sum(Lote.cantidad_actual * Lote.precio_compra_lote).label('valor'),
+        )
+        .join(Product, Product.id == Lote.producto_id)
+        .where(_filtro_vencidos(hoy, con_stock, desde, hasta))
+        .group_by(Lote.producto_id, Product.categoria, Lote.proveedor, anio, mes)
+    ).all()
+
+    def nuevo_grupo():
+        return {'lotes': 0, 'cantidad': 0, 'valor': Decimal('0'), 'productos': set()}
+
+    total = nuevo_grupo()
+    desgloses = {
+        'por_proveedor': defaultdict(nuevo_grupo),
+        'por_categoria': defaultdict(nuevo_grupo),
+        'por_mes': defaultdict(nuevo_grupo),
+    }
+
+    for fila in filas:
+        claves = {
+            'por_proveedor': fila.proveedor or 'Sin proveedor',
+            'por_categoria': fila.categoria or 'Sin categoría',
+            'por_mes': f'{int(fila.anio):04d}-{int(fila.mes):02d}',
+        }
+        grupos = [total] + [desgloses[d][clave] for d, clave in claves.items()]
+        for grupo in grupos:
+            grupo['lotes'] += fila.lotes
+            grupo['cantidad'] += int(fila.cantidad or 0)
+            grupo['valor'] += _monto(fila.valor)
+            grupo['productos'].add(fila.producto_id)
+
+    def serializar(clave_nombre, clave, grupo):
+        return {
+            clave_nombre: clave,
+            'total_lotes': grupo['lotes'],
+            'cantidad_afectada': grupo['cantidad'],
+            'valor_perdido': str(grupo['valor']),
+            'productos_unicos': len(grupo['productos']),
+        }
+
+    ordenar_por_valor = lambda items: sorted(items, key=lambda par: par[1]['valor'], reverse=True)
+
+    return {
+        'total_lotes': total['lotes'],
+        'cantidad_total_afectada': total['cantidad'],
+        'valor_perdido_estimado': str(total['valor']),
+        'productos_unicos_afectados': len(total['productos']),
+        'desglose': {
+            'por_proveedor': [serializar('proveedor', k, g)
+                              for k, g in ordenar_por_valor(desgloses['por_proveedor'].items())],
+            'por_categoria': [serializar('categoria', k, g)
+                              for k, g in ordenar_por_valor(desgloses['por_categoria'].items())],
+            'por_mes': [serializar('mes', k, g)
+                        for k, g in sorted(desgloses['por_mes'].items())],
+        },
+    }
+
+
+def lotes_vencidos_pagina(con_stock=True, desde=None, hasta=None, despues=None,
+                          limit=100, offset=0, hoy=None):
+    """
+    Página de lotes vencidos con paginación keyset
+
+    Orden estable (fecha_vencimiento, id). El cursor es el par del último
+    lote de la página anterior, así cada página es una búsqueda por índice
+    sin OFFSET.
+
+    Args:
+        con_stock (bool): Solo lotes con stock
+        desde (date): Vencimiento desde (opcional)
+        hasta (date): Vencimiento hasta (opcional)
+        despues (tuple): (fecha_vencimiento, id) del último lote visto
+        limit (int): Lotes por página
+        offset (int): Solo por compatibilidad con /vencidos (preferir despues)
+        hoy (date): Fecha de referencia (default: date.today())
+
+    Returns:
+        dict: lotes (serializados con dias_vencido y valor_perdido),
+              siguiente (tuple o None)
+    """
+    hoy = hoy or date.today()
+    query = Lote.con_producto().filter(_filtro_vencidos(hoy, con_stock, desde, hasta))
+
+    if despues:
+        fecha, lote_id = despues
+        query = query.filter(or_(
+            Lote.fecha_vencimiento > fecha,
+            and_(Lote.fecha_vencimiento == fecha, Lote.id > lote_id)
+        ))
+
+    # Un lote extra para saber si hay una página siguiente
+    query = query.order_by(Lote.fecha_vencimiento.asc(), Lote.id.asc())
+    if offset:
+        query = query.offset(offset)
+    lotes = query.limit(limit + 1).all()
+    hay_mas = len(lotes) > limit
+    lotes = lotes[:limit]
+
+    return {
+        'lotes': serializar_vencidos(lotes, hoy),
+        'siguiente': (lotes[-1].fecha_vencimiento, lotes[-1].id) if hay_mas else None,
+    }
+
+
+def serializar_vencidos(lotes, hoy=None):
+    """
+    Serializa lotes vencidos agregando dias_vencido y valor_perdido
+
+    Args:
+        lotes (list): Lotes con el producto precargado
+        hoy (date): Fecha de referencia
+
+    Returns:
+        list: Lotes serializados
+    """
+    datos = Lote.serializar_lista(lotes, include_producto=True, hoy=hoy)
+    for lote, lote_data in zip(lotes, datos):
+        lote_data['dias_vencido'] = abs(lote_data['dias_hasta_vencimiento'])
+        lote_data['valor_perdido'] = str(lote.cantidad_actual * lote.precio_compra_lote)
+    return datos
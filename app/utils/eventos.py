@@ -0,0 +1,22 @@
+"""
+KATITA-POS - Registro de listeners de SQLAlchemy
+================================================
+Los listeners de la app se registran sobre objetos globales al proceso
+(la clase Session, los mappers), mientras que create_app se llama varias
+veces (tests, CLI). Registrarlos con `escuchar` evita duplicarlos.
+"""
+
+from sqlalchemy import event
+
+
+def escuchar(objetivo, evento, funcion):
+    """
+    event.listen idempotente
+
+    Args:
+        objetivo: Clase u objeto de SQLAlchemy (Session, un modelo...)
+        evento (str): Nombre del evento ('after_flush', 'after_update'...)
+        funcion (callable): Listener
+    """
+    if not event.contains(objetivo, evento, funcion):
+        event.listen(objetivo, evento, funcion)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+KATITA-POS - Generador de Reportes Excel
+========================================
+Genera el reporte de ventas en Excel (resumen, Top 10 y detalle).
+
+Se importa de forma diferida desde el endpoint de exportación: openpyxl
+no se carga al arrancar la app, solo en la primera exportación.
+"""
+
+from io import BytesIO
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+
+def generar_excel_ventas(
+    fecha_inicio,
+    fecha_fin,
+    ventas,
+    total_vendido,
+    ganancia_total,
+    total_unidades,
+    margen_porcentaje,
+    top_productos,
+    metodo_mas_usado,
+    hora_pico,
+    comparacion
+):
+    """
+    Genera el reporte de ventas en formato Excel.
+
+    Returns:
+        BytesIO: Buffer con el archivo .xlsx generado
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Reporte de Ventas'
+
+    # Estilos
+    header_fill = PatternFill(start_color='1e40af', end_color='1e40af', fill_type='solid')
+    header_font = Font(color='FFFFFF', bold=True, size=11)
+    title_font = Font(bold=True, size=16, color='1e40af')
+    green_fill = PatternFill(start_color='16a34a', end_color='16a34a', fill_type='solid')
+    green_header_font = Font(color='FFFFFF', bold=True, size=11)
+    border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    # Título
+    ws.merge_cells('A1:F1')
+    ws['A1'] = 'KATITA POS - Reporte de Ventas'
+    ws['A1'].font = title_font
+    ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
+    ws.row_dimensions[1].height = 25
+
+    # Período
+    ws.merge_cells('A2:F2')
+    ws['A2'] = f'Período: {fecha_inicio.strftime("%d/%m/%Y")} - {fecha_fin.strftime("%d/%m/%Y")}'
+    ws['A2'].alignment = Alignment(horizontal='center')
+    ws['A2'].font = Font(size=11)
+
+    # Resumen de métricas
+    ws['A4'] = 'RESUMEN DE VENTAS'
+    ws['A4'].font = Font(bold=True, size=13, color='1e40af')
+
+    ws['A5'] = 'Total de Ventas:'
+    ws['B5'] = f'{len(ventas)} ventas'
+    ws['A6'] = 'Total Vendido:'
+    ws['B6'] = f'S/ {total_vendido:.2f}'
+    ws['A7'] = 'Ganancia Total:'
+    ws['B7'] = f'S/ {ganancia_total:.2f}'
+    ws['A8'] = 'Margen de Ganancia:'
+    ws['B8'] = f'{margen_porcentaje:.1f}%'
+    ws['A9'] = 'Ticket Promedio:'
+    ws['B9'] = f'S/ {(total_vendido / len(ventas)):.2f}' if len(ventas) > 0 else 'S/ 0.00'
+    ws['A10'] = 'Unidades Vendidas:'
+    ws['B10'] = f'{total_unidades} unidades'
+    ws['A11'] = 'Método Más Usado:'
+    ws['B11'] = metodo_mas_usado
+    ws['A12'] = 'Hora Pico:'
+    ws['B12'] = hora_pico
+    ws['A13'] = 'Comparación:'
+    ws['B13'] = comparacion
+
+    # Formatear resumen
+    for row in range(5, 14):
+        ws[f'A{row}'].font = Font(bold=True, size=10)
+        ws[f'A{row}'].border = border
+        ws[f'B{row}'].border = border
+        ws[f'B{row}'].alignment = Alignment(horizontal='left')
+
+    # Top 10 Productos
+    current_row = 15
+    if top_productos:
+        ws[f'A{current_row}'] = 'TOP 10 PRODUCTOS MÁS VENDIDOS'
+        ws[f'A{current_row}'].font = Font(bold=True, size=13, color='16a34a')
+        current_row += 2
+
+        # Headers Top 10
+        top_headers = ['#', 'Producto', 'Cantidad', 'Total Vendido', 'Ganancia']
+        for col, header in enumerate(top_headers, start=1):
+            cell = ws.cell(row=current_row, column=col)
+            cell.value = header
+            cell.fill = green_fill
+            cell.font = green_header_font
+            cell.alignment = Alignment(horizontal='center', vertical='center')
+            cell.border = border
+
+        # Datos Top 10
+        current_row += 1
+        for idx, prod in enumerate(top_productos, 1):
+            ws.cell(row=current_row, column=1, value=idx)
+            ws.cell(row=current_row, column=2, value=prod['nombre'])
+            ws.cell(row=current_row, column=3, value=prod['cantidad'])
+            ws.cell(row=current_row, column=4, value=f"S/ {float(prod['total']):.2f}")
+            ws.cell(row=current_row, column=5, value=f"S/ {float(prod['ganancia']):.2f}")
+
+            for col in range(1, 6):
+                ws.cell(row=current_row, column=col).border = border
+                ws.cell(row=current_row, column=col).alignment = Alignment(horizontal='center' if col in [1, 3] else 'left')
+
+            current_row += 1
+
+        current_row += 1
+
+    # Detalle de ventas
+    ws[f'A{current_row}'] = 'DETALLE DE VENTAS'
+    ws[f'A{current_row}'].font = Font(bold=True, size=13, color='1e40af')
+    current_row += 2
+
+    # Headers
+    headers = ['Fecha', 'ID Venta', 'Método de Pago', 'Vendedor', 'Total', 'Ganancia']
+    for col, header in enumerate(headers, start=1):
+        cell = ws.cell(row=current_row, column=col)
+        cell.value = header
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        cell.border = border
+
+    # Datos de ventas
+    current_row += 1
+    for venta in ventas:
+        vendedor_nombre = venta.vendedor.nombre_completo if venta.vendedor else 'Sin asignar'
+        ws.cell(row=current_row, column=1, value=venta.created_at.strftime('%d/%m/%Y %H:%M'))
+        ws.cell(row=current_row, column=2, value=f'#{venta.id}')
+        ws.cell(row=current_row, column=3, value=venta.metodo_pago.upper())
+        ws.cell(row=current_row, column=4, value=vendedor_nombre)
+        ws.cell(row=current_row, column=5, value=f'S/ {venta.total:.2f}')
+        ws.cell(row=current_row, column=6, value=f'S/ {venta.ganancia_total:.2f}')
+
+        # Aplicar bordes
+        for col in range(1, 7):
+            ws.cell(row=current_row, column=col).border = border
+            ws.cell(row=current_row, column=col).alignment = Alignment(horizontal='center')
+
+        current_row += 1
+
+    # Ajustar anchos de columna
+    ws.column_dimensions['A'].width = 20
+    ws.column_dimensions['B'].width = 12
+    ws.column_dimensions['C'].width = 20
+    ws.column_dimensions['D'].width = 25
+    ws.column_dimensions['E'].width = 15
+    ws.column_dimensions['F'].width = 15
+
+    # Guardar en memoria
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
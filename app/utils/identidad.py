@@ -0,0 +1,153 @@
+"""
+KATITA-POS - Identidad del usuario autenticado
+==============================================
+Identidad a partir de los claims ya verificados del JWT y carga diferida
+del usuario completo
+
+- identidad_desde_claims: user_id, username y rol salen del token (login
+  ya los pone en additional_claims); rechazar por rol no consulta la base
+- current_user: proxy por petición que carga el usuario solo si el
+  endpoint lee sus campos (nombre, activo, horarios...)
+- tiene_rol_vigente / es_admin_vigente: si el claim autoriza, se confirma
+  el rol y que el usuario siga activo con la identidad cacheada (el claim
+  dura lo que el token); lo usan @role_required y @admin_required
+- Caché de identidades por proceso con TTL corto (IDENTIDAD_CACHE_TTL_SEGUNDOS):
+  cualquier cambio a un User (desactivar, cambio de rol o contraseña,
+  eliminar) invalida su entrada al hacer flush
+"""
+
+import threading
+import time
+from flask import g, current_app, has_request_context
+from flask_jwt_extended import get_jwt
+from werkzeug.local import LocalProxy
+from app.utils.eventos import escuchar
+
+_cache_lock = threading.Lock()
+_cache = {}  # user_id -> (expira_monotonic, dict)
+
+
+def identidad_desde_claims(claims=None):
+    """
+    Identidad del token verificado (sin consultar la base)
+
+    Args:
+        claims (dict): Claims del JWT; por defecto los de la petición actual
+
+    Returns:
+        dict: user_id (int), username, rol
+    """
+    claims = claims if claims is not None else get_jwt()
+    sub = claims.get('sub')
+    return {
+        'user_id': int(sub) if sub is not None else None,
+        'username': claims.get('username'),
+        'rol': claims.get('rol'),
+    }
+
+
+def obtener_identidad(user_id):
+    """
+    Datos del usuario (User.to_dict) desde la caché o la base
+
+    Args:
+        user_id (int): ID del usuario
+
+    Returns:
+        dict | None: None si el usuario no existe
+    """
+    ttl = current_app.config.get('IDENTIDAD_CACHE_TTL_SEGUNDOS', 30)
+    ahora = time.monotonic()
+
+    with _cache_lock:
+        entrada = _cache.get(user_id)
+        if entrada and entrada[0] > ahora:
+            return entrada[1]
+
+    from app import db
+    from app.models.user import User
+    usuario = db.session.get(User, user_id)
+    if usuario is None:
+        return None
+
+    datos = usuario.to_dict()
+    if ttl > 0:
+        maximo = current_app.config.get('IDENTIDAD_CACHE_MAX', 1000)
+        with _cache_lock:
+            if len(_cache) >= maximo:
+                _cache.pop(next(iter(_cache)))  # La más antigua
+            _cache[user_id] = (ahora + ttl, datos)
+    return datos
+
+
+def invalidar_identidad(user_id=None):
+    """
+    Descarta la identidad cacheada de un usuario (o de todos)
+
+    Args:
+        user_id (int): ID del usuario; None vacía la caché
+    """
+    with _cache_lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
+
+
+def _usuario_actual():
+    if not has_request_context():
+        return None
+    identidad = getattr(g, 'current_user', None) or identidad_desde_claims()
+    user_id = identidad.get('user_id')
+    cargado = g.get('_usuario_actual')
+    if cargado is None or cargado[0] != user_id:
+        # g vive en el contexto de app: se guarda junto al user_id al que pertenece
+        cargado = (user_id, obtener_identidad(user_id) if user_id is not None else None)
+        g._usuario_actual = cargado
+    return cargado[1]
+
+
+# Usuario de la petición como dict (User.to_dict) o None; se carga al primer acceso
+current_user = LocalProxy(_usuario_actual)
+
+
+def tiene_rol_vigente(*roles):
+    """
+    Indica si el usuario de la petición tiene uno de los roles y sigue activo
+
+    El claim rol descarta sin consultar la base a quien no tiene el rol;
+    si el claim lo autoriza se confirma con la identidad cacheada, así un
+    usuario degradado o desactivado pierde el acceso sin esperar a que su
+    token expire.
+
+    Args:
+        *roles: Roles permitidos
+
+    Returns:
+        bool
+    """
+    if (g.get('current_user') or identidad_desde_claims()).get('rol') not in roles:
+        return False
+    usuario = current_user
+    return bool(usuario) and bool(usuario.get('activo')) and usuario.get('rol') in roles
+
+
+def es_admin_vigente():
+    """
+    Indica si el usuario de la petición es admin y sigue activo
+
+    Returns:
+        bool
+    """
+    return tiene_rol_vigente('admin')
+
+
+def _invalidar_por_cambio(mapper, connection, target):
+    invalidar_identidad(target.id)
+
+
+def registrar_eventos_identidad():
+    """Invalida la caché cuando se actualiza o elimina un usuario"""
+    from app.models.user import User
+    escuchar(User, 'after_update', _invalidar_por_cambio)
+    escuchar(User, 'after_delete', _invalidar_por_cambio)
@@ -0,0 +1,95 @@
+"""
+KATITA-POS - Proveedor JSON de la API
+=====================================
+Serialización de jsonify/success_response con orjson (si está instalado)
+y soporte nativo de Decimal, date y datetime
+
+Los to_dict pueden devolver los valores tal cual vienen del modelo:
+- Decimal -> número JSON (igual que el float() que hacían los modelos)
+- date / datetime -> ISO 8601 (igual que .isoformat(); Flask por defecto
+  usa el formato HTTP "Sun, 19 Oct 2026 ...")
+
+Sin orjson (o con JSON_ORJSON=False) se usa el json de la stdlib con las
+mismas conversiones: la salida es equivalente, solo más lenta.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_SUPPORT = True
+except ImportError:
+    orjson = None
+    ORJSON_SUPPORT = False
+
+
+def _por_defecto(valor):
+    """Decimal (orjson no lo conoce) y fechas para la stdlib (Flask usaría formato HTTP)"""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return DefaultJSONProvider.default(valor)
+
+
+class ProveedorJSON(DefaultJSONProvider):
+    """
+    Proveedor JSON de la app (app.json)
+
+    Respeta sort_keys y compact de Flask: en debug la salida va indentada.
+    orjson siempre escribe UTF-8 (no escapa acentos como ensure_ascii).
+    """
+
+    default = staticmethod(_por_defecto)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.usa_orjson = ORJSON_SUPPORT and app.config.get('JSON_ORJSON', True)
+
+    def _opciones_orjson(self, indentar=False):
+        opciones = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opciones |= orjson.OPT_SORT_KEYS
+        if indentar:
+            opciones |= orjson.OPT_INDENT_2
+        return opciones
+
+    def _indentar(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def dumps_bytes(self, obj, indentar=False):
+        """
+        Serializa a bytes UTF-8 sin pasar por str (respuestas armadas a mano)
+
+        Args:
+            obj: Valor a serializar
+            indentar (bool): Salida indentada
+
+        Returns:
+            bytes
+        """
+        if self.usa_orjson:
+            return orjson.dumps(obj, default=_por_defecto, option=self._opciones_orjson(indentar))
+        return self.dumps(obj, indent=2 if indentar else None,
+                          separators=None if indentar else (',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.usa_orjson and not kwargs.keys() - {'indent', 'separators'}:
+            return self.dumps_bytes(obj, indentar=bool(kwargs.get('indent'))).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.usa_orjson and not kwargs:
+            # orjson.JSONDecodeError hereda de json.JSONDecodeError: request.get_json sigue respondiendo 400
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self.usa_orjson:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        cuerpo = self.dumps_bytes(obj, indentar=self._indentar())
+        return self._app.response_class(cuerpo + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,108 @@
+"""
+KATITA-POS - Migraciones versionadas (Alembic)
+==============================================
+Configuración de Alembic sin alembic.ini y verificación de versión al arrancar
+
+En la nube el esquema se actualiza en el paso de release (`flask db upgrade`),
+no en create_app: el arranque de cada worker solo lee la versión aplicada
+(una consulta) y avisa si la base está atrasada. La base local (SQLite de
+la tienda) no tiene paso de release: se migra al arrancar, que es un solo
+proceso y no hay locks de DDL que coordinar.
+"""
+
+import os
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+DIRECTORIO_MIGRACIONES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'migrations'
+)
+
+
+def config_alembic():
+    """
+    Configuración de Alembic apuntando a migrations/
+
+    Returns:
+        alembic.config.Config
+    """
+    config = Config()
+    config.set_main_option('script_location', DIRECTORIO_MIGRACIONES)
+    return config
+
+
+def revision_head():
+    """
+    Última revisión disponible en migrations/versions (sin consultar la base)
+
+    Returns:
+        str
+    """
+    return ScriptDirectory.from_config(config_alembic()).get_current_head()
+
+
+def revision_actual(engine):
+    """
+    Revisión aplicada en la base, o None si nunca se migró con Alembic
+
+    Args:
+        engine (Engine): Engine de la app
+
+    Returns:
+        str | None
+    """
+    with engine.connect() as conexion:
+        try:
+            return conexion.execute(text('SELECT version_num FROM alembic_version')).scalar()
+        except DBAPIError:
+            return None
+
+
+def verificar_version(app, db):
+    """
+    Compara la revisión aplicada con la última disponible y registra un aviso
+
+    Args:
+        app (Flask): Aplicación
+        db (SQLAlchemy): Extensión
+
+    Returns:
+        dict: actual, head, al_dia
+    """
+    head = revision_head()
+    with app.app_context():
+        actual = revision_actual(db.engine)
+
+    if actual != head:
+        app.logger.warning(
+            f"Esquema de base de datos en {actual or 'sin versión'} (última: {head}). "
+            "Ejecute `flask db upgrade`."
+        )
+    return {'actual': actual, 'head': head, 'al_dia': actual == head}
+
+
+def actualizar_esquema_local(app, db):
+    """
+    Aplica las migraciones pendientes de la base local (modo local, al arrancar)
+
+    Si la base ya está en la última revisión solo cuesta una consulta.
+    Debe llamarse dentro de un app_context (migrations/env.py usa current_app).
+
+    Args:
+        app (Flask): Aplicación
+        db (SQLAlchemy): Extensión
+
+    Returns:
+        dict: actual, head, al_dia
+    """
+    head = revision_head()
+    actual = revision_actual(db.engine)
+
+    if actual != head:
+        app.logger.info(f"Migrando la base local de {actual or 'sin versión'} a {head}")
+        command.upgrade(config_alembic(), 'head')
+        actual = revision_actual(db.engine)
+    return {'actual': actual, 'head': head, 'al_dia': actual == head}
@@ -0,0 +1,263 @@
+"""
+KATITA-POS - Pool de conexiones PostgreSQL (modo cloud)
+=======================================================
+Opciones del engine y métricas del pool para Supabase
+
+Sin opciones, cada worker de gunicorn usa el pool por defecto de
+SQLAlchemy: sin pre_ping ni recycle, así que las conexiones que Supabase
+cierra por inactividad aparecen como un 500 en la primera venta del día.
+Aquí se arma SQLALCHEMY_ENGINE_OPTIONS desde la configuración (DB_POOL_*)
+y se registran los statement_timeout por tipo de carga:
+
+- transaccional: ventas, caja, catálogo (DB_STATEMENT_TIMEOUT_MS)
+- reportes: endpoints con @solo_lectura (DB_STATEMENT_TIMEOUT_REPORTES_MS)
+
+Con PgBouncer en modo transacción (DB_PGBOUNCER=True) no se pueden usar
+parámetros de arranque ni sentencias preparadas del servidor: el timeout se
+fija con SET LOCAL al inicio de cada transacción.
+"""
+
+import threading
+import time
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+_metricas_lock = threading.Lock()
+
+
+def _metricas_vacias():
+    return {
+        'checkouts': 0,
+        'espera_total_s': 0.0,
+        'espera_max_s': 0.0,
+        'esperas_lentas': 0,  # Más de 100 ms esperando una conexión
+        'timeouts': 0,
+        'en_uso': 0,
+        'pico_en_uso': 0,
+        'conexiones_nuevas': 0,
+        'conexiones_invalidadas': 0,
+    }
+
+
+_metricas = _metricas_vacias()
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada petición por una conexión libre"""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            with _metricas_lock:
+                _metricas['timeouts'] += 1
+            raise
+
+        espera = time.perf_counter() - inicio
+        with _metricas_lock:
+            _metricas['checkouts'] += 1
+            _metricas['espera_total_s'] += espera
+            _metricas['espera_max_s'] = max(_metricas['espera_max_s'], espera)
+            _metricas['esperas_lentas'] += 1 if espera > 0.1 else 0
+        return conexion
+
+
+def es_postgres(uri):
+    """
+    Indica si la URI apunta a PostgreSQL
+
+    Args:
+        uri (str): URI de SQLAlchemy
+
+    Returns:
+        bool
+    """
+    return make_url(uri).get_backend_name() == 'postgresql'
+
+
+def construir_opciones_engine(config):
+    """
+    Arma SQLALCHEMY_ENGINE_OPTIONS para PostgreSQL desde la configuración
+
+    Args:
+        config (dict): Configuración de la app
+
+    Returns:
+        dict: Opciones para create_engine
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    pgbouncer = config.get('DB_PGBOUNCER', False)
+
+    connect_args = {
+        # Detectar conexiones muertas aunque no haya tráfico
+        'keepalives': 1,
+        'keepalives_idle': 30,
+        'keepalives_interval': 10,
+        'keepalives_count': 3,
+        'connect_timeout': config.get('DB_CONNECT_TIMEOUT', 10),
+    }
+    if not pgbouncer:
+        # PgBouncer en modo transacción rechaza parámetros de arranque
+        connect_args['options'] = f"-c statement_timeout={int(config.get('DB_STATEMENT_TIMEOUT_MS', 15000))}"
+    if pgbouncer and url.get_driver_name() == 'psycopg':
+        # psycopg 3 prepara sentencias en el servidor; PgBouncer no las comparte entre conexiones
+        connect_args['prepare_threshold'] = None
+
+    return {
+        'poolclass': PoolMedido,
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        'pool_use_lifo': True,  # Las conexiones sobrantes quedan inactivas y el recycle las cierra
+        'connect_args': connect_args,
+    }
+
+
+def preparar_engine_postgres(app):
+    """
+    Completa SQLALCHEMY_ENGINE_OPTIONS antes de db.init_app
+
+    Las opciones definidas explícitamente en la configuración tienen prioridad.
+
+    Args:
+        app (Flask): Aplicación
+
+    Returns:
+        bool: True si la base es PostgreSQL
+    """
+    if not es_postgres(app.config['SQLALCHEMY_DATABASE_URI']):
+        return False
+
+    opciones = construir_opciones_engine(app.config)
+    opciones.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones
+    return True
+
+
+def timeout_actual(config):
+    """
+    statement_timeout (ms) para la transacción que empieza
+
+    Args:
+        config (dict): Configuración de la app
+
+    Returns:
+        int
+    """
+    if has_app_context() and g.get('solo_lectura'):
+        return int(config.get('DB_STATEMENT_TIMEOUT_REPORTES_MS', 60000))
+    return int(config.get('DB_STATEMENT_TIMEOUT_MS', 15000))
+
+
+def registrar_eventos_pool(engine, config):
+    """
+    Registra los listeners de métricas y de statement_timeout en el engine
+
+    Args:
+        engine (Engine): Engine PostgreSQL
+        config (dict): Configuración de la app
+    """
+    pgbouncer = config.get('DB_PGBOUNCER', False)
+    base = int(config.get('DB_STATEMENT_TIMEOUT_MS', 15000))
+
+    @event.listens_for(engine, 'connect')
+    def contar_conexion(dbapi_connection, connection_record):
+        with _metricas_lock:
+            _metricas['conexiones_nuevas'] += 1
+
+    @event.listens_for(engine, 'checkout')
+    def contar_checkout(dbapi_connection, connection_record, connection_proxy):
+        with _metricas_lock:
+            _metricas['en_uso'] += 1
+            _metricas['pico_en_uso'] = max(_metricas['pico_en_uso'], _metricas['en_uso'])
+
+    @event.listens_for(engine, 'checkin')
+    def contar_checkin(dbapi_connection, connection_record):
+        with _metricas_lock:
+            _metricas['en_uso'] = max(_metricas['en_uso'] - 1, 0)
+
+    @event.listens_for(engine, 'invalidate')
+    def contar_invalidada(dbapi_connection, connection_record, exception):
+        with _metricas_lock:
+            _metricas['conexiones_invalidadas'] += 1
+
+    @event.listens_for(engine, 'begin')
+    def fijar_statement_timeout(conexion):
+        timeout = timeout_actual(config)
+        # Sin PgBouncer el timeout transaccional ya viene en los parámetros de arranque
+        if not pgbouncer and timeout == base:
+            return
+        cursor = conexion.connection.cursor()
+        try:
+            cursor.execute(f'SET LOCAL statement_timeout = {timeout}')
+        finally:
+            cursor.close()
+
+
+def configurar_postgres(app, db):
+    """
+    Registra métricas y statement_timeout en el engine PostgreSQL de la app
+
+    Args:
+        app (Flask): Aplicación
+        db (SQLAlchemy): Extensión ya inicializada con la app
+
+    Returns:
+        bool: True si la base es PostgreSQL
+    """
+    if not es_postgres(app.config['SQLALCHEMY_DATABASE_URI']):
+        return False
+
+    with app.app_context():
+        registrar_eventos_pool(db.engine, app.config)
+    return True
+
+
+def obtener_metricas_pool(engine):
+    """
+    Ocupación actual del pool más las métricas acumuladas del proceso
+
+    Args:
+        engine (Engine): Engine de la app
+
+    Returns:
+        dict: dialecto, pool (clase, tamano, en_uso, libres, overflow),
+              checkouts, espera_promedio_ms, espera_max_ms, esperas_lentas,
+              timeouts, pico_en_uso, conexiones_nuevas, conexiones_invalidadas
+    """
+    pool = engine.pool
+    estado = {'clase': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update({
+            'tamano': pool.size(),
+            'en_uso': pool.checkedout(),
+            'libres': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+            'timeout_s': pool.timeout(),
+        })
+
+    with _metricas_lock:
+        metricas = dict(_metricas)
+
+    checkouts = metricas['checkouts']
+    espera_total = metricas.pop('espera_total_s')
+    metricas.pop('en_uso')
+    metricas['espera_promedio_ms'] = round(espera_total / checkouts * 1000, 3) if checkouts else 0.0
+    metricas['espera_max_ms'] = round(metricas.pop('espera_max_s') * 1000, 3)
+    metricas['dialecto'] = engine.dialect.name
+    metricas['pool'] = estado
+    return metricas
+
+
+def reiniciar_metricas_pool():
+    """Pone en cero las métricas del proceso"""
+    with _metricas_lock:
+        _metricas.clear()
+        _metricas.update(_metricas_vacias())
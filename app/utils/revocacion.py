@@ -0,0 +1,241 @@
+"""
+KATITA-POS - Revocación de tokens JWT
+=====================================
+Consulta O(1) y sin I/O de la lista de tokens revocados (tokens_revocados)
+
+Cada worker mantiene en memoria:
+- Un filtro de Bloom con los jti vigentes al último armado completo:
+  ~1.8 bytes por token con 0.1% de falsos positivos
+- Un set exacto con los jti revocados después de ese armado (logout en
+  este proceso, o leídos en el refresco incremental `id > último - solape`)
+
+Un token que no está en ninguno de los dos (el caso normal) se acepta sin
+consultar la base. Si el filtro dice "quizás" se confirma con una consulta
+exacta y el resultado se recuerda. El refresco incremental corre como
+máximo cada BLOCKLIST_REFRESCO_SEGUNDOS; cuando el set crece más de
+BLOCKLIST_MAX_RECIENTES o pasa BLOCKLIST_RECONSTRUIR_SEGUNDOS se rearma
+el filtro desde cero, descartando los tokens ya expirados.
+
+Los id se asignan al insertar, no al hacer commit: un logout con id menor
+puede confirmarse después de que otro worker ya leyó un id mayor. Por eso
+el refresco vuelve a leer los últimos BLOCKLIST_SOLAPE_IDS ids.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from flask import current_app
+from sqlalchemy import select, func
+from sqlalchemy.exc import DBAPIError
+
+EXTENSION = 'katita_revocados'
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom sobre un bytearray
+
+    Sin falsos negativos: si `valor in filtro` es False, el valor nunca se
+    agregó. Las k posiciones salen de un solo blake2b (doble hashing).
+    """
+
+    def __init__(self, capacidad, tasa_falsos_positivos=0.001):
+        capacidad = max(int(capacidad), 1)
+        self.bits = max(int(-capacidad * math.log(tasa_falsos_positivos) / math.log(2) ** 2), 64)
+        self.hashes = max(int(round(self.bits / capacidad * math.log(2))), 1)
+        self._datos = bytearray((self.bits + 7) // 8)
+
+    def _posiciones(self, valor):
+        resumen = hashlib.blake2b(valor.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(resumen[:8], 'little')
+        h2 = int.from_bytes(resumen[8:], 'little') | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def agregar(self, valor):
+        for posicion in self._posiciones(valor):
+            self._datos[posicion >> 3] |= 1 << (posicion & 7)
+
+    def __contains__(self, valor):
+        return all(self._datos[posicion >> 3] & (1 << (posicion & 7)) for posicion in self._posiciones(valor))
+
+    @property
+    def tamano_bytes(self):
+        return len(self._datos)
+
+
+class ListaRevocados:
+    """Estado en memoria de la lista de revocados para una app"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filtro = FiltroBloom(1)
+        self.recientes = set()
+        self.confirmados = {}  # jti -> bool, positivos del filtro ya consultados
+        self.ultimo_id = 0
+        self.armado = False
+        self.refrescado_en = 0.0
+        self.reconstruido_en = 0.0
+        self.consultas_base = 0
+
+    def reconstruir(self, db, config):
+        """
+        Arma el filtro con todos los jti vigentes
+
+        Una sola consulta: los jti y el max(id) salen de la misma foto de la
+        tabla (con dos, un logout entre ambas quedaría fuera del filtro y
+        por debajo de ultimo_id). El LEFT JOIN devuelve una fila aunque no
+        haya tokens vigentes.
+        """
+        from app.models.token_revocado import TokenRevocado, ahora_utc
+
+        maximo = select(func.max(TokenRevocado.id).label('ultimo_id')).subquery()
+        filas = db.session.execute(
+            select(maximo.c.ultimo_id, TokenRevocado.jti)
+            .select_from(maximo)
+            .outerjoin(TokenRevocado, TokenRevocado.expira_en > ahora_utc())
+        ).all()
+        ultimo_id = (filas[0].ultimo_id if filas else None) or 0
+        jtis = [jti for _, jti in filas if jti is not None]
+
+        filtro = FiltroBloom(max(len(jtis) * 2, 1024), config['BLOCKLIST_TASA_FALSOS_POSITIVOS'])
+        for jti in jtis:
+            filtro.agregar(jti)
+
+        with self.lock:
+            self.filtro = filtro
+            self.recientes = set()
+            self.confirmados = {}
+            self.ultimo_id = ultimo_id
+            self.armado = True
+            self.reconstruido_en = self.refrescado_en = time.monotonic()
+
+    def refrescar(self, db, config):
+        """
+        Agrega al set exacto los jti revocados por otros procesos desde el último refresco
+
+        Relee los últimos BLOCKLIST_SOLAPE_IDS ids: cubre los logouts con id
+        menor que se confirmaron después de la lectura anterior.
+        """
+        from app.models.token_revocado import TokenRevocado
+
+        desde = self.ultimo_id - config['BLOCKLIST_SOLAPE_IDS']
+        filas = db.session.execute(
+            select(TokenRevocado.id, TokenRevocado.jti).where(TokenRevocado.id > desde)
+        ).all()
+        with self.lock:
+            for id_, jti in filas:
+                self.recientes.add(jti)
+                self.confirmados.pop(jti, None)
+                self.ultimo_id = max(self.ultimo_id, id_)
+            self.refrescado_en = time.monotonic()
+
+    def agregar_local(self, jti):
+        with self.lock:
+            self.recientes.add(jti)
+            self.confirmados.pop(jti, None)
+
+
+def _lista(app=None):
+    app = app or current_app._get_current_object()
+    lista = app.extensions.get(EXTENSION)
+    if lista is None:
+        lista = app.extensions.setdefault(EXTENSION, ListaRevocados())
+    return lista
+
+
+def _mantener(lista, db, config):
+    """Refresco incremental o rearmado completo según los intervalos configurados"""
+    ahora = time.monotonic()
+    rearmar = (
+        not lista.armado
+        or len(lista.recientes) > config['BLOCKLIST_MAX_RECIENTES']
+        or ahora - lista.reconstruido_en >= config['BLOCKLIST_RECONSTRUIR_SEGUNDOS']
+    )
+    if not rearmar and ahora - lista.refrescado_en < config['BLOCKLIST_REFRESCO_SEGUNDOS']:
+        return
+
+    try:
+        if rearmar:
+            lista.reconstruir(db, config)
+        else:
+            lista.refrescar(db, config)
+    except DBAPIError as e:
+        # Base sin migrar o caída: se reintenta en el próximo intervalo
+        db.session.rollback()
+        lista.refrescado_en = ahora
+        current_app.logger.warning(f'No se pudo refrescar la lista de tokens revocados: {e}')
+
+
+def esta_revocado(jti):
+    """
+    Indica si un token está revocado
+
+    Args:
+        jti (str): Claim jti
+
+    Returns:
+        bool
+    """
+    from app import db
+    from app.models.token_revocado import TokenRevocado
+
+    config = current_app.config
+    lista = _lista()
+    _mantener(lista, db, config)
+
+    if jti in lista.recientes:
+        return True
+    if jti not in lista.filtro:
+        return False
+
+    # "Quizás": confirmar con la base una sola vez
+    with lista.lock:
+        if jti in lista.confirmados:
+            return lista.confirmados[jti]
+    revocado = TokenRevocado.esta_revocado(jti)
+    with lista.lock:
+        lista.consultas_base += 1
+        if len(lista.confirmados) >= config['BLOCKLIST_MAX_RECIENTES']:
+            lista.confirmados.pop(next(iter(lista.confirmados)))
+        lista.confirmados[jti] = revocado
+    return revocado
+
+
+def revocar_token(payload):
+    """
+    Revoca un token decodificado (commit) y lo agrega al set exacto del proceso
+
+    Args:
+        payload (dict): Claims del token (jti, type, sub, exp)
+    """
+    from app import db
+    from app.models.token_revocado import TokenRevocado
+
+    sub = payload.get('sub')
+    TokenRevocado.revocar(
+        jti=payload['jti'],
+        tipo=payload.get('type', 'access'),
+        user_id=int(sub) if sub is not None else None,
+        exp=payload['exp']
+    )
+    db.session.commit()
+    _lista().agregar_local(payload['jti'])
+
+
+def estadisticas(app=None):
+    """
+    Estado del filtro en este proceso
+
+    Returns:
+        dict: tamano_filtro_bytes, hashes, recientes, confirmados, consultas_base
+    """
+    lista = _lista(app)
+    with lista.lock:
+        return {
+            'tamano_filtro_bytes': lista.filtro.tamano_bytes,
+            'hashes': lista.filtro.hashes,
+            'recientes': len(lista.recientes),
+            'confirmados': len(lista.confirmados),
+            'consultas_base': lista.consultas_base,
+        }
@@ -0,0 +1,209 @@
+"""
+KATITA-POS - Perfil de almacenamiento SQLite (modo local)
+=========================================================
+Ajustes de SQLite para las tiendas offline (DATABASE_MODE=local)
+
+Con los valores por defecto de SQLite un reporte largo bloquea el registro
+de una venta y dos escrituras simultáneas fallan con "database is locked".
+Este perfil se aplica en cada conexión nueva (evento 'connect' del engine):
+
+- journal_mode=WAL: los lectores no bloquean al escritor ni viceversa
+- synchronous=NORMAL: en WAL solo se sincroniza al hacer checkpoint
+- busy_timeout: los escritores esperan su turno en lugar de fallar
+- mmap_size, cache_size, temp_store=MEMORY: menos lecturas de disco
+- foreign_keys=ON: SQLite no valida las FK si no se activa por conexión
+
+Los reportes usan un pool aparte de solo lectura (ver @solo_lectura) y un
+hilo hace checkpoint del WAL para que no crezca indefinidamente.
+"""
+
+import threading
+import time
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+
+EXTENSION_LECTURA = 'sqlite_lectura'
+MODOS_CHECKPOINT = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+def es_sqlite_archivo(uri):
+    """
+    Indica si la URI apunta a un archivo SQLite (no a una base en memoria)
+
+    Args:
+        uri (str): URI de SQLAlchemy
+
+    Returns:
+        bool
+    """
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def pragmas_perfil(config):
+    """
+    PRAGMAs del perfil local en el orden en que se aplican
+
+    Args:
+        config (dict): Configuración de la app
+
+    Returns:
+        list[tuple]: (pragma, valor)
+    """
+    return [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+        ('mmap_size', int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+        # Negativo = KiB en lugar de páginas
+        ('cache_size', -int(config.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))),
+        ('temp_store', 'MEMORY'),
+        ('foreign_keys', 'ON' if config.get('SQLITE_FOREIGN_KEYS', True) else 'OFF'),
+    ]
+
+
+def registrar_perfil(engine, config, solo_lectura=False):
+    """
+    Aplica el perfil en cada conexión nueva del engine
+
+    Debe llamarse antes de que el pool abra su primera conexión.
+
+    Args:
+        engine (Engine): Engine SQLite
+        config (dict): Configuración de la app
+        solo_lectura (bool): Rechazar escrituras en estas conexiones (query_only)
+    """
+    pragmas = pragmas_perfil(config)
+
+    @event.listens_for(engine, 'connect')
+    def aplicar_perfil(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, valor in pragmas:
+                cursor.execute(f'PRAGMA {pragma}={valor}')
+            if solo_lectura:
+                cursor.execute('PRAGMA query_only=ON')
+        finally:
+            cursor.close()
+
+
+def configurar_sqlite_local(app, db):
+    """
+    Registra el perfil en el engine SQLite de archivo de la app y crea el
+    engine de solo lectura para reportes
+
+    El engine de lectura no es un bind de SQLALCHEMY_BINDS: ningún modelo
+    vive en él, solo lo elige SesionKatita. Se guarda en
+    app.extensions['sqlite_lectura'].
+
+    Args:
+        app (Flask): Aplicación
+        db (SQLAlchemy): Extensión ya inicializada con la app
+
+    Returns:
+        bool: True si se aplicó el perfil
+    """
+    if not es_sqlite_archivo(app.config['SQLALCHEMY_DATABASE_URI']):
+        return False
+
+    with app.app_context():
+        engine = db.engine
+        registrar_perfil(engine, app.config)
+        if app.config.get('SQLITE_POOL_LECTURA', True):
+            # La URL ya resuelta (rutas relativas a instance/) del engine principal
+            lectura = create_engine(engine.url)
+            registrar_perfil(lectura, app.config, solo_lectura=True)
+            app.extensions[EXTENSION_LECTURA] = lectura
+    return True
+
+
+def engine_lectura(app=None):
+    """
+    Engine de solo lectura de la app, o None si no aplica (PostgreSQL, memoria)
+
+    Args:
+        app (Flask): Aplicación (default: current_app)
+
+    Returns:
+        Engine | None
+    """
+    app = app or current_app
+    return app.extensions.get(EXTENSION_LECTURA)
+
+
+class SesionKatita(Session):
+    """
+    Sesión que envía todo al pool de solo lectura cuando el endpoint lo pide
+
+    Sin engine de lectura (PostgreSQL, tests en memoria) se comporta igual
+    que la sesión de Flask-SQLAlchemy.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('solo_lectura'):
+            engine = engine_lectura()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def checkpoint_wal(engine, modo='TRUNCATE'):
+    """
+    Traslada el WAL a la base de datos
+
+    PASSIVE nunca espera; TRUNCATE espera a los lectores (hasta busy_timeout)
+    y deja el archivo -wal en cero bytes.
+
+    Args:
+        engine (Engine): Engine SQLite de escritura
+        modo (str): PASSIVE | FULL | RESTART | TRUNCATE
+
+    Returns:
+        dict: ocupado (bool), paginas_wal, paginas_copiadas
+    """
+    modo = modo.upper()
+    if modo not in MODOS_CHECKPOINT:
+        raise ValueError(f'Modo de checkpoint inválido: {modo}')
+
+    with engine.connect() as conexion:
+        ocupado, paginas_wal, paginas_copiadas = conexion.execute(
+            text(f'PRAGMA wal_checkpoint({modo})')
+        ).one()
+    return {
+        'ocupado': bool(ocupado),
+        'paginas_wal': paginas_wal,
+        'paginas_copiadas': paginas_copiadas,
+    }
+
+
+def iniciar_checkpoint_periodico(app, db):
+    """
+    Lanza un hilo daemon que hace checkpoint cada SQLITE_CHECKPOINT_SEGUNDOS
+
+    Args:
+        app (Flask): Aplicación
+        db (SQLAlchemy): Extensión
+
+    Returns:
+        threading.Event: Señal para detener el hilo
+    """
+    intervalo = app.config['SQLITE_CHECKPOINT_SEGUNDOS']
+    modo = app.config.get('SQLITE_CHECKPOINT_MODO', 'TRUNCATE')
+    detener = threading.Event()
+
+    def bucle():
+        while not detener.wait(intervalo):
+            with app.app_context():
+                try:
+                    inicio = time.monotonic()
+                    resultado = checkpoint_wal(db.engine, modo)
+                    current_app.logger.debug(
+                        f"Checkpoint WAL {modo}: {resultado} en {time.monotonic() - inicio:.3f}s"
+                    )
+                except Exception as e:
+                    current_app.logger.warning(f"Error en checkpoint WAL: {e}")
+
+    threading.Thread(target=bucle, name='katita-wal-checkpoint', daemon=True).start()
+    return detener
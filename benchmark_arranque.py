@@ -0,0 +1,92 @@
+"""
+Presupuesto de arranque: tiempo de import de create_app()
+
+Ejecuta `python -X importtime` sobre `create_app('testing')` en un proceso
+limpio, suma el tiempo acumulado de los módulos de primer nivel y muestra
+los más costosos. Termina con código 1 si el total supera el presupuesto
+o si se cargó alguna dependencia de reportes (matplotlib, reportlab,
+openpyxl), que solo deben importarse en la primera exportación.
+
+Uso:
+    python benchmark_arranque.py [--presupuesto-ms 1500] [--repeticiones 3] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PRESUPUESTO_MS = 1500
+MODULOS_DIFERIDOS = ('matplotlib', 'reportlab', 'openpyxl')
+
+CODIGO = "from app import create_app; create_app('testing')"
+LINEA = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def medir():
+    """
+    Ejecuta create_app con -X importtime en un subproceso
+
+    Returns:
+        tuple: (total_ms, {modulo: acumulado_ms} de primer nivel, set de todos los módulos)
+    """
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CODIGO],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, FLASK_ENV='testing'),
+        capture_output=True, text=True, check=True,
+    )
+
+    primer_nivel = {}
+    modulos = set()
+    for linea in resultado.stderr.splitlines():
+        coincidencia = LINEA.match(linea)
+        if not coincidencia:
+            continue
+        _, acumulado, sangria, nombre = coincidencia.groups()
+        modulos.add(nombre)
+        if not sangria:
+            primer_nivel[nombre] = int(acumulado) / 1000
+
+    return sum(primer_nivel.values()), primer_nivel, modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--presupuesto-ms', type=float, default=PRESUPUESTO_MS)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    mediciones = [medir() for _ in range(args.repeticiones)]
+    totales = [total for total, _, _ in mediciones]
+    mediana = statistics.median(totales)
+    _, primer_nivel, modulos = mediciones[totales.index(min(totales))]
+
+    print("=" * 60)
+    print("KATITA-POS - Tiempo de import de create_app()")
+    print("=" * 60)
+    print(f"\nTop {args.top} módulos (acumulado, mejor corrida):")
+    for nombre, ms in sorted(primer_nivel.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f"    {ms:8.1f} ms  {nombre}")
+
+    print(f"\nTotal (mediana de {args.repeticiones}): {mediana:.0f} ms  |  presupuesto: {args.presupuesto_ms:.0f} ms")
+
+    cargados = sorted({m.split('.')[0] for m in modulos} & set(MODULOS_DIFERIDOS))
+    fallo = False
+    if cargados:
+        print(f"❌ Dependencias de reportes importadas al arrancar: {', '.join(cargados)}")
+        fallo = True
+    if mediana > args.presupuesto_ms:
+        print(f"❌ El arranque supera el presupuesto por {mediana - args.presupuesto_ms:.0f} ms")
+        fallo = True
+
+    if fallo:
+        sys.exit(1)
+    print("✅ Arranque dentro del presupuesto")
+
+
+if __name__ == '__main__':
+    main()
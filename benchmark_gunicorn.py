@@ -0,0 +1,201 @@
+"""
+Prueba de carga local: Procfile anterior vs gunicorn.conf.py
+
+Levanta gunicorn dos veces sobre una base SQLite temporal con datos de
+prueba y lanza clientes concurrentes con la mezcla típica de una tienda:
+cajeros listando productos y, de vez en cuando, un export PDF lento.
+Reporta throughput y p50/p99 de cada escenario.
+
+Uso:
+    python benchmark_gunicorn.py [--segundos 20] [--clientes 16] [--pdf 0.1]
+
+Requiere gunicorn (Linux/macOS).
+"""
+
+import argparse
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from datetime import date, timedelta
+import requests
+
+ESCENARIOS = {
+    'actual': ['--workers', '2', '--timeout', '120'],
+    'gunicorn.conf.py': ['-c', 'gunicorn.conf.py'],
+}
+
+
+def _app_servidor():
+    """App que sirve gunicorn en el benchmark (modo local, sin log de SQL)"""
+    from app import create_app, db
+    aplicacion = create_app('development')
+    with aplicacion.app_context():
+        db.engine.echo = False
+    return aplicacion
+
+
+# gunicorn importa este módulo como `benchmark_gunicorn:app`
+if os.environ.get('KATITA_BENCH_SERVIDOR'):
+    app = _app_servidor()
+
+
+def preparar_base(productos=300, ventas=400):
+    """Crea la base con productos, lotes y ventas de hoy; retorna un token de administrador"""
+    from flask_jwt_extended import create_access_token
+    from app import db
+    from app.models.user import User
+    from app.models.product import Product
+    from app.models.lote import Lote
+    from app.models.venta import Venta
+    from app.models.detalle_venta import DetalleVenta
+
+    aplicacion = _app_servidor()
+    with aplicacion.app_context():
+        db.create_all()
+        usuario = User(username='benchmark', email='benchmark@katita.pe', password_hash='-',
+                       nombre_completo='Benchmark', rol='admin')
+        db.session.add(usuario)
+        for i in range(productos):
+            producto = Product(codigo_barras=f'775{i:010d}', nombre=f'Producto {i}', categoria='Abarrotes',
+                               precio_compra=Decimal('2.00'), precio_venta=Decimal('3.50'), stock_total=50)
+            db.session.add(producto)
+            db.session.flush()
+            db.session.add(Lote(producto_id=producto.id, codigo_lote=f'L-{i}', cantidad_inicial=50,
+                                fecha_vencimiento=date.today() + timedelta(days=90),
+                                precio_compra_lote=Decimal('2.00')))
+        db.session.flush()
+
+        # Ventas del día para que el export PDF tenga gráficos y top de productos
+        aleatorio = random.Random(7)
+        lotes = Lote.query.all()
+        for _ in range(ventas):
+            lote = aleatorio.choice(lotes)
+            cantidad = aleatorio.randint(1, 3)
+            total = Decimal('3.50') * cantidad
+            venta = Venta(subtotal=total, descuento=Decimal('0.00'), total=total,
+                          metodo_pago=aleatorio.choice(['efectivo', 'yape', 'plin']), vendedor_id=usuario.id)
+            venta.generar_numero_venta()
+            db.session.add(venta)
+            db.session.flush()
+            detalle = DetalleVenta(venta_id=venta.id, producto_id=lote.producto_id, lote_id=lote.id,
+                                   cantidad=cantidad, precio_unitario=Decimal('3.50'),
+                                   precio_compra=Decimal('2.00'))
+            detalle.calcular_subtotales()
+            db.session.add(detalle)
+        db.session.commit()
+        return create_access_token(identity=str(usuario.id), additional_claims={'rol': 'admin'})
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _esperar_servidor(url, segundos=60):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        try:
+            if requests.get(f'{url}/health', timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            time.sleep(0.25)
+    raise RuntimeError('gunicorn no respondió a /health')
+
+
+def cargar(url, token, segundos, clientes, proporcion_pdf):
+    """Lanza los clientes y retorna las latencias por tipo de petición"""
+    cabeceras = {'Authorization': f'Bearer {token}'}
+    fin = time.monotonic() + segundos
+    latencias = {'productos': [], 'pdf': []}
+    errores = []
+    candado = threading.Lock()
+
+    def cliente(semilla):
+        aleatorio = random.Random(semilla)
+        sesion = requests.Session()
+        while time.monotonic() < fin:
+            tipo = 'pdf' if aleatorio.random() < proporcion_pdf else 'productos'
+            ruta = '/api/ventas/reportes/pdf' if tipo == 'pdf' else '/api/products?page=1&per_page=50'
+            inicio = time.monotonic()
+            try:
+                respuesta = sesion.get(url + ruta, headers=cabeceras, timeout=120)
+                ok = respuesta.status_code < 500
+            except requests.RequestException:
+                ok = False
+            with candado:
+                (latencias[tipo] if ok else errores).append(time.monotonic() - inicio)
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, len(errores)
+
+
+def _percentil(valores, p):
+    if len(valores) < 2:
+        return (valores[0] if valores else 0.0) * 1000
+    return statistics.quantiles(valores, n=100)[p - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--segundos', type=float, default=20)
+    parser.add_argument('--clientes', type=int, default=16)
+    parser.add_argument('--pdf', type=float, default=0.1, help='Proporción de exports PDF')
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix='katita-gunicorn-')
+    entorno = dict(
+        os.environ,
+        FLASK_ENV='development',
+        DATABASE_MODE='local',
+        SQLITE_DATABASE_URI=f"sqlite:///{os.path.join(directorio, 'katita_local.db')}",
+        SYNC_ENABLED='False',
+        SQLITE_CHECKPOINT_SEGUNDOS='0',
+    )
+    os.environ.update(entorno)
+    token = preparar_base()
+
+    print("=" * 60)
+    print("KATITA-POS - Prueba de carga gunicorn")
+    print(f"{args.clientes} clientes, {args.segundos:.0f}s, {args.pdf:.0%} exports PDF")
+    print("=" * 60)
+
+    for nombre, opciones in ESCENARIOS.items():
+        puerto = _puerto_libre()
+        url = f'http://127.0.0.1:{puerto}'
+        servidor = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{puerto}', *opciones,
+             'benchmark_gunicorn:app'],
+            env=dict(entorno, PORT=str(puerto), KATITA_BENCH_SERVIDOR='1', GUNICORN_ACCESS_LOG=''),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _esperar_servidor(url)
+            latencias, errores = cargar(url, token, args.segundos, args.clientes, args.pdf)
+        finally:
+            servidor.send_signal(signal.SIGTERM)
+            servidor.wait(30)
+
+        todas = latencias['productos'] + latencias['pdf']
+        print(f"\n[{nombre}]")
+        print(f"    Peticiones/s:       {len(todas) / args.segundos:.1f}")
+        print(f"    p50 / p99 total:    {_percentil(todas, 50):.0f} / {_percentil(todas, 99):.0f} ms")
+        print(f"    p99 productos:      {_percentil(latencias['productos'], 99):.0f} ms")
+        print(f"    p99 export PDF:     {_percentil(latencias['pdf'], 99):.0f} ms")
+        print(f"    Errores:            {errores}")
+
+
+if __name__ == '__main__':
+    main()
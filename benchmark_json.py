@@ -0,0 +1,128 @@
+"""
+Microbenchmark de serialización JSON: listado de 1000 ventas
+
+Arma un payload como el de GET /api/ventas (1000 ventas con 3 detalles
+cada una, valores Decimal y datetime tal como los devuelve to_dict) y mide:
+- stdlib: conversión previa a float/isoformat (lo que hacían los modelos) + json.dumps
+- proveedor (stdlib): app.json con JSON_ORJSON=False sobre los valores crudos
+- proveedor (orjson): app.json con orjson sobre los valores crudos
+
+Uso:
+    python benchmark_json.py [--ventas 1000] [--repeticiones 20]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app import create_app
+from app.utils.json_provider import ORJSON_SUPPORT
+
+PERU_TZ = timezone(timedelta(hours=-5))
+
+
+def armar_payload(cantidad):
+    """Payload de success_response con `cantidad` ventas en valores crudos"""
+    base = datetime(2026, 10, 19, 8, 0, tzinfo=PERU_TZ)
+    ventas = []
+    for i in range(cantidad):
+        fecha = base + timedelta(minutes=i)
+        detalles = []
+        for j in range(3):
+            precio = Decimal('3.50') + Decimal(j)
+            detalles.append({
+                'id': i * 3 + j, 'venta_id': i, 'producto_id': j + 1, 'lote_id': j + 10,
+                'cantidad': j + 1,
+                'precio_unitario': precio, 'precio_compra': Decimal('2.10'),
+                'precio_compra_unitario': Decimal('2.10'),
+                'subtotal': precio * (j + 1), 'descuento_item': Decimal('0.00'),
+                'subtotal_final': precio * (j + 1),
+                'created_at': fecha.replace(tzinfo=None), 'updated_at': fecha.replace(tzinfo=None),
+                'ganancia_unitaria': precio - Decimal('2.10'),
+                'ganancia_total': (precio - Decimal('2.10')) * (j + 1),
+                'porcentaje_ganancia': 66.67, 'margen_bruto': 40.0,
+                'producto': {'id': j + 1, 'nombre': f'Producto {j}', 'codigo_barras': f'775{j:010d}',
+                             'precio_compra': Decimal('2.10'), 'categoria': 'Abarrotes'},
+            })
+        ventas.append({
+            'id': i, 'numero_venta': f'V-20261019-{i:04d}', 'fecha': fecha, 'fecha_venta': fecha,
+            'subtotal': Decimal('22.50'), 'descuento': Decimal('0.00'), 'total': Decimal('22.50'),
+            'metodo_pago': 'efectivo', 'monto_recibido': Decimal('50.00'), 'cambio': Decimal('27.50'),
+            'cliente_nombre': None, 'cliente_dni': None, 'vendedor_id': 1, 'cuadro_caja_id': 7,
+            'estado': 'completada', 'devuelta': False, 'notas': None,
+            'created_offline': False, 'synced': True,
+            'created_at': fecha.replace(tzinfo=None), 'updated_at': fecha.replace(tzinfo=None),
+            'cantidad_items': 6, 'es_pago_digital': False, 'es_pago_efectivo': True,
+            'fue_creada_hoy': True, 'dias_desde_venta': 0,
+            'vendedor_nombre': 'Cajera Uno', 'vendedor_username': 'cajera1',
+            'detalles': detalles,
+        })
+    return {'success': True, 'message': f'{cantidad} ventas encontradas',
+            'data': {'ventas': ventas, 'total': cantidad, 'limit': cantidad, 'offset': 0}}
+
+
+def convertir(valor):
+    """Conversión que hacían los to_dict antes: Decimal -> float, fechas -> isoformat"""
+    if isinstance(valor, dict):
+        return {k: convertir(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [convertir(v) for v in valor]
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return valor
+
+
+def cronometrar(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        cuerpo = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), len(cuerpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ventas', type=int, default=1000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    payload = armar_payload(args.ventas)
+
+    app = create_app('testing')
+    app.config['JSON_ORJSON'] = False
+    proveedor_stdlib = type(app.json)(app)
+    app.config['JSON_ORJSON'] = True
+    proveedor = type(app.json)(app)
+
+    casos = [
+        ('stdlib (float/isoformat previos)',
+         lambda: json.dumps(convertir(payload), separators=(',', ':')).encode('utf-8')),
+        ('proveedor (stdlib)', lambda: proveedor_stdlib.dumps_bytes(payload)),
+    ]
+    if ORJSON_SUPPORT:
+        casos.append(('proveedor (orjson)', lambda: proveedor.dumps_bytes(payload)))
+
+    # Misma salida en todos los casos
+    salidas = [json.loads(funcion()) for _, funcion in casos]
+    assert all(salida == salidas[0] for salida in salidas), 'Las salidas no coinciden'
+
+    print("=" * 60)
+    print(f"KATITA-POS - Serialización de {args.ventas} ventas (mediana de {args.repeticiones})")
+    print("=" * 60)
+    referencia = None
+    for nombre, funcion in casos:
+        ms, tamano = cronometrar(funcion, args.repeticiones)
+        referencia = referencia or ms
+        print(f"    {nombre:34s} {ms:8.1f} ms  {tamano / 1024:7.0f} KB  x{referencia / ms:.1f}")
+    if not ORJSON_SUPPORT:
+        print("\n⚠️  orjson no está instalado: pip install orjson")
+
+
+if __name__ == '__main__':
+    main()
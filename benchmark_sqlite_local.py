@@ -0,0 +1,144 @@
+"""
+Benchmark de concurrencia lectura/escritura sobre SQLite local
+
+Compara la configuración por defecto de SQLite con el perfil local de
+KATITA-POS (app/utils/sqlite_local.py): varios hilos registran ventas
+mientras otros ejecutan un reporte agregado, como en una tienda con la
+caja vendiendo y el dashboard abierto.
+
+Uso:
+    python benchmark_sqlite_local.py [--segundos 10] [--escritores 4] [--lectores 2]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from config import Config
+from app.utils.sqlite_local import registrar_perfil, checkpoint_wal
+
+ESQUEMA = """
+CREATE TABLE ventas_bench (
+    id INTEGER PRIMARY KEY,
+    producto_id INTEGER NOT NULL,
+    cantidad INTEGER NOT NULL,
+    total NUMERIC(10, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+REPORTE = """
+SELECT producto_id, COUNT(*), SUM(cantidad), SUM(total)
+FROM ventas_bench GROUP BY producto_id ORDER BY SUM(total) DESC
+"""
+
+
+def crear_engines(ruta, perfil):
+    """Engine de escritura y de lectura; con perfil igual que la app en modo local"""
+    uri = f'sqlite:///{ruta}'
+    # timeout=0: sin perfil, SQLite no espera al recibir "database is locked"
+    argumentos = {} if perfil else {'connect_args': {'timeout': 0}}
+    escritura = create_engine(uri, **argumentos)
+    lectura = create_engine(uri, **argumentos)
+    if perfil:
+        config = {k: getattr(Config, k) for k in dir(Config) if k.startswith('SQLITE_')}
+        registrar_perfil(escritura, config)
+        registrar_perfil(lectura, config, solo_lectura=True)
+    return escritura, lectura
+
+
+def ejecutar(perfil, segundos, escritores, lectores):
+    """Corre un escenario y retorna sus métricas"""
+    directorio = tempfile.mkdtemp(prefix='katita-bench-')
+    escritura, lectura = crear_engines(os.path.join(directorio, 'bench.db'), perfil)
+    with escritura.begin() as conexion:
+        conexion.execute(text(ESQUEMA))
+
+    fin = time.monotonic() + segundos
+    latencias, reportes, bloqueos = [], [], []
+    candado = threading.Lock()
+
+    def escritor():
+        aleatorio = random.Random()
+        while time.monotonic() < fin:
+            inicio = time.monotonic()
+            try:
+                with escritura.begin() as conexion:
+                    conexion.execute(
+                        text('INSERT INTO ventas_bench (producto_id, cantidad, total) VALUES (:p, :c, :t)'),
+                        {'p': aleatorio.randint(1, 500), 'c': aleatorio.randint(1, 5),
+                         't': round(aleatorio.uniform(1, 50), 2)}
+                    )
+                with candado:
+                    latencias.append(time.monotonic() - inicio)
+            except OperationalError:
+                with candado:
+                    bloqueos.append('escritura')
+
+    def lector():
+        while time.monotonic() < fin:
+            inicio = time.monotonic()
+            try:
+                with lectura.connect() as conexion:
+                    conexion.execute(text(REPORTE)).fetchall()
+                with candado:
+                    reportes.append(time.monotonic() - inicio)
+            except OperationalError:
+                with candado:
+                    bloqueos.append('lectura')
+
+    hilos = [threading.Thread(target=escritor) for _ in range(escritores)]
+    hilos += [threading.Thread(target=lector) for _ in range(lectores)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    wal = checkpoint_wal(escritura) if perfil else None
+    escritura.dispose()
+    lectura.dispose()
+
+    def p95(valores):
+        return statistics.quantiles(valores, n=20)[-1] * 1000 if len(valores) >= 20 else 0.0
+
+    return {
+        'escenario': 'perfil local' if perfil else 'por defecto',
+        'ventas_por_segundo': len(latencias) / segundos,
+        'reportes_por_segundo': len(reportes) / segundos,
+        'p95_venta_ms': p95(latencias),
+        'p95_reporte_ms': p95(reportes),
+        'database_is_locked': len(bloqueos),
+        'checkpoint': wal,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--escritores', type=int, default=4)
+    parser.add_argument('--lectores', type=int, default=2)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("KATITA-POS - Benchmark SQLite local (lectura/escritura concurrente)")
+    print(f"{args.escritores} escritores, {args.lectores} lectores, {args.segundos:.0f}s por escenario")
+    print("=" * 60)
+
+    for perfil in (False, True):
+        r = ejecutar(perfil, args.segundos, args.escritores, args.lectores)
+        print(f"\n[{r['escenario']}]")
+        print(f"    Ventas/s:            {r['ventas_por_segundo']:.1f}")
+        print(f"    Reportes/s:          {r['reportes_por_segundo']:.1f}")
+        print(f"    p95 venta:           {r['p95_venta_ms']:.1f} ms")
+        print(f"    p95 reporte:         {r['p95_reporte_ms']:.1f} ms")
+        print(f"    database is locked:  {r['database_is_locked']}")
+        if r['checkpoint']:
+            print(f"    Checkpoint WAL:      {r['checkpoint']['paginas_copiadas']} páginas")
+
+
+if __name__ == '__main__':
+    main()
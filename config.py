@@ -36,6 +36,33 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
 
+    # Avisar al arrancar si faltan migraciones (se aplican con `flask db upgrade`)
+    DB_VERIFICAR_MIGRACIONES = os.environ.get('DB_VERIFICAR_MIGRACIONES', 'True').lower() == 'true'
+    # Modo local: aplicar las migraciones pendientes al arrancar (la tienda no tiene paso de release)
+    DB_MIGRAR_LOCAL_AL_ARRANCAR = os.environ.get('DB_MIGRAR_LOCAL_AL_ARRANCAR', 'True').lower() == 'true'
+
+    # Pool de conexiones PostgreSQL (modo cloud; ver app/utils/pool_postgres.py)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))  # Por worker de gunicorn
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # Segundos esperando una conexión libre
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # Antes de que Supabase la cierre
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true'
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 10))
+    DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', 'False').lower() == 'true'  # Modo transacción (puerto 6543)
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 15000))  # Ventas, caja, catálogo
+    DB_STATEMENT_TIMEOUT_REPORTES_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_REPORTES_MS', 60000))
+
+    # Perfil de SQLite local (se aplica en cada conexión; ver app/utils/sqlite_local.py)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # Bytes
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    SQLITE_FOREIGN_KEYS = os.environ.get('SQLITE_FOREIGN_KEYS', 'True').lower() == 'true'
+    SQLITE_POOL_LECTURA = os.environ.get('SQLITE_POOL_LECTURA', 'True').lower() == 'true'  # Reportes
+    SQLITE_CHECKPOINT_SEGUNDOS = int(os.environ.get('SQLITE_CHECKPOINT_SEGUNDOS', 300))  # 0 = desactivado
+    SQLITE_CHECKPOINT_MODO = os.environ.get('SQLITE_CHECKPOINT_MODO', 'TRUNCATE')
+
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=8)  # 8 horas
@@ -43,6 +70,27 @@ class Config:
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
+    # Tokens revocados (logout): filtro de Bloom + set exacto por proceso (app.utils.revocacion)
+    BLOCKLIST_REFRESCO_SEGUNDOS = float(os.environ.get('BLOCKLIST_REFRESCO_SEGUNDOS', 5))  # Revocaciones de otros workers
+    BLOCKLIST_RECONSTRUIR_SEGUNDOS = int(os.environ.get('BLOCKLIST_RECONSTRUIR_SEGUNDOS', 3600))
+    BLOCKLIST_MAX_RECIENTES = int(os.environ.get('BLOCKLIST_MAX_RECIENTES', 1000))
+    BLOCKLIST_SOLAPE_IDS = int(os.environ.get('BLOCKLIST_SOLAPE_IDS', 100))  # Ids que se releen (commits fuera de orden)
+    BLOCKLIST_TASA_FALSOS_POSITIVOS = float(os.environ.get('BLOCKLIST_TASA_FALSOS_POSITIVOS', 0.001))
+    # Identidad del usuario (current_user): caché por proceso, se invalida al modificar el usuario
+    IDENTIDAD_CACHE_TTL_SEGUNDOS = int(os.environ.get('IDENTIDAD_CACHE_TTL_SEGUNDOS', 30))  # 0 = sin caché
+    IDENTIDAD_CACHE_MAX = int(os.environ.get('IDENTIDAD_CACHE_MAX', 1000))
+
+    # Login: bcrypt en pool acotado y bloqueo por intentos fallidos (auth_service)
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))  # Los hashes con otro costo se rehacen al loguear
+    BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', 2))
+    BCRYPT_MAX_PENDIENTES = int(os.environ.get('BCRYPT_MAX_PENDIENTES', 8))  # Verificaciones en curso + en cola
+    BCRYPT_ESPERA_SEGUNDOS = float(os.environ.get('BCRYPT_ESPERA_SEGUNDOS', 5))  # Sin cupo: 503
+    LOGIN_MAX_INTENTOS = int(os.environ.get('LOGIN_MAX_INTENTOS', 5))
+    LOGIN_VENTANA_SEGUNDOS = int(os.environ.get('LOGIN_VENTANA_SEGUNDOS', 1800))
+    LOGIN_BLOQUEO_MINUTOS = int(os.environ.get('LOGIN_BLOQUEO_MINUTOS', 30))
+
+    # Respuestas JSON: orjson si está instalado (app.utils.json_provider); False = json de la stdlib
+    JSON_ORJSON = os.environ.get('JSON_ORJSON', 'True').lower() == 'true'
 
     # CORS Configuration
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
@@ -54,6 +102,42 @@ class Config:
     # Sync Configuration
     SYNC_ENABLED = os.environ.get('SYNC_ENABLED', 'True').lower() == 'true'
     SYNC_INTERVAL = int(os.environ.get('SYNC_INTERVAL', 300))
+    # Captura de cambios hacia SyncQueue (solo tiene sentido en tiendas offline)
+    SYNC_CAPTURE = os.environ.get(
+        'SYNC_CAPTURE', str(SYNC_ENABLED and DATABASE_MODE == 'local')
+    ).lower() == 'true'
+    # Identificador de este nodo en los contadores de stock (default: hostname)
+    SYNC_NODE_ID = os.environ.get('SYNC_NODE_ID')
+    # Contadores por nodo para fusionar stock sin perder ventas offline
+    SYNC_STOCK_CONTADORES = os.environ.get('SYNC_STOCK_CONTADORES', str(SYNC_ENABLED)).lower() == 'true'
+    SYNC_WORKER_MODE = os.environ.get('SYNC_WORKER_MODE', 'cli')  # 'cli' (flask sync run) o 'thread'
+    SYNC_REMOTE = os.environ.get('SYNC_REMOTE', 'http')  # o 'local'
+    SYNC_REMOTE_URL = os.environ.get('SYNC_REMOTE_URL')
+    SYNC_REMOTE_TOKEN = os.environ.get('SYNC_REMOTE_TOKEN')
+    SYNC_REMOTE_TIMEOUT = int(os.environ.get('SYNC_REMOTE_TIMEOUT', 10))
+    SYNC_BATCH_SIZE = int(os.environ.get('SYNC_BATCH_SIZE', 100))
+    SYNC_LEASE_SECONDS = int(os.environ.get('SYNC_LEASE_SECONDS', 120))  # Reserva de un lote reclamado
+    SYNC_BACKOFF_BASE = int(os.environ.get('SYNC_BACKOFF_BASE', 30))  # Segundos; se duplica por intento
+    SYNC_BACKOFF_MAX = int(os.environ.get('SYNC_BACKOFF_MAX', 3600))
+    SYNC_RETENCION_DIAS = int(os.environ.get('SYNC_RETENCION_DIAS', 30))  # Procesados
+    SYNC_RETENCION_FALLIDOS_DIAS = int(os.environ.get('SYNC_RETENCION_FALLIDOS_DIAS', 0))  # 0 = conservar
+    SYNC_PURGA_BLOQUE = int(os.environ.get('SYNC_PURGA_BLOQUE', 1000))
+
+    # Búsqueda de códigos de barras (FASE 5 - Open Food Facts con caché)
+    BARCODE_PROVIDER = os.environ.get('BARCODE_PROVIDER', 'openfoodfacts')  # o 'json_local'
+    BARCODE_LOCAL_DATASET = os.environ.get('BARCODE_LOCAL_DATASET')
+    BARCODE_LOOKUP_TIMEOUT = int(os.environ.get('BARCODE_LOOKUP_TIMEOUT', 5))
+    BARCODE_CACHE_TTL_POSITIVO = int(os.environ.get('BARCODE_CACHE_TTL_POSITIVO', 30 * 24 * 3600))  # 30 días
+    BARCODE_CACHE_TTL_NEGATIVO = int(os.environ.get('BARCODE_CACHE_TTL_NEGATIVO', 24 * 3600))  # 1 día
+
+    # Importación masiva de productos (archivos mayores se procesan en segundo plano)
+    IMPORT_BACKGROUND_BYTES = int(os.environ.get('IMPORT_BACKGROUND_BYTES', 2 * 1024 * 1024))
+    IMPORT_TRABAJOS_RETENCION_DIAS = int(os.environ.get('IMPORT_TRABAJOS_RETENCION_DIAS', 7))  # Estado de los trabajos
+    IMPORT_TRABAJO_MAX_MINUTOS = int(os.environ.get('IMPORT_TRABAJO_MAX_MINUTOS', 60))  # Luego se da por abandonado
+
+    # Alertas de vencimiento: urgencia alta/media si el lote más próximo vence en <= N días
+    VENCIMIENTO_URGENCIA_ALTA_DIAS = int(os.environ.get('VENCIMIENTO_URGENCIA_ALTA_DIAS', 3))
+    VENCIMIENTO_URGENCIA_MEDIA_DIAS = int(os.environ.get('VENCIMIENTO_URGENCIA_MEDIA_DIAS', 7))
 
     # Application Settings
     TIMEZONE = os.environ.get('TIMEZONE', 'America/Lima')
@@ -74,6 +158,7 @@ class ProductionConfig(Config):
     DATABASE_MODE = 'cloud'  # En producción siempre usar PostgreSQL
     # Leer directamente del environment para asegurar que Railway use las variables correctas
     SQLALCHEMY_DATABASE_URI = os.environ.get('POSTGRES_DATABASE_URI') or Config.POSTGRES_DATABASE_URI
+    SYNC_CAPTURE = False  # La nube es el destino de la sincronización, no un origen
 
 
 class TestingConfig(Config):
@@ -83,6 +168,12 @@ class TestingConfig(Config):
     # Usar base de datos en memoria para tests
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
+    BARCODE_PROVIDER = 'json_local'  # Nunca llamar a Open Food Facts desde tests
+    SYNC_REMOTE = 'local'  # Nunca llamar al servidor de sincronización desde tests
+    SYNC_CAPTURE = False  # Los tests de captura la activan explícitamente
+    SYNC_STOCK_CONTADORES = False
+    BCRYPT_ROUNDS = 4  # Mínimo de bcrypt: hashes rápidos en tests
+    DB_MIGRAR_LOCAL_AL_ARRANCAR = False  # create_all arma el esquema; el test de migración lo activa
 
 
 # Diccionario para seleccionar configuración según el entorno
@@ -0,0 +1,100 @@
+"""
+KATITA-POS - Configuración de Gunicorn (producción)
+===================================================
+Perfil de servicio para Railway: `gunicorn -c gunicorn.conf.py run:app`
+
+- preload_app: la app se importa una sola vez en el proceso maestro y los
+  workers la heredan por fork
+- precarga de reportes: matplotlib/reportlab/openpyxl ya no se importan en
+  create_app; se cargan en el maestro (when_ready) para que el primer
+  export de cada worker no pague la importación
+- post_fork: cada worker descarta las conexiones heredadas del maestro;
+  un socket compartido entre procesos corrompe el protocolo de PostgreSQL
+- gthread: un export PDF lento ocupa un hilo, no el worker entero
+- max_requests + jitter: reciclar workers de forma escalonada
+
+Todos los valores se leen del entorno (GUNICORN_*, DB_POOL_*).
+"""
+
+import os
+import multiprocessing
+
+# ==================== Servidor ====================
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2, 4)))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Un hilo por conexión del pool: más hilos que conexiones solo esperan en
+# el pool (DB_POOL_TIMEOUT) en lugar de en la cola del socket
+_pool = int(os.environ.get('DB_POOL_SIZE', 5))
+_overflow = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+threads = int(os.environ.get('GUNICORN_THREADS', _pool))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+precargar_reportes = os.environ.get('GUNICORN_PRECARGAR_REPORTES', 'True').lower() == 'true'
+
+# ==================== Logging ====================
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None  # Vacío = sin log de accesos
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+# ==================== Hooks ====================
+
+def _precargar_reportes(log):
+    """Importa los generadores de PDF y Excel (y con ellos matplotlib, reportlab, openpyxl)"""
+    import app.utils.pdf_generator  # noqa: F401
+    import app.utils.excel_generator  # noqa: F401
+    log.info("KATITA-POS: dependencias de reportes precargadas")
+
+
+def when_ready(server):
+    """Advierte si los hilos superan las conexiones que el pool puede abrir y precarga reportes"""
+    if worker_class == 'gthread' and threads > _pool + _overflow:
+        server.log.warning(
+            f"GUNICORN_THREADS={threads} supera DB_POOL_SIZE + DB_MAX_OVERFLOW "
+            f"({_pool + _overflow}): los hilos extra esperarán conexión"
+        )
+    server.log.info(f"KATITA-POS: {workers} workers x {threads} hilos ({worker_class}), preload={preload_app}")
+    if precargar_reportes and preload_app:
+        _precargar_reportes(server.log)
+
+
+def post_worker_init(worker):
+    """Sin preload cada worker importa su propia app: precarga los reportes en el worker"""
+    if precargar_reportes and not preload_app:
+        _precargar_reportes(worker.log)
+
+
+def post_fork(server, worker):
+    """
+    Descarta en el worker las conexiones abiertas por el maestro
+
+    dispose(close=False) abandona el pool heredado sin cerrar los sockets,
+    que siguen siendo del maestro. Los hilos en segundo plano (worker de
+    sincronización, checkpoint del WAL) quedan solo en el maestro.
+    """
+    if not preload_app:
+        return
+
+    from app import db
+    from app.utils.sqlite_local import engine_lectura
+
+    app = worker.app.wsgi()  # La app ya cargada por el maestro (preload)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+        lectura = engine_lectura(app)
+        if lectura is not None:
+            lectura.dispose(close=False)
+
+    server.log.info(f"Worker {worker.pid}: pool de conexiones reiniciado")
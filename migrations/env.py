@@ -0,0 +1,53 @@
+"""
+KATITA-POS - Entorno de Alembic
+===============================
+Se ejecuta con `flask db ...` (ver app/cli.py): la app ya está creada y
+la conexión sale del engine de Flask-SQLAlchemy, así que no hay alembic.ini
+ni URI duplicada.
+"""
+
+from alembic import context
+from flask import current_app
+from app import db
+
+config = context.config
+target_metadata = db.metadata
+
+
+def _opciones(dialecto):
+    return {
+        'target_metadata': target_metadata,
+        'compare_type': True,
+        # SQLite no soporta ALTER COLUMN: Alembic recrea la tabla
+        'render_as_batch': dialecto == 'sqlite',
+        'transaction_per_migration': True,
+    }
+
+
+def run_migrations_offline():
+    """Genera el SQL sin conectarse (flask db upgrade --sql)"""
+    url = current_app.config['SQLALCHEMY_DATABASE_URI']
+    context.configure(url=url, literal_binds=True, **_opciones(db.engine.dialect.name))
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Aplica las migraciones sobre la conexión de la app"""
+    conexion = config.attributes.get('connection')
+    if conexion is not None:
+        context.configure(connection=conexion, **_opciones(conexion.dialect.name))
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    with db.engine.connect() as conexion:
+        context.configure(connection=conexion, **_opciones(conexion.dialect.name))
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,501 @@
+"""Esquema base de KATITA-POS
+
+Tablas existentes al adoptar Alembic. En bases creadas antes con
+db.create_all() o con los scripts add_*/fix_* solo crea las tablas que
+faltan; 0002 completa columnas y constraints de esas bases.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# Identificadores de la revisión (Alembic)
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # --sql (offline) no puede inspeccionar: genera el esquema completo
+    existentes = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    def _crear_tabla(nombre):
+        # Bases creadas antes de Alembic (create_all): solo se agregan las tablas que faltan
+        return nombre not in existentes
+
+    if _crear_tabla('cache_codigos_barras'):
+        op.create_table('cache_codigos_barras',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('codigo_barras', sa.String(length=20), nullable=False, comment='Código de barras consultado'),
+            sa.Column('encontrado', sa.Boolean(), nullable=False, comment='Entrada positiva (True) o negativa (False)'),
+            sa.Column('datos', sa.Text(), nullable=True, comment='Datos del producto en formato JSON'),
+            sa.Column('proveedor', sa.String(length=50), nullable=False, comment='Proveedor que respondió la búsqueda'),
+            sa.Column('expira_en', sa.DateTime(), nullable=False, comment='Fecha de expiración de la entrada'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, comment='Fecha de creación'),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, comment='Fecha de última actualización'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('codigo_barras')
+        )
+        op.create_index('ix_cache_codigo_expira', 'cache_codigos_barras', ['expira_en'], unique=False)
+
+    if _crear_tabla('catalogo_cambios'):
+        op.create_table('catalogo_cambios',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('producto_id', sa.Integer(), nullable=False, comment='Producto cuyo estado en el catálogo cambió'),
+            sa.Column('origen', sa.String(length=50), nullable=False, comment='Tabla que originó el cambio'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, comment='Fecha del cambio'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_catalogo_cambio_producto', 'catalogo_cambios', ['producto_id', 'id'], unique=False)
+
+    if _crear_tabla('products'):
+        op.create_table('products',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('codigo_barras', sa.String(length=13), nullable=False, comment='Código de barras EAN-13'),
+            sa.Column('nombre', sa.String(length=200), nullable=False, comment='Nombre del producto'),
+            sa.Column('descripcion', sa.Text(), nullable=True, comment='Descripción detallada del producto'),
+            sa.Column('categoria', sa.String(length=50), nullable=False, comment='Categoría del producto'),
+            sa.Column('precio_compra', sa.Numeric(precision=10, scale=2), nullable=False, comment='Precio de compra'),
+            sa.Column('precio_venta', sa.Numeric(precision=10, scale=2), nullable=False, comment='Precio de venta al público'),
+            sa.Column('stock_total', sa.Integer(), nullable=False, comment='Stock total actual (calculado de lotes)'),
+            sa.Column('stock_minimo', sa.Integer(), nullable=False, comment='Stock mínimo para alerta'),
+            sa.Column('imagen_url', sa.String(length=500), nullable=True, comment='URL de la imagen del producto'),
+            sa.Column('activo', sa.Boolean(), nullable=False, comment='Indica si el producto está activo'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, comment='Fecha de creación'),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, comment='Fecha de última actualización'),
+            sa.CheckConstraint('precio_venta > precio_compra', name='check_precio_venta_mayor_compra'),
+            sa.CheckConstraint('stock_minimo >= 0', name='check_stock_minimo_positivo'),
+            sa.CheckConstraint('stock_total >= 0', name='check_stock_total_positivo'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_categoria_activo', 'products', ['categoria', 'activo'], unique=False)
+        op.create_index(op.f('ix_products_activo'), 'products', ['activo'], unique=False)
+        op.create_index(op.f('ix_products_categoria'), 'products', ['categoria'], unique=False)
+        op.create_index(op.f('ix_products_codigo_barras'), 'products', ['codigo_barras'], unique=True)
+        op.create_index(op.f('ix_products_nombre'), 'products', ['nombre'], unique=False)
+
+    if _crear_tabla('sync_queue'):
+        op.create_table('sync_queue',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('tabla', sa.String(length=50), nullable=False),
+            sa.Column('operacion', sa.String(length=20), nullable=False),
+            sa.Column('registro_id', sa.Integer(), nullable=False),
+            sa.Column('data', sa.Text(), nullable=False),
+            sa.Column('intentos', sa.Integer(), nullable=False),
+            sa.Column('max_intentos', sa.Integer(), nullable=False),
+            sa.Column('procesado', sa.Boolean(), nullable=False),
+            sa.Column('error_mensaje', sa.Text(), nullable=True),
+            sa.Column('siguiente_intento', sa.DateTime(), nullable=True),
+            sa.Column('lease_owner', sa.String(length=64), nullable=True),
+            sa.Column('lease_hasta', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('procesado_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.CheckConstraint("operacion IN ('insert', 'update', 'delete')", name='check_operacion_valida'),
+            sa.CheckConstraint('intentos >= 0', name='check_intentos_no_negativo'),
+            sa.CheckConstraint('max_intentos > 0', name='check_max_intentos_positivo'),
+            sa.CheckConstraint('registro_id > 0', name='check_registro_id_positivo'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_sync_created_at', 'sync_queue', ['created_at'], unique=False)
+        op.create_index('ix_sync_operacion', 'sync_queue', ['operacion'], unique=False)
+        op.create_index('ix_sync_pendientes', 'sync_queue', ['created_at', 'id'], unique=False, postgresql_where=sa.text('procesado = false'), sqlite_where=sa.text('procesado = 0'))
+        op.create_index('ix_sync_procesado', 'sync_queue', ['procesado'], unique=False)
+        op.create_index('ix_sync_procesado_created', 'sync_queue', ['procesado', 'created_at'], unique=False)
+        op.create_index('ix_sync_registro_id', 'sync_queue', ['registro_id'], unique=False)
+        op.create_index('ix_sync_tabla', 'sync_queue', ['tabla'], unique=False)
+        op.create_index('ix_sync_tabla_operacion', 'sync_queue', ['tabla', 'operacion'], unique=False)
+        op.create_index('ix_sync_tabla_registro', 'sync_queue', ['tabla', 'registro_id'], unique=False)
+
+    if _crear_tabla('users'):
+        op.create_table('users',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=255), nullable=False),
+            sa.Column('nombre_completo', sa.String(length=200), nullable=False),
+            sa.Column('telefono', sa.String(length=20), nullable=True),
+            sa.Column('hora_entrada', sa.String(length=5), nullable=True),
+            sa.Column('hora_salida', sa.String(length=5), nullable=True),
+            sa.Column('dias_trabajo', sa.String(length=50), nullable=True),
+            sa.Column('rol', sa.String(length=20), nullable=False),
+            sa.Column('activo', sa.Boolean(), nullable=False),
+            sa.Column('ultimo_acceso', sa.DateTime(), nullable=True),
+            sa.Column('intentos_login_fallidos', sa.Integer(), nullable=False),
+            sa.Column('bloqueado_hasta', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.CheckConstraint("rol IN ('admin', 'vendedor', 'bodeguero')", name='check_rol_valido'),
+            sa.CheckConstraint('intentos_login_fallidos >= 0', name='check_intentos_no_negativos'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_rol_activo', 'users', ['rol', 'activo'], unique=False)
+        op.create_index(op.f('ix_users_activo'), 'users', ['activo'], unique=False)
+        op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+        op.create_index(op.f('ix_users_rol'), 'users', ['rol'], unique=False)
+        op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+
+    if _crear_tabla('cuadros_caja'):
+        op.create_table('cuadros_caja',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('numero_turno', sa.String(length=30), nullable=False),
+            sa.Column('vendedor_id', sa.Integer(), nullable=False),
+            sa.Column('fecha_apertura', sa.DateTime(), nullable=False),
+            sa.Column('fecha_cierre', sa.DateTime(), nullable=True),
+            sa.Column('monto_inicial', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('total_efectivo', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('total_yape', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('total_plin', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('total_transferencia', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('total_egresos', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('detalle_egresos', sa.Text(), nullable=True),
+            sa.Column('efectivo_esperado', sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column('efectivo_contado', sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column('diferencia', sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column('estado', sa.String(length=20), nullable=False),
+            sa.Column('observaciones', sa.Text(), nullable=True),
+            sa.Column('observaciones_rechazo', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.CheckConstraint("estado IN ('abierto', 'cerrado', 'pendiente_cierre')", name='check_estado_valido'),
+            sa.CheckConstraint('monto_inicial >= 0', name='check_monto_inicial_no_negativo'),
+            sa.CheckConstraint('total_efectivo >= 0', name='check_total_efectivo_no_negativo'),
+            sa.CheckConstraint('total_egresos >= 0', name='check_total_egresos_no_negativo'),
+            sa.CheckConstraint('total_plin >= 0', name='check_total_plin_no_negativo'),
+            sa.CheckConstraint('total_transferencia >= 0', name='check_total_transferencia_no_negativo'),
+            sa.CheckConstraint('total_yape >= 0', name='check_total_yape_no_negativo'),
+            sa.ForeignKeyConstraint(['vendedor_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_estado_fecha', 'cuadros_caja', ['estado', 'fecha_apertura'], unique=False)
+        op.create_index('idx_vendedor_fecha', 'cuadros_caja', ['vendedor_id', 'fecha_apertura'], unique=False)
+        op.create_index(op.f('ix_cuadros_caja_estado'), 'cuadros_caja', ['estado'], unique=False)
+        op.create_index(op.f('ix_cuadros_caja_fecha_apertura'), 'cuadros_caja', ['fecha_apertura'], unique=False)
+        op.create_index(op.f('ix_cuadros_caja_numero_turno'), 'cuadros_caja', ['numero_turno'], unique=True)
+        op.create_index(op.f('ix_cuadros_caja_vendedor_id'), 'cuadros_caja', ['vendedor_id'], unique=False)
+
+    if _crear_tabla('lotes'):
+        op.create_table('lotes',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('producto_id', sa.Integer(), nullable=False, comment='ID del producto asociado'),
+            sa.Column('codigo_lote', sa.String(length=50), nullable=False, comment='Código único del lote'),
+            sa.Column('cantidad_inicial', sa.Integer(), nullable=False, comment='Cantidad al ingresar el lote'),
+            sa.Column('cantidad_actual', sa.Integer(), nullable=False, comment='Cantidad disponible actualmente'),
+            sa.Column('fecha_ingreso', sa.DateTime(), nullable=False, comment='Fecha de ingreso al inventario'),
+            sa.Column('fecha_vencimiento', sa.Date(), nullable=False, comment='Fecha de vencimiento del lote'),
+            sa.Column('precio_compra_lote', sa.Numeric(precision=10, scale=2), nullable=False, comment='Precio de compra de este lote específico'),
+            sa.Column('proveedor', sa.String(length=200), nullable=True, comment='Nombre del proveedor'),
+            sa.Column('ubicacion', sa.String(length=100), nullable=True, comment='Ubicación física (pasillo/estante)'),
+            sa.Column('notas', sa.Text(), nullable=True, comment='Notas adicionales del lote'),
+            sa.Column('activo', sa.Boolean(), nullable=False, comment='Indica si el lote está activo'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, comment='Fecha de creación'),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, comment='Fecha de última actualización'),
+            sa.CheckConstraint('cantidad_actual <= cantidad_inicial', name='check_cantidad_actual_menor_inicial'),
+            sa.CheckConstraint('cantidad_actual >= 0', name='check_cantidad_actual_positiva'),
+            sa.CheckConstraint('cantidad_inicial > 0', name='check_cantidad_inicial_positiva'),
+            sa.CheckConstraint('precio_compra_lote > 0', name='check_precio_compra_lote_positivo'),
+            sa.ForeignKeyConstraint(['producto_id'], ['products.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_producto_activo', 'lotes', ['producto_id', 'activo'], unique=False)
+        op.create_index('idx_producto_vencimiento', 'lotes', ['producto_id', 'fecha_vencimiento'], unique=False)
+        op.create_index(op.f('ix_lotes_activo'), 'lotes', ['activo'], unique=False)
+        op.create_index(op.f('ix_lotes_codigo_lote'), 'lotes', ['codigo_lote'], unique=True)
+        op.create_index(op.f('ix_lotes_fecha_vencimiento'), 'lotes', ['fecha_vencimiento'], unique=False)
+        op.create_index(op.f('ix_lotes_producto_id'), 'lotes', ['producto_id'], unique=False)
+
+    if _crear_tabla('operaciones_masivas'):
+        op.create_table('operaciones_masivas',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('tipo', sa.String(length=50), nullable=False, comment='Tipo de operación masiva'),
+            sa.Column('usuario_id', sa.Integer(), nullable=True, comment='Usuario que ejecutó la operación'),
+            sa.Column('filtro', sa.Text(), nullable=True, comment='Filtro aplicado (JSON)'),
+            sa.Column('cambios', sa.Text(), nullable=False, comment='Operación aplicada (JSON)'),
+            sa.Column('filas_afectadas', sa.Integer(), nullable=False, comment='Cantidad de filas modificadas'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, comment='Fecha de la operación'),
+            sa.ForeignKeyConstraint(['usuario_id'], ['users.id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_operacion_masiva_tipo_fecha', 'operaciones_masivas', ['tipo', 'created_at'], unique=False)
+
+    if _crear_tabla('ajustes_inventario'):
+        op.create_table('ajustes_inventario',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('producto_id', sa.Integer(), nullable=False),
+            sa.Column('lote_id', sa.Integer(), nullable=True),
+            sa.Column('admin_id', sa.Integer(), nullable=False),
+            sa.Column('cantidad_anterior', sa.Integer(), nullable=False),
+            sa.Column('cantidad_nueva', sa.Integer(), nullable=False),
+            sa.Column('diferencia', sa.Integer(), nullable=False),
+            sa.Column('tipo_ajuste', sa.Enum('merma', 'rotura', 'robo', 'error_conteo', 'inventario_fisico', name='tipo_ajuste_enum'), nullable=False),
+            sa.Column('motivo', sa.Text(), nullable=False),
+            sa.Column('observaciones', sa.Text(), nullable=True),
+            sa.Column('fecha', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['admin_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['lote_id'], ['lotes.id'], ),
+            sa.ForeignKeyConstraint(['producto_id'], ['products.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if _crear_tabla('contadores_stock'):
+        op.create_table('contadores_stock',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('lote_id', sa.Integer(), nullable=False, comment='Lote'),
+            sa.Column('nodo', sa.String(length=64), nullable=False, comment='Nodo dueño del contador'),
+            sa.Column('incrementos', sa.BigInteger(), nullable=False, comment='Entradas acumuladas (solo crece)'),
+            sa.Column('decrementos', sa.BigInteger(), nullable=False, comment='Salidas acumuladas (solo crece)'),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, comment='Última modificación'),
+            sa.CheckConstraint('decrementos >= 0', name='check_decrementos_no_negativo'),
+            sa.CheckConstraint('incrementos >= 0', name='check_incrementos_no_negativo'),
+            sa.ForeignKeyConstraint(['lote_id'], ['lotes.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('lote_id', 'nodo', name='uq_contador_lote_nodo')
+        )
+        op.create_index('ix_contador_stock_lote', 'contadores_stock', ['lote_id'], unique=False)
+
+    if _crear_tabla('snapshots_stock'):
+        op.create_table('snapshots_stock',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('corte', sa.DateTime(), nullable=False, comment='Instante de la fotografía'),
+            sa.Column('producto_id', sa.Integer(), nullable=False, comment='Producto'),
+            sa.Column('lote_id', sa.Integer(), nullable=True, comment='Lote (NULL = resumen del producto)'),
+            sa.Column('cantidad', sa.Integer(), nullable=False, comment='Unidades en el corte'),
+            sa.Column('valor', sa.Numeric(precision=12, scale=2), nullable=False, comment='Valor al costo en el corte'),
+            sa.ForeignKeyConstraint(['lote_id'], ['lotes.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['producto_id'], ['products.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_snapshot_stock_corte_producto', 'snapshots_stock', ['corte', 'producto_id'], unique=False)
+
+    if _crear_tabla('tareas_reconciliacion'):
+        op.create_table('tareas_reconciliacion',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('lote_id', sa.Integer(), nullable=False, comment='Lote en conflicto'),
+            sa.Column('producto_id', sa.Integer(), nullable=False, comment='Producto del lote'),
+            sa.Column('diferencia', sa.Integer(), nullable=False, comment='Contadores - stock aplicado'),
+            sa.Column('estado', sa.String(length=20), nullable=False, comment='pendiente | resuelta'),
+            sa.Column('nota', sa.String(length=255), nullable=True),
+            sa.Column('resuelta_por', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('resuelta_at', sa.DateTime(), nullable=True),
+            sa.CheckConstraint("estado IN ('pendiente', 'resuelta')", name='check_estado_tarea_valido'),
+            sa.ForeignKeyConstraint(['lote_id'], ['lotes.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['producto_id'], ['products.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['resuelta_por'], ['users.id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_tarea_reconciliacion_estado_lote', 'tareas_reconciliacion', ['estado', 'lote_id'], unique=False)
+
+    if _crear_tabla('ventas'):
+        op.create_table('ventas',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('numero_venta', sa.String(length=20), nullable=False),
+            sa.Column('fecha', sa.DateTime(), nullable=False),
+            sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('descuento', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('total', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('metodo_pago', sa.String(length=20), nullable=False),
+            sa.Column('monto_recibido', sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column('cambio', sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column('cliente_nombre', sa.String(length=200), nullable=True),
+            sa.Column('cliente_dni', sa.String(length=8), nullable=True),
+            sa.Column('vendedor_id', sa.Integer(), nullable=False),
+            sa.Column('cuadro_caja_id', sa.Integer(), nullable=True),
+            sa.Column('estado', sa.String(length=20), nullable=False),
+            sa.Column('devuelta', sa.Boolean(), nullable=False),
+            sa.Column('notas', sa.Text(), nullable=True),
+            sa.Column('created_offline', sa.Boolean(), nullable=False),
+            sa.Column('synced', sa.Boolean(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.CheckConstraint("estado IN ('completada', 'cancelada', 'pendiente')", name='check_estado_valido'),
+            sa.CheckConstraint("metodo_pago IN ('efectivo', 'yape', 'plin', 'transferencia')", name='check_metodo_pago_valido'),
+            sa.CheckConstraint('descuento <= subtotal', name='check_descuento_menor_subtotal'),
+            sa.CheckConstraint('descuento >= 0', name='check_descuento_no_negativo'),
+            sa.CheckConstraint('subtotal >= 0', name='check_subtotal_no_negativo'),
+            sa.CheckConstraint('total > 0', name='check_total_positivo'),
+            sa.ForeignKeyConstraint(['cuadro_caja_id'], ['cuadros_caja.id'], ),
+            sa.ForeignKeyConstraint(['vendedor_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_estado_synced', 'ventas', ['estado', 'synced'], unique=False)
+        op.create_index('idx_fecha_vendedor', 'ventas', ['fecha', 'vendedor_id'], unique=False)
+        op.create_index('idx_metodo_pago_fecha', 'ventas', ['metodo_pago', 'fecha'], unique=False)
+        op.create_index(op.f('ix_ventas_cuadro_caja_id'), 'ventas', ['cuadro_caja_id'], unique=False)
+        op.create_index(op.f('ix_ventas_devuelta'), 'ventas', ['devuelta'], unique=False)
+        op.create_index(op.f('ix_ventas_estado'), 'ventas', ['estado'], unique=False)
+        op.create_index(op.f('ix_ventas_fecha'), 'ventas', ['fecha'], unique=False)
+        op.create_index(op.f('ix_ventas_metodo_pago'), 'ventas', ['metodo_pago'], unique=False)
+        op.create_index(op.f('ix_ventas_numero_venta'), 'ventas', ['numero_venta'], unique=True)
+        op.create_index(op.f('ix_ventas_synced'), 'ventas', ['synced'], unique=False)
+        op.create_index(op.f('ix_ventas_vendedor_id'), 'ventas', ['vendedor_id'], unique=False)
+
+    if _crear_tabla('detalles_venta'):
+        op.create_table('detalles_venta',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('venta_id', sa.Integer(), nullable=False),
+            sa.Column('producto_id', sa.Integer(), nullable=False),
+            sa.Column('lote_id', sa.Integer(), nullable=True),
+            sa.Column('cantidad', sa.Integer(), nullable=False),
+            sa.Column('precio_unitario', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('precio_compra', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('descuento_item', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('subtotal_final', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.CheckConstraint('cantidad > 0', name='check_cantidad_positiva'),
+            sa.CheckConstraint('descuento_item <= subtotal', name='check_descuento_menor_subtotal'),
+            sa.CheckConstraint('descuento_item >= 0', name='check_descuento_item_no_negativo'),
+            sa.CheckConstraint('precio_compra >= 0', name='check_precio_compra_no_negativo'),
+            sa.CheckConstraint('precio_unitario > 0', name='check_precio_unitario_positivo'),
+            sa.ForeignKeyConstraint(['lote_id'], ['lotes.id'], ),
+            sa.ForeignKeyConstraint(['producto_id'], ['products.id'], ),
+            sa.ForeignKeyConstraint(['venta_id'], ['ventas.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_producto_fecha', 'detalles_venta', ['producto_id', 'created_at'], unique=False)
+        op.create_index('idx_venta_producto', 'detalles_venta', ['venta_id', 'producto_id'], unique=False)
+        op.create_index(op.f('ix_detalles_venta_created_at'), 'detalles_venta', ['created_at'], unique=False)
+        op.create_index(op.f('ix_detalles_venta_lote_id'), 'detalles_venta', ['lote_id'], unique=False)
+        op.create_index(op.f('ix_detalles_venta_producto_id'), 'detalles_venta', ['producto_id'], unique=False)
+        op.create_index(op.f('ix_detalles_venta_venta_id'), 'detalles_venta', ['venta_id'], unique=False)
+
+    if _crear_tabla('devoluciones'):
+        op.create_table('devoluciones',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('venta_id', sa.Integer(), nullable=False),
+            sa.Column('admin_id', sa.Integer(), nullable=False),
+            sa.Column('vendedor_id', sa.Integer(), nullable=False),
+            sa.Column('motivo', sa.String(length=200), nullable=False),
+            sa.Column('observaciones', sa.Text(), nullable=True),
+            sa.Column('monto_devuelto', sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column('fecha', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['admin_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['vendedor_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['venta_id'], ['ventas.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if _crear_tabla('movimientos_stock'):
+        op.create_table('movimientos_stock',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('tipo', sa.String(length=20), nullable=False),
+            sa.Column('producto_id', sa.Integer(), nullable=False),
+            sa.Column('lote_id', sa.Integer(), nullable=True),
+            sa.Column('usuario_id', sa.Integer(), nullable=False),
+            sa.Column('venta_id', sa.Integer(), nullable=True),
+            sa.Column('cantidad', sa.Integer(), nullable=False),
+            sa.Column('stock_anterior', sa.Integer(), nullable=False),
+            sa.Column('stock_nuevo', sa.Integer(), nullable=False),
+            sa.Column('motivo', sa.String(length=100), nullable=True),
+            sa.Column('referencia', sa.String(length=100), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.CheckConstraint("tipo IN ('venta', 'compra', 'ajuste', 'devolucion', 'merma', 'ingreso_inicial')", name='check_tipo_valido'),
+            sa.CheckConstraint('cantidad != 0', name='check_cantidad_no_cero'),
+            sa.CheckConstraint('stock_anterior >= 0', name='check_stock_anterior_no_negativo'),
+            sa.CheckConstraint('stock_nuevo >= 0', name='check_stock_nuevo_no_negativo'),
+            sa.ForeignKeyConstraint(['lote_id'], ['lotes.id'], ),
+            sa.ForeignKeyConstraint(['producto_id'], ['products.id'], ),
+            sa.ForeignKeyConstraint(['usuario_id'], ['users.id'], ),
+            sa.ForeignKeyConstraint(['venta_id'], ['ventas.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_movimiento_created_at', 'movimientos_stock', ['created_at'], unique=False)
+        op.create_index('ix_movimiento_lote_id', 'movimientos_stock', ['lote_id'], unique=False)
+        op.create_index('ix_movimiento_producto_fecha', 'movimientos_stock', ['producto_id', 'created_at'], unique=False)
+        op.create_index('ix_movimiento_producto_id', 'movimientos_stock', ['producto_id'], unique=False)
+        op.create_index('ix_movimiento_producto_tipo', 'movimientos_stock', ['producto_id', 'tipo'], unique=False)
+        op.create_index('ix_movimiento_tipo', 'movimientos_stock', ['tipo'], unique=False)
+        op.create_index('ix_movimiento_tipo_fecha', 'movimientos_stock', ['tipo', 'created_at'], unique=False)
+        op.create_index('ix_movimiento_usuario_id', 'movimientos_stock', ['usuario_id'], unique=False)
+        op.create_index('ix_movimiento_venta_id', 'movimientos_stock', ['venta_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_movimiento_venta_id', table_name='movimientos_stock')
+    op.drop_index('ix_movimiento_usuario_id', table_name='movimientos_stock')
+    op.drop_index('ix_movimiento_tipo_fecha', table_name='movimientos_stock')
+    op.drop_index('ix_movimiento_tipo', table_name='movimientos_stock')
+    op.drop_index('ix_movimiento_producto_tipo', table_name='movimientos_stock')
+    op.drop_index('ix_movimiento_producto_id', table_name='movimientos_stock')
+    op.drop_index('ix_movimiento_producto_fecha', table_name='movimientos_stock')
+    op.drop_index('ix_movimiento_lote_id', table_name='movimientos_stock')
+    op.drop_index('ix_movimiento_created_at', table_name='movimientos_stock')
+    op.drop_table('movimientos_stock')
+    op.drop_table('devoluciones')
+    op.drop_index(op.f('ix_detalles_venta_venta_id'), table_name='detalles_venta')
+    op.drop_index(op.f('ix_detalles_venta_producto_id'), table_name='detalles_venta')
+    op.drop_index(op.f('ix_detalles_venta_lote_id'), table_name='detalles_venta')
+    op.drop_index(op.f('ix_detalles_venta_created_at'), table_name='detalles_venta')
+    op.drop_index('idx_venta_producto', table_name='detalles_venta')
+    op.drop_index('idx_producto_fecha', table_name='detalles_venta')
+    op.drop_table('detalles_venta')
+    op.drop_index(op.f('ix_ventas_vendedor_id'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_synced'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_numero_venta'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_metodo_pago'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_fecha'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_estado'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_devuelta'), table_name='ventas')
+    op.drop_index(op.f('ix_ventas_cuadro_caja_id'), table_name='ventas')
+    op.drop_index('idx_metodo_pago_fecha', table_name='ventas')
+    op.drop_index('idx_fecha_vendedor', table_name='ventas')
+    op.drop_index('idx_estado_synced', table_name='ventas')
+    op.drop_table('ventas')
+    op.drop_index('ix_tarea_reconciliacion_estado_lote', table_name='tareas_reconciliacion')
+    op.drop_table('tareas_reconciliacion')
+    op.drop_index('ix_snapshot_stock_corte_producto', table_name='snapshots_stock')
+    op.drop_table('snapshots_stock')
+    op.drop_index('ix_contador_stock_lote', table_name='contadores_stock')
+    op.drop_table('contadores_stock')
+    op.drop_table('ajustes_inventario')
+    op.drop_index('ix_operacion_masiva_tipo_fecha', table_name='operaciones_masivas')
+    op.drop_table('operaciones_masivas')
+    op.drop_index(op.f('ix_lotes_producto_id'), table_name='lotes')
+    op.drop_index(op.f('ix_lotes_fecha_vencimiento'), table_name='lotes')
+    op.drop_index(op.f('ix_lotes_codigo_lote'), table_name='lotes')
+    op.drop_index(op.f('ix_lotes_activo'), table_name='lotes')
+    op.drop_index('idx_producto_vencimiento', table_name='lotes')
+    op.drop_index('idx_producto_activo', table_name='lotes')
+    op.drop_table('lotes')
+    op.drop_index(op.f('ix_cuadros_caja_vendedor_id'), table_name='cuadros_caja')
+    op.drop_index(op.f('ix_cuadros_caja_numero_turno'), table_name='cuadros_caja')
+    op.drop_index(op.f('ix_cuadros_caja_fecha_apertura'), table_name='cuadros_caja')
+    op.drop_index(op.f('ix_cuadros_caja_estado'), table_name='cuadros_caja')
+    op.drop_index('idx_vendedor_fecha', table_name='cuadros_caja')
+    op.drop_index('idx_estado_fecha', table_name='cuadros_caja')
+    op.drop_table('cuadros_caja')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_rol'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_index(op.f('ix_users_activo'), table_name='users')
+    op.drop_index('idx_rol_activo', table_name='users')
+    op.drop_table('users')
+    op.drop_index('ix_sync_tabla_registro', table_name='sync_queue')
+    op.drop_index('ix_sync_tabla_operacion', table_name='sync_queue')
+    op.drop_index('ix_sync_tabla', table_name='sync_queue')
+    op.drop_index('ix_sync_registro_id', table_name='sync_queue')
+    op.drop_index('ix_sync_procesado_created', table_name='sync_queue')
+    op.drop_index('ix_sync_procesado', table_name='sync_queue')
+    op.drop_index('ix_sync_pendientes', table_name='sync_queue')
+    op.drop_index('ix_sync_operacion', table_name='sync_queue')
+    op.drop_index('ix_sync_created_at', table_name='sync_queue')
+    op.drop_table('sync_queue')
+    op.drop_index(op.f('ix_products_nombre'), table_name='products')
+    op.drop_index(op.f('ix_products_codigo_barras'), table_name='products')
+    op.drop_index(op.f('ix_products_categoria'), table_name='products')
+    op.drop_index(op.f('ix_products_activo'), table_name='products')
+    op.drop_index('idx_categoria_activo', table_name='products')
+    op.drop_table('products')
+    op.drop_index('ix_catalogo_cambio_producto', table_name='catalogo_cambios')
+    op.drop_table('catalogo_cambios')
+    op.drop_index('ix_cache_codigo_expira', table_name='cache_codigos_barras')
+    op.drop_table('cache_codigos_barras')
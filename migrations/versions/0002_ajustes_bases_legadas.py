@@ -0,0 +1,83 @@
+"""Ajustes de bases anteriores a Alembic
+
+Reúne lo que antes hacían los scripts add_*/update_estado_constraint*.py y
+la auto-migración de create_app en cada arranque. Cada paso comprueba el
+estado actual, así que en una base creada por 0001 no hace nada.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# Identificadores de la revisión (Alembic)
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+ESTADOS_CUADRO_CAJA = "estado IN ('abierto', 'cerrado', 'pendiente_cierre')"
+
+# (tabla, columna) en el orden en que los scripts las fueron agregando
+COLUMNAS = [
+    ('users', sa.Column('hora_entrada', sa.String(length=5), nullable=True)),
+    ('users', sa.Column('hora_salida', sa.String(length=5), nullable=True)),
+    ('users', sa.Column('dias_trabajo', sa.String(length=50), nullable=True)),
+    ('detalles_venta', sa.Column('descuento_item', sa.Numeric(precision=10, scale=2),
+                                 nullable=False, server_default='0.00')),
+    ('detalles_venta', sa.Column('subtotal_final', sa.Numeric(precision=10, scale=2),
+                                 nullable=False, server_default='0.00')),
+    ('cuadros_caja', sa.Column('observaciones_rechazo', sa.Text(), nullable=True)),
+    ('movimientos_stock', sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                    server_default=sa.func.current_timestamp())),
+    ('ventas', sa.Column('cuadro_caja_id', sa.Integer(), nullable=True)),
+    ('sync_queue', sa.Column('siguiente_intento', sa.DateTime(), nullable=True)),
+    ('sync_queue', sa.Column('lease_owner', sa.String(length=64), nullable=True)),
+    ('sync_queue', sa.Column('lease_hasta', sa.DateTime(), nullable=True)),
+]
+
+
+def upgrade():
+    if context.is_offline_mode():
+        # Cada paso depende del estado de la base: no hay SQL fijo que mostrar
+        return
+
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    postgres = bind.dialect.name == 'postgresql'
+
+    for tabla, columna in COLUMNAS:
+        existentes = {c['name'] for c in inspector.get_columns(tabla)}
+        if columna.name not in existentes:
+            op.add_column(tabla, columna)
+
+    if postgres:
+        # SQLite no tiene ALTER ... CONSTRAINT; las bases locales ya la crean con create_all
+        constraints = {c['name']: c['sqltext'] for c in inspector.get_check_constraints('cuadros_caja')}
+        if 'pendiente_cierre' not in (constraints.get('check_estado_valido') or ''):
+            op.execute('ALTER TABLE cuadros_caja DROP CONSTRAINT IF EXISTS check_estado_valido')
+            op.create_check_constraint('check_estado_valido', 'cuadros_caja', ESTADOS_CUADRO_CAJA)
+
+        claves = {fk['name'] for fk in inspector.get_foreign_keys('ventas')
+                  if fk['constrained_columns'] == ['cuadro_caja_id']}
+        if not claves:
+            op.create_foreign_key('ventas_cuadro_caja_id_fkey', 'ventas', 'cuadros_caja',
+                                  ['cuadro_caja_id'], ['id'])
+
+    indices = {i['name'] for i in inspector.get_indexes('ventas')}
+    if not indices & {'ix_ventas_cuadro_caja_id', 'idx_ventas_cuadro_caja_id'}:
+        op.create_index(op.f('ix_ventas_cuadro_caja_id'), 'ventas', ['cuadro_caja_id'], unique=False)
+
+    indices = {i['name'] for i in inspector.get_indexes('sync_queue')}
+    if 'ix_sync_pendientes' not in indices:
+        op.create_index('ix_sync_pendientes', 'sync_queue', ['created_at', 'id'], unique=False,
+                        postgresql_where=sa.text('procesado = false'),
+                        sqlite_where=sa.text('procesado = 0'))
+
+
+def downgrade():
+    # Las bases legadas no tienen un estado anterior único al que volver
+    pass
@@ -0,0 +1,42 @@
+"""Lista de tokens revocados
+
+Tabla tokens_revocados para el logout con revocación por jti. En
+desarrollo create_all puede haberla creado antes de migrar: solo se crea
+si falta.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# Identificadores de la revisión (Alembic)
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not context.is_offline_mode() and 'tokens_revocados' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('tokens_revocados',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('jti', sa.String(length=64), nullable=False, comment='Identificador único del token (claim jti)'),
+        sa.Column('tipo', sa.String(length=10), nullable=False, comment='Tipo de token: access o refresh'),
+        sa.Column('user_id', sa.Integer(), nullable=True, comment='Usuario dueño del token'),
+        sa.Column('expira_en', sa.DateTime(), nullable=False, comment='Expiración del token en UTC'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, comment='Fecha de revocación en UTC'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('jti')
+    )
+    op.create_index('ix_token_revocado_expira', 'tokens_revocados', ['expira_en'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_token_revocado_expira', table_name='tokens_revocados')
+    op.drop_table('tokens_revocados')
@@ -0,0 +1,52 @@
+"""Versión del catálogo en orden de commit
+
+Contador catalogo_version (una fila) y columna catalogo_cambios.version.
+La versión deja de ser el id de la bitácora, que se asigna al insertar y
+no al hacer commit. Las filas existentes toman version = id. En desarrollo
+create_all puede haber creado la tabla antes de migrar: cada paso
+comprueba el estado actual.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# Identificadores de la revisión (Alembic)
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+    if inspector is None or 'catalogo_version' not in inspector.get_table_names():
+        op.create_table('catalogo_version',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False, comment='Última versión del catálogo asignada'),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if inspector is None or 'version' not in {c['name'] for c in inspector.get_columns('catalogo_cambios')}:
+        op.add_column('catalogo_cambios', sa.Column('version', sa.Integer(), nullable=False, server_default='0',
+                                                    comment='Versión del catálogo (orden de commit)'))
+        op.execute('UPDATE catalogo_cambios SET version = id')
+        op.create_index('ix_catalogo_cambio_version', 'catalogo_cambios', ['version', 'producto_id'], unique=False)
+
+    op.execute(
+        'INSERT INTO catalogo_version (id, version) '
+        'SELECT 1, (SELECT COALESCE(MAX(version), 0) FROM catalogo_cambios) '
+        'WHERE NOT EXISTS (SELECT 1 FROM catalogo_version WHERE id = 1)'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_catalogo_cambio_version', table_name='catalogo_cambios')
+    with op.batch_alter_table('catalogo_cambios') as batch_op:
+        batch_op.drop_column('version')
+    op.drop_table('catalogo_version')
@@ -0,0 +1,41 @@
+"""Trabajos de importación de productos
+
+Tabla trabajos_importacion con el estado de las importaciones en segundo
+plano (antes en memoria de cada worker). En desarrollo create_all puede
+haberla creado antes de migrar: solo se crea si falta.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# Identificadores de la revisión (Alembic)
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not context.is_offline_mode() and 'trabajos_importacion' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('trabajos_importacion',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('estado', sa.String(length=20), nullable=False, comment='en_proceso, completado o fallido'),
+        sa.Column('resultado', sa.Text(), nullable=True, comment='Reporte de la importación (JSON)'),
+        sa.Column('error', sa.Text(), nullable=True, comment='Mensaje de error si el trabajo falló'),
+        sa.Column('creado_at', sa.DateTime(), nullable=False, comment='Inicio del trabajo'),
+        sa.Column('finalizado_at', sa.DateTime(), nullable=True, comment='Fin del trabajo'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_trabajo_importacion_finalizado', 'trabajos_importacion', ['finalizado_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_trabajo_importacion_finalizado', table_name='trabajos_importacion')
+    op.drop_table('trabajos_importacion')
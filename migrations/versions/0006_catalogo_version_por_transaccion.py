@@ -0,0 +1,51 @@
+"""Versión del catálogo por transacción
+
+Elimina el contador catalogo_version: su fila quedaba bloqueada hasta el
+commit de cada venta. La versión de catalogo_cambios pasa a ser el id de
+la transacción en PostgreSQL (BIGINT) y max + 1 en SQLite.
+
+Las versiones ya registradas venían del contador, que avanza como mucho
+unas pocas veces por transacción: quedan por debajo de los ids de
+transacción que se asignen desde ahora.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# Identificadores de la revisión (Alembic)
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if context.is_offline_mode() or 'catalogo_version' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('catalogo_version')
+
+    if op.get_context().dialect.name == 'postgresql':
+        op.alter_column('catalogo_cambios', 'version',
+                        existing_type=sa.Integer(), type_=sa.BigInteger(), existing_nullable=False,
+                        comment='Versión del catálogo (id de la transacción que registró el cambio)',
+                        existing_comment='Versión del catálogo (orden de commit)')
+
+
+def downgrade():
+    if op.get_context().dialect.name == 'postgresql':
+        op.alter_column('catalogo_cambios', 'version',
+                        existing_type=sa.BigInteger(), type_=sa.Integer(), existing_nullable=False,
+                        comment='Versión del catálogo (orden de commit)',
+                        existing_comment='Versión del catálogo (id de la transacción que registró el cambio)')
+
+    op.create_table('catalogo_version',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, comment='Última versión del catálogo asignada'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO catalogo_version (id, version) '
+               'SELECT 1, (SELECT COALESCE(MAX(version), 0) FROM catalogo_cambios)')
@@ -39,3 +39,52 @@ def runner(app):
     Fixture que proporciona un runner CLI para tests
     """
     return app.test_cli_runner()
+
+
+@pytest.fixture
+def auth_headers(app, request):
+    """
+    Fixture que proporciona el header Authorization de un usuario real
+
+    El rol es 'vendedor' por defecto; se cambia parametrizando el fixture:
+        @pytest.mark.parametrize('auth_headers', ['admin'], indirect=True)
+    """
+    from flask_jwt_extended import create_access_token
+    from app.models.user import User
+
+    rol = getattr(request, 'param', 'vendedor')
+    usuario = User(username=f'{rol}_test', email=f'{rol}_test@katita.pe',
+                   nombre_completo=f'Usuario {rol}', rol=rol)
+    usuario.set_password('Test1234')
+    db.session.add(usuario)
+    db.session.commit()
+
+    token = create_access_token(identity=str(usuario.id),
+                                additional_claims={'username': usuario.username, 'rol': rol})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def invariante_stock(app):
+    """
+    Fixture opt-in que verifica stock_total == SUM(lotes) después de cada commit
+
+    Los descuadres se acumulan y se reportan al final del test: un assert
+    dentro del commit quedaría oculto por los try/except de los endpoints.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    from app.services.stock_service import detectar_descuadres
+
+    descuadres = []
+
+    def verificar(session):
+        # Después del commit la sesión no puede emitir SQL: usar otra conexión
+        with db.engine.connect() as conexion:
+            descuadres.extend(detectar_descuadres(conexion=conexion))
+
+    event.listen(Session, 'after_commit', verificar)
+    yield
+    event.remove(Session, 'after_commit', verificar)
+
+    assert not descuadres, f'stock_total descuadrado tras commit: {descuadres}'
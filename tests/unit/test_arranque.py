@@ -0,0 +1,41 @@
+"""
+KATITA-POS - Arranque Tests
+===========================
+Tests de la carga diferida de las dependencias de reportes
+"""
+
+import os
+import subprocess
+import sys
+from io import BytesIO
+from flask_jwt_extended import create_access_token
+
+CODIGO = (
+    "import sys; from app import create_app; create_app('testing'); "
+    "print('cargados=' + ','.join(sorted(m for m in ('matplotlib', 'reportlab', 'openpyxl') if m in sys.modules)))"
+)
+
+
+def test_create_app_no_importa_dependencias_de_reportes():
+    """Test: matplotlib, reportlab y openpyxl no se cargan al crear la app"""
+    raiz = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    resultado = subprocess.run([sys.executable, '-c', CODIGO], cwd=raiz,
+                               capture_output=True, text=True, check=True)
+    assert resultado.stdout.strip().splitlines()[-1] == 'cargados='
+
+
+def test_exportar_excel_carga_openpyxl_al_usarse(client, app):
+    """Test: El export Excel importa su generador en la primera llamada y retorna un .xlsx válido"""
+    from openpyxl import load_workbook
+
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'rol': 'admin'})
+
+    response = client.get('/api/ventas/reportes/excel?fecha_inicio=2026-01-01&fecha_fin=2026-01-31',
+                          headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert response.headers['Content-Disposition'].endswith('reporte_ventas_2026-01-01_2026-01-31.xlsx')
+
+    hoja = load_workbook(BytesIO(response.data)).active
+    assert hoja['A1'].value == 'KATITA POS - Reporte de Ventas'
+    assert hoja['B5'].value == '0 ventas'
@@ -0,0 +1,114 @@
+"""
+KATITA-POS - Servicio de Autenticación Tests
+============================================
+Tests del pool de bcrypt, el rehash al loguear y los intentos fallidos en memoria
+"""
+
+import threading
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+from app.services import auth_service
+
+
+@pytest.fixture
+def cajera(app):
+    """Fixture: Usuario vendedor con contraseña conocida"""
+    auth_service.reiniciar_intentos()
+    auth_service.cerrar_pool()
+    usuario = User(username='cajera1', email='cajera1@katita.pe', nombre_completo='Cajera Uno', rol='vendedor')
+    usuario.set_password('secreta123')
+    db.session.add(usuario)
+    db.session.commit()
+    yield usuario
+    auth_service.reiniciar_intentos()
+    auth_service.cerrar_pool()
+
+
+def _login(client, password):
+    return client.post('/api/auth/login', json={'username': 'cajera1', 'password': password})
+
+
+def test_intentos_fallidos_solo_escriben_al_bloquear(client, app, cajera):
+    """Test: Los fallos se cuentan en memoria; el quinto bloquea y es el único UPDATE a users"""
+    updates = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE users'):
+            updates.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        for restantes in (4, 3, 2, 1):
+            response = _login(client, 'incorrecta')
+            assert response.status_code == 401
+            assert response.get_json()['errors']['intentos_restantes'] == restantes
+        assert updates == []
+
+        response = _login(client, 'incorrecta')
+        assert response.status_code == 401
+        assert len(updates) == 1
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    db.session.expire_all()
+    assert cajera.bloqueado_hasta is not None
+    assert cajera.activo is False
+    assert cajera.intentos_login_fallidos == 5
+
+
+def test_login_rehace_hash_con_otro_costo(client, app, cajera):
+    """Test: Un hash con costo distinto de BCRYPT_ROUNDS se rehace en el login correcto"""
+    app.config['BCRYPT_ROUNDS'] = 5
+    response = _login(client, 'secreta123')
+    assert response.status_code == 200
+
+    db.session.expire_all()
+    assert auth_service.costo_hash(cajera.password_hash) == 5
+    assert cajera.check_password('secreta123')
+
+
+def test_pool_saturado_responde_503(client, app, cajera):
+    """Test: Sin cupo en el pool de bcrypt el login falla rápido con 503"""
+    app.config['BCRYPT_MAX_PENDIENTES'] = 1
+    app.config['BCRYPT_ESPERA_SEGUNDOS'] = 0.05
+
+    liberar = threading.Event()
+    ocupado = threading.Event()
+
+    def bloquear_cupo():
+        with app.app_context():
+            auth_service._ejecutar(lambda: (ocupado.set(), liberar.wait(5)))
+
+    hilo = threading.Thread(target=bloquear_cupo)
+    hilo.start()
+    try:
+        ocupado.wait(5)
+        response = _login(client, 'secreta123')
+        assert response.status_code == 503
+    finally:
+        liberar.set()
+        hilo.join()
+
+    assert _login(client, 'secreta123').status_code == 200
+
+
+def test_cambio_de_password_usa_el_pool(client, app, cajera, monkeypatch):
+    """Test: El cambio de contraseña del perfil verifica y hashea en el pool con BCRYPT_ROUNDS"""
+    token = _login(client, 'secreta123').get_json()['data']['access_token']
+    app.config['BCRYPT_ROUNDS'] = 5
+
+    llamadas = []
+    ejecutar = auth_service._ejecutar
+    monkeypatch.setattr(auth_service, '_ejecutar',
+                        lambda funcion, *args: llamadas.append(funcion.__name__) or ejecutar(funcion, *args))
+
+    response = client.put('/api/auth/profile', headers={'Authorization': f'Bearer {token}'},
+                          json={'current_password': 'secreta123', 'new_password': 'nueva4567'})
+    assert response.status_code == 200
+    assert llamadas[0] == '_checkpw' and llamadas[-1] == '_hashpw'
+
+    db.session.expire_all()
+    assert auth_service.costo_hash(cajera.password_hash) == 5
+    assert _login(client, 'nueva4567').status_code == 200
@@ -0,0 +1,79 @@
+"""
+KATITA-POS - Barcode Batch Tests
+================================
+Tests para la búsqueda POS de varios códigos de barras en una petición
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, timedelta
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+
+
+@pytest.fixture
+def productos(app):
+    """Fixture: Un producto con lote, uno sin stock y uno inactivo"""
+    with app.app_context():
+        con_stock = Product(
+            codigo_barras='7750182001878', nombre='Coca Cola 500ml', categoria='Bebidas',
+            precio_compra=Decimal('2.00'), precio_venta=Decimal('3.50'), stock_total=24
+        )
+        sin_stock = Product(
+            codigo_barras='7755139002015', nombre='Inca Kola 500ml', categoria='Bebidas',
+            precio_compra=Decimal('2.00'), precio_venta=Decimal('3.00')
+        )
+        inactivo = Product(
+            codigo_barras='7751271001234', nombre='Galleta Soda', categoria='Snacks',
+            precio_compra=Decimal('0.50'), precio_venta=Decimal('1.00'), activo=False
+        )
+        db.session.add_all([con_stock, sin_stock, inactivo])
+        db.session.flush()
+
+        db.session.add(Lote(
+            producto_id=con_stock.id,
+            codigo_lote='LOTE-001',
+            cantidad_inicial=24,
+            fecha_vencimiento=date.today() + timedelta(days=60),
+            precio_compra_lote=Decimal('2.00')
+        ))
+        db.session.commit()
+
+
+def test_batch_estados_por_codigo(client, productos, auth_headers):
+    """Test: Cada código recibe su estado y los contadores cuadran"""
+    response = client.post('/api/products/barcode/batch', headers=auth_headers, json={
+        'codigos': ['7750182001878', '7755139002015', '7751271001234', '0000000000000']
+    })
+    assert response.status_code == 200
+
+    data = response.get_json()['data']
+    resultados = data['resultados']
+
+    assert resultados['7750182001878']['estado'] == 'encontrado'
+    assert resultados['7755139002015']['estado'] == 'encontrado'
+    assert resultados['7755139002015']['warning'] == 'Producto sin stock disponible'
+    assert resultados['7751271001234'] == {'estado': 'inactivo', 'data': None}
+    assert resultados['0000000000000'] == {'estado': 'no_encontrado', 'data': None}
+    assert (data['encontrados'], data['inactivos'], data['no_encontrados']) == (2, 1, 1)
+
+
+def test_batch_mismo_payload_que_individual(client, productos, auth_headers):
+    """Test: El payload por producto es idéntico al del endpoint individual"""
+    individual = client.get('/api/products/barcode/7750182001878', headers=auth_headers)
+    batch = client.post('/api/products/barcode/batch', headers=auth_headers, json={
+        'codigos': ['7750182001878']
+    })
+
+    esperado = individual.get_json()['data']
+    obtenido = batch.get_json()['data']['resultados']['7750182001878']['data']
+
+    assert obtenido == esperado
+    assert obtenido['lote_siguiente_fifo']['codigo_lote'] == 'LOTE-001'
+
+
+def test_batch_valida_lista(client, auth_headers):
+    """Test: Se rechaza un body sin lista de códigos"""
+    response = client.post('/api/products/barcode/batch', headers=auth_headers, json={'codigos': 'x'})
+    assert response.status_code == 422
@@ -0,0 +1,139 @@
+"""
+KATITA-POS - Barcode Lookup Service Tests
+=========================================
+Tests para la caché de búsquedas externas por código de barras
+"""
+
+import threading
+import time
+import pytest
+from app.models.cache_codigo_barras import CacheCodigoBarras
+from app.services import barcode_lookup_service
+from app.services.barcode_lookup_service import (
+    ProveedorCodigos, ProveedorJSONLocal, ProveedorTimeout, configurar_proveedor
+)
+
+
+class ProveedorContador(ProveedorCodigos):
+    """Proveedor de prueba que cuenta llamadas y puede demorar o fallar"""
+
+    nombre = 'contador'
+
+    def __init__(self, datos=None, demora=0, error=None):
+        self.local = ProveedorJSONLocal(datos=datos or {})
+        self.demora = demora
+        self.error = error
+        self.llamadas = 0
+
+    def buscar(self, codigo_barras):
+        self.llamadas += 1
+        time.sleep(self.demora)
+        if self.error:
+            raise self.error
+        return self.local.buscar(codigo_barras)
+
+
+DATASET = {
+    '7750182001878': {'nombre': 'Coca Cola 500ml', 'marca': 'Coca-Cola', 'categoria': 'beverages'}
+}
+
+
+def test_entrada_positiva_se_cachea(app):
+    """Test: La segunda búsqueda del mismo código no llama al proveedor"""
+    proveedor = ProveedorContador(DATASET)
+    configurar_proveedor(app, proveedor)
+
+    with app.app_context():
+        primero = barcode_lookup_service.buscar_codigo('7750182001878')
+        segundo = barcode_lookup_service.buscar_codigo('7750182001878')
+
+        assert primero['encontrado'] is True
+        assert primero['cache'] is False
+        assert segundo['cache'] is True
+        assert segundo['datos']['nombre'] == 'Coca Cola 500ml'
+        assert proveedor.llamadas == 1
+
+
+def test_entrada_negativa_se_cachea_con_ttl(app):
+    """Test: Los 'no encontrado' también se cachean con su propio TTL"""
+    app.config['BARCODE_CACHE_TTL_NEGATIVO'] = 60
+    proveedor = ProveedorContador(DATASET)
+    configurar_proveedor(app, proveedor)
+
+    with app.app_context():
+        assert barcode_lookup_service.buscar_codigo('0000000000000')['encontrado'] is False
+        assert barcode_lookup_service.buscar_codigo('0000000000000')['cache'] is True
+        assert proveedor.llamadas == 1
+
+        entrada = CacheCodigoBarras.query.filter_by(codigo_barras='0000000000000').first()
+        assert entrada.encontrado is False
+        assert entrada.esta_vigente()
+
+
+def test_entrada_expirada_vuelve_a_consultar(app):
+    """Test: Una entrada con TTL vencido se ignora"""
+    app.config['BARCODE_CACHE_TTL_POSITIVO'] = -1
+    proveedor = ProveedorContador(DATASET)
+    configurar_proveedor(app, proveedor)
+
+    with app.app_context():
+        barcode_lookup_service.buscar_codigo('7750182001878')
+        barcode_lookup_service.buscar_codigo('7750182001878')
+        assert proveedor.llamadas == 2
+
+
+def test_errores_del_proveedor_no_se_cachean(app):
+    """Test: Un timeout se propaga y no deja entrada en caché"""
+    configurar_proveedor(app, ProveedorContador(error=ProveedorTimeout('lento')))
+
+    with app.app_context():
+        with pytest.raises(ProveedorTimeout):
+            barcode_lookup_service.buscar_codigo('7750182001878')
+        assert CacheCodigoBarras.query.count() == 0
+
+
+def test_single_flight_una_sola_consulta(app):
+    """Test: Búsquedas simultáneas del mismo código comparten una consulta"""
+    proveedor = ProveedorContador(DATASET, demora=0.2)
+    configurar_proveedor(app, proveedor)
+    resultados = []
+
+    def buscar():
+        with app.app_context():
+            resultados.append(barcode_lookup_service._buscar_una_vez(
+                '7750182001878', lambda: proveedor.buscar('7750182001878')
+            ))
+
+    hilos = [threading.Thread(target=buscar) for _ in range(5)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert proveedor.llamadas == 1
+    assert len(resultados) == 5
+    assert all(r['nombre'] == 'Coca Cola 500ml' for r in resultados)
+
+
+def test_endpoint_usa_cache(client, app):
+    """Test: El endpoint mantiene el formato de respuesta original"""
+    configurar_proveedor(app, ProveedorContador(DATASET))
+
+    response = client.get('/api/products/buscar-barcode/7750182001878')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['encontrado'] is True
+    assert data['nombre'] == 'Coca Cola 500ml'
+    assert data['barcode'] == '7750182001878'
+
+    response = client.get('/api/products/buscar-barcode/123')
+    assert response.status_code == 400
+
+
+def test_proveedor_sin_buscar_no_se_instancia():
+    """Test: Un proveedor que no implementa buscar falla al crearse, no en la primera búsqueda"""
+    class ProveedorIncompleto(ProveedorCodigos):
+        nombre = 'incompleto'
+
+    with pytest.raises(TypeError):
+        ProveedorIncompleto()
@@ -0,0 +1,174 @@
+"""
+KATITA-POS - Catálogo POS Tests
+===============================
+Tests para el snapshot versionado del catálogo y la bitácora de cambios
+"""
+
+import gzip
+import json
+import pytest
+from decimal import Decimal
+from datetime import date, timedelta
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.catalogo_cambio import CatalogoCambio
+from app.services import catalogo_service
+
+
+@pytest.fixture
+def producto(app):
+    """Fixture: Producto activo con dos lotes (el que vence antes es la cabeza FIFO)"""
+    with app.app_context():
+        product = Product(
+            codigo_barras='7750182001878',
+            nombre='Coca Cola 500ml',
+            categoria='Bebidas',
+            precio_compra=Decimal('2.00'),
+            precio_venta=Decimal('3.50'),
+            stock_total=30
+        )
+        db.session.add(product)
+        db.session.flush()
+
+        db.session.add_all([
+            Lote(
+                producto_id=product.id,
+                codigo_lote='LOTE-TARDE',
+                cantidad_inicial=20,
+                fecha_vencimiento=date.today() + timedelta(days=90),
+                precio_compra_lote=Decimal('2.00')
+            ),
+            Lote(
+                producto_id=product.id,
+                codigo_lote='LOTE-PRONTO',
+                cantidad_inicial=10,
+                fecha_vencimiento=date.today() + timedelta(days=10),
+                precio_compra_lote=Decimal('2.00')
+            ),
+        ])
+        db.session.commit()
+        return product.id
+
+
+def test_snapshot_incluye_lote_cabeza_fifo(app, producto):
+    """Test: El snapshot trae el lote que vence primero"""
+    with app.app_context():
+        data = catalogo_service.obtener_snapshot()
+
+        assert data['version'] > 0
+        assert len(data['productos']) == 1
+
+        fila = dict(zip(data['columnas'], data['productos'][0]))
+        assert fila['id'] == producto
+        assert fila['precio_venta'] == 3.5
+        assert fila['codigo_lote'] == 'LOTE-PRONTO'
+        assert fila['lote_cantidad'] == 10
+
+
+def test_escrituras_incrementan_version(app, producto):
+    """Test: Modificar un lote agrega una versión para su producto"""
+    with app.app_context():
+        version = CatalogoCambio.version_actual()
+
+        lote = Lote.query.filter_by(codigo_lote='LOTE-PRONTO').first()
+        lote.descontar_stock(4)
+        db.session.commit()
+
+        assert CatalogoCambio.version_actual() > version
+        assert CatalogoCambio.productos_cambiados_desde(version) == [producto]
+
+
+def test_version_en_orden_de_commit(app, producto):
+    """Test: Una versión por transacción, sin contador compartido ni id de la bitácora"""
+    with app.app_context():
+        version = CatalogoCambio.version_actual()
+
+        # Una transacción que se deshace no consume versión (un id de secuencia sí)
+        CatalogoCambio.registrar([producto], 'products')
+        db.session.rollback()
+        assert CatalogoCambio.version_actual() == version
+
+        # Una transacción = una versión, sin importar cuántos flushes o productos toque
+        db.session.get(Product, producto).precio_venta = Decimal('4.00')
+        db.session.flush()
+        otro = Product(codigo_barras='7755139002015', nombre='Inca Kola 500ml', categoria='Bebidas',
+                       precio_compra=Decimal('2.00'), precio_venta=Decimal('3.00'))
+        db.session.add(otro)
+        db.session.flush()
+        CatalogoCambio.registrar([producto], 'reparacion_stock')
+        db.session.commit()
+        assert CatalogoCambio.version_actual() == version + 1
+        assert sorted(CatalogoCambio.productos_cambiados_desde(version)) == [producto, otro.id]
+        assert {c.version for c in CatalogoCambio.query.filter(CatalogoCambio.version > version)} == {version + 1}
+
+
+def test_cambios_no_pasan_de_la_marca_publicada(app, producto, monkeypatch):
+    """Test: Un cambio por encima de la versión publicada se entrega en el siguiente delta"""
+    with app.app_context():
+        marca = CatalogoCambio.version_actual()
+        db.session.get(Product, producto).precio_venta = Decimal('4.00')
+        db.session.commit()
+
+        # Marca retenida por una transacción en curso (PostgreSQL): el cambio aún no se publica
+        monkeypatch.setattr(CatalogoCambio, 'version_actual', classmethod(lambda cls: marca))
+        retenido = catalogo_service.obtener_cambios(marca)
+        assert retenido['version'] == marca
+        assert retenido['productos'] == []
+
+        monkeypatch.undo()
+        cambios = catalogo_service.obtener_cambios(retenido['version'])
+        assert [fila[0] for fila in cambios['productos']] == [producto]
+
+
+def test_cambios_desde_version(app, producto):
+    """Test: El delta solo trae productos modificados y marca los inactivos"""
+    with app.app_context():
+        otro = Product(
+            codigo_barras='7755139002015',
+            nombre='Inca Kola 500ml',
+            categoria='Bebidas',
+            precio_compra=Decimal('2.00'),
+            precio_venta=Decimal('3.00')
+        )
+        db.session.add(otro)
+        db.session.commit()
+        version = CatalogoCambio.version_actual()
+
+        sin_cambios = catalogo_service.obtener_cambios(version)
+        assert sin_cambios['productos'] == []
+        assert sin_cambios['eliminados'] == []
+
+        db.session.get(Product, producto).precio_venta = Decimal('4.00')
+        otro.desactivar()
+        db.session.commit()
+
+        cambios = catalogo_service.obtener_cambios(version)
+        assert [fila[0] for fila in cambios['productos']] == [producto]
+        assert cambios['productos'][0][4] == 4.0
+        assert cambios['eliminados'] == [otro.id]
+
+
+def test_endpoint_catalogo_gzip_y_etag(client, producto, auth_headers):
+    """Test: El endpoint comprime con gzip y responde 304 con la misma versión"""
+    response = client.get(
+        '/api/pos/catalog',
+        headers={**auth_headers, 'Accept-Encoding': 'gzip'}
+    )
+    assert response.status_code == 200
+
+    cuerpo = response.data
+    if response.headers.get('Content-Encoding') == 'gzip':
+        cuerpo = gzip.decompress(cuerpo)
+    payload = json.loads(cuerpo)
+    assert payload['data']['productos'][0][0] == producto
+
+    etag = response.headers['ETag']
+    response = client.get('/api/pos/catalog', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_endpoint_cambios_valida_since(client, auth_headers):
+    """Test: since debe ser un entero no negativo"""
+    response = client.get('/api/pos/catalog/changes?since=abc', headers=auth_headers)
+    assert response.status_code == 422
@@ -0,0 +1,90 @@
+"""
+KATITA-POS - Devoluciones Tests
+===============================
+Tests de la reposición de stock en lotes al devolver una venta
+"""
+
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.user import User
+from app.models.venta import Venta
+from app.models.detalle_venta import DetalleVenta
+from app.models.movimiento_stock import MovimientoStock
+
+
+@pytest.fixture
+def venta_devolver(app):
+    """Fixture: Venta de 3 unidades; una línea con lote y otra sin lote (datos antiguos)"""
+    admin = User(username='admin', email='admin@katita.com', nombre_completo='Admin', rol='admin')
+    admin.set_password('Admin123')
+    producto = Product(codigo_barras='7750182001878', nombre='Coca Cola 500ml', categoria='Bebidas',
+                       precio_compra=Decimal('2.00'), precio_venta=Decimal('3.50'), stock_total=7)
+    db.session.add_all([admin, producto])
+    db.session.flush()
+
+    pronto = Lote(producto_id=producto.id, codigo_lote='LOTE-PRONTO', cantidad_inicial=5,
+                  fecha_vencimiento=date.today() + timedelta(days=10), precio_compra_lote=Decimal('2.00'))
+    tarde = Lote(producto_id=producto.id, codigo_lote='LOTE-TARDE', cantidad_inicial=5,
+                 fecha_vencimiento=date.today() + timedelta(days=90), precio_compra_lote=Decimal('2.00'))
+    db.session.add_all([pronto, tarde])
+    db.session.flush()
+    pronto.cantidad_actual = 4
+    tarde.cantidad_actual = 3
+
+    venta = Venta(subtotal=Decimal('10.50'), total=Decimal('10.50'), metodo_pago='efectivo',
+                  monto_recibido=Decimal('20.00'), cambio=Decimal('9.50'), vendedor_id=admin.id)
+    venta.generar_numero_venta()
+    db.session.add(venta)
+    db.session.flush()
+    db.session.add_all([
+        DetalleVenta(venta_id=venta.id, producto_id=producto.id, lote_id=tarde.id, cantidad=2,
+                     precio_unitario=Decimal('3.50'), precio_compra=Decimal('2.00')),
+        DetalleVenta(venta_id=venta.id, producto_id=producto.id, lote_id=None, cantidad=1,
+                     precio_unitario=Decimal('3.50'), precio_compra=Decimal('2.00')),
+    ])
+    db.session.commit()
+
+    token = create_access_token(identity=str(admin.id), additional_claims={'username': 'admin', 'rol': 'admin'})
+    return venta.id, {'Authorization': f'Bearer {token}'}
+
+
+def test_devolucion_repone_lineas_sin_lote_en_fifo(client, app, venta_devolver):
+    """Test: La línea sin lote vuelve al lote FIFO y la respuesta informa lo realmente repuesto"""
+    venta_id, cabeceras = venta_devolver
+
+    response = client.post('/api/devoluciones/', headers=cabeceras,
+                           json={'venta_id': venta_id, 'motivo': 'Cliente insatisfecho'})
+    assert response.status_code == 201
+
+    revertido = response.get_json()['stock_revertido']
+    assert [(r['cantidad_vendida'], r['cantidad_devuelta'], r['cantidad_no_repuesta']) for r in revertido] == [
+        (2, 2, 0), (1, 1, 0)
+    ]
+
+    lotes = {l.codigo_lote: l.cantidad_actual for l in Lote.query.all()}
+    assert lotes == {'LOTE-PRONTO': 5, 'LOTE-TARDE': 5}
+    assert Product.query.first().stock_total == 10
+    assert MovimientoStock.query.filter_by(tipo='devolucion').count() == 2
+
+
+def test_devolucion_sin_espacio_en_lotes_se_informa(client, app, venta_devolver):
+    """Test: Si ningún lote puede recibir las unidades, la respuesta lo dice en lugar de inventarlas"""
+    venta_id, cabeceras = venta_devolver
+    for lote in Lote.query.all():
+        lote.cantidad_actual = lote.cantidad_inicial
+    Product.query.first().stock_total = 10
+    db.session.commit()
+
+    response = client.post('/api/devoluciones/', headers=cabeceras,
+                           json={'venta_id': venta_id, 'motivo': 'Cliente insatisfecho'})
+    assert response.status_code == 201
+
+    revertido = response.get_json()['stock_revertido']
+    assert sum(r['cantidad_devuelta'] for r in revertido) == 0
+    assert sum(r['cantidad_no_repuesta'] for r in revertido) == 3
+    assert Product.query.first().stock_total == 10
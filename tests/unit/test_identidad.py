@@ -0,0 +1,106 @@
+"""
+KATITA-POS - Identidad Tests
+============================
+Tests de la autorización por claims y de la carga diferida de current_user
+"""
+
+import pytest
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+from app import db
+from app.models.user import User
+from app.utils.identidad import current_user, invalidar_identidad
+
+
+@pytest.fixture
+def consultas_users(app):
+    """Fixture: Cuenta las consultas a la tabla users durante el test"""
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM users' in statement:
+            consultas.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', registrar)
+    invalidar_identidad()
+    yield consultas
+    event.remove(engine, 'before_cursor_execute', registrar)
+    invalidar_identidad()
+
+
+def _token(app, user_id, rol):
+    with app.app_context():
+        token = create_access_token(identity=str(user_id),
+                                    additional_claims={'username': f'u{user_id}', 'rol': rol})
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_autorizacion_por_claims_sin_consultar_usuarios(client, app, consultas_users):
+    """Test: cuadro-caja y usuarios rechazan por los claims del token, sin leer users"""
+    response = client.get('/api/cuadro-caja/turnos-abiertos', headers=_token(app, 98, 'vendedor'))
+    assert response.status_code == 403
+
+    response = client.get('/api/usuarios/', headers=_token(app, 98, 'vendedor'))
+    assert response.status_code == 403
+    assert consultas_users == []
+
+    response = client.get('/api/usuarios/')
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'authorization_required'
+
+
+def test_current_user_se_carga_una_vez_y_se_invalida(app, consultas_users):
+    """Test: current_user consulta la base solo al leerse; un cambio al usuario invalida la caché"""
+    usuario = User(username='cajera1', email='cajera1@katita.pe', password_hash='-',
+                   nombre_completo='Cajera Uno', rol='vendedor')
+    db.session.add(usuario)
+    db.session.commit()
+    cabeceras = _token(app, usuario.id, 'vendedor')
+    consultas_users.clear()
+
+    for _ in range(2):
+        with app.app_context(), app.test_request_context(headers=cabeceras):
+            verify_jwt_in_request()
+            assert current_user['nombre_completo'] == 'Cajera Uno'
+    assert len(consultas_users) == 1
+
+    usuario = db.session.get(User, usuario.id)
+    usuario.activo = False
+    db.session.commit()
+
+    with app.app_context(), app.test_request_context(headers=cabeceras):
+        verify_jwt_in_request()
+        assert current_user['activo'] is False
+    assert len(consultas_users) == 2
+
+    with app.app_context(), app.test_request_context(headers=_token(app, 12345, 'vendedor')):
+        verify_jwt_in_request()
+        assert not current_user
+
+
+def test_admin_degradado_o_desactivado_pierde_acceso(client, app, consultas_users):
+    """Test: Las rutas de administración confirman rol y activo con la identidad cacheada"""
+    admin = User(username='admin2', email='admin2@katita.pe', password_hash='-',
+                 nombre_completo='Admin Dos', rol='admin')
+    db.session.add(admin)
+    db.session.commit()
+    cabeceras = _token(app, admin.id, 'admin')
+    for ruta in ('/api/cuadro-caja/turnos-abiertos', '/api/usuarios/', '/api/sistema/sync'):
+        assert client.get(ruta, headers=cabeceras).status_code == 200
+
+    admin = db.session.get(User, admin.id)
+    admin.rol = 'vendedor'
+    db.session.commit()
+    assert client.get('/api/cuadro-caja/turnos-abiertos', headers=cabeceras).status_code == 403
+    assert client.get('/api/sistema/sync', headers=cabeceras).status_code == 403
+
+    admin = db.session.get(User, admin.id)
+    admin.rol = 'admin'
+    admin.activo = False
+    db.session.commit()
+    assert client.get('/api/cuadro-caja/turnos-pendientes', headers=cabeceras).status_code == 403
+    assert client.get('/api/usuarios/', headers=cabeceras).status_code == 403
+
+    response = client.get('/api/cuadro-caja/turnos-abiertos', headers=_token(app, 12345, 'admin'))
+    assert response.status_code == 403
@@ -0,0 +1,88 @@
+"""
+KATITA-POS - Proveedor JSON Tests
+=================================
+Tests de la serialización de Decimal/date/datetime con orjson y con la stdlib
+y de los to_dict que devuelven esos valores sin convertir
+"""
+
+import json
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from flask import jsonify, request
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.utils.json_provider import ProveedorJSON, ORJSON_SUPPORT
+
+DATOS = {
+    'total': Decimal('22.50'),
+    'fecha': datetime(2026, 10, 19, 8, 30, 15, tzinfo=timezone(timedelta(hours=-5))),
+    'creado': datetime(2026, 10, 19, 13, 30, 15, 250000),
+    'vence': date(2027, 1, 31),
+    'nombre': 'Café',
+    'items': [1, Decimal('0.00'), None],
+}
+
+ESPERADO = {
+    'total': 22.5,
+    'fecha': '2026-10-19T08:30:15-05:00',
+    'creado': '2026-10-19T13:30:15.250000',
+    'vence': '2027-01-31',
+    'nombre': 'Café',
+    'items': [1, 0.0, None],
+}
+
+
+@pytest.mark.parametrize('usar_orjson', [False, True])
+def test_decimal_y_fechas_como_numero_e_iso(app, usar_orjson):
+    """Test: Decimal sale como número y las fechas en ISO 8601, con orjson o sin él"""
+    if usar_orjson and not ORJSON_SUPPORT:
+        pytest.skip('orjson no está instalado')
+    app.config['JSON_ORJSON'] = usar_orjson
+    proveedor = ProveedorJSON(app)
+    assert proveedor.usa_orjson is usar_orjson
+
+    cuerpo = proveedor.dumps_bytes(DATOS)
+    assert json.loads(cuerpo) == ESPERADO
+    assert b' ' not in cuerpo.replace(b'Caf', b'')  # Compacto
+    assert proveedor.loads(proveedor.dumps(DATOS)) == ESPERADO
+
+
+def test_jsonify_usa_el_proveedor(app):
+    """Test: jsonify serializa valores crudos y request.get_json rechaza JSON inválido"""
+    assert isinstance(app.json, ProveedorJSON)
+
+    with app.test_request_context():
+        response = jsonify(DATOS)
+    assert response.mimetype == 'application/json'
+    assert response.get_data().endswith(b'\n')
+    assert json.loads(response.get_data()) == ESPERADO
+
+    with app.test_request_context(data=b'{"a": ', content_type='application/json'):
+        assert request.get_json(silent=True) is None
+
+
+def test_producto_y_lote_crudos_salen_igual(app):
+    """Test: Product/Lote.to_dict devuelven Decimal y fechas; en JSON salen como antes (número e ISO)"""
+    producto = Product(codigo_barras='7750182001878', nombre='Coca Cola 500ml', categoria='Bebidas',
+                       precio_compra=Decimal('2.00'), precio_venta=Decimal('3.50'))
+    db.session.add(producto)
+    db.session.flush()
+    lote = Lote(producto_id=producto.id, codigo_lote='LOTE-A', cantidad_inicial=20,
+                fecha_vencimiento=date(2027, 1, 31), precio_compra_lote=Decimal('2.10'))
+    db.session.add(lote)
+    db.session.commit()
+
+    datos_producto = producto.to_dict()
+    datos_lote = lote.to_dict()
+    assert isinstance(datos_producto['precio_venta'], Decimal)
+    assert isinstance(datos_lote['fecha_vencimiento'], date)
+
+    producto_json = json.loads(app.json.dumps(datos_producto))
+    lote_json = json.loads(app.json.dumps(datos_lote))
+    assert (producto_json['precio_compra'], producto_json['precio_venta'], producto_json['margen_ganancia']) == (2.0, 3.5, 1.5)
+    assert producto_json['created_at'] == producto.created_at.isoformat()
+    assert lote_json['precio_compra_lote'] == 2.1
+    assert lote_json['fecha_vencimiento'] == '2027-01-31'
+    assert lote_json['fecha_ingreso'] == lote.fecha_ingreso.isoformat()
@@ -0,0 +1,97 @@
+"""
+KATITA-POS - Kardex Tests
+=========================
+Tests para el kardex con saldos corridos y paginación keyset
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.user import User
+from app.models.movimiento_stock import MovimientoStock
+from app.services import kardex_service
+
+
+@pytest.fixture
+def movimientos(app):
+    """Fixture: Dos lotes (2.00 y 2.50) con una compra y ventas de cada uno"""
+    with app.app_context():
+        usuario = User(username='almacen', email='almacen@katita.com', nombre_completo='Almacen', rol='admin')
+        usuario.set_password('Admin123')
+        producto = Product(codigo_barras='7750182001878', nombre='Coca Cola 500ml', categoria='Bebidas',
+                           precio_compra=Decimal('2.00'), precio_venta=Decimal('3.50'))
+        db.session.add_all([usuario, producto])
+        db.session.flush()
+
+        lote_a = Lote(producto_id=producto.id, codigo_lote='A', cantidad_inicial=10,
+                      fecha_vencimiento=date.today() + timedelta(days=60), precio_compra_lote=Decimal('2.00'))
+        lote_b = Lote(producto_id=producto.id, codigo_lote='B', cantidad_inicial=20,
+                      fecha_vencimiento=date.today() + timedelta(days=90), precio_compra_lote=Decimal('2.50'))
+        db.session.add_all([lote_a, lote_b])
+        db.session.flush()
+
+        inicio = datetime(2025, 1, 1, 8, 0)
+        datos = [(lote_a, 'compra', 10, 0), (lote_b, 'compra', 20, 1), (lote_a, 'venta', -3, 2),
+                 (lote_b, 'venta', -5, 2), (lote_a, 'venta', -1, 3)]
+        stock = 0
+        for lote, tipo, cantidad, dia in datos:
+            db.session.add(MovimientoStock(
+                tipo=tipo, producto_id=producto.id, lote_id=lote.id, usuario_id=usuario.id,
+                cantidad=cantidad, stock_anterior=stock, stock_nuevo=stock + cantidad,
+                created_at=inicio + timedelta(days=dia)
+            ))
+            stock += cantidad
+        db.session.commit()
+        return producto.id, lote_a.id
+
+
+def test_saldos_corridos_con_keyset(app, movimientos):
+    """Test: El saldo de cada página continúa el de la anterior"""
+    producto_id, _ = movimientos
+    with app.app_context():
+        primera = kardex_service.pagina_kardex(producto_id=producto_id, limit=3)
+        segunda = kardex_service.pagina_kardex(producto_id=producto_id, limit=3,
+                                               despues=primera['siguiente'])
+
+        filas = primera['movimientos'] + segunda['movimientos']
+        assert segunda['siguiente'] is None
+        assert [f['saldo_cantidad'] for f in filas] == [10, 30, 27, 22, 21]
+        assert [f['saldo_valorizado'] for f in filas] == ['20.00', '70.00', '64.00', '51.50', '49.50']
+        assert filas[3]['salida'] == 5 and filas[3]['costo_unitario'] == '2.50'
+
+
+def test_kardex_por_lote_y_rango(app, movimientos):
+    """Test: Kardex de un lote; con 'desde' el saldo incluye lo anterior"""
+    _, lote_a = movimientos
+    with app.app_context():
+        pagina = kardex_service.pagina_kardex(lote_id=lote_a, desde=date(2025, 1, 3))
+
+        assert [f['saldo_cantidad'] for f in pagina['movimientos']] == [7, 6]
+
+
+def test_endpoints_kardex_json_y_csv(client, app, movimientos):
+    """Test: Paginación por cursor en la API y exportación CSV completa"""
+    producto_id, lote_a = movimientos
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'rol': 'admin'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    data = client.get(f'/api/productos/{producto_id}/kardex?limit=2', headers=headers).get_json()['data']
+    assert data['producto']['id'] == producto_id
+    cursor = data['siguiente_cursor']
+
+    data = client.get(f'/api/productos/{producto_id}/kardex?limit=2&despues={cursor}',
+                      headers=headers).get_json()['data']
+    assert [m['saldo_cantidad'] for m in data['movimientos']] == [27, 22]
+
+    response = client.get(f'/api/lotes/{lote_a}/kardex?formato=csv&desde=2025-01-03', headers=headers)
+    assert response.mimetype == 'text/csv'
+    lineas = response.get_data(as_text=True).strip().splitlines()
+    assert lineas[0].startswith('id,fecha,tipo')
+    assert lineas[-1].endswith(',6,12.00')
+
+    assert client.get('/api/productos/999/kardex', headers=headers).status_code == 404
@@ -574,6 +574,45 @@ class TestLoteModel:
             assert 'producto' in data
             assert data['producto']['nombre'] == 'Coca Cola 2L'
 
+    def test_serializar_lista(self, app, producto):
+        """Test: Serialización en lote con fecha de referencia y producto precargado"""
+        with app.app_context():
+            from sqlalchemy import event
+
+            product = db.session.merge(producto)
+            for i, dias in enumerate([-2, 10, 45]):
+                db.session.add(Lote(
+                    producto_id=product.id,
+                    codigo_lote=f'LT-2024-04{i}',
+                    cantidad_inicial=20,
+                    cantidad_actual=5,
+                    fecha_ingreso=datetime.now() - timedelta(days=60),
+                    fecha_vencimiento=date.today() + timedelta(days=dias),
+                    precio_compra_lote=Decimal('8.00')
+                ))
+            db.session.commit()
+            db.session.expunge_all()
+
+            lotes = Lote.con_producto().order_by(Lote.fecha_vencimiento).all()
+
+            consultas = []
+            contar = lambda *args: consultas.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', contar)
+            try:
+                datos = Lote.serializar_lista(lotes, include_producto=True)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', contar)
+
+            assert consultas == []
+            assert [d['esta_vencido'] for d in datos] == [True, False, False]
+            assert [d['esta_por_vencer'] for d in datos] == [False, True, False]
+            assert datos[0]['producto']['nombre'] == 'Coca Cola 2L'
+            assert datos == [l.to_dict(include_producto=True) for l in lotes]
+
+            # La fecha de referencia es la misma para todos los lotes
+            manana = Lote.serializar_lista(lotes, hoy=date.today() + timedelta(days=1))
+            assert [d['dias_hasta_vencimiento'] for d in manana] == [-3, 9, 44]
+
     def test_relacion_con_producto(self, app, producto):
         """Test: Relación con el modelo Product"""
         with app.app_context():
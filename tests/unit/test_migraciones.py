@@ -0,0 +1,113 @@
+"""
+KATITA-POS - Migraciones Tests
+==============================
+Tests de las migraciones Alembic (`flask db ...`) y de la verificación de
+versión al arrancar
+"""
+
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from config import TestingConfig
+from app import create_app, db
+
+pytest.importorskip('alembic')
+
+from alembic.autogenerate import compare_metadata  # noqa: E402
+from alembic.migration import MigrationContext  # noqa: E402
+from app.utils.migraciones import revision_head, revision_actual  # noqa: E402
+
+
+@pytest.fixture
+def app_archivo(tmp_path, monkeypatch):
+    """Fixture: App de testing sobre un archivo SQLite vacío"""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI',
+                        f"sqlite:///{tmp_path / 'katita_local.db'}")
+    app = create_app('testing')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _upgrade(app):
+    resultado = app.test_cli_runner().invoke(args=['db', 'upgrade'])
+    assert resultado.exit_code == 0, resultado.output
+
+
+def test_upgrade_crea_el_esquema_de_los_modelos(app_archivo):
+    """Test: Una base vacía migrada a head coincide con los modelos"""
+    _upgrade(app_archivo)
+
+    with app_archivo.app_context():
+        assert revision_actual(db.engine) == revision_head()
+        with db.engine.connect() as conexion:
+            diferencias = compare_metadata(MigrationContext.configure(conexion), db.metadata)
+        assert diferencias == []
+
+    resultado = app_archivo.test_cli_runner().invoke(args=['db', 'current'])
+    assert '(pendiente)' not in resultado.output
+
+
+def test_upgrade_adopta_base_legada(app_archivo):
+    """Test: Una base creada con create_all y sin columnas nuevas se completa sin perder datos"""
+    with app_archivo.app_context():
+        db.create_all()
+        with db.engine.begin() as conexion:
+            conexion.execute(text('DROP INDEX ix_sync_pendientes'))
+            conexion.execute(text('ALTER TABLE sync_queue DROP COLUMN lease_owner'))
+            conexion.execute(text('ALTER TABLE users DROP COLUMN hora_entrada'))
+            conexion.execute(text("INSERT INTO catalogo_cambios (producto_id, origen, created_at) "
+                                  "VALUES (1, 'products', CURRENT_TIMESTAMP)"))
+
+    _upgrade(app_archivo)
+
+    with app_archivo.app_context():
+        inspector = inspect(db.engine)
+        assert 'lease_owner' in {c['name'] for c in inspector.get_columns('sync_queue')}
+        assert 'hora_entrada' in {c['name'] for c in inspector.get_columns('users')}
+        assert 'ix_sync_pendientes' in {i['name'] for i in inspector.get_indexes('sync_queue')}
+        with db.engine.connect() as conexion:
+            assert conexion.execute(text('SELECT COUNT(*) FROM catalogo_cambios')).scalar() == 1
+        assert revision_actual(db.engine) == revision_head()
+
+
+def test_arranque_cloud_solo_consulta_la_version(tmp_path, monkeypatch):
+    """Test: create_app en modo cloud ya no ejecuta DDL: una sola consulta"""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI',
+                        f"sqlite:///{tmp_path / 'katita_cloud.db'}")
+    monkeypatch.setattr(TestingConfig, 'DATABASE_MODE', 'cloud')
+
+    sentencias = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', registrar)
+    try:
+        app = create_app('testing')
+    finally:
+        event.remove(Engine, 'before_cursor_execute', registrar)
+
+    assert sentencias == ['SELECT version_num FROM alembic_version']
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_arranque_local_migra_base_atrasada(app_archivo, monkeypatch):
+    """Test: create_app en modo local aplica las migraciones pendientes antes del worker"""
+    with app_archivo.app_context():
+        db.create_all()
+        with db.engine.begin() as conexion:
+            conexion.execute(text('DROP INDEX ix_sync_pendientes'))
+            conexion.execute(text('ALTER TABLE sync_queue DROP COLUMN lease_owner'))
+        db.engine.dispose()
+
+    monkeypatch.setattr(TestingConfig, 'DB_MIGRAR_LOCAL_AL_ARRANCAR', True)
+    app = create_app('testing')
+
+    with app.app_context():
+        inspector = inspect(db.engine)
+        assert 'lease_owner' in {c['name'] for c in inspector.get_columns('sync_queue')}
+        assert revision_actual(db.engine) == revision_head()
+        db.engine.dispose()
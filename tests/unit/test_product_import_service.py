@@ -0,0 +1,175 @@
+"""
+KATITA-POS - Product Import Tests
+=================================
+Tests para la importación masiva de productos desde CSV/XLSX
+"""
+
+import io
+import time
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from openpyxl import Workbook
+from app import db
+from app.models.product import Product
+from app.models.trabajo_importacion import TrabajoImportacion
+from app.services import product_import_service
+
+CSV_VALIDO = (
+    "codigo_barras,nombre,categoria,precio_compra,precio_venta,stock_minimo\n"
+    "7750182001878,Coca Cola 500ml,Bebidas,2.00,3.50,10\n"
+    "7755139002015,Inca Kola 500ml,Bebidas,2.00,3.20,\n"
+    "123,Codigo corto,Bebidas,1.00,2.00,5\n"
+    "7751271001234,Galleta Soda,Snacks,1.00,0.80,5\n"
+    "7750182001878,Coca Cola repetida,Bebidas,2.00,3.50,5\n"
+)
+
+
+# Header Authorization de un administrador (fixture auth_headers de conftest)
+como_admin = pytest.mark.parametrize('auth_headers', ['admin'], indirect=True)
+
+
+def _subir(client, headers, contenido, nombre='productos.csv', **form):
+    data = {'archivo': (io.BytesIO(contenido), nombre), **form}
+    return client.post('/api/products/import', headers=headers, data=data,
+                       content_type='multipart/form-data')
+
+
+@como_admin
+def test_importar_csv_con_reporte_por_fila(client, app, auth_headers):
+    """Test: Las filas válidas se crean y las inválidas se reportan con su número"""
+    response = _subir(client, auth_headers, CSV_VALIDO.encode('utf-8'))
+    assert response.status_code == 200
+
+    reporte = response.get_json()['data']
+    assert reporte['total_filas'] == 5
+    assert reporte['creados'] == 2
+    assert reporte['filas_con_error'] == 3
+    assert [e['fila'] for e in reporte['errores']] == [4, 5, 6]
+
+    with app.app_context():
+        coca = Product.buscar_por_codigo('7750182001878')
+        assert coca.stock_minimo == 10
+        assert Product.buscar_por_codigo('7755139002015').stock_minimo == 5
+
+
+@como_admin
+def test_importar_actualiza_existentes(client, app, auth_headers):
+    """Test: Un código existente se actualiza (upsert) sin tocar el stock"""
+    with app.app_context():
+        db.session.add(Product(
+            codigo_barras='7750182001878', nombre='Coca antigua', categoria='Bebidas',
+            precio_compra=Decimal('1.00'), precio_venta=Decimal('2.00'), stock_total=12
+        ))
+        db.session.commit()
+
+    contenido = (
+        "codigo_barras;nombre;categoria;precio_compra;precio_venta\n"
+        "7750182001878;Coca Cola 500ml;Bebidas;2,10;3,60\n"
+    ).encode('utf-8')
+    reporte = _subir(client, auth_headers, contenido).get_json()['data']
+    assert (reporte['creados'], reporte['actualizados']) == (0, 1)
+
+    with app.app_context():
+        coca = Product.buscar_por_codigo('7750182001878')
+        assert coca.nombre == 'Coca Cola 500ml'
+        assert coca.precio_venta == Decimal('3.60')
+        assert coca.stock_total == 12
+
+
+def test_importar_xlsx_en_bloques(app, tmp_path):
+    """Test: Lectura XLSX en modo read_only con bloques pequeños"""
+    libro = Workbook()
+    hoja = libro.active
+    hoja.append(['Codigo Barras', 'Nombre', 'Categoria', 'Precio Compra', 'Precio Venta'])
+    for i in range(7):
+        hoja.append([7750000000000 + i, f'Producto {i}', 'Abarrotes', 1.5, 2.5])
+    ruta = tmp_path / 'productos.xlsx'
+    libro.save(ruta)
+
+    with app.app_context():
+        reporte = product_import_service.importar_productos(str(ruta), 'xlsx', tamano_bloque=3)
+
+        assert reporte['creados'] == 7
+        assert reporte['filas_con_error'] == 0
+        assert Product.query.count() == 7
+
+
+def test_importar_csv_de_excel_en_windows_1252(app, tmp_path):
+    """Test: Un CSV en Windows-1252 se importa completo en lugar de fallar a mitad de archivo"""
+    ruta = tmp_path / 'productos.csv'
+    ruta.write_bytes((
+        "codigo_barras;nombre;categoria;precio_compra;precio_venta\n"
+        "7750182001878;Coca Cola 500ml;Bebidas;2.00;3.50\n"
+        "7751271001234;Galleta Ñapa;Snacks;1.00;1.50\n"
+    ).encode('cp1252'))
+
+    with app.app_context():
+        reporte = product_import_service.importar_productos(str(ruta), 'csv', tamano_bloque=1)
+        assert reporte['creados'] == 2
+        assert Product.query.filter_by(codigo_barras='7751271001234').one().nombre == 'Galleta Ñapa'
+
+
+@como_admin
+def test_importar_codificacion_invalida_no_confirma_nada(client, app, auth_headers):
+    """Test: Si el CSV no se puede decodificar se rechaza antes del primer bloque"""
+    contenido = CSV_VALIDO.encode('utf-8') + "7750000000017,Café \x81,Bebidas,1.00,2.00,5\n".encode('latin-1')
+    response = _subir(client, auth_headers, contenido)
+    assert response.status_code == 422
+    with app.app_context():
+        assert Product.query.count() == 0
+
+
+@como_admin
+def test_importar_columnas_faltantes(client, auth_headers):
+    """Test: Un archivo sin columnas requeridas se rechaza completo"""
+    response = _subir(client, auth_headers, b"codigo_barras,nombre\n7750182001878,Coca\n")
+    assert response.status_code == 422
+
+
+@como_admin
+def test_importar_en_segundo_plano(client, app, auth_headers):
+    """Test: Con async=true se retorna un trabajo y luego su reporte"""
+    response = _subir(client, auth_headers, CSV_VALIDO.encode('utf-8'), **{'async': 'true'})
+    assert response.status_code == 202
+    trabajo_id = response.get_json()['data']['trabajo_id']
+
+    for _ in range(50):
+        trabajo = client.get(f'/api/products/import/{trabajo_id}', headers=auth_headers).get_json()['data']
+        if trabajo['estado'] != 'en_proceso':
+            break
+        time.sleep(0.1)
+
+    assert trabajo['estado'] == 'completado'
+    assert trabajo['resultado']['creados'] == 2
+
+
+def test_trabajos_persisten_y_se_depuran(app):
+    """Test: El estado vive en la base (cualquier worker lo ve) y los finalizados antiguos se eliminan"""
+    with app.app_context():
+        db.session.add_all([
+            TrabajoImportacion(id='antiguo', estado='completado', finalizado_at=datetime.now() - timedelta(days=30)),
+            TrabajoImportacion(id='en-curso', estado='en_proceso', creado_at=datetime.now() - timedelta(days=30)),
+        ])
+        db.session.commit()
+
+        db.session.add(TrabajoImportacion(id='reciente', estado='en_proceso'))
+        db.session.commit()
+        TrabajoImportacion.finalizar('reciente', 'fallido', error='Archivo dañado')
+        db.session.remove()
+
+        assert product_import_service.obtener_trabajo('reciente')['error'] == 'Archivo dañado'
+        assert TrabajoImportacion.limpiar_finalizados(7) == 1
+        db.session.commit()
+        assert {t.id for t in TrabajoImportacion.query} == {'en-curso', 'reciente'}
+
+        # El hilo de 'en-curso' murió con su worker: se informa como fallido
+        abandonado = product_import_service.obtener_trabajo('en-curso')
+        assert abandonado['estado'] == 'fallido'
+        assert 'finalizado_at' in abandonado and abandonado['error']
+
+
+def test_importar_requiere_admin(client, auth_headers):
+    """Test: Un vendedor no puede importar"""
+    response = _subir(client, auth_headers, CSV_VALIDO.encode('utf-8'))
+    assert response.status_code == 403
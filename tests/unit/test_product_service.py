@@ -0,0 +1,125 @@
+"""
+KATITA-POS - Product Service Tests
+==================================
+Tests para la actualización masiva de productos (set-based)
+"""
+
+import pytest
+from decimal import Decimal
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.product import Product
+from app.models.user import User
+from app.models.catalogo_cambio import CatalogoCambio
+from app.models.operacion_masiva import OperacionMasiva
+from app.services import product_service
+from app.services.product_service import ErrorActualizacionMasiva
+
+
+@pytest.fixture
+def admin_id(app):
+    """Fixture: Usuario administrador"""
+    with app.app_context():
+        admin = User(username='admin', email='admin@katita.com', nombre_completo='Admin', rol='admin')
+        admin.set_password('Admin123')
+        db.session.add(admin)
+        db.session.commit()
+        return admin.id
+
+
+@pytest.fixture
+def productos(app):
+    """Fixture: Tres bebidas y un snack"""
+    with app.app_context():
+        db.session.add_all([
+            Product(codigo_barras='7750000000001', nombre='Agua', categoria='Bebidas',
+                    precio_compra=Decimal('1.00'), precio_venta=Decimal('1.50')),
+            Product(codigo_barras='7750000000002', nombre='Gaseosa', categoria='Bebidas',
+                    precio_compra=Decimal('2.00'), precio_venta=Decimal('3.20')),
+            Product(codigo_barras='7750000000003', nombre='Jugo', categoria='Bebidas',
+                    precio_compra=Decimal('2.50'), precio_venta=Decimal('3.90')),
+            Product(codigo_barras='7750000000004', nombre='Galleta', categoria='Snacks',
+                    precio_compra=Decimal('0.50'), precio_venta=Decimal('1.00')),
+        ])
+        db.session.commit()
+
+
+def test_porcentaje_con_redondeo(app, productos, admin_id):
+    """Test: +10% redondeado a 0.10 solo en la categoría filtrada"""
+    with app.app_context():
+        version = CatalogoCambio.version_actual()
+
+        resultado = product_service.actualizar_productos_masivo(
+            {'categoria': 'Bebidas'},
+            {'precio_porcentaje': 10, 'redondeo': '0.10'},
+            admin_id
+        )
+
+        assert resultado['filas_afectadas'] == 3
+        precios = {p.nombre: p.precio_venta for p in Product.query.all()}
+        assert precios['Agua'] == Decimal('1.70')      # 1.65 -> 1.70
+        assert precios['Gaseosa'] == Decimal('3.50')   # 3.52 -> 3.50
+        assert precios['Jugo'] == Decimal('4.30')      # 4.29 -> 4.30
+        assert precios['Galleta'] == Decimal('1.00')
+
+        # Una auditoría por lote y una versión de catálogo por producto
+        assert OperacionMasiva.query.count() == 1
+        assert OperacionMasiva.query.first().filas_afectadas == 3
+        assert len(CatalogoCambio.productos_cambiados_desde(version)) == 3
+
+
+def test_rechaza_si_algun_precio_queda_invalido(app, productos, admin_id):
+    """Test: Si un producto queda con venta <= compra no se modifica ninguno"""
+    with app.app_context():
+        with pytest.raises(ErrorActualizacionMasiva) as error:
+            product_service.actualizar_productos_masivo(
+                {'categoria': 'Bebidas'}, {'precio_valor': 2.00}, admin_id
+            )
+
+        assert len(error.value.productos_invalidos) == 2
+        assert Product.buscar_por_codigo('7750000000001').precio_venta == Decimal('1.50')
+        assert OperacionMasiva.query.count() == 0
+
+
+def test_atributos_por_codigos_y_simulacion(app, productos, admin_id):
+    """Test: activo/stock_minimo por códigos, y simular no modifica"""
+    with app.app_context():
+        filtro = {'codigos_barras': ['7750000000001', '7750000000004']}
+
+        simulado = product_service.actualizar_productos_masivo(
+            filtro, {'activo': False}, admin_id, simular=True
+        )
+        assert simulado['filas_afectadas'] == 2
+        assert Product.query.filter_by(activo=False).count() == 0
+
+        product_service.actualizar_productos_masivo(
+            filtro, {'activo': False, 'stock_minimo': 12}, admin_id
+        )
+        inactivos = Product.query.filter_by(activo=False).all()
+        assert {p.codigo_barras for p in inactivos} == set(filtro['codigos_barras'])
+        assert all(p.stock_minimo == 12 for p in inactivos)
+
+
+def test_filtro_vacio_no_permitido(app, productos, admin_id):
+    """Test: Sin criterio de filtro no se toca el catálogo completo"""
+    with app.app_context():
+        with pytest.raises(ErrorActualizacionMasiva):
+            product_service.actualizar_productos_masivo({}, {'activo': False}, admin_id)
+
+
+def test_endpoint_bulk_update(client, app, productos, admin_id):
+    """Test: El endpoint aplica la operación y exige rol admin"""
+    with app.app_context():
+        token_admin = create_access_token(identity=str(admin_id), additional_claims={'rol': 'admin'})
+        token_vendedor = create_access_token(identity='99', additional_claims={'rol': 'vendedor'})
+
+    body = {'filtro': {'categoria': 'Snacks'}, 'operacion': {'precio_valor': 1.20}}
+
+    response = client.post('/api/products/bulk-update', json=body,
+                           headers={'Authorization': f'Bearer {token_vendedor}'})
+    assert response.status_code == 403
+
+    response = client.post('/api/products/bulk-update', json=body,
+                           headers={'Authorization': f'Bearer {token_admin}'})
+    assert response.status_code == 200
+    assert response.get_json()['data']['filas_afectadas'] == 1
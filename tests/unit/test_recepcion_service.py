@@ -0,0 +1,105 @@
+"""
+KATITA-POS - Recepción de Mercadería Tests
+==========================================
+Tests para el registro de muchos lotes en una sola transacción
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, timedelta
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.user import User
+from app.models.movimiento_stock import MovimientoStock
+from app.models.catalogo_cambio import CatalogoCambio
+from app.services import recepcion_service
+from app.services.recepcion_service import ErrorRecepcion
+
+
+@pytest.fixture
+def datos(app):
+    """Fixture: Usuario y dos productos (uno con stock previo)"""
+    with app.app_context():
+        usuario = User(username='almacen', email='almacen@katita.com', nombre_completo='Almacen', rol='admin')
+        usuario.set_password('Admin123')
+        coca = Product(codigo_barras='7750182001878', nombre='Coca Cola 500ml', categoria='Bebidas',
+                       precio_compra=Decimal('2.00'), precio_venta=Decimal('3.50'))
+        inca = Product(codigo_barras='7755139002015', nombre='Inca Kola 500ml', categoria='Bebidas',
+                       precio_compra=Decimal('2.00'), precio_venta=Decimal('3.20'))
+        db.session.add_all([usuario, coca, inca])
+        db.session.flush()
+        db.session.add(Lote(producto_id=coca.id, codigo_lote='PREVIO', cantidad_inicial=5,
+                            fecha_vencimiento=date.today() + timedelta(days=30),
+                            precio_compra_lote=Decimal('2.00')))
+        coca.stock_total = 5
+        db.session.commit()
+        return usuario.id, coca.id, inca.id
+
+
+def _linea(producto_id, cantidad, **extra):
+    return {'producto_id': producto_id, 'cantidad': cantidad,
+            'fecha_vencimiento': (date.today() + timedelta(days=90)).isoformat(),
+            'precio_compra_lote': 2.10, **extra}
+
+
+def test_recepcion_completa(app, datos, invariante_stock):
+    """Test: Lotes, movimientos encadenados y stock en una sola transacción"""
+    usuario_id, coca, inca = datos
+    with app.app_context():
+        version = CatalogoCambio.version_actual()
+
+        resultado = recepcion_service.registrar_recepcion({
+            'proveedor': 'Distribuidora Lima',
+            'numero_documento': 'F001-123',
+            'lineas': [_linea(coca, 24), _linea(inca, 12, codigo_lote='INCA-01'), _linea(coca, 10)],
+        }, usuario_id)
+
+        assert resultado['recepcion']['total_unidades'] == 46
+        assert resultado['productos'] == [{'id': coca, 'stock_total': 39}, {'id': inca, 'stock_total': 12}]
+        assert Lote.query.count() == 4
+        assert Lote.buscar_por_codigo('INCA-01').proveedor == 'Distribuidora Lima'
+
+        codigos = [l['codigo_lote'] for l in resultado['lotes']]
+        assert codigos[0].startswith('LOTE-') and codigos[0].endswith('-001')
+        assert codigos[2].endswith('-002')
+
+        movimientos = MovimientoStock.query.filter_by(producto_id=coca).order_by(MovimientoStock.id).all()
+        assert [(m.stock_anterior, m.stock_nuevo) for m in movimientos] == [(5, 29), (29, 39)]
+        assert set(CatalogoCambio.productos_cambiados_desde(version)) == {coca, inca}
+
+
+def test_recepcion_invalida_no_registra_nada(app, datos):
+    """Test: Un error en cualquier línea rechaza la recepción completa"""
+    usuario_id, coca, inca = datos
+    with app.app_context():
+        with pytest.raises(ErrorRecepcion) as error:
+            recepcion_service.registrar_recepcion({'lineas': [
+                _linea(coca, 10),
+                _linea(999, 5),
+                _linea(inca, 5, codigo_lote='PREVIO'),
+                _linea(inca, 0),
+            ]}, usuario_id)
+
+        assert set(error.value.errores) == {
+            'lineas[1].producto_id', 'lineas[2].codigo_lote', 'lineas[3].cantidad'
+        }
+        assert Lote.query.count() == 1
+        assert db.session.get(Product, coca).stock_total == 5
+
+
+def test_endpoint_recepcion(client, app, datos):
+    """Test: El endpoint responde 201 o 422 con errores por línea"""
+    usuario_id, coca, _ = datos
+    with app.app_context():
+        token = create_access_token(identity=str(usuario_id), additional_claims={'rol': 'admin'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.post('/api/lotes/recepcion', headers=headers,
+                           json={'lineas': [_linea(coca, 6)]})
+    assert response.status_code == 201
+    assert response.get_json()['data']['productos'][0]['stock_total'] == 11
+
+    response = client.post('/api/lotes/recepcion', headers=headers, json={'lineas': []})
+    assert response.status_code == 422
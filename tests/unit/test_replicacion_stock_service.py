@@ -0,0 +1,197 @@
+"""
+KATITA-POS - Replicación de Stock Tests
+=======================================
+Tests para la fusión de stock por contadores entre nodos, incluida una
+simulación de ventas offline intercaladas en varias tiendas
+"""
+
+import random
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.contador_stock import ContadorStock
+from app.models.tarea_reconciliacion import TareaReconciliacion
+from app.services import replicacion_stock_service as replicacion
+
+
+class NodoSimulado:
+    """Réplica en memoria: vende contra su vista local y fusiona por gossip"""
+
+    def __init__(self, nombre, estado_inicial):
+        self.nombre = nombre
+        self.estado = dict(estado_inicial)
+        self.vendido = 0
+
+    def vender(self, lote_id, cantidad):
+        # La tienda solo ve su réplica: puede vender unidades que otra ya vendió
+        if replicacion.valor_lote(self.estado, lote_id) < cantidad:
+            return
+        incrementos, decrementos = self.estado.get((lote_id, self.nombre), (0, 0))
+        self.estado[(lote_id, self.nombre)] = (incrementos, decrementos + cantidad)
+        self.vendido += cantidad
+
+    def recibir(self, otro):
+        self.estado = replicacion.fusionar_estados(self.estado, otro.estado)
+
+
+def _simular(semilla, nodos=3, pasos=300, stock=40):
+    aleatorio = random.Random(semilla)
+    inicial = {(1, replicacion.NODO_BASE): (stock, 0)}
+    red = [NodoSimulado(f'tienda-{i}', inicial) for i in range(nodos)]
+
+    for _ in range(pasos):
+        nodo = aleatorio.choice(red)
+        if aleatorio.random() < 0.8:
+            nodo.vender(1, aleatorio.randint(1, 3))
+        else:
+            nodo.recibir(aleatorio.choice(red))
+    return red
+
+
+@pytest.mark.parametrize('semilla', range(5))
+def test_simulacion_converge_sin_perder_ventas(semilla):
+    """Test: Tras fusionar en cualquier orden todos los nodos ven las mismas ventas"""
+    red = _simular(semilla)
+
+    ordenes = [list(red), list(reversed(red)), random.Random(semilla).sample(red, len(red))]
+    finales = []
+    for orden in ordenes:
+        estado = {}
+        for nodo in orden:
+            estado = replicacion.fusionar_estados(estado, nodo.estado)
+        finales.append(estado)
+
+    assert finales[0] == finales[1] == finales[2]
+    assert replicacion.valor_lote(finales[0], 1) == 40 - sum(n.vendido for n in red)
+
+
+def test_fusion_idempotente_y_conmutativa():
+    """Test: Propiedades de la fusión por máximo"""
+    a, b = (n.estado for n in _simular(7, nodos=2))
+
+    assert replicacion.fusionar_estados(a, a) == a
+    assert replicacion.fusionar_estados(a, b) == replicacion.fusionar_estados(b, a)
+
+
+@pytest.fixture
+def lote(app):
+    """Fixture: Lote de 20 unidades con contadores activos"""
+    app.config['SYNC_STOCK_CONTADORES'] = True
+    app.config['SYNC_NODE_ID'] = 'tienda-1'
+    with app.app_context():
+        producto = Product(codigo_barras='7750182001878', nombre='Coca Cola 500ml', categoria='Bebidas',
+                           precio_compra=Decimal('2.00'), precio_venta=Decimal('3.50'), stock_total=20)
+        db.session.add(producto)
+        db.session.flush()
+        lote = Lote(producto_id=producto.id, codigo_lote='LOTE-A', cantidad_inicial=20,
+                    fecha_vencimiento=date.today() + timedelta(days=30),
+                    precio_compra_lote=Decimal('2.00'))
+        db.session.add(lote)
+        db.session.commit()
+        yield lote.id
+    app.config['SYNC_STOCK_CONTADORES'] = False
+
+
+def _contadores(lote_id):
+    return {c.nodo: (c.incrementos, c.decrementos)
+            for c in ContadorStock.query.filter_by(lote_id=lote_id)}
+
+
+def test_ventas_locales_alimentan_contador(app, lote):
+    """Test: Cada cambio de cantidad_actual por el ORM suma al contador del nodo"""
+    with app.app_context():
+        registro = db.session.get(Lote, lote)
+        registro.descontar_stock(3)
+        db.session.commit()
+        registro.descontar_stock(2)
+        db.session.commit()
+        registro.aumentar_stock(1)
+        db.session.commit()
+
+        assert _contadores(lote) == {'tienda-1': (21, 5)}
+
+
+def test_fusion_en_base_de_datos(app, lote):
+    """Test: Ventas de dos nodos se suman; reaplicar no cambia nada; sobreventa abre tarea"""
+    with app.app_context():
+        db.session.get(Lote, lote).descontar_stock(5)
+        db.session.commit()
+
+        remotos = [{'lote_id': lote, 'nodo': 'nube', 'incrementos': 0, 'decrementos': 3}]
+        for _ in range(2):
+            resultado = replicacion.fusionar_contadores(remotos)
+            assert resultado['conflictos'] == 0
+            assert db.session.get(Lote, lote).cantidad_actual == 12
+            assert db.session.get(Product, db.session.get(Lote, lote).producto_id).stock_total == 12
+
+        # Contador viejo del mismo nodo: el máximo lo ignora
+        replicacion.fusionar_contadores([dict(remotos[0], decrementos=1)])
+        assert db.session.get(Lote, lote).cantidad_actual == 12
+
+        # La nube vendió offline más de lo que quedaba: stock 0 y tarea abierta
+        resultado = replicacion.fusionar_contadores([dict(remotos[0], decrementos=18)])
+        assert resultado['conflictos'] == 1
+        assert db.session.get(Lote, lote).cantidad_actual == 0
+        tarea = TareaReconciliacion.query.one()
+        assert tarea.diferencia == -3 and tarea.estado == 'pendiente'
+
+        replicacion.fusionar_contadores([dict(remotos[0], decrementos=18)])
+        assert TareaReconciliacion.query.count() == 1
+
+        resultado = replicacion.fusionar_contadores([{'lote_id': 999, 'nodo': 'nube',
+                                                      'incrementos': 1, 'decrementos': 0}])
+        assert resultado['lotes_desconocidos'] == [999]
+
+
+@pytest.mark.parametrize('semilla', [3, 4])  # 3: termina con sobreventa, 4: sin conflicto
+def test_replay_de_simulacion_en_base_de_datos(app, lote, semilla):
+    """Test: Aplicar los contadores de cada nodo simulado en cualquier orden da el mismo stock"""
+    red = _simular(semilla, pasos=15, stock=20)
+    with app.app_context():
+        # El lote existía antes de los contadores del nodo base simulado
+        ContadorStock.query.delete()
+        db.session.add(ContadorStock(lote_id=lote, nodo=replicacion.NODO_BASE, incrementos=20))
+        db.session.commit()
+
+        for nodo in random.Random(semilla).sample(red, len(red)):
+            contadores = [
+                {'lote_id': lote, 'nodo': n, 'incrementos': i, 'decrementos': d}
+                for (_, n), (i, d) in nodo.estado.items()
+            ]
+            replicacion.fusionar_contadores(contadores)
+
+        esperado = 20 - sum(n.vendido for n in red)
+        assert db.session.get(Lote, lote).cantidad_actual == max(esperado, 0)
+        assert TareaReconciliacion.query.count() == (1 if esperado < 0 else 0)
+
+
+def test_endpoints_contadores_y_conflictos(client, app, lote):
+    """Test: Exportar/fusionar contadores y resolver conflictos por API"""
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'rol': 'admin'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get('/api/sistema/sync/contadores', headers=headers)
+    assert response.get_json()['data']['contadores'] == [
+        {'lote_id': lote, 'nodo': 'tienda-1', 'incrementos': 20, 'decrementos': 0}
+    ]
+
+    response = client.post('/api/sistema/sync/contadores', headers=headers, json={
+        'contadores': [{'lote_id': lote, 'nodo': 'nube', 'incrementos': 0, 'decrementos': 25}]
+    })
+    assert response.get_json()['data']['conflictos'] == 1
+
+    response = client.post('/api/sistema/sync/contadores', headers=headers,
+                           json={'contadores': [{'lote_id': lote}]})
+    assert response.status_code == 422
+
+    tareas = client.get('/api/inventario/conflictos', headers=headers).get_json()['data']['tareas']
+    assert tareas[0]['tipo'] == 'faltante'
+
+    response = client.post(f"/api/inventario/conflictos/{tareas[0]['id']}/resolver",
+                           headers=headers, json={'nota': 'Conteo físico'})
+    assert response.get_json()['data']['estado'] == 'resuelta'
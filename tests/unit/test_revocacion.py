@@ -0,0 +1,131 @@
+"""
+KATITA-POS - Revocación de Tokens Tests
+=======================================
+Tests del filtro de Bloom, del logout con revocación y del refresco incremental
+"""
+
+import pytest
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token, decode_token
+from app import db
+from app.models.user import User
+from app.models.token_revocado import TokenRevocado
+from app.utils.revocacion import FiltroBloom, estadisticas
+
+
+@pytest.fixture
+def cajera(app):
+    """Fixture: Usuario vendedor con contraseña conocida"""
+    usuario = User(username='cajera1', email='cajera1@katita.pe', nombre_completo='Cajera Uno', rol='vendedor')
+    usuario.set_password('secreta123')
+    db.session.add(usuario)
+    db.session.commit()
+    return usuario
+
+
+def _consultas_revocados(engine, consultas):
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if 'tokens_revocados' in statement:
+            consultas.append(statement)
+    event.listen(engine, 'before_cursor_execute', registrar)
+    return registrar
+
+
+def test_filtro_bloom_sin_falsos_negativos():
+    """Test: Todo lo agregado se encuentra y los falsos positivos quedan cerca de la tasa pedida"""
+    filtro = FiltroBloom(5000, 0.001)
+    for i in range(5000):
+        filtro.agregar(f'jti-{i}')
+
+    assert all(f'jti-{i}' in filtro for i in range(5000))
+    falsos = sum(f'otro-{i}' in filtro for i in range(20000))
+    assert falsos / 20000 < 0.005
+    assert filtro.tamano_bytes < 10000
+
+
+def test_logout_revoca_access_y_refresh(client, app, cajera):
+    """Test: Tras el logout el access y el refresh token son rechazados como revocados"""
+    datos = client.post('/api/auth/login', json={'username': 'cajera1', 'password': 'secreta123'}).get_json()['data']
+    access = {'Authorization': f"Bearer {datos['access_token']}"}
+
+    assert client.get('/api/auth/me', headers=access).status_code == 200
+
+    response = client.post('/api/auth/logout', headers=access, json={'refresh_token': datos['refresh_token']})
+    assert response.status_code == 200
+    assert response.get_json()['data']['tokens_revocados'] == 2
+
+    response = client.get('/api/auth/me', headers=access)
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'token_revoked'
+
+    response = client.post('/api/auth/refresh', headers={'Authorization': f"Bearer {datos['refresh_token']}"})
+    assert response.status_code == 401
+    assert TokenRevocado.query.count() == 2
+
+
+def test_consulta_sin_io_y_refresco_incremental(client, app, cajera):
+    """Test: El camino normal no consulta la base; lo revocado por otro worker se ve al refrescar"""
+    app.config['BLOCKLIST_REFRESCO_SEGUNDOS'] = 3600
+    token = create_access_token(identity=str(cajera.id), additional_claims={'username': 'cajera1', 'rol': 'vendedor'})
+    cabeceras = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/auth/me', headers=cabeceras).status_code == 200  # Arma el filtro
+
+    consultas = []
+    registrar = _consultas_revocados(db.engine, consultas)
+    try:
+        for _ in range(20):
+            assert client.get('/api/auth/me', headers=cabeceras).status_code == 200
+        assert consultas == []
+
+        # Otro worker revoca el token: este proceso se entera en el próximo refresco
+        payload = decode_token(token)
+        TokenRevocado.revocar(payload['jti'], 'access', cajera.id, payload['exp'])
+        db.session.commit()
+        assert client.get('/api/auth/me', headers=cabeceras).status_code == 200
+
+        app.config['BLOCKLIST_REFRESCO_SEGUNDOS'] = 0
+        assert client.get('/api/auth/me', headers=cabeceras).status_code == 401
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    assert estadisticas(app)['recientes'] == 1
+
+
+def test_refresco_ve_commits_fuera_de_orden(client, app, cajera):
+    """Test: Un logout con id menor confirmado después del refresco no se pierde"""
+    app.config['BLOCKLIST_REFRESCO_SEGUNDOS'] = 0
+    tokens = [create_access_token(identity=str(cajera.id), additional_claims={'username': 'cajera1', 'rol': 'vendedor'})
+              for _ in range(3)]
+    cabeceras = [{'Authorization': f'Bearer {token}'} for token in tokens]
+    assert client.get('/api/auth/me', headers=cabeceras[0]).status_code == 200  # Arma el filtro
+
+    # Dos workers reservan los ids 10 y 11; el 11 confirma primero y este proceso lo lee
+    for id_, token in ((11, tokens[1]), (10, tokens[0])):
+        payload = decode_token(token)
+        registro = TokenRevocado.revocar(payload['jti'], 'access', cajera.id, payload['exp'])
+        registro.id = id_
+        db.session.commit()
+        if id_ == 11:
+            assert client.get('/api/auth/me', headers=cabeceras[1]).status_code == 401
+
+    assert client.get('/api/auth/me', headers=cabeceras[0]).status_code == 401
+    assert client.get('/api/auth/me', headers=cabeceras[2]).status_code == 200
+
+
+def test_reconstruir_en_una_consulta(client, app, cajera):
+    """Test: El rearmado lee los jti vigentes y el último id en la misma consulta"""
+    payload = decode_token(create_access_token(identity=str(cajera.id)))
+    TokenRevocado.revocar(payload['jti'], 'access', cajera.id, payload['exp'])
+    db.session.commit()
+
+    app.config['BLOCKLIST_RECONSTRUIR_SEGUNDOS'] = 0
+    consultas = []
+    registrar = _consultas_revocados(db.engine, consultas)
+    try:
+        token = create_access_token(identity=str(cajera.id), additional_claims={'username': 'cajera1', 'rol': 'vendedor'})
+        assert client.get('/api/auth/me', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+    assert len(consultas) == 1
+    assert app.extensions['katita_revocados'].ultimo_id == TokenRevocado.query.first().id
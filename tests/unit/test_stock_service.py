@@ -0,0 +1,274 @@
+"""
+KATITA-POS - Stock Service Tests
+================================
+Tests para la reconciliación de stock_total contra los lotes
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timedelta
+from flask_jwt_extended import create_access_token
+from sqlalchemy import update
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.user import User
+from app.models.ajuste_inventario import AjusteInventario
+from app.models.movimiento_stock import MovimientoStock
+from app.models.snapshot_stock import SnapshotStock
+from app.models.catalogo_cambio import CatalogoCambio
+from app.models.operacion_masiva import OperacionMasiva
+from app.services import stock_service
+
+
+@pytest.fixture
+def productos(app):
+    """Fixture: Un producto con dos lotes (30 unidades) y otro sin lotes"""
+    with app.app_context():
+        con_lotes = Product(codigo_barras='7750182001878', nombre='Coca Cola 500ml', categoria='Bebidas',
+                            precio_compra=Decimal('2.00'), precio_venta=Decimal('3.50'),
+                            stock_total=30)
+        sin_lotes = Product(codigo_barras='7755139002015', nombre='Inca Kola 500ml', categoria='Bebidas',
+                            precio_compra=Decimal('2.00'), precio_venta=Decimal('3.20'))
+        db.session.add_all([con_lotes, sin_lotes])
+        db.session.flush()
+
+        db.session.add_all([
+            Lote(producto_id=con_lotes.id, codigo_lote='LOTE-A', cantidad_inicial=20,
+                 fecha_vencimiento=date.today() + timedelta(days=10),
+                 precio_compra_lote=Decimal('2.00')),
+            Lote(producto_id=con_lotes.id, codigo_lote='LOTE-B', cantidad_inicial=10,
+                 fecha_vencimiento=date.today() + timedelta(days=90),
+                 precio_compra_lote=Decimal('2.00')),
+        ])
+        db.session.commit()
+        return con_lotes.id, sin_lotes.id
+
+
+def _descuadrar(producto_id, stock_total):
+    db.session.execute(
+        update(Product.__table__).where(Product.__table__.c.id == producto_id)
+        .values(stock_total=stock_total)
+    )
+    db.session.commit()
+
+
+def test_detectar_y_reparar(app, productos):
+    """Test: Se detectan los descuadres y se corrigen con un solo UPDATE"""
+    con_lotes, sin_lotes = productos
+    with app.app_context():
+        assert stock_service.detectar_descuadres() == []
+
+        _descuadrar(con_lotes, 25)
+        _descuadrar(sin_lotes, 4)
+        version = CatalogoCambio.version_actual()
+
+        descuadres = {d['producto_id']: d for d in stock_service.detectar_descuadres()}
+        assert descuadres[con_lotes]['diferencia'] == 5
+        assert descuadres[sin_lotes]['stock_real'] == 0
+
+        resultado = stock_service.reparar_descuadres()
+
+        assert resultado['productos_corregidos'] == 2
+        assert db.session.get(Product, con_lotes).stock_total == 30
+        assert db.session.get(Product, sin_lotes).stock_total == 0
+        assert stock_service.detectar_descuadres() == []
+        assert OperacionMasiva.query.filter_by(tipo='reparacion_stock').count() == 1
+        assert set(CatalogoCambio.productos_cambiados_desde(version)) == {con_lotes, sin_lotes}
+
+
+def test_calcular_stock_total(app, productos):
+    """Test: calcular_stock_total suma los lotes del producto"""
+    con_lotes, _ = productos
+    with app.app_context():
+        _descuadrar(con_lotes, 0)
+        producto = db.session.get(Product, con_lotes)
+
+        assert producto.calcular_stock_total() == 30
+        assert producto.stock_total == 30
+
+
+def test_ajuste_mantiene_invariante(app, productos, invariante_stock):
+    """Test: Un ajuste reparte la diferencia entre los lotes (FIFO al descontar)"""
+    con_lotes, _ = productos
+    with app.app_context():
+        admin = User(username='admin', email='admin@katita.com', nombre_completo='Admin', rol='admin')
+        admin.set_password('Admin123')
+        db.session.add(admin)
+        db.session.commit()
+
+        AjusteInventario.crear_ajuste(con_lotes, admin.id, 22, 'merma', 'Productos dañados')
+        db.session.commit()
+
+        lotes = {l.codigo_lote: l.cantidad_actual for l in Lote.query.all()}
+        assert lotes == {'LOTE-A': 12, 'LOTE-B': 10}
+
+        AjusteInventario.crear_ajuste(con_lotes, admin.id, 26, 'error_conteo', 'Reconteo')
+        db.session.commit()
+
+        # El sobrante vuelve al lote con espacio (LOTE-B está completo)
+        lotes = {l.codigo_lote: l.cantidad_actual for l in Lote.query.all()}
+        assert lotes == {'LOTE-A': 16, 'LOTE-B': 10}
+        assert db.session.get(Product, con_lotes).stock_total == 26
+
+        # Cada lote tocado queda en el kardex
+        movimientos = MovimientoStock.query.filter_by(tipo='ajuste').order_by(MovimientoStock.id).all()
+        assert [(m.referencia, m.cantidad, m.stock_anterior, m.stock_nuevo) for m in movimientos] == [
+            ('LOTE-A', -8, 30, 22), ('LOTE-A', 4, 22, 26)
+        ]
+
+
+@pytest.mark.parametrize('auth_headers', ['admin'], indirect=True)
+def test_endpoints_reconciliacion(client, app, productos, auth_headers):
+    """Test: Reporte y reparación por API, solo administradores"""
+    con_lotes, _ = productos
+    with app.app_context():
+        _descuadrar(con_lotes, 7)
+        token_vendedor = create_access_token(identity='2', additional_claims={'rol': 'vendedor'})
+
+    response = client.get('/api/inventario/reconciliacion',
+                          headers={'Authorization': f'Bearer {token_vendedor}'})
+    assert response.status_code == 403
+
+    response = client.get('/api/inventario/reconciliacion', headers=auth_headers)
+    assert response.get_json()['data']['total'] == 1
+
+    response = client.post('/api/inventario/reconciliacion/reparar', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data']['productos_corregidos'] == 1
+
+
+def test_cli_reconciliar(app, runner, productos):
+    """Test: flask stock reconciliar reporta y --reparar corrige"""
+    con_lotes, _ = productos
+    with app.app_context():
+        _descuadrar(con_lotes, 31)
+
+    resultado = runner.invoke(args=['stock', 'reconciliar'])
+    assert '1 productos descuadrados' in resultado.output
+
+    resultado = runner.invoke(args=['stock', 'reconciliar', '--reparar'])
+    assert '1 productos corregidos' in resultado.output
+
+    with app.app_context():
+        assert stock_service.detectar_descuadres() == []
+
+
+def test_stock_al_desde_snapshot(app, productos):
+    """Test: stock_al desde el último corte coincide con recorrer todo el historial"""
+    con_lotes, _ = productos
+    with app.app_context():
+        admin = User(username='admin', email='admin@katita.com', nombre_completo='Admin', rol='admin')
+        admin.set_password('Admin123')
+        db.session.add(admin)
+        db.session.commit()
+
+        hace = lambda dias: datetime.now() - timedelta(days=dias)
+        lote_a, lote_b = Lote.query.order_by(Lote.codigo_lote).all()
+        db.session.add_all([
+            MovimientoStock(tipo='ingreso_inicial', producto_id=con_lotes, lote_id=lote_a.id,
+                            usuario_id=admin.id, cantidad=20, stock_anterior=0, stock_nuevo=20,
+                            created_at=hace(3)),
+            MovimientoStock(tipo='ingreso_inicial', producto_id=con_lotes, lote_id=lote_b.id,
+                            usuario_id=admin.id, cantidad=10, stock_anterior=20, stock_nuevo=30,
+                            created_at=hace(3)),
+        ])
+        db.session.commit()
+
+        sin_corte = stock_service.stock_al(date.today())
+        assert sin_corte['corte_base'] is None
+        assert sin_corte['total_unidades'] == 30
+
+        resultado = stock_service.tomar_snapshot(corte=hace(2))
+        assert resultado == {'corte': resultado['corte'], 'lotes': 2, 'productos': 1}
+
+        # Venta posterior al corte
+        db.session.add(MovimientoStock(tipo='venta', producto_id=con_lotes, lote_id=lote_a.id,
+                                       usuario_id=admin.id, cantidad=-5, stock_anterior=30,
+                                       stock_nuevo=25, created_at=hace(1)))
+        db.session.commit()
+
+        con_corte = stock_service.stock_al(date.today(), por_lote=True)
+        assert con_corte['movimientos_aplicados'] == 1
+        assert {i['lote_id']: i['cantidad'] for i in con_corte['items']} == {lote_a.id: 15, lote_b.id: 10}
+        assert con_corte['valor_total'] == '50.00'
+
+        # Antes del corte se recorre el historial; después se parte del corte
+        assert stock_service.stock_al(date.today() - timedelta(days=3))['total_unidades'] == 30
+        SnapshotStock.query.delete()
+        db.session.commit()
+        historial = stock_service.stock_al(date.today(), por_lote=True)
+        assert historial['items'] == con_corte['items']
+        assert historial['movimientos_aplicados'] == 3
+
+
+def test_stock_al_por_lote_con_movimientos_sin_lote(app, productos):
+    """Test: Por lote, los movimientos sin lote se informan aparte (lote_id None) sin romper el orden"""
+    con_lotes, sin_lotes = productos
+    with app.app_context():
+        admin = User(username='admin', email='admin@katita.com', nombre_completo='Admin', rol='admin')
+        admin.set_password('Admin123')
+        db.session.add(admin)
+        db.session.commit()
+
+        lote_a = Lote.query.filter_by(codigo_lote='LOTE-A').first()
+        ayer = datetime.now() - timedelta(days=1)
+        db.session.add_all([
+            MovimientoStock(tipo='ingreso_inicial', producto_id=con_lotes, lote_id=None, usuario_id=admin.id,
+                            cantidad=4, stock_anterior=0, stock_nuevo=4, created_at=ayer),
+            MovimientoStock(tipo='ingreso_inicial', producto_id=con_lotes, lote_id=lote_a.id, usuario_id=admin.id,
+                            cantidad=20, stock_anterior=4, stock_nuevo=24, created_at=ayer),
+            MovimientoStock(tipo='ingreso_inicial', producto_id=sin_lotes, lote_id=None, usuario_id=admin.id,
+                            cantidad=3, stock_anterior=0, stock_nuevo=3, created_at=ayer),
+        ])
+        db.session.commit()
+
+        resultado = stock_service.stock_al(date.today(), por_lote=True)
+
+        assert [(i['producto_id'], i['lote_id'], i['cantidad']) for i in resultado['items']] == [
+            (con_lotes, lote_a.id, 20), (con_lotes, None, 4), (sin_lotes, None, 3)
+        ]
+        assert resultado['total_unidades'] == 27
+
+
+@pytest.mark.parametrize('auth_headers', ['admin'], indirect=True)
+def test_endpoints_snapshots(client, app, productos, runner, auth_headers):
+    """Test: Corte por CLI y API, listado y consulta de stock a una fecha"""
+    resultado = runner.invoke(args=['stock', 'snapshot'])
+    assert '1 productos, 2 lotes' in resultado.output
+
+    headers = auth_headers
+    response = client.get('/api/inventario/snapshots', headers=headers)
+    cortes = response.get_json()['data']
+    assert len(cortes) == 1 and cortes[0]['unidades'] == 30
+
+    response = client.get(f'/api/inventario/stock-al?fecha={date.today().isoformat()}', headers=headers)
+    data = response.get_json()['data']
+    assert data['total_unidades'] == 30
+    assert data['valor_total'] == '60.00'
+
+    response = client.get('/api/inventario/stock-al?fecha=ayer', headers=headers)
+    assert response.status_code == 400
+
+
+def test_corte_con_la_zona_de_los_movimientos(app, productos):
+    """Test: El corte se escribe con zona horaria, igual que MovimientoStock.created_at"""
+    con_lotes, _ = productos
+    with app.app_context():
+        admin = User(username='admin', email='admin@katita.com', nombre_completo='Admin', rol='admin')
+        admin.set_password('Admin123')
+        db.session.add(admin)
+        db.session.commit()
+
+        corte = stock_service.tomar_snapshot()['corte']
+        assert corte.utcoffset() == timedelta(hours=-5)
+
+        lote = Lote.query.filter_by(codigo_lote='LOTE-A').first()
+        db.session.add(MovimientoStock(tipo='venta', producto_id=con_lotes, lote_id=lote.id,
+                                       usuario_id=admin.id, cantidad=-2, stock_anterior=30,
+                                       stock_nuevo=28))
+        db.session.commit()
+
+        resultado = stock_service.stock_al(date.today())
+        assert resultado['movimientos_aplicados'] == 1
+        assert resultado['total_unidades'] == 28
@@ -822,6 +822,49 @@ def test_limpiar_procesados(app):
         assert len(todos) == 2
 
 
+def test_limpiar_procesados_en_bloques(app):
+    """Test de limpieza en bloques y retención de fallidos"""
+    with app.app_context():
+        from app import db
+
+        hace_40_dias = datetime.now(timezone.utc) - timedelta(days=40)
+
+        procesados = [
+            SyncQueue(tabla='products', operacion='update', registro_id=i + 1,
+                      data=json.dumps({'id': i + 1}), procesado=True)
+            for i in range(5)
+        ]
+        fallido = SyncQueue(tabla='lotes', operacion='update', registro_id=9,
+                            data=json.dumps({'id': 9}), intentos=5, max_intentos=5)
+        db.session.add_all(procesados + [fallido])
+        db.session.flush()
+
+        for sync in procesados:
+            sync.procesado_at = hace_40_dias
+        fallido.updated_at = hace_40_dias
+        db.session.commit()
+
+        # Sin política de fallidos: solo se eliminan los procesados (3 bloques de 2)
+        assert SyncQueue.limpiar_procesados(dias=30, tamano_bloque=2) == 5
+        assert SyncQueue.query.count() == 1
+
+        assert SyncQueue.limpiar_procesados(dias=30, tamano_bloque=2, dias_fallidos=30) == 1
+        assert SyncQueue.query.count() == 0
+
+
+def test_indice_parcial_pendientes(app):
+    """Test de que el índice de pendientes es parcial"""
+    with app.app_context():
+        from app import db
+        from sqlalchemy import text
+
+        sql = db.session.execute(text(
+            "SELECT sql FROM sqlite_master WHERE name = 'ix_sync_pendientes'"
+        )).scalar()
+
+        assert 'WHERE' in sql
+
+
 def test_estadisticas(app):
     """Test de método estadisticas"""
     with app.app_context():
@@ -0,0 +1,273 @@
+"""
+KATITA-POS - Sync Service Tests
+===============================
+Tests para el worker que vacía la cola de sincronización y la captura de cambios
+"""
+
+import json
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.models.sync_queue import SyncQueue
+from app.services import sync_service, stock_service
+
+
+@pytest.fixture
+def remoto(app):
+    """Fixture: Remoto local en memoria y métricas en cero"""
+    remoto = sync_service.RemotoLocal()
+    sync_service.configurar_remoto(app, remoto)
+    sync_service.reiniciar_metricas()
+    return remoto
+
+
+def _encolar(cantidad):
+    registros = [
+        SyncQueue(tabla='products', operacion='update', registro_id=i + 1,
+                  data=json.dumps({'stock_total': i}))
+        for i in range(cantidad)
+    ]
+    db.session.add_all(registros)
+    db.session.commit()
+    return [r.id for r in registros]
+
+
+def test_vaciar_cola_en_lotes(app, remoto):
+    """Test: La cola se vacía en lotes y los aceptados quedan procesados"""
+    with app.app_context():
+        ids = _encolar(5)
+
+        totales = sync_service.vaciar_cola(tamano=2)
+
+        assert totales == {'lotes': 3, 'enviados': 5, 'rechazados': 0, 'agotados': 0}
+        assert [c['id'] for c in remoto.recibidos] == ids
+        assert SyncQueue.query.filter_by(procesado=False).count() == 0
+        assert SyncQueue.query.filter(SyncQueue.lease_owner.isnot(None)).count() == 0
+        assert sync_service.obtener_metricas()['enviados'] == 5
+
+
+def test_lease_evita_doble_reclamo(app, remoto):
+    """Test: Un registro con lease vigente no lo reclama otro worker"""
+    with app.app_context():
+        _encolar(3)
+
+        primero = sync_service.reclamar_lote('worker-a', tamano=2)
+        segundo = sync_service.reclamar_lote('worker-b', tamano=10)
+
+        assert len(primero) == 2
+        assert len(segundo) == 1
+        assert not {f.id for f in primero} & {f.id for f in segundo}
+
+        # Lease vencido: el registro vuelve a estar disponible
+        SyncQueue.query.filter_by(lease_owner='worker-a').update(
+            {'lease_hasta': sync_service._ahora() - timedelta(seconds=1)}
+        )
+        db.session.commit()
+        assert len(sync_service.reclamar_lote('worker-c', tamano=10)) == 2
+
+
+def test_backoff_y_remoto_caido(app, remoto):
+    """Test: Los rechazos incrementan intentos; las caídas solo reprograman el reintento"""
+    with app.app_context():
+        rechazado, aceptado = _encolar(2)
+        remoto.rechazar.add(rechazado)
+
+        resultado = sync_service.procesar_lote()
+        assert resultado['enviados'] == 1 and resultado['rechazados'] == 1
+
+        registro = db.session.get(SyncQueue, rechazado)
+        assert registro.intentos == 1
+        assert registro.siguiente_intento > sync_service._ahora()
+        assert registro.error_mensaje == 'Rechazado por el remoto'
+        assert db.session.get(SyncQueue, aceptado).procesado is True
+
+        # En backoff: no se reclama hasta que venza siguiente_intento
+        assert sync_service.procesar_lote()['reclamados'] == 0
+
+        registro.siguiente_intento = sync_service._ahora() - timedelta(seconds=1)
+        db.session.commit()
+        remoto.disponible = False
+        resultado = sync_service.procesar_lote()
+        assert resultado['remoto_disponible'] is False
+
+        db.session.refresh(registro)
+        assert registro.intentos == 1
+        assert registro.error_mensaje == 'Rechazado por el remoto'
+        assert registro.lease_owner is None
+        assert registro.siguiente_intento > sync_service._ahora()
+        assert sync_service.obtener_metricas()['remoto_no_disponible'] == 1
+
+
+def test_caidas_prolongadas_no_agotan_la_cola(app, remoto):
+    """Test: Muchas caídas seguidas del remoto no consumen intentos; al volver se envía todo"""
+    with app.app_context():
+        ids = _encolar(3)
+        remoto.disponible = False
+
+        for _ in range(10):
+            resultado = sync_service.procesar_lote()
+            assert resultado['reclamados'] == 3 and resultado['remoto_disponible'] is False
+            # Saltar el backoff para simular que pasó el tiempo
+            SyncQueue.query.update({'siguiente_intento': sync_service._ahora() - timedelta(seconds=1)})
+            db.session.commit()
+
+        registros = SyncQueue.query.order_by(SyncQueue.id).all()
+        assert all(r.intentos == 0 and r.error_mensaje is None and r.lease_owner is None for r in registros)
+        assert sync_service.obtener_metricas()['caidas_consecutivas'] == 10
+
+        remoto.disponible = True
+        assert sync_service.vaciar_cola()['enviados'] == 3
+        assert [c['id'] for c in remoto.recibidos] == ids
+        assert sync_service.obtener_metricas()['caidas_consecutivas'] == 0
+
+
+def test_calcular_espera():
+    """Test: Backoff exponencial con tope"""
+    assert 24 <= sync_service.calcular_espera(1, 30, 3600) <= 30
+    assert 96 <= sync_service.calcular_espera(3, 30, 3600) <= 120
+    assert sync_service.calcular_espera(20, 30, 3600) <= 3600
+
+
+@pytest.mark.parametrize('auth_headers', ['admin'], indirect=True)
+def test_cli_y_endpoint(client, app, runner, remoto, auth_headers):
+    """Test: flask sync run --una-vez y métricas por API"""
+    with app.app_context():
+        _encolar(3)
+
+    resultado = runner.invoke(args=['sync', 'run', '--una-vez'])
+    assert '3 enviados' in resultado.output
+
+    response = client.get('/api/sistema/sync', headers=auth_headers)
+    data = response.get_json()['data']
+    assert data['enviados'] == 3
+    assert data['cola']['pendientes'] == 0
+
+
+@pytest.fixture
+def captura(app):
+    """Fixture: Activa la captura de cambios hacia SyncQueue"""
+    app.config['SYNC_CAPTURE'] = True
+    yield
+    app.config['SYNC_CAPTURE'] = False
+
+
+def _pendientes(tabla):
+    return SyncQueue.query.filter_by(tabla=tabla, procesado=False).order_by(SyncQueue.id).all()
+
+
+def test_captura_fusiona_actualizaciones(app, remoto, captura):
+    """Test: Muchas actualizaciones del mismo lote dejan una sola fila pendiente"""
+    with app.app_context():
+        producto = Product(codigo_barras='7750182001878', nombre='Coca Cola 500ml', categoria='Bebidas',
+                           precio_compra=Decimal('2.00'), precio_venta=Decimal('3.50'))
+        db.session.add(producto)
+        db.session.flush()
+        lote = Lote(producto_id=producto.id, codigo_lote='LOTE-A', cantidad_inicial=20,
+                    fecha_vencimiento=date.today() + timedelta(days=30),
+                    precio_compra_lote=Decimal('2.00'))
+        db.session.add(lote)
+        db.session.commit()
+
+        for _ in range(5):
+            lote.cantidad_actual -= 1
+            db.session.commit()
+
+        pendientes = _pendientes('lotes')
+        assert len(pendientes) == 1
+        assert pendientes[0].operacion == 'insert'
+        assert pendientes[0].get_data()['cantidad_actual'] == 15
+
+        sync_service.vaciar_cola()
+        assert {c['tabla'] for c in remoto.recibidos} == {'products', 'lotes'}
+
+        # Ya enviado: el siguiente cambio abre una nueva fila 'update'
+        lote.cantidad_actual -= 1
+        db.session.commit()
+        lote.cantidad_actual -= 1
+        db.session.commit()
+        pendientes = _pendientes('lotes')
+        assert [p.operacion for p in pendientes] == ['update']
+        assert pendientes[0].get_data()['cantidad_actual'] == 13
+
+        # En vuelo (con lease) no se fusiona
+        sync_service.reclamar_lote('worker-a')
+        lote.cantidad_actual -= 1
+        db.session.commit()
+        assert len(_pendientes('lotes')) == 2
+
+
+def test_captura_insert_y_delete_se_anulan(app, remoto, captura):
+    """Test: Un registro creado y eliminado antes de sincronizar no se envía"""
+    with app.app_context():
+        producto = Product(codigo_barras='7755139002015', nombre='Inca Kola 500ml', categoria='Bebidas',
+                           precio_compra=Decimal('2.00'), precio_venta=Decimal('3.20'))
+        db.session.add(producto)
+        db.session.commit()
+        assert len(_pendientes('products')) == 1
+
+        db.session.delete(producto)
+        db.session.commit()
+        assert _pendientes('products') == []
+
+
+def test_captura_escrituras_masivas(app, remoto, captura):
+    """Test: Los UPDATE set-based se encolan con registrar_cambios"""
+    with app.app_context():
+        producto = Product(codigo_barras='7751271001234', nombre='Galleta Soda', categoria='Snacks',
+                           precio_compra=Decimal('0.50'), precio_venta=Decimal('1.00'), stock_total=9)
+        db.session.add(producto)
+        db.session.commit()
+        sync_service.vaciar_cola()
+
+        stock_service.reparar_descuadres()
+
+        pendientes = _pendientes('products')
+        assert len(pendientes) == 1
+        assert pendientes[0].get_data()['stock_total'] == 0
+
+
+class _ConexionConCarrera:
+    """Conexión que simula un worker reclamando la cola justo después de la consulta de pendientes"""
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.consultas = 0
+
+    def execute(self, sentencia, *args):
+        resultado = self.conexion.execute(sentencia, *args)
+        if self.consultas == 0 and getattr(sentencia, 'is_select', False):
+            self.consultas += 1
+            congelado = resultado.freeze()
+            SyncQueue.query.update({'lease_owner': 'worker-b'})
+            return congelado()
+        return resultado
+
+
+def test_fila_reclamada_durante_la_captura_no_pierde_el_cambio(app, remoto):
+    """Test: Si un worker reclama la fila pendiente antes del UPDATE, el cambio va en una fila nueva"""
+    with app.app_context():
+        actualizar, borrar = _encolar(2)
+
+        cambios = [('products', 'update', 1, {'stock_total': 99}), ('products', 'delete', 2, {'id': 2})]
+        sync_service._encolar(_ConexionConCarrera(db.session.connection()), cambios)
+        db.session.commit()
+
+        en_vuelo = {r.id: r for r in SyncQueue.query.filter_by(lease_owner='worker-b')}
+        assert set(en_vuelo) == {actualizar, borrar}
+        assert en_vuelo[actualizar].get_data() == {'stock_total': 0}
+
+        nuevas = SyncQueue.query.filter(SyncQueue.lease_owner.is_(None)).order_by(SyncQueue.registro_id).all()
+        assert [(r.registro_id, r.operacion) for r in nuevas] == [(1, 'update'), (2, 'delete')]
+        assert nuevas[0].get_data() == {'stock_total': 99}
+
+
+def test_remoto_sin_enviar_no_se_instancia():
+    """Test: Un remoto que no implementa enviar falla al crearse, no en el primer lote"""
+    class RemotoIncompleto(sync_service.RemotoSync):
+        nombre = 'incompleto'
+
+    with pytest.raises(TypeError):
+        RemotoIncompleto()
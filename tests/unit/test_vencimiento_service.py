@@ -0,0 +1,150 @@
+"""
+KATITA-POS - Vencimiento Service Tests
+======================================
+Tests para las alertas de vencimiento agregadas en SQL
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.product import Product
+from app.models.lote import Lote
+from app.services import vencimiento_service
+
+
+@pytest.fixture
+def lotes_por_vencer(app):
+    """Fixture: Cuatro productos con lotes que vencen en 2, 5, 20 y 60 días"""
+    with app.app_context():
+        hoy = date.today()
+        for i, dias in enumerate([20, 2, 5, 60]):
+            producto = Product(codigo_barras=f'775000000000{i}', nombre=f'Producto {i}',
+                               categoria='Abarrotes', precio_compra=Decimal('1.00'),
+                               precio_venta=Decimal('2.00'))
+            db.session.add(producto)
+            db.session.flush()
+            db.session.add_all([
+                Lote(producto_id=producto.id, codigo_lote=f'L{i}-A', cantidad_inicial=10,
+                     fecha_ingreso=datetime.now() - timedelta(days=30),
+                     fecha_vencimiento=hoy + timedelta(days=dias), precio_compra_lote=Decimal('1.00')),
+                Lote(producto_id=producto.id, codigo_lote=f'L{i}-B', cantidad_inicial=4,
+                     fecha_ingreso=datetime.now() - timedelta(days=30),
+                     fecha_vencimiento=hoy + timedelta(days=dias + 1), precio_compra_lote=Decimal('1.00')),
+            ])
+        db.session.commit()
+
+
+def test_alertas_agrupadas_y_ordenadas(app, lotes_por_vencer):
+    """Test: Un grupo por producto, urgencia calculada en SQL y orden por urgencia"""
+    with app.app_context():
+        resultado = vencimiento_service.alertas_vencimiento(30)
+
+        alertas = resultado['alertas']
+        assert resultado['total_productos_afectados'] == 3
+        assert [a['producto']['nombre'] for a in alertas] == ['Producto 1', 'Producto 2', 'Producto 0']
+        assert [a['urgencia'] for a in alertas] == ['alta', 'media', 'baja']
+        assert [a['dias_minimo_vencimiento'] for a in alertas] == [2, 5, 20]
+        assert alertas[0]['cantidad_total_afectada'] == 14
+        assert [l['codigo_lote'] for l in alertas[0]['lotes_proximos']] == ['L1-A', 'L1-B']
+
+
+def test_alertas_paginadas_por_producto(app, lotes_por_vencer):
+    """Test: limit/offset cuentan productos, no lotes; el total es global"""
+    with app.app_context():
+        pagina = vencimiento_service.alertas_vencimiento(30, limit=1, offset=1)
+
+        assert pagina['total_productos_afectados'] == 3
+        assert len(pagina['alertas']) == 1
+        assert pagina['alertas'][0]['producto']['nombre'] == 'Producto 2'
+        assert len(pagina['alertas'][0]['lotes_proximos']) == 2
+
+        fuera = vencimiento_service.alertas_vencimiento(30, limit=10, offset=10)
+        assert fuera['alertas'] == []
+        assert fuera['total_productos_afectados'] == 3
+
+
+def test_endpoint_alertas_umbrales_configurables(client, app, lotes_por_vencer):
+    """Test: Los umbrales de urgencia se leen de la configuración"""
+    app.config['VENCIMIENTO_URGENCIA_ALTA_DIAS'] = 1
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'rol': 'vendedor'})
+
+    response = client.get('/api/lotes/alertas?dias=7',
+                          headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['total_productos_afectados'] == 2
+    assert [a['urgencia'] for a in data['alertas']] == ['media', 'media']
+
+
+@pytest.fixture
+def lotes_vencidos(app):
+    """Fixture: Cinco lotes vencidos de dos proveedores y dos categorías"""
+    with app.app_context():
+        hoy = date.today()
+        leche = Product(codigo_barras='7751000000001', nombre='Leche', categoria='Lacteos',
+                        precio_compra=Decimal('3.00'), precio_venta=Decimal('4.00'))
+        pan = Product(codigo_barras='7751000000002', nombre='Pan', categoria='Panaderia',
+                      precio_compra=Decimal('0.50'), precio_venta=Decimal('1.00'))
+        db.session.add_all([leche, pan])
+        db.session.flush()
+
+        datos = [
+            (leche, 'Gloria', 10, 3, '3.00'), (leche, 'Gloria', 40, 2, '3.00'),
+            (leche, 'Laive', 5, 1, '2.50'), (pan, 'Bimbo', 3, 6, '0.50'),
+            (pan, 'Bimbo', 70, 4, '0.50'),
+        ]
+        for i, (producto, proveedor, dias, cantidad, precio) in enumerate(datos):
+            db.session.add(Lote(
+                producto_id=producto.id, codigo_lote=f'V-{i}', cantidad_inicial=10,
+                cantidad_actual=cantidad, proveedor=proveedor,
+                fecha_ingreso=datetime.now() - timedelta(days=200),
+                fecha_vencimiento=hoy - timedelta(days=dias), precio_compra_lote=Decimal(precio)
+            ))
+        db.session.commit()
+
+
+def test_resumen_vencidos_sobre_todo_el_filtro(app, lotes_vencidos):
+    """Test: Totales y desglose no dependen de la página"""
+    with app.app_context():
+        resumen = vencimiento_service.resumen_vencidos()
+
+        assert resumen['total_lotes'] == 5
+        assert resumen['cantidad_total_afectada'] == 16
+        assert resumen['valor_perdido_estimado'] == '22.50'
+        assert resumen['productos_unicos_afectados'] == 2
+
+        por_proveedor = {d['proveedor']: d for d in resumen['desglose']['por_proveedor']}
+        assert por_proveedor['Gloria']['valor_perdido'] == '15.00'
+        assert por_proveedor['Bimbo']['cantidad_afectada'] == 10
+        por_categoria = {d['categoria']: d for d in resumen['desglose']['por_categoria']}
+        assert por_categoria['Lacteos']['total_lotes'] == 3
+        assert sum(d['total_lotes'] for d in resumen['desglose']['por_mes']) == 5
+
+
+def test_endpoint_vencidos_keyset(client, app, lotes_vencidos):
+    """Test: El reporte trae totales completos y el detalle se recorre con cursor"""
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'rol': 'admin'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    data = client.get('/api/lotes/vencidos?limit=2', headers=headers).get_json()['data']
+    assert len(data['lotes_vencidos']) == 2
+    assert data['total_lotes'] == 5
+    assert data['cantidad_total_afectada'] == 16
+
+    vistos = []
+    url = '/api/lotes/vencidos/lotes?limit=2'
+    while url:
+        pagina = client.get(url, headers=headers).get_json()['data']
+        vistos += [l['codigo_lote'] for l in pagina['lotes']]
+        cursor = pagina['siguiente_cursor']
+        url = f'/api/lotes/vencidos/lotes?limit=2&despues={cursor}' if cursor else None
+
+    assert vistos == ['V-4', 'V-1', 'V-0', 'V-2', 'V-3']
+
+    response = client.get('/api/lotes/vencidos/lotes?despues=ayer', headers=headers)
+    assert response.status_code == 400